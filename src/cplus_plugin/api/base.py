@@ -3,8 +3,6 @@
  Plugin tasks related to the scenario history
 
 """
-import concurrent.futures
-import copy
 import datetime
 from enum import IntEnum
 import json
@@ -13,8 +11,11 @@ import os
 from qgis.PyQt import QtCore
 from qgis.core import QgsTask
 
-from .request import CplusApiRequest
+from .output_placeholders import save_output_placeholders
+from .request import CplusApiRequest, FileDownload
+from ..conf import settings_manager, Settings
 from ..models.base import Scenario, ScenarioResult, NcsPathway, Activity
+from ..utils import log
 
 
 class BaseScenarioTask(QgsTask):
@@ -45,6 +46,26 @@ class BaseFetchScenarioOutput:
         """
         return False
 
+    def on_download_progress(self, downloaded: int, total: int):
+        """Callback with the progress of the output downloads.
+
+        This method should be overriden by child class.
+        :param downloaded: downloaded bytes
+        :type downloaded: int
+
+        :param total: total size of the outputs whose size is known
+        :type total: int
+        """
+        pass
+
+    def on_output_downloaded(self, download: FileDownload):
+        """Callback when an output file has been downloaded.
+
+        :param download: downloaded output file
+        :type download: FileDownload
+        """
+        self.downloaded_output += 1
+
     def __create_activity(self, activity: dict, download_dict: list):
         """
         Create activity object from activity and downloaded file dictionary.
@@ -136,10 +157,19 @@ class BaseFetchScenarioOutput:
         return len(invalid_indexes) == 0, invalid_indexes
 
     def fetch_scenario_output(
-        self, original_scenario, scenario_detail, output_list, scenario_directory
+        self,
+        original_scenario,
+        scenario_detail,
+        output_list,
+        scenario_directory,
+        server_uuid=None,
     ):
         """Fetch scenario outputs from API.
 
+        When lazy downloads are enabled only the final output is downloaded,
+        the other outputs are registered as placeholders that are downloaded
+        when they are first needed.
+
         :param original_scenario: Original scenario
         :type original_scenario: Scenario
 
@@ -151,14 +181,22 @@ class BaseFetchScenarioOutput:
 
         :param scenario_directory: dictionary that contains outputs from API
         :type scenario_directory: dict
+
+        :param server_uuid: UUID of the scenario in the server, defaults to
+        the server UUID of the original scenario
+        :type server_uuid: str
         """
         if not scenario_detail:
             return None, None
+        lazy_download = settings_manager.get_value(
+            Settings.LAZY_ONLINE_OUTPUTS, default=False, setting_type=bool
+        )
         self.total_file_output = len(output_list["results"])
         self.downloaded_output = 0
 
-        urls_to_download = []
+        downloads = []
         download_paths = []
+        placeholders = {}
         final_output = None
         for output in output_list["results"]:
             if output["is_final_output"]:
@@ -170,32 +208,43 @@ class BaseFetchScenarioOutput:
                 download_path = os.path.join(
                     scenario_directory, output["group"], output["filename"]
                 )
-            urls_to_download.append(output["url"])
             download_paths.append(download_path)
+            if lazy_download and not output["is_final_output"]:
+                placeholders[download_path] = output
+                continue
+            # The ranges of the final output are requested first, the scenario
+            # layers are still only loaded once all the downloads have finished
+            downloads.append(
+                FileDownload(
+                    url=output["url"],
+                    file_path=download_path,
+                    expected_size=output.get("size"),
+                    priority=1 if output["is_final_output"] else 0,
+                )
+            )
+
+        if len(placeholders) > 0:
+            self.total_file_output = len(downloads)
+            save_output_placeholders(
+                scenario_directory,
+                server_uuid or original_scenario.server_uuid,
+                placeholders,
+            )
+
+        self.request.download_files(
+            downloads,
+            on_download_progress=self.on_download_progress,
+            on_file_downloaded=self.on_output_downloaded,
+            is_cancelled=self.is_download_cancelled,
+        )
+        if self.is_download_cancelled():
+            return None, None
+        for download in downloads:
+            if download.error:
+                log(download.error, info=False)
 
-        download_paths_copy = copy.deepcopy(download_paths)
-
-        # configure max number of iteration
-        max_iteration = len(download_paths_copy * 2)
-        iteration = 0
-        while len(urls_to_download) > 0:
-            with concurrent.futures.ThreadPoolExecutor(
-                max_workers=3 if os.cpu_count() > 3 else 1
-            ) as executor:
-                executor.map(self.download_file, urls_to_download, download_paths_copy)
-            if self.is_download_cancelled():
-                return None, None
-            is_valid, invalid_indexes = self.__validate_output_paths(download_paths)
-            if len(invalid_indexes) <= len(urls_to_download):
-                urls_to_download = [urls_to_download[idx] for idx in invalid_indexes]
-                download_paths_copy = [
-                    download_paths_copy[idx] for idx in invalid_indexes
-                ]
-            if iteration == max_iteration:
-                break
-            iteration += 1
-
-        if not self.__validate_output_paths(download_paths):
+        downloaded_paths = [download.file_path for download in downloads]
+        if not self.__validate_output_paths(downloaded_paths)[0]:
             return None, None
         scenario = self.__create_scenario(
             original_scenario, scenario_detail, output_list, download_paths
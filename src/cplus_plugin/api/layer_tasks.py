@@ -21,7 +21,7 @@ from ..utils import (
     get_layer_type,
     convert_size,
 )
-from .request import CplusApiRequest
+from .request import CplusApiRequest, UploadPart, create_upload_parts
 
 
 class FetchDefaultLayerTask(QgsTask):
@@ -195,45 +195,33 @@ class CreateUpdateDefaultLayerTask(QgsTask):
             "name": os.path.basename(tmp_file),
             "upload_id": self.upload_id,
             "path": tmp_file,
+            "parts": [],
         }
         settings_manager.save_layer_mapping(temp_layer)
 
-        # do upload by chunks
-        self.upload_items = []
-        with open(tmp_file, "rb") as f:
-            idx = 0
-            while True:
-                if self.upload_cancelled:
-                    break
-                chunk = f.read(self.chunk_size)
-                if not chunk:
-                    break
-                url_item = upload_urls[idx]
-                part_item = self.request.upload_file_part(
-                    url_item["url"], chunk, url_item["part_number"]
-                )
-                if part_item:
-                    self.upload_items.append(part_item)
-                else:
-                    raise Exception(
-                        f"""
-                        Error while uploading {self.file_path}
-                        """
-                    )
-                self.uploaded_chunks += 1
-                self._update_upload_status(
-                    {
-                        "progress_text": "Uploading layers",
-                        "progress": int(
-                            (self.uploaded_chunks / self.total_file_upload_chunks) * 100
-                        ),
-                    }
-                )
-                idx += 1
-                self.progress = int(
-                    (self.uploaded_chunks / self.total_file_upload_chunks) * 100
-                )
-                self.setProgress(self.progress)
+        def on_part_uploaded(part: UploadPart, part_item: dict):
+            # persist the uploaded parts with the layer mapping
+            temp_layer["parts"].append(part_item)
+            settings_manager.save_layer_mapping(temp_layer)
+            self.uploaded_chunks += 1
+            self.progress = int(
+                (self.uploaded_chunks / self.total_file_upload_chunks) * 100
+            )
+            self._update_upload_status(
+                {"progress_text": "Uploading layers", "progress": self.progress}
+            )
+            self.setProgress(self.progress)
+
+        # upload the chunks concurrently
+        parts = create_upload_parts(tmp_file, upload_urls, self.chunk_size)
+        self.request.upload_parts(
+            parts,
+            on_part_uploaded,
+            is_cancelled=lambda: self.upload_cancelled,
+        )
+        self.upload_items = sorted(
+            temp_layer["parts"], key=lambda item: item["part_number"]
+        )
 
         # finish upload
         result = {"uuid": None}
@@ -0,0 +1,179 @@
+# coding=utf-8
+"""
+ Placeholders of the online scenario outputs that are downloaded on demand
+
+"""
+import json
+import os
+import typing
+
+from .request import CplusApiRequest, FileDownload
+from ..utils import log
+
+
+OUTPUT_PLACEHOLDERS_FILE_NAME = "online_outputs.json"
+
+
+def _placeholders_path(scenario_directory: str) -> str:
+    return os.path.join(scenario_directory, OUTPUT_PLACEHOLDERS_FILE_NAME)
+
+
+def _read_placeholders(scenario_directory: str) -> dict:
+    """Reads the placeholders of a scenario directory.
+
+    :param scenario_directory: Scenario output directory
+    :type scenario_directory: str
+
+    :returns: Server scenario UUID and the outputs keyed by their path
+    relative to the scenario directory.
+    :rtype: dict
+    """
+    path = _placeholders_path(scenario_directory)
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path, "r") as placeholders_file:
+            return json.load(placeholders_file)
+    except (OSError, ValueError) as e:
+        log(f"Unable to read the online output placeholders, {e}", info=False)
+
+    return {}
+
+
+def save_output_placeholders(
+    scenario_directory: str, server_uuid: str, outputs: typing.Dict[str, dict]
+):
+    """Registers outputs that are in the server but have not been
+    downloaded.
+
+    :param scenario_directory: Scenario output directory
+    :type scenario_directory: str
+
+    :param server_uuid: UUID of the scenario in the server
+    :type server_uuid: str
+
+    :param outputs: Outputs from the output list API keyed by the local path
+    :type outputs: dict
+    """
+    placeholders = {
+        os.path.relpath(path, scenario_directory): {
+            "filename": output["filename"],
+            "group": output.get("group"),
+            "size": output.get("size"),
+        }
+        for path, output in outputs.items()
+    }
+
+    if not os.path.exists(scenario_directory):
+        os.makedirs(scenario_directory, exist_ok=True)
+    try:
+        with open(_placeholders_path(scenario_directory), "w") as placeholders_file:
+            json.dump(
+                {"scenario_uuid": str(server_uuid), "outputs": placeholders},
+                placeholders_file,
+            )
+    except OSError as e:
+        log(f"Unable to save the online output placeholders, {e}", info=False)
+
+
+def missing_output_paths(
+    scenario_directory: str, paths: typing.List[str]
+) -> typing.List[str]:
+    """Gets the paths that are placeholders of outputs not yet downloaded.
+
+    :param scenario_directory: Scenario output directory
+    :type scenario_directory: str
+
+    :param paths: Output paths to check
+    :type paths: list
+
+    :returns: Paths that can be downloaded on demand.
+    :rtype: list
+    """
+    if not scenario_directory:
+        return []
+
+    outputs = _read_placeholders(scenario_directory).get("outputs", {})
+    if len(outputs) == 0:
+        return []
+
+    missing_paths = []
+    for path in paths:
+        if not path or os.path.exists(path):
+            continue
+        relative_path = os.path.relpath(path, scenario_directory)
+        if relative_path in outputs and path not in missing_paths:
+            missing_paths.append(path)
+
+    return missing_paths
+
+
+def fetch_placeholder_outputs(
+    scenario_directory: str,
+    paths: typing.List[str],
+    request: CplusApiRequest = None,
+    on_download_progress: typing.Callable[[int, int], None] = None,
+    is_cancelled: typing.Callable[[], bool] = None,
+) -> typing.List[str]:
+    """Downloads the outputs of placeholders. The download URLs are
+    requested again since the ones in the output list expire.
+
+    :param scenario_directory: Scenario output directory
+    :type scenario_directory: str
+
+    :param paths: Paths of the outputs to download
+    :type paths: list
+
+    :param request: API request object, a new one is created if not given
+    :type request: CplusApiRequest
+
+    :param on_download_progress: Callback with the downloaded bytes and the
+    total size of the outputs
+    :type on_download_progress: typing.Callable
+
+    :param is_cancelled: Function that returns True when the downloads
+    should be cancelled
+    :type is_cancelled: typing.Callable
+
+    :returns: Paths of the downloaded outputs.
+    :rtype: list
+    """
+    missing_paths = missing_output_paths(scenario_directory, paths)
+    if len(missing_paths) == 0:
+        return []
+
+    placeholders = _read_placeholders(scenario_directory)
+    outputs = placeholders.get("outputs", {})
+    request = request or CplusApiRequest()
+    output_list = request.fetch_scenario_output_list(placeholders["scenario_uuid"])
+    output_urls = {
+        (output["filename"], output.get("group")): output["url"]
+        for output in output_list.get("results", [])
+    }
+
+    downloads = []
+    for path in missing_paths:
+        output = outputs[os.path.relpath(path, scenario_directory)]
+        url = output_urls.get((output["filename"], output["group"]))
+        if url is None:
+            log(f"Output {output['filename']} is no longer in the server", info=False)
+            continue
+        downloads.append(
+            FileDownload(url=url, file_path=path, expected_size=output["size"])
+        )
+
+    request.download_files(
+        downloads,
+        on_download_progress=on_download_progress,
+        is_cancelled=is_cancelled,
+    )
+
+    downloaded_paths = []
+    for download in downloads:
+        if download.downloaded:
+            downloaded_paths.append(download.file_path)
+        else:
+            log(download.error, info=False)
+
+    return downloaded_paths
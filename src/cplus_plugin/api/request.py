@@ -1,20 +1,20 @@
+import dataclasses
 import datetime
+import functools
 import io
 import json
 import math
+import mmap
 import os
+import random
+import threading
 import time
 import typing
 import uuid
 
-from qgis import processing
 from qgis.PyQt import QtCore
 from qgis.PyQt.QtNetwork import QNetworkRequest, QNetworkReply
-from qgis.core import (
-    QgsNetworkAccessManager,
-    QgsNetworkReplyContent,
-    QgsProcessingFeedback,
-)
+from qgis.core import QgsNetworkAccessManager, QgsNetworkReplyContent
 
 from ..models.base import Scenario, SpatialExtent, Activity
 from ..conf import settings_manager, Settings
@@ -28,6 +28,13 @@ JOB_CANCELLED_STATUS = "Cancelled"
 JOB_RUNNING_STATUS = "Running"
 JOB_STOPPED_STATUS = "Stopped"
 CHUNK_SIZE = 100 * 1024 * 1024
+# Seconds without any data transfer before a request is aborted
+DEFAULT_REQUEST_TIMEOUT = 60
+# Matches the number of connections Qt keeps alive for each host
+DEFAULT_MAX_CONCURRENT_REQUESTS = 6
+# Size of the byte ranges of a file that are downloaded concurrently
+DOWNLOAD_SEGMENT_SIZE = 16 * 1024 * 1024
+PARTIAL_DOWNLOAD_SUFFIX = ".part"
 
 
 def debug_log(message: str, data: dict = {}):
@@ -65,10 +72,20 @@ class CplusApiRequestError(Exception):
 
 
 class CplusApiPooling:
-    """Fetch/Post url with pooling."""
+    """Fetch/Post url with pooling.
 
-    DEFAULT_LIMIT = 3600  # Check result maximum 3600 times
+    The interval between the checks adapts to the job activity, it is
+    increased while the status and progress are unchanged and reset when they
+    change. A random jitter is added so that several clients do not poll the
+    server in lockstep.
+    """
+
+    DEFAULT_LIMIT = -1  # Unlimited number of checks, see DEFAULT_TIMEOUT
+    DEFAULT_TIMEOUT = 3600  # Check result for maximum 3600 seconds
     DEFAULT_INTERVAL = 1  # Interval of check results
+    DEFAULT_MAX_INTERVAL = 30  # Maximum interval when the job is idle
+    BACKOFF_FACTOR = 1.5  # Interval multiplier when the job is idle
+    JITTER = 0.2  # Fraction of the interval randomly added or removed
     FINAL_STATUS_LIST = [JOB_COMPLETED_STATUS, JOB_CANCELLED_STATUS, JOB_STOPPED_STATUS]
 
     def __init__(
@@ -81,6 +98,9 @@ class CplusApiPooling:
         max_limit=None,
         interval=None,
         on_response_fetched=None,
+        max_interval=None,
+        scenario_uuid=None,
+        timeout=None,
     ):
         """Create Cplus API Pooling for fetching status.
 
@@ -99,14 +119,27 @@ class CplusApiPooling:
         :param data: payload for POST method, defaults to None
         :type data: dict, optional
 
-        :param max_limit: maximum retries when pooling, defaults to None
+        :param max_limit: maximum retries when pooling, defaults to
+            an unlimited number of retries
         :type max_limit: int, optional
 
-        :param interval: interval for pooling, defaults to None
+        :param interval: minimum interval for pooling, defaults to None
         :type interval: int, optional
 
         :param on_response_fetched: callback when response is fetched, defaults to None
         :type on_response_fetched: any, optional
+
+        :param max_interval: maximum interval for pooling, defaults to the
+            saved setting
+        :type max_interval: int, optional
+
+        :param scenario_uuid: UUID of the scenario whose status is pooled,
+            the status is then fetched by the shared scenario status poller
+        :type scenario_uuid: str, optional
+
+        :param timeout: maximum time in seconds spent pooling, measured from
+            the first check, defaults to one hour
+        :type timeout: int, optional
         """
         self.context = context
         self.url = url
@@ -115,9 +148,36 @@ class CplusApiPooling:
         self.method = method
         self.data = data
         self.limit = max_limit or self.DEFAULT_LIMIT
+        self.timeout = timeout or self.DEFAULT_TIMEOUT
+        self.started = None
         self.interval = interval or self.DEFAULT_INTERVAL
+        self.max_interval = max(
+            self.interval, max_interval or self._max_interval_setting()
+        )
         self.on_response_fetched = on_response_fetched
+        self.scenario_uuid = str(scenario_uuid) if scenario_uuid else None
         self.cancelled = False
+        self.current_interval = self.interval
+        self.next_check = 0
+        self.latest_response = None
+        self._last_activity = None
+
+    def _max_interval_setting(self) -> float:
+        """Gets the maximum pooling interval from the settings.
+
+        :return: maximum interval in seconds
+        :rtype: float
+        """
+        try:
+            max_interval = float(
+                settings_manager.get_value(
+                    Settings.API_STATUS_MAX_INTERVAL,
+                    default=self.DEFAULT_MAX_INTERVAL,
+                )
+            )
+        except (TypeError, ValueError):
+            max_interval = self.DEFAULT_MAX_INTERVAL
+        return max_interval if max_interval > 0 else self.DEFAULT_MAX_INTERVAL
 
     def __call_api(self) -> typing.Tuple[dict, int]:
         """Trigger the api call to fetch the status.
@@ -129,35 +189,271 @@ class CplusApiPooling:
             return self.context.get(self.url)
         return self.context.post(self.url, self.data)
 
+    def check_limit(self):
+        """Counts a status check against the maximum number of checks and
+        the maximum time spent pooling. The time is measured, rather than
+        derived from the number of checks, as the interval between the
+        checks grows while the job is idle.
+
+        :raises CplusApiRequestError: raises when max limit or timeout
+            is reached.
+        """
+        now = time.monotonic()
+        if self.started is None:
+            self.started = now
+        if self.timeout != -1 and now - self.started >= self.timeout:
+            raise CplusApiRequestError("Request Timeout when fetching status!")
+        if self.limit != -1 and self.current_repeat >= self.limit:
+            raise CplusApiRequestError("Request Timeout when fetching status!")
+        self.current_repeat += 1
+
+    def update_interval(self, response: typing.Optional[dict]):
+        """Adapts the interval to the job activity.
+
+        :param response: fetched response, None if the check failed
+        :type response: dict
+        """
+        activity = None
+        if response is not None:
+            activity = (
+                response.get("status"),
+                response.get("progress"),
+                response.get("progress_text"),
+                len(response.get("logs") or []),
+            )
+            self.latest_response = response
+
+        if activity is not None and activity != self._last_activity:
+            self._last_activity = activity
+            self.current_interval = self.interval
+        else:
+            self.current_interval = min(
+                self.current_interval * self.BACKOFF_FACTOR, self.max_interval
+            )
+
+    def next_delay(self) -> float:
+        """Gets the delay before the next check, including the jitter.
+
+        :return: delay in seconds
+        :rtype: float
+        """
+        jitter = random.uniform(-self.JITTER, self.JITTER)
+        return max(0.0, self.current_interval * (1 + jitter))
+
+    def wait(self, delay: float):
+        """Sleeps for the given delay, waking up every second so that
+        cancelling is not delayed by long intervals.
+
+        :param delay: delay in seconds
+        :type delay: float
+        """
+        remaining = delay
+        while remaining > 0 and not self.cancelled:
+            step = min(remaining, 1.0)
+            time.sleep(step)
+            remaining -= step
+
     def results(self) -> dict:
-        """Fetch the results from API every X seconds and stop when status is in the final status list.
+        """Fetch the results from API until the status is in the final status list.
 
         :raises CplusApiRequestError: raisess when max limit is reached or server returns non 200 status code.
 
         :return: response dictionary
         :rtype: dict
         """
-        if self.cancelled:
-            return {"status": JOB_CANCELLED_STATUS}
-        if self.limit != -1 and self.current_repeat >= self.limit:
-            raise CplusApiRequestError("Request Timeout when fetching status!")
-        self.current_repeat += 1
+        if self.scenario_uuid is not None and isinstance(self.context, CplusApiRequest):
+            return scenario_status_poller.results(self)
+
+        while True:
+            if self.cancelled:
+                return {"status": JOB_CANCELLED_STATUS}
+            self.check_limit()
+            try:
+                response, status_code = self.__call_api()
+                if status_code != 200:
+                    error_detail = response.get("detail", "Unknown Error!")
+                    raise CplusApiRequestError(f"{status_code} - {error_detail}")
+                if self.on_response_fetched:
+                    self.on_response_fetched(response)
+                if response["status"] in self.FINAL_STATUS_LIST:
+                    return response
+                self.update_interval(response)
+            except Exception as ex:
+                log(f"Error when fetching results {ex}", info=False)
+                self.update_interval(None)
+            self.wait(self.next_delay())
+
+
+class ScenarioStatusPoller:
+    """Polls the status of all the online scenarios being waited for.
+
+    The API has no endpoint for the status of several scenarios, so the
+    status requests of all the scenarios that are due are sent together in
+    each check, sharing the connections of a single event loop. The thread
+    of one of the waiting tasks sends the requests for all of them while the
+    others wait for the responses, each task then handles its responses in
+    its own thread.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._poolings = {}
+        self._responses = {}
+        self._errors = {}
+        self._polling = False
+
+    @property
+    def scenario_uuids(self) -> typing.List[str]:
+        """Gets the UUIDs of the scenarios whose status is being polled.
+
+        :return: list of scenario UUIDs
+        :rtype: typing.List[str]
+        """
+        with self._condition:
+            return [pooling.scenario_uuid for pooling in self._poolings.values()]
+
+    def latest_status(self, scenario_uuid: str) -> typing.Optional[dict]:
+        """Gets the latest status fetched for a scenario.
+
+        :param scenario_uuid: Scenario UUID
+        :type scenario_uuid: str
+
+        :return: latest status response or None if the scenario is not
+            being polled or its status has not been fetched yet
+        :rtype: dict
+        """
+        with self._condition:
+            for pooling in self._poolings.values():
+                if (
+                    pooling.scenario_uuid == str(scenario_uuid)
+                    and pooling.latest_response is not None
+                ):
+                    return dict(pooling.latest_response)
+        return None
+
+    def results(self, pooling: CplusApiPooling) -> dict:
+        """Waits until the scenario of the pooling reaches a final status.
+
+        :param pooling: pooling of the scenario status
+        :type pooling: CplusApiPooling
+
+        :raises CplusApiRequestError: raises when max limit or timeout
+            is reached.
+
+        :return: response dictionary
+        :rtype: dict
+        """
+        key = id(pooling)
+        with self._condition:
+            pooling.next_check = time.monotonic()
+            self._poolings[key] = pooling
+            self._responses[key] = []
+            self._condition.notify_all()
+
+        poll = False
         try:
-            response, status_code = self.__call_api()
-            if status_code != 200:
-                error_detail = response.get("detail", "Unknown Error!")
-                raise CplusApiRequestError(f"{status_code} - {error_detail}")
-            if self.on_response_fetched:
-                self.on_response_fetched(response)
-            if response["status"] in self.FINAL_STATUS_LIST:
-                return response
-            else:
-                time.sleep(self.interval)
-                return self.results()
+            while True:
+                with self._condition:
+                    if (
+                        not self._responses[key]
+                        and key not in self._errors
+                        and not pooling.cancelled
+                    ):
+                        if not self._polling:
+                            self._polling = poll = True
+                        else:
+                            self._condition.wait(timeout=1.0)
+                    responses = self._responses[key]
+                    self._responses[key] = []
+                    error = self._errors.pop(key, None)
+
+                for response in responses:
+                    if pooling.on_response_fetched:
+                        pooling.on_response_fetched(response)
+                    if response.get("status") in pooling.FINAL_STATUS_LIST:
+                        return response
+                if pooling.cancelled:
+                    return {"status": JOB_CANCELLED_STATUS}
+                if error is not None:
+                    raise error
+
+                if poll:
+                    try:
+                        self._poll(pooling.context)
+                    finally:
+                        poll = False
+                        with self._condition:
+                            self._polling = False
+                            self._condition.notify_all()
+        finally:
+            with self._condition:
+                if poll:
+                    self._polling = False
+                    self._condition.notify_all()
+                self._poolings.pop(key, None)
+                self._responses.pop(key, None)
+                self._errors.pop(key, None)
+
+    def _poll(self, context: "CplusApiRequest"):
+        """Fetches the status of the scenarios that are due for a check, or
+        waits for the next check to be due.
+
+        :param context: API request object of the polling thread
+        :type context: CplusApiRequest
+        """
+        with self._condition:
+            poolings = [
+                (key, pooling)
+                for key, pooling in self._poolings.items()
+                if not pooling.cancelled
+            ]
+        if len(poolings) == 0:
+            return
+
+        now = time.monotonic()
+        due = [(key, pooling) for key, pooling in poolings if pooling.next_check <= now]
+        if len(due) == 0:
+            next_check = min(pooling.next_check for _, pooling in poolings)
+            time.sleep(min(next_check - now, 1.0))
+            return
+
+        checks = []
+        for key, pooling in due:
+            try:
+                pooling.check_limit()
+            except CplusApiRequestError as ex:
+                with self._condition:
+                    self._errors[key] = ex
+                continue
+            checks.append((key, pooling, context.create_reply("GET", pooling.url)))
+
+        try:
+            context.send_requests([reply for _, _, reply in checks])
         except Exception as ex:
-            log(f"Error when fetching results {ex}", info=False)
-            time.sleep(self.interval)
-            return self.results()
+            log(f"Error when fetching scenario status {ex}", info=False)
+
+        for key, pooling, reply in checks:
+            response = None
+            try:
+                response, status_code = context.reply_result(reply)
+                if status_code != 200:
+                    error_detail = response.get("detail", "Unknown Error!")
+                    raise CplusApiRequestError(f"{status_code} - {error_detail}")
+            except Exception as ex:
+                log(f"Error when fetching results {ex}", info=False)
+                response = None
+            pooling.update_interval(response)
+            pooling.next_check = time.monotonic() + pooling.next_delay()
+            if response is not None:
+                with self._condition:
+                    if key in self._responses:
+                        self._responses[key].append(response)
+
+        with self._condition:
+            self._condition.notify_all()
+
+
+scenario_status_poller = ScenarioStatusPoller()
 
 
 class TrendsApiUrl:
@@ -336,6 +632,832 @@ class CplusApiUrl:
         )
 
 
+@dataclasses.dataclass
+class UploadPart:
+    """Part of a file that is uploaded to a presigned URL in a multipart
+    upload.
+    """
+
+    file_path: str
+    part_number: int
+    url: str
+    offset: int
+    size: int
+
+
+def create_upload_parts(
+    file_path: str, upload_urls: typing.List[dict], chunk_size: int = CHUNK_SIZE
+) -> typing.List[UploadPart]:
+    """Split a file into the parts of a multipart upload.
+
+    :param file_path: Path of the file to be uploaded
+    :type file_path: str
+
+    :param upload_urls: Presigned URLs, with url and part_number, in the
+        order of the file parts
+    :type upload_urls: typing.List[dict]
+
+    :param chunk_size: Size of each part in bytes, defaults to CHUNK_SIZE
+    :type chunk_size: int
+
+    :return: Parts of the file
+    :rtype: typing.List[UploadPart]
+    """
+    file_size = os.stat(file_path).st_size
+    parts = []
+    for idx, url_item in enumerate(upload_urls):
+        offset = idx * chunk_size
+        if offset >= file_size:
+            break
+        parts.append(
+            UploadPart(
+                file_path=file_path,
+                part_number=url_item["part_number"],
+                url=url_item["url"],
+                offset=offset,
+                size=min(chunk_size, file_size - offset),
+            )
+        )
+    return parts
+
+
+class FilePartDevice(QtCore.QIODevice):
+    """Read-only device that streams a part of a memory-mapped file so that
+    the part is sent without being copied as a whole into memory.
+    """
+
+    def __init__(self, file_map: mmap.mmap, offset: int, size: int):
+        """Create the device and open it for reading.
+
+        :param file_map: Memory map of the file
+        :type file_map: mmap.mmap
+
+        :param offset: Offset of the part in the file
+        :type offset: int
+
+        :param size: Size of the part in bytes
+        :type size: int
+        """
+        super().__init__()
+        self._view = memoryview(file_map)[offset : offset + size]
+        self.open(QtCore.QIODevice.ReadOnly | QtCore.QIODevice.Unbuffered)
+
+    def size(self) -> int:
+        return len(self._view) if self._view is not None else 0
+
+    def isSequential(self) -> bool:
+        return False
+
+    def readData(self, max_size: int) -> bytes:
+        if self._view is None:
+            return b""
+        position = self.pos()
+        end = min(position + max_size, len(self._view))
+        return self._view[position:end].tobytes()
+
+    def writeData(self, data) -> int:
+        return -1
+
+    def close(self):
+        """Close the device and release the view of the file."""
+        super().close()
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+
+
+class UploadFileReader:
+    """Memory maps the files being uploaded and creates the devices that
+    stream their parts. The maps are closed when the reader is closed.
+    """
+
+    def __init__(self):
+        self._files = {}
+        self._maps = {}
+        self._devices = []
+
+    def device(self, part: UploadPart) -> FilePartDevice:
+        """Create a device for reading a file part.
+
+        :param part: File part
+        :type part: UploadPart
+
+        :return: Device streaming the content of the part
+        :rtype: FilePartDevice
+        """
+        file_map = self._maps.get(part.file_path)
+        if file_map is None:
+            upload_file = open(part.file_path, "rb")
+            self._files[part.file_path] = upload_file
+            file_map = mmap.mmap(upload_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[part.file_path] = file_map
+        device = FilePartDevice(file_map, part.offset, part.size)
+        self._devices.append(device)
+        return device
+
+    def close(self):
+        """Close the devices, memory maps and files."""
+        for device in self._devices:
+            device.close()
+        self._devices = []
+        for file_map in self._maps.values():
+            file_map.close()
+        self._maps = {}
+        for upload_file in self._files.values():
+            upload_file.close()
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CplusApiReply:
+    """Request to the CPLUS API that is sent asynchronously so that several
+    requests can be in flight over the connections kept alive by the
+    network access manager.
+
+    The reply is aborted when no data has been transferred within the
+    timeout or when the request is cancelled.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        request: QNetworkRequest,
+        data: typing.Union[
+            bytes, bytearray, QtCore.QByteArray, QtCore.QIODevice, typing.Callable
+        ] = None,
+        timeout: int = DEFAULT_REQUEST_TIMEOUT,
+    ):
+        """Create an asynchronous request.
+
+        :param method: HTTP method e.g. GET, POST, PUT, PATCH or DELETE
+        :type method: str
+
+        :param request: request object
+        :type request: QNetworkRequest
+
+        :param data: request payload, device streaming the payload or a
+            function returning either, which is called when the request is
+            sent, defaults to None
+        :type data: typing.Union[bytes, QtCore.QIODevice, typing.Callable]
+
+        :param timeout: seconds without any data transfer before the
+            request is aborted, zero disables the timeout
+        :type timeout: int
+        """
+        self.method = method.upper()
+        self.request = request
+        self.data = data
+        self.timeout = timeout
+        self.reply = None
+        self.finished = False
+        self.timed_out = False
+        self.cancelled = False
+        self._timer = None
+        self._callbacks = []
+        # Function called with the reply and each block of received data,
+        # the data is then not kept in the reply
+        self.on_data_received = None
+
+    @property
+    def url(self) -> str:
+        """Get the URL of the request.
+
+        :return: request URL
+        :rtype: str
+        """
+        return self.request.url().toString()
+
+    def start(self):
+        """Send the request using the network access manager of the
+        current thread.
+        """
+        if self.reply is not None or self.finished:
+            return
+
+        if callable(self.data):
+            self.data = self.data()
+
+        nam = QgsNetworkAccessManager.instance()
+        if self.method == "GET":
+            self.reply = nam.get(self.request)
+        elif self.method == "POST":
+            self.reply = nam.post(self.request, self.data)
+        elif self.method == "PUT":
+            self.reply = nam.put(self.request, self.data)
+        elif self.method == "DELETE":
+            self.reply = nam.deleteResource(self.request)
+        else:
+            self.reply = nam.sendCustomRequest(
+                self.request, self.method.encode("utf-8"), self.data
+            )
+
+        self.reply.finished.connect(self._on_finished)
+        if self.on_data_received is not None:
+            self.reply.readyRead.connect(self._on_ready_read)
+        if self.timeout:
+            self._timer = QtCore.QTimer()
+            self._timer.setSingleShot(True)
+            self._timer.timeout.connect(self._on_timeout)
+            self.reply.uploadProgress.connect(self._restart_timer)
+            self.reply.downloadProgress.connect(self._restart_timer)
+            self._timer.start(self.timeout * 1000)
+
+    def cancel(self):
+        """Cancel the request, aborting the reply if it has been sent."""
+        if self.finished:
+            return
+        self.cancelled = True
+        if self.reply is None:
+            self._on_finished()
+        else:
+            self.reply.abort()
+
+    def add_done_callback(self, callback: typing.Callable):
+        """Add a function that is called with this object once the request
+        has finished, has been cancelled or has timed out.
+
+        :param callback: function accepting the CplusApiReply object
+        :type callback: typing.Callable
+        """
+        if self.finished:
+            callback(self)
+        else:
+            self._callbacks.append(callback)
+
+    def _restart_timer(self, *args):
+        """Restart the timeout when data has been transferred."""
+        if self._timer is not None and not self.finished:
+            self._timer.start(self.timeout * 1000)
+
+    def _on_timeout(self):
+        """Abort the reply when the timeout has elapsed."""
+        if self.finished:
+            return
+        log(f"Request to {self.url} timed out after {self.timeout} seconds")
+        self.timed_out = True
+        self.reply.abort()
+
+    def _on_ready_read(self):
+        """Pass the received data to the data callback."""
+        data = self.reply.readAll().data()
+        if data:
+            self.on_data_received(self, data)
+
+    def _on_finished(self):
+        """Notify the callbacks that the request has finished."""
+        if self.finished:
+            return
+        if self.on_data_received is not None and self.reply is not None:
+            self._on_ready_read()
+        self.finished = True
+        # Release the payload as soon as it has been sent
+        self.data = None
+        if self._timer is not None:
+            self._timer.stop()
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+
+@dataclasses.dataclass
+class FileDownload:
+    """File downloaded in byte ranges that are fetched concurrently.
+
+    The ranges are written to a partial file next to the destination and
+    the downloaded ranges are recorded in a state file so that an
+    interrupted download can be resumed.
+    """
+
+    url: str
+    file_path: str
+    expected_size: typing.Optional[int] = None
+    priority: int = 0
+    size: typing.Optional[int] = None
+    etag: str = ""
+    completed_segments: typing.Set[int] = dataclasses.field(default_factory=set)
+    downloaded: bool = False
+    error: str = ""
+    restarts: int = 0
+
+    @property
+    def partial_path(self) -> str:
+        """Get the path of the file the data is written to while downloading.
+
+        :return: partial file path
+        :rtype: str
+        """
+        return f"{self.file_path}{PARTIAL_DOWNLOAD_SUFFIX}"
+
+    @property
+    def state_path(self) -> str:
+        """Get the path of the file recording the downloaded ranges.
+
+        :return: state file path
+        :rtype: str
+        """
+        return f"{self.partial_path}.json"
+
+    def segment_count(self, segment_size: int) -> int:
+        """Get the number of ranges of the file.
+
+        :param segment_size: size of the ranges
+        :type segment_size: int
+
+        :return: number of ranges, zero if the size is not known yet
+        :rtype: int
+        """
+        if self.size is None:
+            return 0
+        return max(1, math.ceil(self.size / segment_size))
+
+    def load_state(self):
+        """Restore the downloaded ranges of an interrupted download."""
+        if not os.path.exists(self.state_path) or not os.path.exists(self.partial_path):
+            return
+        try:
+            with open(self.state_path, "r") as state_file:
+                state = json.load(state_file)
+        except (OSError, ValueError) as e:
+            log(f"Unable to read the download state of {self.file_path}, {e}")
+            return
+
+        size = state.get("size")
+        if size is None or os.path.getsize(self.partial_path) != size:
+            return
+        if self.expected_size is not None and size != self.expected_size:
+            return
+        self.size = size
+        self.etag = state.get("etag", "")
+        self.completed_segments = set(state.get("completed_segments", []))
+
+    def save_state(self):
+        """Record the downloaded ranges."""
+        try:
+            with open(self.state_path, "w") as state_file:
+                json.dump(
+                    {
+                        "size": self.size,
+                        "etag": self.etag,
+                        "completed_segments": sorted(self.completed_segments),
+                    },
+                    state_file,
+                )
+        except OSError as e:
+            log(f"Unable to save the download state of {self.file_path}, {e}")
+
+    def reset(self):
+        """Discard the downloaded data e.g. when the file has changed in
+        the server.
+        """
+        self.size = None
+        self.etag = ""
+        self.completed_segments = set()
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+
+class FileDownloadManager:
+    """Downloads files concurrently, splitting each file into byte ranges
+    that are requested with HTTP Range headers.
+
+    The first range of a file also returns its size and ETag, the other
+    ranges are then requested with an If-Match header so that a file
+    replaced in the server while it is being downloaded is detected. The
+    sizes of the ranges and of the file, and the expected size when it is
+    known, are checked as the data is received. Files with a higher priority
+    are requested first.
+    """
+
+    def __init__(
+        self,
+        request: "CplusApiRequest",
+        segment_size: int = DOWNLOAD_SEGMENT_SIZE,
+        max_retries: int = 3,
+    ):
+        self.request = request
+        self.segment_size = segment_size
+        self.max_retries = max_retries
+        self._queue = []
+        self._active = 0
+        self._files = {}
+        self._downloaded_bytes = 0
+        self._downloads = []
+        self._progress_percent = -1
+        self._on_download_progress = None
+        self._on_file_downloaded = None
+
+    def download(
+        self,
+        downloads: typing.List[FileDownload],
+        on_download_progress: typing.Callable[[int, int], None] = None,
+        on_file_downloaded: typing.Callable[[FileDownload], None] = None,
+        is_cancelled: typing.Callable[[], bool] = None,
+    ) -> typing.List[FileDownload]:
+        """Download the files.
+
+        :param downloads: files to be downloaded
+        :type downloads: typing.List[FileDownload]
+
+        :param on_download_progress: callback with the downloaded bytes and
+            the total size of the files whose size is known
+        :type on_download_progress: typing.Callable
+
+        :param on_file_downloaded: callback when a file has been downloaded
+            and moved to its destination
+        :type on_file_downloaded: typing.Callable
+
+        :param is_cancelled: function that returns True when the downloads
+            should be cancelled, partial files are kept to be resumed
+        :type is_cancelled: typing.Callable
+
+        :return: the downloads, with the downloaded flag or the error set
+        :rtype: typing.List[FileDownload]
+        """
+        self._downloads = downloads
+        self._on_download_progress = on_download_progress
+        self._on_file_downloaded = on_file_downloaded
+
+        for download in sorted(downloads, key=lambda d: d.priority, reverse=True):
+            try:
+                self._start(download)
+            except OSError as e:
+                download.error = f"Unable to write {download.file_path}, {e}"
+                log(download.error, info=False)
+
+        def more_replies():
+            replies, self._queue = self._queue, []
+            if len(replies) == 0 and self._active == 0:
+                return None
+            return replies
+
+        try:
+            self.request.send_requests(
+                [], is_cancelled=is_cancelled, more_replies=more_replies
+            )
+        finally:
+            for partial_file in self._files.values():
+                partial_file.close()
+            self._files = {}
+
+        for download in downloads:
+            if not download.downloaded and not download.error:
+                download.error = f"Download of {download.file_path} was interrupted"
+
+        return downloads
+
+    def _known_size(self) -> int:
+        """Get the total size of the files whose size is known.
+
+        :return: size in bytes
+        :rtype: int
+        """
+        return sum(download.size or 0 for download in self._downloads)
+
+    def _start(self, download: FileDownload):
+        """Queue the ranges of a file that have not been downloaded.
+
+        :param download: file to be downloaded
+        :type download: FileDownload
+        """
+        directory = os.path.dirname(download.file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        if (
+            download.expected_size is not None
+            and os.path.exists(download.file_path)
+            and os.path.getsize(download.file_path) == download.expected_size
+        ):
+            download.downloaded = True
+            self._notify_downloaded(download)
+            return
+
+        download.load_state()
+        if download.size is None:
+            self._files[download.file_path] = open(download.partial_path, "w+b")
+            self._queue_segment(download, 0)
+            return
+
+        self._files[download.file_path] = open(download.partial_path, "r+b")
+        self._downloaded_bytes += sum(
+            self._segment_length(download, index)
+            for index in download.completed_segments
+        )
+        for index in range(download.segment_count(self.segment_size)):
+            if index not in download.completed_segments:
+                self._queue_segment(download, index)
+        if len(download.completed_segments) == download.segment_count(
+            self.segment_size
+        ):
+            self._complete(download)
+
+    def _segment_length(self, download: FileDownload, index: int) -> int:
+        start = index * self.segment_size
+        return min(self.segment_size, download.size - start)
+
+    def _queue_segment(self, download: FileDownload, index: int, retries: int = 0):
+        """Create the request of a range of a file.
+
+        :param download: file being downloaded
+        :type download: FileDownload
+
+        :param index: index of the range
+        :type index: int
+
+        :param retries: number of previous attempts of the range
+        :type retries: int
+        """
+        start = index * self.segment_size
+        end = start + self.segment_size - 1
+        if download.size is not None:
+            end = min(end, download.size - 1)
+
+        request = QNetworkRequest(QtCore.QUrl(download.url))
+        request.setRawHeader(b"Range", f"bytes={start}-{end}".encode("utf-8"))
+        if download.etag and download.size is not None:
+            request.setRawHeader(b"If-Match", download.etag.encode("utf-8"))
+        request.setAttribute(
+            QNetworkRequest.CacheLoadControlAttribute, QNetworkRequest.AlwaysNetwork
+        )
+        if hasattr(QNetworkRequest, "Http2AllowedAttribute"):
+            request.setAttribute(QNetworkRequest.Http2AllowedAttribute, True)
+
+        segment = {
+            "index": index,
+            "offset": start,
+            "length": end - start + 1,
+            "written": 0,
+            "probe": download.size is None,
+            "started": False,
+            "restarts": download.restarts,
+            "error": "",
+        }
+        reply = CplusApiReply("GET", request, timeout=self.request._request_timeout())
+        reply.on_data_received = functools.partial(self._write, download, segment)
+        reply.add_done_callback(
+            functools.partial(self._on_segment_finished, download, segment, retries)
+        )
+        self._active += 1
+        self._queue.append(reply)
+
+    def _write(
+        self, download: FileDownload, segment: dict, reply: CplusApiReply, data: bytes
+    ):
+        """Write the received data of a range, checking the response against
+        the size and ETag of the file.
+
+        :param download: file being downloaded
+        :type download: FileDownload
+
+        :param segment: range being downloaded
+        :type segment: dict
+
+        :param reply: request of the range
+        :type reply: CplusApiReply
+
+        :param data: received data
+        :type data: bytes
+        """
+        if (
+            download.error
+            or segment["error"]
+            or segment["restarts"] != download.restarts
+        ):
+            return
+        status = reply.reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        if status not in (200, 206):
+            # Error responses are handled when the request has finished
+            return
+
+        if not segment["started"]:
+            segment["started"] = True
+            if status == 200 and not segment["probe"]:
+                segment["error"] = "the server did not return the requested range"
+            elif segment["probe"]:
+                download.etag = self._header(reply.reply, "ETag")
+                if status == 200:
+                    # Ranges are not supported, the whole file is returned
+                    download.size = self._content_length(reply.reply)
+                    segment["length"] = download.size
+                else:
+                    download.size = self._content_range_total(reply.reply)
+                    if download.size is None:
+                        segment["error"] = "the size of the file is unknown"
+                    else:
+                        segment["length"] = min(segment["length"], download.size)
+
+                if (
+                    download.size is not None
+                    and download.expected_size is not None
+                    and download.size != download.expected_size
+                ):
+                    download.error = (
+                        f"Invalid download of {download.file_path}, the size "
+                        f"{download.size} does not match the expected size "
+                        f"{download.expected_size}"
+                    )
+                    log(download.error, info=False)
+                    reply.reply.abort()
+                    return
+
+        if (
+            segment["length"] is not None
+            and segment["written"] + len(data) > segment["length"]
+        ):
+            segment["error"] = "more data than requested was received"
+        if segment["error"]:
+            reply.reply.abort()
+            return
+
+        partial_file = self._files[download.file_path]
+        partial_file.seek(segment["offset"] + segment["written"])
+        partial_file.write(data)
+        segment["written"] += len(data)
+        self._downloaded_bytes += len(data)
+        self._notify_progress()
+
+    def _notify_progress(self):
+        """Report the progress each time another percent has been downloaded."""
+        total = self._known_size()
+        if self._on_download_progress is None or total == 0:
+            return
+        percent = int(self._downloaded_bytes * 100 / total)
+        if percent != self._progress_percent:
+            self._progress_percent = percent
+            self._on_download_progress(self._downloaded_bytes, total)
+
+    def _on_segment_finished(
+        self,
+        download: FileDownload,
+        segment: dict,
+        retries: int,
+        reply: CplusApiReply,
+    ):
+        """Record a downloaded range, or retry it when it has failed.
+
+        :param download: file being downloaded
+        :type download: FileDownload
+
+        :param segment: downloaded range
+        :type segment: dict
+
+        :param retries: number of previous attempts of the range
+        :type retries: int
+
+        :param reply: finished request of the range
+        :type reply: CplusApiReply
+        """
+        self._active -= 1
+        network_reply = reply.reply
+        status = None
+        if network_reply is not None:
+            status = network_reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+            network_reply.deleteLater()
+
+        if download.error or download.downloaded:
+            return
+        if segment["restarts"] != download.restarts:
+            # The file was restarted while this range was in flight
+            return
+        if reply.cancelled:
+            return
+
+        if status == 412:
+            # The file has changed in the server since the first range
+            self._restart(download, "the file has changed in the server")
+            return
+
+        error = segment["error"]
+        if not error:
+            if reply.timed_out:
+                error = "the request timed out"
+            elif network_reply.error() != QNetworkReply.NoError:
+                error = network_reply.errorString()
+            elif status not in (200, 206):
+                error = f"HTTP status {status}"
+            elif segment["length"] is None:
+                # The size was not in the response of a whole file request
+                segment["length"] = download.size = segment["written"]
+            elif segment["written"] != segment["length"]:
+                error = (
+                    f"{segment['written']} bytes received "
+                    f"instead of {segment['length']}"
+                )
+
+        if error:
+            self._downloaded_bytes -= segment["written"]
+            if retries >= self.max_retries:
+                download.error = (
+                    f"Unable to download {download.file_path} "
+                    f"after {retries + 1} attempts, {error}"
+                )
+                log(download.error, info=False)
+                return
+            log(f"Retrying the download of {download.file_path}, {error}")
+            self._queue_segment(download, segment["index"], retries + 1)
+            return
+
+        first_range = len(download.completed_segments) == 0 and segment["index"] == 0
+        download.completed_segments.add(segment["index"])
+        segment_count = download.segment_count(self.segment_size)
+        if status == 200:
+            download.completed_segments = set(range(segment_count))
+        elif first_range:
+            self._files[download.file_path].truncate(download.size)
+            for index in range(1, segment_count):
+                self._queue_segment(download, index)
+
+        if len(download.completed_segments) == segment_count:
+            self._complete(download)
+        elif status == 206:
+            download.save_state()
+
+    def _restart(self, download: FileDownload, reason: str):
+        """Download a file again from its first range.
+
+        :param download: file being downloaded
+        :type download: FileDownload
+
+        :param reason: reason for discarding the downloaded data
+        :type reason: str
+        """
+        if download.restarts >= self.max_retries:
+            download.error = f"Unable to download {download.file_path}, {reason}"
+            log(download.error, info=False)
+            return
+        log(f"Restarting the download of {download.file_path}, {reason}")
+        self._downloaded_bytes -= sum(
+            self._segment_length(download, index)
+            for index in download.completed_segments
+        )
+        download.restarts += 1
+        download.reset()
+        self._files[download.file_path].truncate(0)
+        self._queue_segment(download, 0)
+
+    def _complete(self, download: FileDownload):
+        """Move a downloaded file to its destination.
+
+        :param download: downloaded file
+        :type download: FileDownload
+        """
+        partial_file = self._files.pop(download.file_path)
+        partial_file.close()
+        actual_size = os.path.getsize(download.partial_path)
+        if actual_size != download.size:
+            download.error = (
+                f"Invalid download of {download.file_path}, "
+                f"{actual_size} bytes written instead of {download.size}"
+            )
+            log(download.error, info=False)
+            return
+
+        try:
+            os.replace(download.partial_path, download.file_path)
+            if os.path.exists(download.state_path):
+                os.remove(download.state_path)
+        except OSError as e:
+            download.error = f"Unable to write {download.file_path}, {e}"
+            log(download.error, info=False)
+            return
+        download.downloaded = True
+        log(f"Finished downloading file to {download.file_path}")
+        self._notify_downloaded(download)
+
+    def _notify_downloaded(self, download: FileDownload):
+        if self._on_file_downloaded is not None:
+            self._on_file_downloaded(download)
+
+    @staticmethod
+    def _header(reply: QNetworkReply, name: str) -> str:
+        return reply.rawHeader(name.encode("utf-8")).data().decode("utf-8")
+
+    @staticmethod
+    def _content_length(reply: QNetworkReply) -> typing.Optional[int]:
+        content_length = reply.header(QNetworkRequest.ContentLengthHeader)
+        return int(content_length) if content_length is not None else None
+
+    @staticmethod
+    def _content_range_total(reply: QNetworkReply) -> typing.Optional[int]:
+        """Get the file size from the Content-Range header e.g.
+        "bytes 0-99/1000".
+
+        :param reply: response of a range request
+        :type reply: QNetworkReply
+
+        :return: file size or None if it is not in the header
+        :rtype: int
+        """
+        content_range = FileDownloadManager._header(reply, "Content-Range")
+        total = content_range.rpartition("/")[2].strip()
+        return int(total) if total.isdigit() else None
+
+
 class CplusApiRequest:
     """Class to send request to Cplus API."""
 
@@ -486,6 +1608,240 @@ class CplusApiRequest:
             json.dumps(data, cls=CustomJsonEncoder).encode("utf-8")
         )
 
+    def _request_timeout(self) -> int:
+        """Get the timeout of the requests from the settings.
+
+        :return: seconds without any data transfer before a request is aborted
+        :rtype: int
+        """
+        return int(
+            settings_manager.get_value(
+                Settings.API_REQUEST_TIMEOUT,
+                default=DEFAULT_REQUEST_TIMEOUT,
+                setting_type=int,
+            )
+        )
+
+    def _max_concurrent_requests(self) -> int:
+        """Get the maximum number of requests in flight from the settings.
+
+        :return: maximum number of concurrent requests
+        :rtype: int
+        """
+        max_requests = settings_manager.get_value(
+            Settings.API_MAX_CONCURRENT_REQUESTS,
+            default=DEFAULT_MAX_CONCURRENT_REQUESTS,
+            setting_type=int,
+        )
+        return max(1, int(max_requests))
+
+    def create_reply(
+        self,
+        method: str,
+        url: str,
+        data: typing.Union[dict, list] = None,
+        headers: dict = None,
+    ) -> CplusApiReply:
+        """Create an asynchronous JSON request, the request is sent by
+        send_requests.
+
+        :param method: HTTP method e.g. GET, POST, PUT, PATCH or DELETE
+        :type method: str
+
+        :param url: Cplus API URL
+        :type url: str
+
+        :param data: API payload, defaults to None
+        :type data: typing.Union[dict, list]
+
+        :param headers: header dictionary, defaults to the API headers
+        :type headers: dict
+
+        :return: asynchronous request
+        :rtype: CplusApiReply
+        """
+        headers = headers or self._default_headers()
+        request = self._generate_request(url, headers)
+        if method.upper() == "GET":
+            request.setAttribute(
+                QNetworkRequest.CacheLoadControlAttribute,
+                QNetworkRequest.AlwaysNetwork,
+            )
+        if hasattr(QNetworkRequest, "Http2AllowedAttribute"):
+            request.setAttribute(QNetworkRequest.Http2AllowedAttribute, True)
+        payload = self._get_request_payload(data) if data is not None else None
+        return CplusApiReply(method, request, payload, self._request_timeout())
+
+    def send_requests(
+        self,
+        replies: typing.List[CplusApiReply],
+        max_concurrent: int = None,
+        is_cancelled: typing.Callable[[], bool] = None,
+        more_replies: typing.Callable[
+            [], typing.Optional[typing.List[CplusApiReply]]
+        ] = None,
+    ) -> typing.List[CplusApiReply]:
+        """Send the requests concurrently and wait until all of them have
+        finished.
+
+        The requests are sent from the current thread and the replies are
+        received in a single event loop so that up to max_concurrent
+        requests are in flight at a time.
+
+        :param replies: asynchronous requests to be sent
+        :type replies: typing.List[CplusApiReply]
+
+        :param max_concurrent: maximum number of requests in flight,
+            defaults to the value in the settings
+        :type max_concurrent: int
+
+        :param is_cancelled: function that returns True when the remaining
+            requests should be cancelled, defaults to None
+        :type is_cancelled: typing.Callable[[], bool]
+
+        :param more_replies: function that is polled while the requests
+            are in flight and returns requests that have become ready to be
+            sent, or None when there will be no more requests
+        :type more_replies: typing.Callable
+
+        :return: the finished requests, including the ones returned by
+            more_replies
+        :rtype: typing.List[CplusApiReply]
+        """
+        replies = list(replies)
+        max_concurrent = max_concurrent or self._max_concurrent_requests()
+        event_loop = QtCore.QEventLoop()
+        pending = []
+        queue = []
+        state = {"exhausted": more_replies is None, "polling": False}
+
+        def is_done() -> bool:
+            return state["exhausted"] and all(reply.finished for reply in pending)
+
+        def start_next(*args):
+            in_flight = len(
+                [
+                    reply
+                    for reply in pending
+                    if reply.reply is not None and not reply.finished
+                ]
+            )
+            while queue and in_flight < max_concurrent:
+                queue.pop(0).start()
+                in_flight += 1
+            if is_done():
+                event_loop.quit()
+
+        def add_replies(new_replies: typing.List[CplusApiReply]):
+            for reply in new_replies:
+                if reply not in replies:
+                    replies.append(reply)
+                if reply.finished:
+                    continue
+                pending.append(reply)
+                queue.append(reply)
+                reply.add_done_callback(start_next)
+
+        def poll():
+            # more_replies may send requests itself, avoid re-entering it
+            if state["polling"]:
+                return
+            state["polling"] = True
+            try:
+                if is_cancelled is not None and is_cancelled():
+                    state["exhausted"] = True
+                    queue.clear()
+                    for reply in list(pending):
+                        reply.cancel()
+                elif not state["exhausted"]:
+                    new_replies = more_replies()
+                    if new_replies is None:
+                        state["exhausted"] = True
+                    else:
+                        add_replies(new_replies)
+            finally:
+                state["polling"] = False
+            start_next()
+
+        add_replies(replies)
+        poll()
+        if is_done():
+            return replies
+
+        poll_timer = None
+        if is_cancelled is not None or more_replies is not None:
+            poll_timer = QtCore.QTimer()
+            poll_timer.timeout.connect(poll)
+            poll_timer.start(200)
+
+        event_loop.exec_()
+
+        if poll_timer is not None:
+            poll_timer.stop()
+        return replies
+
+    def reply_result(self, reply: CplusApiReply) -> typing.Tuple[dict, int]:
+        """Get the JSON response of a finished asynchronous request.
+
+        :param reply: finished request
+        :type reply: CplusApiReply
+
+        :raises CplusApiRequestError: raises when the request was cancelled,
+            has timed out or there is a network error
+
+        :return: tuple of response dictionary and HTTP status code
+        :rtype: typing.Tuple[dict, int]
+        """
+        self._check_reply(reply)
+        return self._handle_response(reply.url, reply.reply)
+
+    def _check_reply(self, reply: CplusApiReply):
+        """Check that an asynchronous request has completed.
+
+        :param reply: finished request
+        :type reply: CplusApiReply
+
+        :raises CplusApiRequestError: raises when the request was cancelled
+            or has timed out
+        """
+        if reply.timed_out:
+            reply.reply.deleteLater()
+            raise CplusApiRequestError(
+                f"Request to {reply.url} timed out after {reply.timeout} seconds"
+            )
+        if reply.cancelled:
+            if reply.reply is not None:
+                reply.reply.deleteLater()
+            raise CplusApiRequestError(f"Request to {reply.url} was cancelled")
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        data: typing.Union[dict, list] = None,
+        headers: dict = {},
+    ) -> typing.Tuple[dict, int]:
+        """Send a request and wait for its response.
+
+        :param method: HTTP method
+        :type method: str
+
+        :param url: Cplus API URL
+        :type url: str
+
+        :param data: API payload, defaults to None
+        :type data: typing.Union[dict, list]
+
+        :param headers: header dictionary, defaults to {}
+        :type headers: dict
+
+        :return: tuple of response dictionary and HTTP status code
+        :rtype: typing.Tuple[dict, int]
+        """
+        reply = self.create_reply(method, url, data, headers)
+        self.send_requests([reply])
+        return self.reply_result(reply)
+
     def get(self, url: str, headers: dict = {}) -> typing.Tuple[dict, int]:
         """Trigger a GET request.
 
@@ -498,11 +1854,7 @@ class CplusApiRequest:
         :return: tuple of response dictionary and HTTP status code
         :rtype: typing.Tuple[dict, int]
         """
-        nam = QgsNetworkAccessManager.instance()
-        headers = headers or self._default_headers()
-        request = self._generate_request(url, headers)
-        reply = nam.blockingGet(request, forceRefresh=True)
-        return self._handle_response(url, reply)
+        return self._send("GET", url, headers=headers)
 
     def post(
         self, url: str, data: typing.Union[dict, list], headers: dict = {}
@@ -521,12 +1873,7 @@ class CplusApiRequest:
         :return: tuple of response dictionary and HTTP status code
         :rtype: typing.Tuple[dict, int]
         """
-        nam = QgsNetworkAccessManager.instance()
-        headers = headers or self._default_headers()
-        request = self._generate_request(url, headers)
-        json_data = self._get_request_payload(data)
-        reply = nam.blockingPost(request, json_data)
-        return self._handle_response(url, reply)
+        return self._send("POST", url, data, headers)
 
     def put(
         self, url: str, data: typing.Union[dict, list], headers: dict = {}
@@ -545,13 +1892,7 @@ class CplusApiRequest:
         :return: tuple of response dictionary and HTTP status code
         :rtype: typing.Tuple[dict, int]
         """
-        nam = QgsNetworkAccessManager.instance()
-        headers = headers or self._default_headers()
-        request = self._generate_request(url, headers)
-        json_data = self._get_request_payload(data)
-        reply = nam.put(request, json_data)
-        self._make_request(reply)
-        return self._handle_response(url, reply)
+        return self._send("PUT", url, data, headers)
 
     def patch(
         self, url: str, data: typing.Union[dict, list], headers: dict = {}
@@ -570,13 +1911,7 @@ class CplusApiRequest:
         :return: tuple of response dictionary and HTTP status code
         :rtype: typing.Tuple[dict, int]
         """
-        nam = QgsNetworkAccessManager.instance()
-        headers = headers or self._default_headers()
-        request = self._generate_request(url, headers)
-        json_data = self._get_request_payload(data)
-        reply = nam.sendCustomRequest(request, b"PATCH", json_data)
-        self._make_request(reply)
-        return self._handle_response(url, reply)
+        return self._send("PATCH", url, data, headers)
 
     def delete(self, url: str, headers: dict = {}) -> typing.Tuple[dict, int]:
         """Trigger a DELETE request.
@@ -590,12 +1925,7 @@ class CplusApiRequest:
         :return: tuple of response dictionary and HTTP status code
         :rtype: typing.Tuple[dict, int]
         """
-        nam = QgsNetworkAccessManager.instance()
-        headers = headers or self._default_headers()
-        request = self._generate_request(url, headers)
-        reply = nam.deleteResource(request)
-        self._make_request(reply)
-        return self._handle_response(url, reply)
+        return self._send("DELETE", url, headers=headers)
 
     def _on_download_error(self, filename: str, error):
         """Callback when there is an error in download file.
@@ -619,24 +1949,112 @@ class CplusApiRequest:
         """
         log(f"Finished downloading file to {filename}")
 
-    def download_file(self, url: str, file_path: str, on_download_progress):
-        """Download a file from url and save into output file in file_path.
+    def download_files(
+        self,
+        downloads: typing.List[FileDownload],
+        on_download_progress: typing.Callable[[int, int], None] = None,
+        on_file_downloaded: typing.Callable[[FileDownload], None] = None,
+        is_cancelled: typing.Callable[[], bool] = None,
+    ) -> typing.List[FileDownload]:
+        """Download files concurrently in byte ranges, resuming the
+        partial files of interrupted downloads.
+
+        :param downloads: files to be downloaded, files with a higher
+            priority are requested first
+        :type downloads: typing.List[FileDownload]
+
+        :param on_download_progress: callback with the downloaded bytes and
+            the total size of the files whose size is known
+        :type on_download_progress: typing.Callable
+
+        :param on_file_downloaded: callback when a file has been downloaded
+        :type on_file_downloaded: typing.Callable
+
+        :param is_cancelled: function that returns True when the downloads
+            should be cancelled
+        :type is_cancelled: typing.Callable
+
+        :return: the downloads, with the downloaded flag or the error set
+        :rtype: typing.List[FileDownload]
+        """
+        segment_size = settings_manager.get_value(
+            Settings.API_DOWNLOAD_SEGMENT_SIZE,
+            default=DOWNLOAD_SEGMENT_SIZE,
+            setting_type=int,
+        )
+        manager = FileDownloadManager(
+            self, segment_size=max(1024 * 1024, int(segment_size))
+        )
+        return manager.download(
+            downloads,
+            on_download_progress=on_download_progress,
+            on_file_downloaded=on_file_downloaded,
+            is_cancelled=is_cancelled,
+        )
+
+    def create_upload_part_reply(
+        self,
+        url: str,
+        chunk: typing.Union[bytes, bytearray, typing.Callable],
+        content_length: int = None,
+    ) -> CplusApiReply:
+        """Create an asynchronous PUT request to upload a chunk file to the url.
 
-        :param url: Download URL
+        :param url: Upload URL
         :type url: str
 
-        :param file_path: Path to the output file
-        :type file_path: str
+        :param chunk: File chunk to be uploaded or a function returning the
+            chunk, or a device streaming it, when the request is sent
+        :type chunk: bytes, bytearray or typing.Callable
+
+        :param content_length: Size of the chunk, required when the chunk
+            is read when the request is sent
+        :type content_length: int
 
-        :param on_download_progress: callback for download progress signal
-        :type on_download_progress: any
+        :return: asynchronous request
+        :rtype: CplusApiReply
         """
+        if content_length is None:
+            content_length = len(chunk)
+        request = QNetworkRequest(QtCore.QUrl(url))
+        request.setHeader(QNetworkRequest.ContentTypeHeader, "application/octet-stream")
+        request.setHeader(QNetworkRequest.ContentLengthHeader, content_length)
+        if url.startswith("http://"):
+            # add header for minio host in local env
+            request.setRawHeader(
+                self._get_raw_header_value("Host"),
+                self._get_raw_header_value("minio:9000"),
+            )
+        return CplusApiReply("PUT", request, chunk, self._request_timeout())
+
+    def upload_part_result(self, reply: CplusApiReply, file_part_number: int) -> dict:
+        """Get the part number and ETag of a finished chunk upload.
 
-        feedback = QgsProcessingFeedback()
-        params = {"URL": url, "OUTPUT": file_path}
-        feedback.progressChanged.connect(on_download_progress)
+        :param reply: finished upload request
+        :type reply: CplusApiReply
 
-        processing.run("qgis:filedownloader", params, feedback=feedback)
+        :param file_part_number: File part number
+        :type file_part_number: int
+
+        :raises Exception: raises when there is Network Error
+        :return: Dictionary of part_number and etag
+
+        :rtype: dict
+        """
+        self._check_reply(reply)
+        response = {}
+        if reply.reply.error() == QNetworkReply.NoError:
+            etag = reply.reply.rawHeader(b"ETag")
+            response = {
+                "part_number": file_part_number,
+                "etag": etag.data().decode("utf-8"),
+            }
+            debug_log("Upload chunk finished:", response)
+            reply.reply.deleteLater()
+        else:
+            reply.reply.deleteLater()
+            raise Exception(f"Network Error: {reply.reply.errorString()}")
+        return response
 
     def _do_upload_file_part(
         self, url: str, chunk: typing.Union[bytes, bytearray], file_part_number: int
@@ -657,31 +2075,9 @@ class CplusApiRequest:
 
         :rtype: dict
         """
-        nam = QgsNetworkAccessManager.instance()
-        request = QNetworkRequest(QtCore.QUrl(url))
-        request.setHeader(QNetworkRequest.ContentTypeHeader, "application/octet-stream")
-        request.setHeader(QNetworkRequest.ContentLengthHeader, len(chunk))
-        if url.startswith("http://"):
-            # add header for minio host in local env
-            request.setRawHeader(
-                self._get_raw_header_value("Host"),
-                self._get_raw_header_value("minio:9000"),
-            )
-        reply = nam.put(request, chunk)
-        self._make_request(reply)
-        response = {}
-        if reply.error() == QNetworkReply.NoError:
-            etag = reply.rawHeader(b"ETag")
-            response = {
-                "part_number": file_part_number,
-                "etag": etag.data().decode("utf-8"),
-            }
-            debug_log("Upload chunk finished:", response)
-            reply.deleteLater()
-        else:
-            reply.deleteLater()
-            raise Exception(f"Network Error: {reply.errorString()}")
-        return response
+        reply = self.create_upload_part_reply(url, chunk)
+        self.send_requests([reply])
+        return self.upload_part_result(reply, file_part_number)
 
     def upload_file_part(
         self,
@@ -724,6 +2120,154 @@ class CplusApiRequest:
                     raise
         return None
 
+    def upload_parts(
+        self,
+        parts: typing.List[UploadPart],
+        on_part_uploaded: typing.Callable[[UploadPart, dict], None] = None,
+        is_cancelled: typing.Callable[[], bool] = None,
+        max_retries: int = 5,
+        more_parts: typing.Callable[
+            [], typing.Optional[typing.List[UploadPart]]
+        ] = None,
+    ) -> typing.List[dict]:
+        """Upload file parts concurrently, keeping at most the maximum
+        number of concurrent requests in flight across all the files.
+
+        The parts are streamed from memory-mapped files once their request
+        is sent, so they are never copied as a whole into memory. Parts that
+        fail are retried together using exponential backoff.
+
+        :param parts: File parts to be uploaded
+        :type parts: typing.List[UploadPart]
+
+        :param on_part_uploaded: Function called with the part and its
+            part_number and etag dictionary once the part has been uploaded
+        :type on_part_uploaded: typing.Callable
+
+        :param is_cancelled: Function that returns True when the upload
+            should be cancelled
+        :type is_cancelled: typing.Callable[[], bool]
+
+        :param max_retries: Maximum retries in exponential backoff, defaults to 5
+        :type max_retries: int, optional
+
+        :param more_parts: Function polled while the parts are uploaded that
+            returns parts that have become ready to be uploaded, e.g. once
+            their file has been compressed, or None when there will be no
+            more parts
+        :type more_parts: typing.Callable
+
+        :raises CplusApiRequestError: raises when a part could not be
+            uploaded after the maximum retries
+
+        :return: List of part_number and etag dictionaries of the uploaded
+            parts, in the same order as the parts
+        :rtype: typing.List[dict]
+        """
+        with UploadFileReader() as reader:
+            return self._upload_parts(
+                parts, reader, on_part_uploaded, is_cancelled, max_retries, more_parts
+            )
+
+    def _upload_parts(
+        self,
+        parts: typing.List[UploadPart],
+        reader: UploadFileReader,
+        on_part_uploaded: typing.Callable[[UploadPart, dict], None],
+        is_cancelled: typing.Callable[[], bool],
+        max_retries: int,
+        more_parts: typing.Callable[[], typing.Optional[typing.List[UploadPart]]],
+    ) -> typing.List[dict]:
+        """Upload file parts concurrently, see upload_parts.
+
+        :param parts: File parts to be uploaded
+        :type parts: typing.List[UploadPart]
+
+        :param reader: Reader of the file parts
+        :type reader: UploadFileReader
+
+        :param on_part_uploaded: Function called once a part has been uploaded
+        :type on_part_uploaded: typing.Callable
+
+        :param is_cancelled: Function that returns True when the upload
+            should be cancelled
+        :type is_cancelled: typing.Callable[[], bool]
+
+        :param max_retries: Maximum retries in exponential backoff
+        :type max_retries: int
+
+        :param more_parts: Function polled for parts that have become ready
+            to be uploaded, returns None when there will be no more parts
+        :type more_parts: typing.Callable
+
+        :return: List of part_number and etag dictionaries of the uploaded parts
+        :rtype: typing.List[dict]
+        """
+        uploaded = {}
+        all_parts = list(parts)
+        remaining = list(parts)
+        retries = 0
+        while remaining or more_parts is not None:
+            failed = []
+
+            def on_finished(reply: CplusApiReply, part: UploadPart):
+                if reply.cancelled:
+                    return
+                try:
+                    part_item = self.upload_part_result(reply, part.part_number)
+                except Exception as e:
+                    log(f"Upload of part {part.part_number} failed: {e}")
+                    failed.append(part)
+                    return
+                uploaded[id(part)] = part_item
+                if on_part_uploaded:
+                    on_part_uploaded(part, part_item)
+
+            def create_replies(
+                upload_parts: typing.List[UploadPart],
+            ) -> typing.List[CplusApiReply]:
+                replies = []
+                for part in upload_parts:
+                    reply = self.create_upload_part_reply(
+                        part.url,
+                        functools.partial(reader.device, part),
+                        part.size,
+                    )
+                    reply.add_done_callback(functools.partial(on_finished, part=part))
+                    replies.append(reply)
+                return replies
+
+            def more_replies():
+                new_parts = more_parts()
+                if new_parts is None:
+                    return None
+                all_parts.extend(new_parts)
+                return create_replies(new_parts)
+
+            self.send_requests(
+                create_replies(remaining),
+                is_cancelled=is_cancelled,
+                more_replies=more_replies if more_parts is not None else None,
+            )
+            # parts that become available are only polled in the first round
+            more_parts = None
+            if is_cancelled is not None and is_cancelled():
+                break
+            if failed:
+                retries += 1
+                if retries >= max_retries:
+                    log("Max retries exceeded.")
+                    raise CplusApiRequestError(
+                        f"Unable to upload {len(failed)} part(s) of "
+                        f"{failed[0].file_path}"
+                    )
+                delay = 2**retries
+                log(f"Retrying {len(failed)} part(s) in {delay} seconds...")
+                time.sleep(delay)
+            remaining = failed
+
+        return [uploaded[id(part)] for part in all_parts if id(part) in uploaded]
+
     def _default_headers(self) -> dict:
         """Get default headers for Cplus API requests.
 
@@ -997,7 +2541,7 @@ class CplusApiRequest:
         :rtype: CplusApiPooling
         """
         url = self.urls.scenario_status(scenario_uuid)
-        return CplusApiPooling(self, url)
+        return CplusApiPooling(self, url, scenario_uuid=scenario_uuid)
 
     def cancel_scenario(self, scenario_uuid: str) -> bool:
         """Cancel scenario execution.
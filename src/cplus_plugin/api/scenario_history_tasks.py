@@ -11,7 +11,12 @@ from typing import List
 from qgis.PyQt import QtCore
 
 from .base import BaseScenarioTask
-from .request import CplusApiRequest, CplusApiRequestError
+from .output_placeholders import fetch_placeholder_outputs
+from .request import (
+    CplusApiRequest,
+    CplusApiRequestError,
+    scenario_status_poller,
+)
 from .scenario_task_api_client import ScenarioAnalysisTaskApiClient
 from ..conf import settings_manager
 from ..models.base import Scenario
@@ -126,6 +131,65 @@ class DeleteScenarioTask(BaseScenarioTask):
         self.task_finished.emit(is_success)
 
 
+class FetchScenarioOutputFilesTask(BaseScenarioTask):
+    """Task to download the online scenario outputs that have only been
+    registered as placeholders.
+    """
+
+    def __init__(self, scenario_directory: str, paths: List[str]):
+        """Initialize the task.
+
+        :param scenario_directory: Scenario output directory
+        :type scenario_directory: str
+
+        :param paths: Paths of the outputs to download
+        :type paths: List[str]
+        """
+        super().__init__()
+        self.scenario_directory = scenario_directory
+        self.paths = paths
+        self.downloaded_paths = []
+
+    def run(self):
+        """Execute the task logic.
+
+        :return: True if all the outputs have been downloaded
+        :rtype: bool
+        """
+        try:
+            self.downloaded_paths = fetch_placeholder_outputs(
+                self.scenario_directory,
+                self.paths,
+                self.request,
+                on_download_progress=self._on_download_progress,
+                is_cancelled=self.isCanceled,
+            )
+            return len(self.downloaded_paths) == len(self.paths)
+        except Exception as ex:
+            log(f"Error during fetch scenario output files: {ex}", info=False)
+            return False
+
+    def _on_download_progress(self, downloaded: int, total: int):
+        """Update the task progress.
+
+        :param downloaded: Downloaded bytes
+        :type downloaded: int
+
+        :param total: Total size of the outputs
+        :type total: int
+        """
+        if total > 0:
+            self.setProgress(downloaded * 100 / total)
+
+    def finished(self, is_success):
+        """Handler when task has been executed.
+
+        :param is_success: True if task runs successfully.
+        :type is_success: bool
+        """
+        self.task_finished.emit(is_success)
+
+
 class FetchScenarioOutputTask(ScenarioAnalysisTaskApiClient):
     """Fetch scenario output from API."""
 
@@ -259,9 +323,15 @@ class FetchOnlineTaskStatusTask(FetchScenarioHistoryTask):
 
         if online_task:
             try:
-                status_response = self.request.fetch_scenario_detail(
+                # Reuse the status fetched by the shared poller when the
+                # scenario is already being polled
+                status_response = scenario_status_poller.latest_status(
                     online_task.server_uuid
                 )
+                if status_response is None:
+                    status_response = self.request.fetch_scenario_detail(
+                        online_task.server_uuid
+                    )
                 self.task_status = status_response["status"]
             except CplusApiRequestError:
                 self.task_status = "Error"
@@ -1,8 +1,10 @@
 import concurrent.futures
 import json
 import os
+import tempfile
 import traceback
 import typing
+import uuid
 from zipfile import ZipFile
 
 from qgis.core import Qgis
@@ -12,12 +14,27 @@ from .request import (
     JOB_COMPLETED_STATUS,
     JOB_STOPPED_STATUS,
     CHUNK_SIZE,
+    FileDownload,
+    UploadPart,
+    create_upload_parts,
 )
 from ..api.base import BaseFetchScenarioOutput
 from ..conf import settings_manager, Settings
+from ..lib.upload_index import (
+    UploadedLayerIndex,
+    UPLOAD_CACHE_DIRECTORY_NAME,
+    UPLOAD_INDEX_FILE_NAME,
+)
 from ..models.base import Activity, NcsPathway, Scenario
 from ..tasks import ScenarioAnalysisTask
-from ..utils import FileUtils, CustomJsonEncoder, todict
+from ..utils import (
+    FileUtils,
+    CustomJsonEncoder,
+    compress_raster,
+    convert_size,
+    get_layer_type,
+    todict,
+)
 
 
 def clean_filename(filename):
@@ -83,6 +100,9 @@ class ScenarioAnalysisTaskApiClient(ScenarioAnalysisTask, BaseFetchScenarioOutpu
         self.total_file_upload_chunks = 0
         self.uploaded_chunks = 0
         self.path_to_layer_mapping = {}
+        self.resumable_uploads = {}
+        self.upload_index = None
+        self.content_hashes = {}
         self.scenario_api_uuid = None
         self.status_pooling = None
         self.logs = []
@@ -120,6 +140,10 @@ class ScenarioAnalysisTaskApiClient(ScenarioAnalysisTask, BaseFetchScenarioOutpu
             for identifier, layer in layer_mapping.items():
                 if "upload_id" not in layer:
                     continue
+                if self.error is not None and layer.get("upload_urls"):
+                    # Keep the uploaded parts so that the upload is resumed
+                    # in the next run
+                    continue
                 self.log_message(f"Cancelling upload file: {layer['path']} ")
                 try:
                     self.request.abort_upload_layer(layer["uuid"], layer["upload_id"])
@@ -179,8 +203,12 @@ class ScenarioAnalysisTaskApiClient(ScenarioAnalysisTask, BaseFetchScenarioOutpu
             return False
         return not self.processing_cancelled
 
-    def run_upload(self, file_path, component_type) -> typing.Dict:
-        """Upload a file as component type to the S3.
+    def start_upload(
+        self, file_path: str, component_type: str, upload_path: str = None
+    ) -> typing.Dict:
+        """Start the multipart upload of a file or resume its interrupted
+        upload. The upload state, including the ETags of the uploaded
+        parts, is stored in the layer mapping.
 
         :param file_path: Path of the file to be uploaded
         :type file_path: str
@@ -188,67 +216,118 @@ class ScenarioAnalysisTaskApiClient(ScenarioAnalysisTask, BaseFetchScenarioOutpu
         :param component_type: Input layer type of the upload file (ncs_pathway, ncs_carbon, etc.)
         :type component_type: str
 
-        :return: result, containing UUID of the uploaded file, size, and final filename
+        :param upload_path: Path of the file whose content is uploaded e.g.
+            the compressed copy of the file, defaults to the file path
+        :type upload_path: str
+
+        :return: Upload state containing the layer UUID, upload ID,
+            presigned URLs and the uploaded parts
         :rtype: typing.Dict
         """
+        if file_path in self.resumable_uploads:
+            upload = self.resumable_uploads[file_path]
+            self.log_message(
+                f"Resuming upload of {file_path} as {component_type}, "
+                f"{len(upload['parts'])} part(s) already uploaded"
+            )
+            return upload
 
+        upload_path = upload_path or file_path
         self.log_message(f"Uploading {file_path} as {component_type}")
-        upload_params = self.request.start_upload_layer(file_path, component_type)
-        upload_id = upload_params["multipart_upload_id"]
-        layer_uuid = upload_params["uuid"]
-        upload_urls = upload_params["upload_urls"]
-        if self.processing_cancelled:
-            return False
+        upload_params = self.request.start_upload_layer(upload_path, component_type)
+        file_stat = os.stat(file_path)
         # store temporary layer
-        temp_layer = {
-            "uuid": layer_uuid,
-            "size": os.stat(file_path).st_size,
-            "name": os.path.basename(file_path),
-            "upload_id": upload_id,
+        upload = {
+            "uuid": upload_params["uuid"],
+            "size": file_stat.st_size,
+            "mtime": file_stat.st_mtime,
+            "name": os.path.basename(upload_path),
+            "upload_id": upload_params["multipart_upload_id"],
+            "upload_urls": upload_params["upload_urls"],
+            "parts": [],
             "path": file_path,
+            "upload_path": upload_path,
         }
-        settings_manager.save_layer_mapping(temp_layer)
+        settings_manager.save_layer_mapping(upload)
+        return upload
 
-        # do upload by chunks
-        items = []
-        idx = 0
-        with open(file_path, "rb") as f:
-            while True:
-                if self.processing_cancelled:
-                    break
-                chunk = f.read(CHUNK_SIZE)
-                if not chunk:
-                    break
-                url_item = upload_urls[idx]
-                part_item = self.request.upload_file_part(
-                    url_item["url"], chunk, url_item["part_number"]
-                )
-                if part_item:
-                    items.append(part_item)
-                else:
-                    raise Exception(
-                        f"Error while uploading {file_path} as " f"{component_type}"
-                    )
-                self.uploaded_chunks += 1
-                self._update_scenario_status(
-                    {
-                        "progress_text": "Uploading layers with concurrent request",
-                        "progress": int(
-                            (self.uploaded_chunks / self.total_file_upload_chunks) * 100
-                        ),
-                    }
-                )
-                idx += 1
+    def compress_upload_file(self, file_path: str) -> str:
+        """Compress a raster before it is uploaded. The compressed copy is
+        kept, keyed by the content of the raster, until the upload has
+        finished so that an interrupted upload can be resumed.
 
-        # finish upload
-        result = {"uuid": None}
-        if self.processing_cancelled:
-            return result
-        result = self.request.finish_upload_layer(layer_uuid, upload_id, items)
-        return result
+        :param file_path: Path of the raster to be uploaded
+        :type file_path: str
+
+        :return: Path of the compressed raster, or the raster path if it is
+            already compressed or the compression failed
+        :rtype: str
+        """
+        base_dir = self.get_settings_value(Settings.BASE_DIR) or tempfile.gettempdir()
+        file_key = self._content_hash(file_path) or uuid.uuid4().hex
+        output_dir = os.path.join(base_dir, UPLOAD_CACHE_DIRECTORY_NAME, file_key)
+        output_path = os.path.join(output_dir, os.path.basename(file_path))
+        if os.path.exists(output_path):
+            return output_path
+
+        FileUtils.create_new_dir(output_dir)
+        partial_path = os.path.join(
+            output_dir, f"partial_{os.path.basename(file_path)}"
+        )
+        compressed_path = compress_raster(file_path, partial_path)
+        if compressed_path is None or compressed_path == file_path:
+            return file_path
+
+        os.replace(compressed_path, output_path)
+        self.log_message(
+            f"Compressed {file_path} from "
+            f"{convert_size(os.stat(file_path).st_size)} "
+            f"to {convert_size(os.stat(output_path).st_size)}"
+        )
+        return output_path
+
+    def compression_worker_count(self, raster_count: int) -> int:
+        """Gets the number of workers compressing the rasters to be uploaded.
+
+        :param raster_count: Number of rasters to be compressed
+        :type raster_count: int
+
+        :return: Number of workers, at least one and at most the number
+            of rasters
+        :rtype: int
+        """
+        worker_count = int(
+            self.get_settings_value(
+                Settings.UPLOAD_COMPRESSION_WORKER_COUNT, default=0, setting_type=int
+            )
+            or 0
+        )
+        if worker_count <= 0:
+            worker_count = os.cpu_count() or 1
+
+        return max(1, min(worker_count, raster_count))
+
+    def run_upload(self, file_path, component_type) -> typing.Dict:
+        """Upload a file as component type to the S3.
+
+        :param file_path: Path of the file to be uploaded
+        :type file_path: str
+
+        :param component_type: Input layer type of the upload file (ncs_pathway, ncs_carbon, etc.)
+        :type component_type: str
+
+        :return: result, containing UUID of the uploaded file, size, and final filename
+        :rtype: typing.Dict
+        """
+        return self.run_parallel_upload({file_path: component_type})[0]
 
     def run_parallel_upload(self, upload_dict) -> typing.List[typing.Dict]:
-        """Upload file concurrently using ThreadPoolExecutor
+        """Upload the parts of all the files concurrently, keeping at most
+        the maximum number of concurrent API requests in flight.
+
+        Rasters are compressed in a worker pool first and the upload of each
+        raster starts as soon as its compression has finished. Parts
+        confirmed in a previous, interrupted upload are skipped.
 
         :param upload_dict: Dictionary with file path as key and component type
         (ncs_pathway, ncs_carbon, etc.) as value.
@@ -265,17 +344,136 @@ class ScenarioAnalysisTaskApiClient(ScenarioAnalysisTask, BaseFetchScenarioOutpu
                 "progress": 0,
             }
         )
-        file_paths = list(upload_dict.keys())
-        component_types = list(upload_dict.values())
 
+        compression_enabled = self.get_settings_value(
+            Settings.UPLOAD_COMPRESSION_ENABLED, default=True, setting_type=bool
+        )
+        rasters_to_compress = [
+            file_path
+            for file_path in upload_dict
+            if compression_enabled
+            and get_layer_type(file_path) == 0
+            and file_path not in self.resumable_uploads
+        ]
+
+        uploads = {}
+        uploads_by_path = {}
+        compressions = {}
+        executor = None
+        if rasters_to_compress:
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.compression_worker_count(len(rasters_to_compress))
+            )
+            for file_path in rasters_to_compress:
+                future = executor.submit(self.compress_upload_file, file_path)
+                compressions[future] = file_path
+
+        def pending_parts(upload: dict) -> typing.List[UploadPart]:
+            upload_path = upload.get("upload_path", upload["path"])
+            uploads[upload["path"]] = upload
+            uploads_by_path[upload_path] = upload
+            uploaded_parts = {item["part_number"] for item in upload["parts"]}
+            self.uploaded_chunks += len(uploaded_parts)
+            return [
+                part
+                for part in create_upload_parts(upload_path, upload["upload_urls"])
+                if part.part_number not in uploaded_parts
+            ]
+
+        def compressed_parts() -> typing.Optional[typing.List[UploadPart]]:
+            if not compressions:
+                return None
+            parts = []
+            # Called from the poll timer of the requests, errors are logged
+            # instead of being raised in the event loop
+            for future in [future for future in compressions if future.done()]:
+                file_path = compressions.pop(future)
+                try:
+                    upload_path = future.result()
+                except Exception as e:
+                    self.log_message(
+                        f"Problem compressing {file_path}, "
+                        f"the original file will be uploaded, {e}"
+                    )
+                    upload_path = file_path
+                # account for the size of the compressed file in the progress
+                self.total_file_upload_chunks += (
+                    os.stat(upload_path).st_size - os.stat(file_path).st_size
+                ) / CHUNK_SIZE
+                try:
+                    upload = self.start_upload(
+                        file_path, upload_dict[file_path], upload_path
+                    )
+                except Exception as e:
+                    self.log_message(f"Upload of {file_path} failed, {e}")
+                    continue
+                parts.extend(pending_parts(upload))
+            return parts
+
+        def on_part_uploaded(part: UploadPart, part_item: dict):
+            upload = uploads_by_path[part.file_path]
+            upload["parts"].append(part_item)
+            settings_manager.save_layer_mapping(upload)
+            self.uploaded_chunks += 1
+            self._update_scenario_status(
+                {
+                    "progress_text": "Uploading layers with concurrent request",
+                    "progress": int(
+                        (self.uploaded_chunks / self.total_file_upload_chunks) * 100
+                    ),
+                }
+            )
+
+        try:
+            parts = []
+            for file_path, component_type in upload_dict.items():
+                if file_path in rasters_to_compress:
+                    continue
+                if self.processing_cancelled:
+                    return [{"uuid": None} for _ in upload_dict]
+                parts.extend(
+                    pending_parts(self.start_upload(file_path, component_type))
+                )
+
+            self.request.upload_parts(
+                parts,
+                on_part_uploaded,
+                is_cancelled=lambda: self.processing_cancelled,
+                more_parts=compressed_parts if compressions else None,
+            )
+        except Exception:
+            for file_path, upload in uploads.items():
+                if file_path in self.resumable_uploads:
+                    # The presigned URLs may have expired, restart the
+                    # upload in the next run instead of resuming it again
+                    upload.pop("upload_urls", None)
+                    settings_manager.save_layer_mapping(upload)
+            raise
+        finally:
+            if executor is not None:
+                for future in compressions:
+                    future.cancel()
+                executor.shutdown(wait=True)
+
+        # finish upload
         final_result = []
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=3 if os.cpu_count() > 3 else 1
-        ) as executor:
-            final_result.extend(
-                list(executor.map(self.run_upload, file_paths, component_types))
+        for file_path in upload_dict:
+            upload = uploads.get(file_path)
+            if self.processing_cancelled or upload is None:
+                final_result.append({"uuid": None})
+                continue
+            items = sorted(upload["parts"], key=lambda item: item["part_number"])
+            result = self.request.finish_upload_layer(
+                upload["uuid"], upload["upload_id"], items
             )
-        return list(final_result)
+            upload_path = upload.get("upload_path", file_path)
+            if result.get("uuid") and upload_path != file_path:
+                try:
+                    os.remove(upload_path)
+                except OSError as e:
+                    self.log_message(f"Unable to remove {upload_path}, {e}")
+            final_result.append(result)
+        return final_result
 
     def __zip_shapefiles(self, shapefile_path: str) -> str:
         """Zip shapefiles to an object with same name.
@@ -315,6 +513,7 @@ class ScenarioAnalysisTaskApiClient(ScenarioAnalysisTask, BaseFetchScenarioOutpu
         """
 
         files_to_upload = {}
+        self.upload_index = self.get_upload_index()
 
         self._update_scenario_status(
             {"progress_text": "Checking layers to be uploaded", "progress": 0}
@@ -413,40 +612,86 @@ class ScenarioAnalysisTaskApiClient(ScenarioAnalysisTask, BaseFetchScenarioOutpu
         if self.processing_cancelled:
             return False
 
-        self.total_file_upload_size = sum(os.stat(fp).st_size for fp in files_to_upload)
+        # Upload identical contents only once, preferring resumable uploads
+        unique_files = {}
+        duplicate_files = {}
+        hash_to_path = {}
+        for file_path in sorted(
+            files_to_upload, key=lambda path: path not in self.resumable_uploads
+        ):
+            file_hash = self._content_hash(file_path)
+            if file_hash and file_hash in hash_to_path:
+                duplicate_files[file_path] = hash_to_path[file_hash]
+                continue
+            if file_hash:
+                hash_to_path[file_hash] = file_path
+            unique_files[file_path] = files_to_upload[file_path]
+
+        self.total_file_upload_size = sum(os.stat(fp).st_size for fp in unique_files)
         self.total_file_upload_chunks = self.total_file_upload_size / CHUNK_SIZE
-        final_results = self.run_parallel_upload(files_to_upload)
+        final_results = self.run_parallel_upload(unique_files)
 
         if self.processing_cancelled:
             return False
 
         new_uploaded_layer = {}
+        for file_path, res in zip(unique_files, final_results):
+            if res.get("uuid") is None:
+                continue
+            res["path"] = file_path
+            file_hash = self.content_hashes.get(file_path)
+            if file_hash:
+                res["content_hash"] = file_hash
+                self.upload_index.add(
+                    file_hash,
+                    {key: res.get(key) for key in ("uuid", "name", "size")},
+                )
+            new_uploaded_layer[file_path] = res
 
-        if len(files_to_upload) == 0:
-            self._update_scenario_status(
-                {"progress_text": "All layers have been uploaded", "progress": 100}
-            )
-        else:
-            for file_path in files_to_upload:
-                filename_without_ext = ".".join(
-                    os.path.basename(file_path).split(".")[0:-1]
+        for file_path, uploaded_path in duplicate_files.items():
+            if uploaded_path in new_uploaded_layer:
+                new_uploaded_layer[file_path] = dict(
+                    new_uploaded_layer[uploaded_path], path=file_path
                 )
-                for res in final_results:
-                    if res["uuid"] is None:
-                        continue
-                    if res["name"].startswith(filename_without_ext):
-                        res["path"] = file_path
-                        new_uploaded_layer[file_path] = res
-                        break
-            self._update_scenario_status(
-                {"progress_text": "All layers have been uploaded", "progress": 100}
-            )
+
+        self._update_scenario_status(
+            {"progress_text": "All layers have been uploaded", "progress": 100}
+        )
 
         for uploaded_layer in new_uploaded_layer.values():
             identifier = uploaded_layer["path"].replace(os.sep, "--")
             self.path_to_layer_mapping[uploaded_layer["path"]] = uploaded_layer
             settings_manager.save_layer_mapping(uploaded_layer, identifier)
 
+        if self.upload_index is not None:
+            self.upload_index.save()
+
+    def _can_resume_upload(self, layer_path: str, layer_mapping: dict) -> bool:
+        """Check whether an unfinished upload can be resumed, i.e. its
+        presigned URLs are available and the file has not changed since the
+        upload started.
+
+        :param layer_path: Path of the file being uploaded
+        :type layer_path: str
+
+        :param layer_mapping: Layer mapping of the unfinished upload
+        :type layer_mapping: dict
+
+        :return: True if the upload can be resumed
+        :rtype: bool
+        """
+        if not layer_mapping.get("upload_urls") or "parts" not in layer_mapping:
+            return False
+        if layer_mapping.get("path") != layer_path or not os.path.exists(layer_path):
+            return False
+        if not os.path.exists(layer_mapping.get("upload_path", layer_path)):
+            return False
+        file_stat = os.stat(layer_path)
+        return (
+            layer_mapping.get("size") == file_stat.st_size
+            and layer_mapping.get("mtime") == file_stat.st_mtime
+        )
+
     def check_layer_uploaded(self, items_to_check: typing.List[dict]) -> dict:
         """Check whether a layer has been uploaded to CPLUS API
 
@@ -467,26 +712,104 @@ class ScenarioAnalysisTaskApiClient(ScenarioAnalysisTask, BaseFetchScenarioOutpu
                 existing_uuid = uploaded_layer_dict.get("uuid", None)
                 if existing_upload_id and existing_uuid:
                     # if upload_id exists, then upload is not finished
-                    try:
-                        self.request.abort_upload_layer(
-                            existing_uuid, existing_upload_id
-                        )
-                    except Exception as ex:
-                        pass
+                    if self._can_resume_upload(layer_path, uploaded_layer_dict):
+                        self.resumable_uploads[layer_path] = uploaded_layer_dict
+                    else:
+                        try:
+                            self.request.abort_upload_layer(
+                                existing_uuid, existing_upload_id
+                            )
+                        except Exception as ex:
+                            pass
                     output[layer_path] = items_to_check[layer_path]
-                if layer_path == uploaded_layer_dict["path"]:
-                    uuid_to_path[uploaded_layer_dict["uuid"]] = layer_path
-                    self.path_to_layer_mapping[layer_path] = uploaded_layer_dict
-            else:
+                    continue
+
+            # Layers with the same content are reused regardless of the path
+            file_hash = self._content_hash(layer_path)
+            indexed_layer = self.upload_index.get(file_hash) if file_hash else None
+            if indexed_layer:
+                indexed_layer["path"] = layer_path
+                uploaded_layer_dict = indexed_layer
+            elif not uploaded_layer_dict or not self._is_same_content(
+                uploaded_layer_dict, layer_path, file_hash
+            ):
                 output[layer_path] = items_to_check[layer_path]
+                continue
+
+            uuid_to_path.setdefault(uploaded_layer_dict["uuid"], []).append(layer_path)
+            self.path_to_layer_mapping[layer_path] = uploaded_layer_dict
+
         layer_check_result = self.request.check_layer(list(uuid_to_path))
         for layer_uuid in (
             layer_check_result["unavailable"] + layer_check_result["invalid"]
         ):
-            layer_path = uuid_to_path[layer_uuid]
-            output[layer_path] = items_to_check[layer_path]
+            for layer_path in uuid_to_path[layer_uuid]:
+                output[layer_path] = items_to_check[layer_path]
+                self.path_to_layer_mapping.pop(layer_path, None)
+                file_hash = self.content_hashes.get(layer_path)
+                indexed_layer = self.upload_index.get(file_hash) if file_hash else None
+                if indexed_layer and indexed_layer.get("uuid") == layer_uuid:
+                    self.upload_index.remove(file_hash)
         return output
 
+    def get_upload_index(self) -> typing.Optional[UploadedLayerIndex]:
+        """Gets the content index of the uploaded layers.
+
+        :return: Uploaded layers index or None if neither the index path
+            nor the base directory have been set
+        :rtype: UploadedLayerIndex
+        """
+        index_path = self.get_settings_value(Settings.UPLOAD_INDEX_PATH, default="")
+        if not index_path:
+            base_dir = self.get_settings_value(Settings.BASE_DIR)
+            if not base_dir:
+                return None
+            index_path = os.path.join(base_dir, UPLOAD_INDEX_FILE_NAME)
+        return UploadedLayerIndex(index_path)
+
+    def _content_hash(self, layer_path: str) -> typing.Optional[str]:
+        """Get the hash of the contents of a layer file.
+
+        :param layer_path: Path of the layer file
+        :type layer_path: str
+
+        :return: Content hash or None if there is no uploaded layers index
+        :rtype: str
+        """
+        if self.upload_index is None:
+            return None
+        if layer_path not in self.content_hashes:
+            self.content_hashes[layer_path] = self.upload_index.content_hash(layer_path)
+        return self.content_hashes[layer_path]
+
+    def _is_same_content(
+        self, layer_mapping: dict, layer_path: str, file_hash: str = None
+    ) -> bool:
+        """Check whether the uploaded layer in a layer mapping has the
+        current content of the layer file.
+
+        :param layer_mapping: Layer mapping of the uploaded layer
+        :type layer_mapping: dict
+
+        :param layer_path: Path of the layer file
+        :type layer_path: str
+
+        :param file_hash: Hash of the contents of the layer file
+        :type file_hash: str
+
+        :return: True if the uploaded layer has the same content, False if
+            the content differs or the mapping has no content hash
+        :rtype: bool
+        """
+        if layer_mapping.get("path") != layer_path:
+            return False
+        # Mappings saved without a content hash cannot tell an edited file
+        # of the same size apart, the layer is uploaded again so that its
+        # content hash is recorded
+        if not file_hash or not layer_mapping.get("content_hash"):
+            return False
+        return layer_mapping["content_hash"] == file_hash
+
     def build_scenario_detail_json(self) -> None:
         """Build scenario detail JSON to be sent to CPLUS API"""
 
@@ -750,57 +1073,42 @@ class ScenarioAnalysisTaskApiClient(ScenarioAnalysisTask, BaseFetchScenarioOutpu
             "updated_detail"
         ]["priority_layer_groups"]
 
-    def _on_download_file_progress(self, downloaded: int, total: int):
-        """Callback to update download file progreses
+    def is_download_cancelled(self) -> bool:
+        """Check if the download of the outputs has been cancelled.
 
-        :param downloaded: total bytes of downloaded file
-        :type downloaded: int
-        :param total: size of downloaded file
-        :type total: int
+        :return: True if the task has been cancelled
+        :rtype: bool
         """
-        part = (downloaded * 100 / total) if total > 0 else 0
-        downloaded_output = self.downloaded_output + part
-        self._update_scenario_status(
-            {
-                "progress_text": "Downloading output files",
-                "progress": int((downloaded_output / self.total_file_output) * 90) + 5,
-            }
-        )
+        return self.processing_cancelled or self.isCanceled()
 
-    def _download_progress(self, value):
-        """Tracks the download progress of value and updates
-        the info message when the download has finished
+    def on_download_progress(self, downloaded: int, total: int):
+        """Callback to update the progress of the output downloads.
 
-        :param value: Download progress value
-        :type value: int
+        :param downloaded: downloaded bytes
+        :type downloaded: int
+        :param total: total size of the outputs whose size is known
+        :type total: int
         """
+        part = (downloaded / total) if total > 0 else 0
         self._update_scenario_status(
             {
                 "progress_text": "Downloading output files",
-                "progress": value,
+                "progress": int(part * 90) + 5,
             }
         )
 
-    def download_file(self, url: str, local_filename: str) -> None:
-        """Download an output file from S3 to the local destination
+    def on_output_downloaded(self, download: FileDownload):
+        """Callback when an output file has been downloaded.
 
-        :param url: URL of the file to download
-        :type url: str
-        :param local_filename: str
-        :type local_filename: str
+        :param download: downloaded output file
+        :type download: FileDownload
         """
-        parent_dir = os.path.dirname(local_filename)
-        if not os.path.exists(parent_dir):
-            os.makedirs(parent_dir)
-        self.request.download_file(url, local_filename, self._download_progress)
-        self.downloaded_output += 1
-        self._update_scenario_status(
-            {
-                "progress_text": "Downloading output files",
-                "progress": int((self.downloaded_output / self.total_file_output) * 90)
-                + 5,
-            }
-        )
+        super().on_output_downloaded(download)
+        if download.priority > 0:
+            self.set_status_message(
+                "Scenario output downloaded, downloading the other outputs"
+            )
+            self.log_message(f"Scenario output downloaded to {download.file_path}")
 
     def delete_online_task(self):
         running_online_scenario_uuid = settings_manager.get_running_online_scenario()
@@ -829,6 +1137,7 @@ class ScenarioAnalysisTaskApiClient(ScenarioAnalysisTask, BaseFetchScenarioOutpu
             self.new_scenario_detail["updated_detail"],
             output_list,
             self.scenario_directory,
+            server_uuid=scenario_uuid,
         )
         if updated_scenario is None:
             raise Exception("Failed download scenario outputs!")
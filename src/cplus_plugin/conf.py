@@ -4,11 +4,14 @@
 """
 
 import contextlib
+import copy
 import dataclasses
 import datetime
 import enum
 import json
 import os.path
+import sqlite3
+import threading
 import typing
 import uuid
 from pathlib import Path
@@ -31,6 +34,13 @@ from .definitions.constants import (
     UUID_ATTRIBUTE,
 )
 from .definitions.defaults import PRIORITY_LAYERS
+from .lib.settings_store import (
+    ONLINE_TASK_RUNNING,
+    SETTINGS_STORE_FILE_NAME,
+    STORE_DATE_FORMAT,
+    SettingsStore,
+    store_date,
+)
 from .models.base import (
     Activity,
     NcsPathway,
@@ -55,6 +65,10 @@ from .models.report import MetricConfiguration, MetricProfileCollection
 from .utils import log, todict, CustomJsonEncoder
 
 
+# Format of the created date of the scenario results in the settings
+SCENARIO_RESULT_DATE_FORMAT = "%Y_%m_%d_%H_%M_%S"
+
+
 @contextlib.contextmanager
 def qgis_settings(group_root: str, settings=None):
     """Context manager to help defining groups when creating QgsSettings.
@@ -96,9 +110,44 @@ class ScenarioSettings(Scenario):
         :rtype: ScenarioSettings
         """
 
-        activities_list = settings.value("activities", [])
-        server_uuid = settings.value("server_uuid", None)
+        return cls.from_values(
+            identifier,
+            settings.value("name", None),
+            settings.value("description", None),
+            settings.value("activities", []),
+            settings.value("server_uuid", None),
+        )
 
+    @classmethod
+    def from_values(
+        cls,
+        identifier: str,
+        name: str,
+        description: str,
+        activities_list: typing.List[str],
+        server_uuid: typing.Optional[str],
+    ):
+        """Creates a scenario settings instance from the saved values of
+        a scenario.
+
+        :param identifier: Scenario identifier
+        :type identifier: str
+
+        :param name: Scenario name
+        :type name: str
+
+        :param description: Scenario description
+        :type description: str
+
+        :param activities_list: JSON strings of the scenario activities
+        :type activities_list: list
+
+        :param server_uuid: UUID of the scenario in the server
+        :type server_uuid: str
+
+        :returns: Scenario settings object
+        :rtype: ScenarioSettings
+        """
         activities = []
 
         try:
@@ -125,8 +174,8 @@ class ScenarioSettings(Scenario):
 
         return cls(
             uuid=uuid.UUID(identifier),
-            name=settings.value("name", None),
-            description=settings.value("description", None),
+            name=name,
+            description=description,
             extent=[],
             activities=activities,
             priority_layer_groups=[],
@@ -200,6 +249,8 @@ class Settings(enum.Enum):
     RESCALE_VALUES = "snap_rescale"
     RESAMPLING_METHOD = "snap_method"
     SNAP_PIXEL_VALUE = "snap_pixel_value"
+    # Opt-in, snapped layers are copied to the analysis cache in the base directory
+    SNAP_CACHE_ENABLED = "snap_cache_enabled"
 
     # Sieve function parameters
     SIEVE_ENABLED = "sieve_enabled"
@@ -219,16 +270,60 @@ class Settings(enum.Enum):
 
     # Processing option
     PROCESSING_TYPE = "processing_type"
+    FUSED_ANALYSIS_ENABLED = "fused_analysis_enabled"
+    # Memory budget, in megabytes, for the block-wise analysis
+    ANALYSIS_MEMORY_BUDGET = "analysis_memory_budget"
+    # Use the windowed NumPy cell statistics and highest position kernels
+    WINDOWED_KERNELS_ENABLED = "windowed_kernels_enabled"
+    # Number of workers for running independent processing jobs concurrently
+    ANALYSIS_WORKER_COUNT = "analysis_worker_count"
+    # Reuse unchanged intermediate layers from previous runs
+    INCREMENTAL_ANALYSIS_ENABLED = "incremental_analysis_enabled"
+    # Maximum size of the intermediate layers cache in megabytes
+    INTERMEDIATE_CACHE_MAX_SIZE = "intermediate_cache_max_size"
+
+    # Reuse the metadata of unchanged datasets from previous validations
+    VALIDATION_CACHE_ENABLED = "validation_cache_enabled"
+
+    # Estimate the value range of datasets from stored statistics, overviews
+    # or sampled pixels when validating
+    APPROXIMATE_VALIDATION_STATISTICS = "approximate_validation_statistics"
 
     # REPORT OPTIONS
+    # Persist raster statistics in sidecar files next to the rasters
+    STATISTICS_SIDECAR_ENABLED = "statistics_sidecar_enabled"
     USE_CUSTOM_METRICS = "use_custom_metrics"
 
     # DEBUG
     DEBUG = "debug"
     BASE_API_URL = "base_api_url"
+    # Timeout, in seconds, without any data transfer before a request is aborted
+    API_REQUEST_TIMEOUT = "api/request_timeout"
+    # Maximum number of API requests in flight at the same time
+    API_MAX_CONCURRENT_REQUESTS = "api/max_concurrent_requests"
+    # Maximum interval, in seconds, between checks of an idle online scenario
+    API_STATUS_MAX_INTERVAL = "api/status_max_interval"
+    # Size, in bytes, of the ranges of the scenario outputs downloaded concurrently
+    API_DOWNLOAD_SEGMENT_SIZE = "api/download_segment_size"
+    # Only download the final output of online scenarios, the intermediate
+    # outputs are downloaded when they are first needed
+    LAZY_ONLINE_OUTPUTS = "api/lazy_online_outputs"
+    # Path of the index of uploaded layer contents, can be shared by machines
+    UPLOAD_INDEX_PATH = "api/upload_index_path"
+    # Compress rasters before they are uploaded
+    UPLOAD_COMPRESSION_ENABLED = "api/upload_compression_enabled"
+    # Number of workers compressing rasters before they are uploaded,
+    # the number of processors is used if zero
+    UPLOAD_COMPRESSION_WORKER_COUNT = "api/upload_compression_worker_count"
 
     ACTIVE_ONLINE_TASK = "active_online_task"
 
+    # Store the scenarios, their results, layer mappings and online tasks in
+    # an embedded SQLite database instead of individual settings groups
+    SETTINGS_STORE_ENABLED = "settings_store/enabled"
+    # Path of the SQLite database, defaults to the QGIS settings directory
+    SETTINGS_STORE_PATH = "settings_store/path"
+
     # Irrecoverable carbon
     IRRECOVERABLE_CARBON_SOURCE_TYPE = "carbon/irrecoverable_carbon_source_type"
     # Path for local data source
@@ -249,6 +344,108 @@ class Settings(enum.Enum):
     )
 
 
+class SettingsRepository:
+    """In-memory repository of the models saved in the settings.
+
+    Each collection is read from the settings the first time it is
+    requested and then kept up to date as items are saved or removed.
+    The collections are discarded when the settings revision changes
+    i.e. when the settings have been changed by another instance.
+    """
+
+    NCS_PATHWAYS = "ncs_pathways"
+    ACTIVITIES = "activities"
+    PRIORITY_LAYERS = "priority_layers"
+    PRIORITY_GROUPS = "priority_groups"
+
+    def __init__(self):
+        self._collections = {}
+        self._revision = None
+        self._lock = threading.RLock()
+
+    def check_revision(self, revision: str):
+        """Discards all the collections if the settings revision is
+        different from the one the collections were read with.
+
+        :param revision: Current settings revision
+        :type revision: str
+        """
+        with self._lock:
+            if revision != self._revision:
+                self._collections.clear()
+                self._revision = revision
+
+    def set_revision(self, revision: str):
+        """Sets the settings revision after a change made by this instance.
+
+        :param revision: New settings revision
+        :type revision: str
+        """
+        with self._lock:
+            self._revision = revision
+
+    def collection(
+        self, name: str, loader: typing.Callable[[], typing.Dict[str, dict]]
+    ) -> typing.Dict[str, dict]:
+        """Gets a collection, the collection is read using the loader if
+        it is not in the repository.
+
+        :param name: Collection name
+        :type name: str
+
+        :param loader: Function that reads the collection from the settings
+        :type loader: typing.Callable
+
+        :returns: Items of the collection keyed by their UUID, the items
+        should be copied before being changed
+        :rtype: dict
+        """
+        with self._lock:
+            items = self._collections.get(name)
+        if items is not None:
+            return items
+
+        items = loader()
+        with self._lock:
+            return self._collections.setdefault(name, items)
+
+    def put(self, name: str, identifier: str, item: typing.Optional[dict] = None):
+        """Adds, replaces or removes an item in a collection. Collections
+        that have not been read are not changed.
+
+        :param name: Collection name
+        :type name: str
+
+        :param identifier: UUID of the item
+        :type identifier: str
+
+        :param item: Item attribute values, the item is removed if None
+        :type item: dict
+        """
+        with self._lock:
+            items = self._collections.get(name)
+            if items is None:
+                return
+
+            if item is None:
+                items.pop(str(identifier), None)
+            else:
+                items[str(identifier)] = copy.deepcopy(item)
+
+    def invalidate(self, name: str = None):
+        """Discards a collection so that it is read again when requested.
+
+        :param name: Collection name, all the collections are discarded
+        if None
+        :type name: str
+        """
+        with self._lock:
+            if name is None:
+                self._collections.clear()
+            else:
+                self._collections.pop(name, None)
+
+
 class SettingsManager(QtCore.QObject):
     """Manages saving/loading settings for the plugin in QgsSettings."""
 
@@ -263,8 +460,14 @@ class SettingsManager(QtCore.QObject):
     ONLINE_TASK_BASE: str = "online_task"
 
     ACTIVITY_BASE: str = "activities"
+    REPOSITORY_REVISION: str = "repository_revision"
+    STORE_MIGRATED_KEY: str = "settings_migrated"
 
     settings = QgsSettings()
+    repository = SettingsRepository()
+
+    _settings_store = None
+    _store_lock = threading.Lock()
 
     scenarios_settings_updated = QtCore.pyqtSignal()
     priority_layers_changed = QtCore.pyqtSignal()
@@ -334,7 +537,58 @@ class SettingsManager(QtCore.QObject):
 
     def delete_settings(self):
         """Deletes the all the plugin settings."""
+        store = self._store()
+        if store is not None:
+            store.clear()
         self.settings.remove(f"{self.BASE_GROUP_NAME}")
+        self.repository.invalidate()
+
+    def _repository_collection(
+        self, name: str, loader: typing.Callable[[], typing.Dict[str, dict]]
+    ) -> typing.Dict[str, dict]:
+        """Gets a collection from the in-memory repository, the collection is
+        read again if the settings have been changed by another instance.
+
+        :param name: Collection name
+        :type name: str
+
+        :param loader: Function that reads the collection from the settings
+        :type loader: typing.Callable
+
+        :returns: Items of the collection keyed by their UUID
+        :rtype: dict
+        """
+        revision = self.settings.value(
+            f"{self.BASE_GROUP_NAME}/{self.REPOSITORY_REVISION}", ""
+        )
+        self.repository.check_revision(revision)
+        return self.repository.collection(name, loader)
+
+    def _update_repository(
+        self, name: str, identifier: str = None, item: typing.Optional[dict] = None
+    ):
+        """Updates the in-memory repository after the settings have been
+        changed and records a new settings revision.
+
+        :param name: Collection name
+        :type name: str
+
+        :param identifier: UUID of the changed item, the whole collection is
+        read again when needed if None
+        :type identifier: str
+
+        :param item: Item attribute values, None if the item was removed
+        :type item: dict
+        """
+        revision = str(uuid.uuid4())
+        self.settings.setValue(
+            f"{self.BASE_GROUP_NAME}/{self.REPOSITORY_REVISION}", revision
+        )
+        self.repository.set_revision(revision)
+        if identifier is None:
+            self.repository.invalidate(name)
+        else:
+            self.repository.put(name, identifier, item)
 
     def _get_scenario_settings_base(self, identifier):
         """Gets the scenario settings base url.
@@ -366,15 +620,130 @@ class SettingsManager(QtCore.QObject):
             f"{str(identifier)}"
         )
 
+    def _store(self) -> typing.Optional[SettingsStore]:
+        """Gets the SQLite store of the scenarios, scenario results, layer
+        mappings and online tasks. The settings are copied into the store
+        each time it is opened, writes then go to both so the store can be
+        disabled again without losing any changes.
+
+        :returns: Settings store or None if the store is not enabled
+        :rtype: SettingsStore
+        """
+        enabled = self.get_value(
+            Settings.SETTINGS_STORE_ENABLED, default=False, setting_type=bool
+        )
+        if not enabled:
+            with self._store_lock:
+                if SettingsManager._settings_store is not None:
+                    SettingsManager._settings_store.close()
+                    SettingsManager._settings_store = None
+            return None
+
+        path = self.get_value(Settings.SETTINGS_STORE_PATH, default="")
+        if not path:
+            path = os.path.join(
+                os.path.dirname(self.settings.fileName()), SETTINGS_STORE_FILE_NAME
+            )
+
+        with self._store_lock:
+            store = SettingsManager._settings_store
+            if store is not None and store.path == path:
+                return store
+
+            try:
+                new_store = SettingsStore(path)
+                self._migrate_to_store(new_store)
+            except (sqlite3.Error, OSError) as e:
+                log(f"Unable to open the settings store {path}, {e}", info=False)
+                return None
+
+            if store is not None:
+                store.close()
+            SettingsManager._settings_store = new_store
+
+        return new_store
+
+    def _migrate_to_store(self, store: SettingsStore):
+        """Copies the scenarios, scenario results, layer mappings and the
+        running online task from the settings into the store, replacing
+        its records so changes made while the store was disabled are
+        picked up.
+
+        :param store: Settings store
+        :type store: SettingsStore
+        """
+        store.clear()
+        with store.transaction():
+            created_dates = {}
+            with qgis_settings(
+                f"{self.BASE_GROUP_NAME}/{self.SCENARIO_RESULTS_GROUP_NAME}"
+            ) as settings:
+                for scenario_id in settings.childGroups():
+                    result_key = self._get_scenario_results_settings_base(scenario_id)
+                    with qgis_settings(result_key) as result_settings:
+                        analysis_output = result_settings.value("analysis_output")
+                        if analysis_output is None:
+                            continue
+                        try:
+                            created_date = store_date(
+                                datetime.datetime.strptime(
+                                    result_settings.value("created_date"),
+                                    SCENARIO_RESULT_DATE_FORMAT,
+                                )
+                            )
+                        except (TypeError, ValueError):
+                            created_date = store_date()
+
+                        store.save_scenario_result(
+                            scenario_id,
+                            created_date,
+                            analysis_output,
+                            result_settings.value("output_layer_name"),
+                            result_settings.value("scenario_directory"),
+                        )
+                        created_dates[scenario_id] = created_date
+
+            with qgis_settings(
+                f"{self.BASE_GROUP_NAME}/{self.SCENARIO_GROUP_NAME}"
+            ) as settings:
+                for scenario_uuid in settings.childGroups():
+                    scenario_key = self._get_scenario_settings_base(scenario_uuid)
+                    with qgis_settings(scenario_key) as scenario_settings:
+                        activities = scenario_settings.value("activities", [])
+                        if isinstance(activities, str):
+                            activities = [activities]
+                        bbox = scenario_settings.value("extent/spatial/bbox", None)
+
+                        store.save_scenario(
+                            scenario_uuid,
+                            scenario_settings.value("name", None),
+                            scenario_settings.value("description", None),
+                            scenario_settings.value("server_uuid", None) or None,
+                            activities or [],
+                            [float(b) for b in bbox] if bbox else None,
+                            created_dates.get(scenario_uuid, store_date()),
+                        )
+
+            with qgis_settings(self._get_layer_mappings_settings_base()) as settings:
+                for identifier in settings.childKeys():
+                    layer_raw = settings.value(identifier, dict())
+                    if len(layer_raw) > 0:
+                        store.save_layer_mapping(identifier, layer_raw)
+
+            running_online_scenario = self.get_value(self.ONLINE_TASK_BASE)
+            if running_online_scenario:
+                store.save_online_task(running_online_scenario)
+
+            store.set_metadata(self.STORE_MIGRATED_KEY, store_date())
+
+        log(f"Synchronized the scenarios and layer mappings to {store.path}")
+
     def save_scenario(self, scenario_settings):
         """Save the passed scenario settings into the plugin settings
 
         :param scenario_settings: Scenario settings
         :type scenario_settings: ScenarioSettings
         """
-        settings_key = self._get_scenario_settings_base(scenario_settings.uuid)
-        self.save_scenario_extent(settings_key, scenario_settings.extent)
-
         activities = []
 
         for activity in scenario_settings.activities:
@@ -393,17 +762,32 @@ class SettingsManager(QtCore.QObject):
 
                 activities.append(json.dumps(activity))
 
+        server_uuid = (
+            str(scenario_settings.server_uuid)
+            if scenario_settings.server_uuid
+            else None
+        )
+
+        store = self._store()
+        if store is not None:
+            store.save_scenario(
+                str(scenario_settings.uuid),
+                scenario_settings.name,
+                scenario_settings.description,
+                server_uuid,
+                activities,
+                list(scenario_settings.extent.bbox),
+            )
+
+        settings_key = self._get_scenario_settings_base(scenario_settings.uuid)
+        self.save_scenario_extent(settings_key, scenario_settings.extent)
+
         with qgis_settings(settings_key) as settings:
             settings.setValue("uuid", str(scenario_settings.uuid))
             settings.setValue("name", scenario_settings.name)
             settings.setValue("description", scenario_settings.description)
             settings.setValue("activities", activities)
-            settings.setValue(
-                "server_uuid",
-                str(scenario_settings.server_uuid)
-                if scenario_settings.server_uuid
-                else None,
-            )
+            settings.setValue("server_uuid", server_uuid)
 
     def save_scenario_extent(self, key, extent):
         """Saves the scenario extent into plugin settings
@@ -425,6 +809,27 @@ class SettingsManager(QtCore.QObject):
         with qgis_settings(spatial_key) as settings:
             settings.setValue("bbox", spatial_extent)
 
+    def _scenario_from_store(self, row: dict) -> ScenarioSettings:
+        """Creates a scenario from a row of the settings store.
+
+        :param row: Scenario row
+        :type row: dict
+
+        :returns: Scenario settings instance
+        :rtype: ScenarioSettings
+        """
+        scenario = ScenarioSettings.from_values(
+            row["uuid"],
+            row["name"],
+            row["description"],
+            json.loads(row["activities"]),
+            row["server_uuid"],
+        )
+        bbox = json.loads(row["extent"]) if row["extent"] else []
+        scenario.extent = SpatialExtent(bbox=bbox)
+
+        return scenario
+
     def get_scenario(self, scenario_id):
         """Retrieves the first scenario that matched the passed scenario id.
 
@@ -434,6 +839,10 @@ class SettingsManager(QtCore.QObject):
         :returns: Scenario settings instance
         :rtype: ScenarioSettings
         """
+        store = self._store()
+        if store is not None:
+            row = store.get_scenario(scenario_id)
+            return self._scenario_from_store(row) if row is not None else None
 
         with qgis_settings(
             f"{self.BASE_GROUP_NAME}/" f"{self.SCENARIO_GROUP_NAME}"
@@ -450,17 +859,34 @@ class SettingsManager(QtCore.QObject):
                         return scenario
         return None
 
-    def get_scenarios(self):
+    def get_scenarios(self, limit: int = None, offset: int = 0):
         """Gets all the available scenarios settings in the plugin.
 
+        :param limit: Maximum number of scenarios to return, all the
+        scenarios are returned if None
+        :type limit: int
+
+        :param offset: Number of scenarios to skip
+        :type offset: int
+
         :returns: List of the scenario settings instances
         :rtype: list
         """
+        store = self._store()
+        if store is not None:
+            return [
+                self._scenario_from_store(row)
+                for row in store.find_scenarios(limit=limit, offset=offset)
+            ]
+
         result = []
         with qgis_settings(
             f"{self.BASE_GROUP_NAME}/" f"{self.SCENARIO_GROUP_NAME}"
         ) as settings:
-            for scenario_uuid in settings.childGroups():
+            scenario_uuids = settings.childGroups()[
+                offset : offset + limit if limit is not None else None
+            ]
+            for scenario_uuid in scenario_uuids:
                 scenario_settings_key = self._get_scenario_settings_base(scenario_uuid)
                 with qgis_settings(scenario_settings_key) as scenario_settings:
                     scenario = ScenarioSettings.from_qgs_settings(
@@ -470,12 +896,137 @@ class SettingsManager(QtCore.QObject):
                     result.append(scenario)
         return result
 
+    def find_scenarios(
+        self,
+        name: str = None,
+        server_uuid: str = None,
+        start_date: datetime.datetime = None,
+        end_date: datetime.datetime = None,
+        online: bool = None,
+        limit: int = None,
+        offset: int = 0,
+    ) -> typing.List[ScenarioSettings]:
+        """Finds the scenarios that match all the given criteria. The
+        criteria are indexed queries when the settings store is enabled.
+
+        :param name: Scenario name
+        :type name: str
+
+        :param server_uuid: UUID of the scenario in the server
+        :type server_uuid: str
+
+        :param start_date: Earliest date the scenario was created
+        :type start_date: datetime.datetime
+
+        :param end_date: Latest date the scenario was created
+        :type end_date: datetime.datetime
+
+        :param online: Only return online scenarios if True or offline
+        scenarios if False
+        :type online: bool
+
+        :param limit: Maximum number of scenarios to return
+        :type limit: int
+
+        :param offset: Number of matching scenarios to skip
+        :type offset: int
+
+        :returns: Matching scenarios
+        :rtype: list
+        """
+        store = self._store()
+        if store is not None:
+            rows = store.find_scenarios(
+                name=name,
+                server_uuid=server_uuid,
+                start_date=store_date(start_date) if start_date else None,
+                end_date=store_date(end_date) if end_date else None,
+                online=online,
+                limit=limit,
+                offset=offset,
+            )
+            return [self._scenario_from_store(row) for row in rows]
+
+        scenarios = []
+        for scenario in self.get_scenarios():
+            if name is not None and scenario.name != name:
+                continue
+            if server_uuid is not None and str(scenario.server_uuid) != str(
+                server_uuid
+            ):
+                continue
+            if online is not None and bool(scenario.server_uuid) != online:
+                continue
+            if start_date is not None or end_date is not None:
+                # The settings only record when the scenario result was created
+                scenario_result = self.get_scenario_result(scenario.uuid)
+                if scenario_result is None:
+                    continue
+                if start_date is not None and scenario_result.created_date < start_date:
+                    continue
+                if end_date is not None and scenario_result.created_date > end_date:
+                    continue
+            scenarios.append(scenario)
+
+        return scenarios[offset : offset + limit if limit is not None else None]
+
+    def get_scenario_summaries(
+        self, limit: int = None, offset: int = 0
+    ) -> typing.List[typing.Dict]:
+        """Gets the identifying details of the scenarios without decoding
+        their activities, e.g. for listing the scenario history.
+
+        :param limit: Maximum number of scenarios to return, all the
+        scenarios are returned if None
+        :type limit: int
+
+        :param offset: Number of scenarios to skip
+        :type offset: int
+
+        :returns: Dictionaries with the scenario uuid, name, server_uuid and
+        whether the scenario has a saved result i.e. has_result
+        :rtype: list
+        """
+        store = self._store()
+        if store is not None:
+            return store.scenario_summaries(limit=limit, offset=offset)
+
+        with qgis_settings(
+            f"{self.BASE_GROUP_NAME}/{self.SCENARIO_RESULTS_GROUP_NAME}"
+        ) as settings:
+            result_ids = set(settings.childGroups())
+
+        summaries = []
+        with qgis_settings(
+            f"{self.BASE_GROUP_NAME}/" f"{self.SCENARIO_GROUP_NAME}"
+        ) as settings:
+            scenario_uuids = settings.childGroups()[
+                offset : offset + limit if limit is not None else None
+            ]
+            for scenario_uuid in scenario_uuids:
+                scenario_settings_key = self._get_scenario_settings_base(scenario_uuid)
+                with qgis_settings(scenario_settings_key) as scenario_settings:
+                    summaries.append(
+                        {
+                            "uuid": scenario_uuid,
+                            "name": scenario_settings.value("name", None),
+                            "server_uuid": (
+                                scenario_settings.value("server_uuid", None) or None
+                            ),
+                            "has_result": scenario_uuid in result_ids,
+                        }
+                    )
+        return summaries
+
     def delete_scenario(self, scenario_id):
         """Delete the scenario with the passed scenarion id.
 
         :param scenario_id: Scenario identifier
         :type scenario_id: str
         """
+        store = self._store()
+        if store is not None:
+            store.delete_scenario(scenario_id)
 
         with qgis_settings(
             f"{self.BASE_GROUP_NAME}/" f"{self.SCENARIO_GROUP_NAME}"
@@ -486,18 +1037,32 @@ class SettingsManager(QtCore.QObject):
 
     def delete_online_scenario(self):
         """Delete online scenario from QGIS settings"""
-
         with qgis_settings(
             f"{self.BASE_GROUP_NAME}/" f"{self.SCENARIO_GROUP_NAME}"
         ) as settings:
-            for scenario_identifier in settings.childGroups():
-                scenario = settings_manager.get_scenario(scenario_identifier)
-                if scenario.server_uuid:
-                    settings_manager.delete_scenario_result(scenario_identifier)
-                    settings_manager.delete_scenario(scenario_identifier)
+            online_scenarios = [
+                scenario_identifier
+                for scenario_identifier in settings.childGroups()
+                if settings.value(f"{scenario_identifier}/server_uuid")
+            ]
+
+        for scenario_identifier in online_scenarios:
+            self.delete_scenario_result(scenario_identifier)
+            self.delete_scenario(scenario_identifier)
+
+        store = self._store()
+        if store is not None:
+            with store.transaction():
+                for row in store.find_scenarios(online=True):
+                    store.delete_scenario_result(row["uuid"])
+                    store.delete_scenario(row["uuid"])
 
     def delete_all_scenarios(self):
         """Deletes all the plugin scenarios settings."""
+        store = self._store()
+        if store is not None:
+            store.delete_scenarios()
+
         with qgis_settings(
             f"{self.BASE_GROUP_NAME}/" f"{self.SCENARIO_GROUP_NAME}"
         ) as settings:
@@ -510,20 +1075,90 @@ class SettingsManager(QtCore.QObject):
         :param scenario_settings: Scenario settings
         :type scenario_settings: ScenarioSettings
         """
-        settings_key = self._get_scenario_results_settings_base(scenario_id)
-
         analysis_output = json.dumps(scenario_result.analysis_output)
 
+        store = self._store()
+        if store is not None:
+            store.save_scenario_result(
+                scenario_id,
+                store_date(scenario_result.created_date),
+                analysis_output,
+                scenario_result.output_layer_name,
+                scenario_result.scenario_directory,
+            )
+
+        settings_key = self._get_scenario_results_settings_base(scenario_id)
+
         with qgis_settings(settings_key) as settings:
             settings.setValue("scenario_id", scenario_id)
             settings.setValue(
                 "created_date",
-                scenario_result.created_date.strftime("%Y_%m_%d_%H_%M_%S"),
+                scenario_result.created_date.strftime(SCENARIO_RESULT_DATE_FORMAT),
             )
             settings.setValue("analysis_output", analysis_output)
             settings.setValue("output_layer_name", scenario_result.output_layer_name)
             settings.setValue("scenario_directory", scenario_result.scenario_directory)
 
+    def _create_scenario_result(
+        self,
+        created_date: str,
+        analysis_output: str,
+        output_layer_name: str,
+        scenario_directory: str,
+        date_format: str = SCENARIO_RESULT_DATE_FORMAT,
+    ) -> typing.Optional[ScenarioResult]:
+        """Creates a scenario result from its saved values.
+
+        :param created_date: Saved created date
+        :type created_date: str
+
+        :param analysis_output: JSON string of the analysis output
+        :type analysis_output: str
+
+        :param output_layer_name: Name of the output layer
+        :type output_layer_name: str
+
+        :param scenario_directory: Scenario output directory
+        :type scenario_directory: str
+
+        :param date_format: Format of the saved created date
+        :type date_format: str
+
+        :returns: Scenario result or None if the values are invalid
+        :rtype: ScenarioResult
+        """
+        try:
+            created_date = datetime.datetime.strptime(created_date, date_format)
+            analysis_output = json.loads(analysis_output)
+        except Exception as e:
+            log(f"Problem fetching scenario result, {e}")
+            return None
+
+        return ScenarioResult(
+            scenario=None,
+            created_date=created_date,
+            analysis_output=analysis_output,
+            output_layer_name=output_layer_name,
+            scenario_directory=scenario_directory,
+        )
+
+    def _scenario_result_from_store(self, row: dict) -> typing.Optional[ScenarioResult]:
+        """Creates a scenario result from a row of the settings store.
+
+        :param row: Scenario result row
+        :type row: dict
+
+        :returns: Scenario result or None if the row is invalid
+        :rtype: ScenarioResult
+        """
+        return self._create_scenario_result(
+            row["created_date"],
+            row["analysis_output"],
+            row["output_layer_name"],
+            row["scenario_directory"],
+            STORE_DATE_FORMAT,
+        )
+
     def get_scenario_result(self, scenario_id):
         """Retrieves the scenario result that matched the passed scenario id.
 
@@ -533,69 +1168,68 @@ class SettingsManager(QtCore.QObject):
         :returns: Scenario result
         :rtype: ScenarioSettings
         """
+        store = self._store()
+        if store is not None:
+            row = store.get_scenario_result(scenario_id)
+            if row is None or row["analysis_output"] is None:
+                return None
+            return self._scenario_result_from_store(row)
 
         scenario_settings_key = self._get_scenario_results_settings_base(scenario_id)
         with qgis_settings(scenario_settings_key) as scenario_settings:
-            created_date = scenario_settings.value("created_date")
             analysis_output = scenario_settings.value("analysis_output")
-            output_layer_name = scenario_settings.value("output_layer_name")
-            scenario_directory = scenario_settings.value("scenario_directory")
             if analysis_output is None:
                 return None
-            try:
-                created_date = datetime.datetime.strptime(
-                    created_date, "%Y_%m_%d_%H_%M_%S"
-                )
-                analysis_output = json.loads(analysis_output)
-            except Exception as e:
-                log(f"Problem fetching scenario result, {e}")
-                return None
 
-            return ScenarioResult(
-                scenario=None,
-                created_date=created_date,
-                analysis_output=analysis_output,
-                output_layer_name=output_layer_name,
-                scenario_directory=scenario_directory,
+            return self._create_scenario_result(
+                scenario_settings.value("created_date"),
+                analysis_output,
+                scenario_settings.value("output_layer_name"),
+                scenario_settings.value("scenario_directory"),
             )
-        return None
 
-    def get_scenarios_results(self):
+    def get_scenarios_results(self, limit: int = None, offset: int = 0):
         """Gets all the saved scenarios results.
 
+        :param limit: Maximum number of results to return, all the results
+        are returned if None
+        :type limit: int
+
+        :param offset: Number of results to skip
+        :type offset: int
+
         :returns: List of the scenario results
         :rtype: list
         """
         result = []
+        store = self._store()
+        if store is not None:
+            for row in store.scenario_results(limit=limit, offset=offset):
+                scenario_result = self._scenario_result_from_store(row)
+                if scenario_result is None:
+                    return None
+                result.append(scenario_result)
+            return result
+
         with qgis_settings(
             f"{self.BASE_GROUP_NAME}/{self.SCENARIO_RESULTS_GROUP_NAME}"
         ) as settings:
-            for uuid in settings.childGroups():
+            scenario_ids = settings.childGroups()[
+                offset : offset + limit if limit is not None else None
+            ]
+            for uuid in scenario_ids:
                 scenario_settings_key = self._get_scenario_results_settings_base(uuid)
                 with qgis_settings(scenario_settings_key) as scenario_settings:
-                    created_date = scenario_settings.value("created_date")
-                    analysis_output = scenario_settings.value("analysis_output")
-                    output_layer_name = scenario_settings.value("output_layer_name")
-                    scenario_directory = scenario_settings.value("scenario_directory")
-
-                    try:
-                        created_date = datetime.datetime.strptime(
-                            created_date, "%Y_%m_%d_%H_%M_%S"
-                        )
-                        analysis_output = json.loads(analysis_output)
-                    except Exception as e:
-                        log(f"Problem fetching scenario result, {e}")
+                    scenario_result = self._create_scenario_result(
+                        scenario_settings.value("created_date"),
+                        scenario_settings.value("analysis_output"),
+                        scenario_settings.value("output_layer_name"),
+                        scenario_settings.value("scenario_directory"),
+                    )
+                    if scenario_result is None:
                         return None
 
-                    result.append(
-                        ScenarioResult(
-                            scenario=None,
-                            created_date=created_date,
-                            analysis_output=analysis_output,
-                            output_layer_name=output_layer_name,
-                            scenario_directory=scenario_directory,
-                        )
-                    )
+                    result.append(scenario_result)
         return result
 
     def delete_scenario_result(self, scenario_id):
@@ -604,6 +1238,9 @@ class SettingsManager(QtCore.QObject):
         :param scenario_id: Scenario identifier
         :type scenario_id: str
         """
+        store = self._store()
+        if store is not None:
+            store.delete_scenario_result(scenario_id)
 
         with qgis_settings(
             f"{self.BASE_GROUP_NAME}/" f"{self.SCENARIO_RESULTS_GROUP_NAME}"
@@ -614,6 +1251,10 @@ class SettingsManager(QtCore.QObject):
 
     def delete_all_scenarios_results(self):
         """Deletes all the plugin scenarios results settings."""
+        store = self._store()
+        if store is not None:
+            store.delete_scenario_results()
+
         with qgis_settings(
             f"{self.BASE_GROUP_NAME}/{self.SCENARIO_GROUP_NAME}/"
             f"{self.SCENARIO_RESULTS_GROUP_NAME}"
@@ -636,8 +1277,9 @@ class SettingsManager(QtCore.QObject):
             f"{str(identifier)}"
         )
 
-    def get_priority_layer(self, identifier) -> typing.Dict:
-        """Retrieves the priority layer that matches the passed identifier.
+    def _read_priority_layer(self, identifier) -> typing.Dict:
+        """Reads the priority layer that matches the passed identifier from
+        the settings.
 
         :param identifier: Priority layers identifier
         :type identifier: uuid.UUID
@@ -677,47 +1319,50 @@ class SettingsManager(QtCore.QObject):
             priority_layer["groups"] = groups
         return priority_layer
 
+    def _read_priority_layers(self) -> typing.Dict[str, dict]:
+        """Reads all the priority layers from the settings.
+
+        :returns: Priority layers keyed by their identifier
+        :rtype: dict
+        """
+        priority_layers = {}
+        with qgis_settings(
+            f"{self.BASE_GROUP_NAME}/" f"{self.PRIORITY_LAYERS_GROUP_NAME}"
+        ) as settings:
+            for identifier in settings.childGroups():
+                priority_layer = self._read_priority_layer(identifier)
+                if priority_layer is not None:
+                    priority_layers[identifier] = priority_layer
+        return priority_layers
+
+    def _priority_layers(self) -> typing.Dict[str, dict]:
+        return self._repository_collection(
+            SettingsRepository.PRIORITY_LAYERS, self._read_priority_layers
+        )
+
+    def get_priority_layer(self, identifier) -> typing.Dict:
+        """Retrieves the priority layer that matches the passed identifier.
+
+        :param identifier: Priority layers identifier
+        :type identifier: uuid.UUID
+
+        :returns: Priority layer dict or None if not found.
+        :rtype: dict
+        """
+        priority_layer = self._priority_layers().get(str(identifier))
+        return copy.deepcopy(priority_layer) if priority_layer is not None else None
+
     def get_priority_layers(self) -> typing.List:
         """Gets all the available priority layers in the plugin.
 
         :returns: Priority layers list
         :rtype: list
         """
-        priority_layer_list = []
-        with qgis_settings(
-            f"{self.BASE_GROUP_NAME}/" f"{self.PRIORITY_LAYERS_GROUP_NAME}"
-        ) as settings:
-            for uuid in settings.childGroups():
-                priority_layer_settings = self._get_priority_layers_settings_base(uuid)
-                with qgis_settings(priority_layer_settings) as priority_settings:
-                    groups_key = f"{priority_layer_settings}/groups"
-                    groups = []
-
-                    with qgis_settings(groups_key) as groups_settings:
-                        for name in groups_settings.childGroups():
-                            group_settings_key = f"{groups_key}/{name}"
-                            with qgis_settings(group_settings_key) as group_settings:
-                                stored_group = {}
-                                stored_group["uuid"] = group_settings.value("uuid")
-                                stored_group["name"] = group_settings.value("name")
-                                stored_group["value"] = group_settings.value("value")
-                                groups.append(stored_group)
-                    layer = {
-                        "uuid": uuid,
-                        "name": priority_settings.value("name"),
-                        "description": priority_settings.value("description"),
-                        "path": priority_settings.value("path"),
-                        "selected": priority_settings.value("selected", type=bool),
-                        "user_defined": priority_settings.value(
-                            "user_defined", defaultValue=True, type=bool
-                        ),
-                        "type": priority_settings.value(
-                            "type", defaultValue=0, type=int
-                        ),
-                        "groups": groups,
-                    }
-                    priority_layer_list.append(layer)
-        return priority_layer_list
+        priority_layers = self._priority_layers()
+        return [
+            copy.deepcopy(priority_layers[identifier])
+            for identifier in sorted(priority_layers)
+        ]
 
     def find_layer_by_name(self, name: str) -> typing.Dict:
         """Finds a priority layer setting inside
@@ -729,19 +1374,12 @@ class SettingsManager(QtCore.QObject):
         :returns: Priority layers dict
         :rtype: dict
         """
-        found_id = None
-        with qgis_settings(
-            f"{self.BASE_GROUP_NAME}/" f"{self.PRIORITY_LAYERS_GROUP_NAME}"
-        ) as settings:
-            for layer_id in settings.childGroups():
-                layer_settings_key = self._get_priority_layers_settings_base(layer_id)
-                with qgis_settings(layer_settings_key) as layer_settings:
-                    layer_name = layer_settings.value("name")
-                    if layer_name == name:
-                        found_id = uuid.UUID(layer_id)
-                        break
+        priority_layers = self._priority_layers()
+        for identifier in sorted(priority_layers):
+            if priority_layers[identifier]["name"] == name:
+                return copy.deepcopy(priority_layers[identifier])
 
-        return self.get_priority_layer(found_id) if found_id is not None else None
+        return None
 
     def find_layers_by_group(self, group: str) -> typing.List:
         """Finds priority layers inside the plugin QgsSettings
@@ -754,22 +1392,12 @@ class SettingsManager(QtCore.QObject):
         :rtype: list
         """
         layers = []
-        with qgis_settings(
-            f"{self.BASE_GROUP_NAME}/" f"{self.PRIORITY_LAYERS_GROUP_NAME}"
-        ) as settings:
-            for layer_id in settings.childGroups():
-                priority_layer_settings = self._get_priority_layers_settings_base(
-                    layer_id
-                )
-                with qgis_settings(priority_layer_settings) as priority_settings:
-                    groups_key = f"{priority_layer_settings}/groups"
-
-                    with qgis_settings(groups_key) as groups_settings:
-                        for name in groups_settings.childGroups():
-                            group_settings_key = f"{groups_key}/{name}"
-                            with qgis_settings(group_settings_key) as group_settings:
-                                if group == group_settings.value("name"):
-                                    layers.append(self.get_priority_layer(layer_id))
+        priority_layers = self._priority_layers()
+        for identifier in sorted(priority_layers):
+            priority_layer = priority_layers[identifier]
+            for layer_group in priority_layer["groups"]:
+                if group == layer_group["name"]:
+                    layers.append(copy.deepcopy(priority_layer))
         return layers
 
     def save_priority_layer(self, priority_layer):
@@ -802,6 +1430,11 @@ class SettingsManager(QtCore.QObject):
                     group_settings.setValue("name", group["name"])
                     group_settings.setValue("value", group["value"])
 
+        self._update_repository(
+            SettingsRepository.PRIORITY_LAYERS,
+            str(priority_layer["uuid"]),
+            self._read_priority_layer(priority_layer["uuid"]),
+        )
         self.priority_layers_changed.emit()
 
     def set_current_priority_layer(self, identifier: str):
@@ -820,6 +1453,8 @@ class SettingsManager(QtCore.QObject):
                         "selected", str(priority_layer) == str(identifier)
                     )
 
+        self._update_repository(SettingsRepository.PRIORITY_LAYERS)
+
     def delete_priority_layers(self):
         """Deletes all the plugin priority weighting layers settings."""
         with qgis_settings(
@@ -828,6 +1463,8 @@ class SettingsManager(QtCore.QObject):
             for priority_layer in settings.childGroups():
                 settings.remove(priority_layer)
 
+        self._update_repository(SettingsRepository.PRIORITY_LAYERS)
+
     def delete_priority_layer(self, identifier):
         """Removes priority layer that match the passed identifier
 
@@ -841,6 +1478,8 @@ class SettingsManager(QtCore.QObject):
                 if str(priority_layer) == str(identifier):
                     settings.remove(priority_layer)
 
+        self._update_repository(SettingsRepository.PRIORITY_LAYERS, str(identifier))
+
     def _get_priority_groups_settings_base(self, identifier) -> str:
         """Gets the priority group settings base url.
 
@@ -857,6 +1496,43 @@ class SettingsManager(QtCore.QObject):
             f"{str(identifier)}"
         )
 
+    def _read_priority_groups(self) -> typing.Dict[str, dict]:
+        """Reads all the priority groups from the settings.
+
+        :returns: Priority groups keyed by their identifier
+        :rtype: dict
+        """
+        priority_groups = {}
+        with qgis_settings(
+            f"{self.BASE_GROUP_NAME}/" f"{self.PRIORITY_GROUP_NAME}"
+        ) as settings:
+            for identifier in settings.childGroups():
+                priority_groups[identifier] = self._read_priority_group(identifier)
+        return priority_groups
+
+    def _read_priority_group(self, identifier) -> typing.Dict:
+        """Reads the priority group that matches the passed identifier from
+        the settings.
+
+        :param identifier: Priority group identifier
+        :type identifier: str
+
+        :returns: Priority group
+        :rtype: typing.Dict
+        """
+        settings_key = self._get_priority_groups_settings_base(identifier)
+        with qgis_settings(settings_key) as settings:
+            priority_group = {"uuid": identifier}
+            priority_group["name"] = settings.value("name")
+            priority_group["value"] = settings.value("value")
+            priority_group["description"] = settings.value("description")
+        return priority_group
+
+    def _priority_groups(self) -> typing.Dict[str, dict]:
+        return self._repository_collection(
+            SettingsRepository.PRIORITY_GROUPS, self._read_priority_groups
+        )
+
     def find_group_by_name(self, name) -> typing.Dict:
         """Finds a priority group setting inside the plugin QgsSettings by name.
 
@@ -869,16 +1545,11 @@ class SettingsManager(QtCore.QObject):
 
         found_id = None
 
-        with qgis_settings(
-            f"{self.BASE_GROUP_NAME}/" f"{self.PRIORITY_GROUP_NAME}"
-        ) as settings:
-            for group_id in settings.childGroups():
-                group_settings_key = self._get_priority_groups_settings_base(group_id)
-                with qgis_settings(group_settings_key) as group_settings_key:
-                    group_name = group_settings_key.value("name")
-                    if group_name == name:
-                        found_id = uuid.UUID(group_id)
-                        break
+        priority_groups = self._priority_groups()
+        for group_id in sorted(priority_groups):
+            if priority_groups[group_id]["name"] == name:
+                found_id = uuid.UUID(group_id)
+                break
 
         return self.get_priority_group(found_id)
 
@@ -895,12 +1566,12 @@ class SettingsManager(QtCore.QObject):
         if identifier is None:
             return None
 
-        settings_key = self._get_priority_groups_settings_base(identifier)
-        with qgis_settings(settings_key) as settings:
-            priority_group = {"uuid": identifier}
-            priority_group["name"] = settings.value("name")
-            priority_group["value"] = settings.value("value")
-            priority_group["description"] = settings.value("description")
+        priority_group = self._priority_groups().get(str(identifier))
+        if priority_group is None:
+            return self._read_priority_group(identifier)
+
+        priority_group = dict(priority_group)
+        priority_group["uuid"] = identifier
         return priority_group
 
     def get_priority_groups(self) -> typing.List[typing.Dict]:
@@ -909,21 +1580,10 @@ class SettingsManager(QtCore.QObject):
         :returns: List of the priority groups instances
         :rtype: list
         """
-        priority_groups = []
-        with qgis_settings(
-            f"{self.BASE_GROUP_NAME}/" f"{self.PRIORITY_GROUP_NAME}"
-        ) as settings:
-            for uuid in settings.childGroups():
-                priority_layer_settings = self._get_priority_groups_settings_base(uuid)
-                with qgis_settings(priority_layer_settings) as priority_settings:
-                    group = {
-                        "uuid": uuid,
-                        "name": priority_settings.value("name"),
-                        "value": priority_settings.value("value"),
-                        "description": priority_settings.value("description"),
-                    }
-                    priority_groups.append(group)
-        return priority_groups
+        priority_groups = self._priority_groups()
+        return [
+            dict(priority_groups[identifier]) for identifier in sorted(priority_groups)
+        ]
 
     def save_priority_group(self, priority_group):
         """Save the priority group into the plugin settings
@@ -939,6 +1599,13 @@ class SettingsManager(QtCore.QObject):
             settings.setValue("value", priority_group["value"])
             settings.setValue("description", priority_group.get("description"))
 
+        identifier = str(priority_group["uuid"])
+        self._update_repository(
+            SettingsRepository.PRIORITY_GROUPS,
+            identifier,
+            self._read_priority_group(identifier),
+        )
+
     def delete_priority_group(self, identifier):
         """Removes priority group that match the passed identifier
 
@@ -952,6 +1619,8 @@ class SettingsManager(QtCore.QObject):
                 if str(priority_group) == str(identifier):
                     settings.remove(priority_group)
 
+        self._update_repository(SettingsRepository.PRIORITY_GROUPS, str(identifier))
+
     def delete_priority_groups(self):
         """Deletes all the plugin priority groups settings."""
         with qgis_settings(
@@ -960,6 +1629,8 @@ class SettingsManager(QtCore.QObject):
             for priority_group in settings.childGroups():
                 settings.remove(priority_group)
 
+        self._update_repository(SettingsRepository.PRIORITY_GROUPS)
+
     def _get_layer_mappings_settings_base(self) -> str:
         """Returns the path for Layer Mapping settings.
 
@@ -976,6 +1647,15 @@ class SettingsManager(QtCore.QObject):
         """
         layer_mapping = {}
 
+        store = self._store()
+        if store is not None:
+            for k, layer_raw in store.layer_mappings().items():
+                try:
+                    layer_mapping[k] = json.loads(layer_raw)
+                except json.JSONDecodeError:
+                    log("Layer Mapping JSON is invalid")
+            return layer_mapping
+
         layer_mapping_root = self._get_layer_mappings_settings_base()
         with qgis_settings(layer_mapping_root) as settings:
             keys = settings.childKeys()
@@ -1001,6 +1681,16 @@ class SettingsManager(QtCore.QObject):
 
         layer_mapping = {}
 
+        store = self._store()
+        if store is not None:
+            layer = store.get_layer_mapping(identifier) or {}
+            if len(layer) > 0:
+                try:
+                    layer_mapping = json.loads(layer)
+                except json.JSONDecodeError:
+                    log("Layer Mapping JSON is invalid")
+            return layer_mapping
+
         layer_mapping_root = self._get_layer_mappings_settings_base()
 
         with qgis_settings(layer_mapping_root) as settings:
@@ -1023,6 +1713,11 @@ class SettingsManager(QtCore.QObject):
 
         if not identifier:
             identifier = input_layer["path"].replace(os.sep, "--")
+
+        store = self._store()
+        if store is not None:
+            store.save_layer_mapping(identifier, json.dumps(input_layer))
+
         settings_key = self._get_layer_mappings_settings_base()
 
         with qgis_settings(settings_key) as settings:
@@ -1030,6 +1725,10 @@ class SettingsManager(QtCore.QObject):
 
     def remove_layer_mapping(self, identifier: str):
         """Remove layer mapping from settings."""
+        store = self._store()
+        if store is not None:
+            store.delete_layer_mapping(identifier)
+
         self.remove(f"{self.LAYER_MAPPING_BASE}/{identifier}")
 
     def _get_default_layers_settings_base(self) -> str:
@@ -1124,6 +1823,42 @@ class SettingsManager(QtCore.QObject):
         with qgis_settings(ncs_root) as settings:
             settings.setValue(ncs_uuid, ncs_str)
 
+        self._update_repository(
+            SettingsRepository.NCS_PATHWAYS, str(ncs_uuid), json.loads(ncs_str)
+        )
+
+    def _read_json_items(self, root: str, item_type: str) -> typing.Dict[str, dict]:
+        """Reads the items serialized to JSON strings under a settings group.
+
+        :param root: Settings group of the items
+        :type root: str
+
+        :param item_type: Name of the item type used in the log messages
+        :type item_type: str
+
+        :returns: Item attribute values keyed by their UUID
+        :rtype: dict
+        """
+        items = {}
+        with qgis_settings(root) as settings:
+            for key in settings.childKeys():
+                item_str = settings.value(key, None)
+                if not item_str:
+                    continue
+                try:
+                    items[key] = json.loads(item_str)
+                except (TypeError, json.JSONDecodeError):
+                    log(f"{item_type} JSON is invalid")
+        return items
+
+    def _ncs_pathway_dicts(self) -> typing.Dict[str, dict]:
+        return self._repository_collection(
+            SettingsRepository.NCS_PATHWAYS,
+            lambda: self._read_json_items(
+                self._get_ncs_pathway_settings_base(), "NCS pathway"
+            ),
+        )
+
     def get_ncs_pathway(self, ncs_uuid: str) -> typing.Union[NcsPathway, None]:
         """Gets an NCS pathway object matching the given unique identified.
 
@@ -1154,19 +1889,11 @@ class SettingsManager(QtCore.QObject):
         identifier else an empty dictionary if not found.
         :rtype: dict
         """
-        ncs_pathway_dict = {}
+        ncs_pathway_dict = self._ncs_pathway_dicts().get(str(ncs_uuid))
+        if ncs_pathway_dict is None:
+            return {}
 
-        ncs_root = self._get_ncs_pathway_settings_base()
-
-        with qgis_settings(ncs_root) as settings:
-            ncs_model = settings.value(ncs_uuid, dict())
-            if len(ncs_model) > 0:
-                try:
-                    ncs_pathway_dict = json.loads(ncs_model)
-                except json.JSONDecodeError:
-                    log("NCS pathway JSON is invalid")
-
-        return ncs_pathway_dict
+        return copy.deepcopy(ncs_pathway_dict)
 
     def get_all_ncs_pathways(self) -> typing.List[NcsPathway]:
         """Get all the NCS pathway objects stored in settings.
@@ -1176,14 +1903,10 @@ class SettingsManager(QtCore.QObject):
         """
         ncs_pathways = []
 
-        ncs_root = self._get_ncs_pathway_settings_base()
-
-        with qgis_settings(ncs_root) as settings:
-            keys = settings.childKeys()
-            for k in keys:
-                ncs_pathway = self.get_ncs_pathway(k)
-                if ncs_pathway is not None:
-                    ncs_pathways.append(ncs_pathway)
+        for ncs_pathway_dict in list(self._ncs_pathway_dicts().values()):
+            ncs_pathway = create_ncs_pathway(copy.deepcopy(ncs_pathway_dict))
+            if ncs_pathway is not None:
+                ncs_pathways.append(ncs_pathway)
 
         return sorted(ncs_pathways, key=lambda ncs: ncs.name)
 
@@ -1268,6 +1991,7 @@ class SettingsManager(QtCore.QObject):
         """
         if self.get_ncs_pathway(ncs_uuid) is not None:
             self.remove(f"{self.NCS_PATHWAY_BASE}/{ncs_uuid}")
+            self._update_repository(SettingsRepository.NCS_PATHWAYS, str(ncs_uuid))
 
     def _get_activity_settings_base(self) -> str:
         """Returns the path for activity settings.
@@ -1308,6 +2032,39 @@ class SettingsManager(QtCore.QObject):
         with qgis_settings(activity_root) as settings:
             settings.setValue(activity_uuid, activity_str)
 
+        self._update_repository(
+            SettingsRepository.ACTIVITIES, str(activity_uuid), json.loads(activity_str)
+        )
+
+    def _activity_dicts(self) -> typing.Dict[str, dict]:
+        return self._repository_collection(
+            SettingsRepository.ACTIVITIES,
+            lambda: self._read_json_items(
+                self._get_activity_settings_base(), "Activity"
+            ),
+        )
+
+    def _create_activity(self, activity_dict: dict) -> typing.Union[Activity, None]:
+        """Creates an activity object and adds its NCS pathways.
+
+        :param activity_dict: Activity attribute values
+        :type activity_dict: dict
+
+        :returns: Activity object or None if the attribute values are invalid.
+        :rtype: Activity
+        """
+        activity_dict = copy.deepcopy(activity_dict)
+        ncs_uuids = activity_dict.get(PATHWAYS_ATTRIBUTE, [])
+
+        activity = create_activity(activity_dict)
+        if activity is not None:
+            for ncs_uuid in ncs_uuids:
+                ncs = self.get_ncs_pathway(ncs_uuid)
+                if ncs is not None:
+                    activity.add_ncs_pathway(ncs)
+
+        return activity
+
     def get_activity(self, activity_uuid: str) -> typing.Union[Activity, None]:
         """Gets an activity object matching the given unique
         identifier.
@@ -1320,31 +2077,11 @@ class SettingsManager(QtCore.QObject):
         identifier else None if not found.
         :rtype: Activity
         """
-        activity = None
-
-        activity_root = self._get_activity_settings_base()
-
-        with qgis_settings(activity_root) as settings:
-            activity = settings.value(activity_uuid, None)
-            ncs_uuids = []
-            if activity is not None:
-                activity_dict = {}
-                try:
-                    activity_dict = json.loads(activity)
-                except json.JSONDecodeError:
-                    log("Activity JSON is invalid.")
-
-                if PATHWAYS_ATTRIBUTE in activity_dict:
-                    ncs_uuids = activity_dict[PATHWAYS_ATTRIBUTE]
-
-                activity = create_activity(activity_dict)
-                if activity is not None:
-                    for ncs_uuid in ncs_uuids:
-                        ncs = self.get_ncs_pathway(ncs_uuid)
-                        if ncs is not None:
-                            activity.add_ncs_pathway(ncs)
+        activity_dict = self._activity_dicts().get(str(activity_uuid))
+        if activity_dict is None:
+            return None
 
-        return activity
+        return self._create_activity(activity_dict)
 
     def find_activity_by_name(self, name) -> typing.Dict:
         """Finds an activity setting inside
@@ -1372,14 +2109,10 @@ class SettingsManager(QtCore.QObject):
         """
         activities = []
 
-        activity_root = self._get_activity_settings_base()
-
-        with qgis_settings(activity_root) as settings:
-            keys = settings.childKeys()
-            for k in keys:
-                activity = self.get_activity(k)
-                if activity is not None:
-                    activities.append(activity)
+        for activity_dict in list(self._activity_dicts().values()):
+            activity = self._create_activity(activity_dict)
+            if activity is not None:
+                activities.append(activity)
 
         return sorted(activities, key=lambda activity: activity.name)
 
@@ -1413,6 +2146,7 @@ class SettingsManager(QtCore.QObject):
         """
         if self.get_activity(activity_uuid) is not None:
             self.remove(f"{self.ACTIVITY_BASE}/{activity_uuid}")
+            self._update_repository(SettingsRepository.ACTIVITIES, str(activity_uuid))
 
     def get_npv_collection(self) -> typing.Optional[NcsPathwayNpvCollection]:
         """Gets the collection of NPV mappings of NCS pathways.
@@ -1519,6 +2253,10 @@ class SettingsManager(QtCore.QObject):
         :param scenario_uuid: Scenario UUID
         :type scenario_uuid: str
         """
+        store = self._store()
+        if store is not None:
+            store.save_online_task(scenario_uuid, ONLINE_TASK_RUNNING)
+
         settings_manager.set_value(self.ONLINE_TASK_BASE, scenario_uuid)
 
     def _get_online_tasks_settings_base(self) -> str:
@@ -1535,6 +2273,10 @@ class SettingsManager(QtCore.QObject):
         :returns: Scenario settings instance
         :rtype: ScenarioSettings
         """
+        store = self._store()
+        if store is not None:
+            tasks = store.online_tasks(status=ONLINE_TASK_RUNNING, limit=1)
+            return tasks[0]["scenario_uuid"] if tasks else None
 
         scenario_settings_key = self._get_online_tasks_settings_base()
         with qgis_settings(scenario_settings_key) as settings:
@@ -1547,6 +2289,10 @@ class SettingsManager(QtCore.QObject):
         :type scenario_id: str
         """
         log("delete online task")
+        store = self._store()
+        if store is not None:
+            store.delete_online_tasks(ONLINE_TASK_RUNNING)
+
         with qgis_settings(self.BASE_GROUP_NAME) as settings:
             a = settings.value(self.ONLINE_TASK_BASE)
             log(a)
@@ -55,8 +55,10 @@ from .progress_dialog import OnlineProgressDialog, ReportProgressDialog, Progres
 from ..trends_earth import auth
 from ..api.scenario_task_api_client import ScenarioAnalysisTaskApiClient
 from ..api.layer_tasks import FetchDefaultLayerTask
+from ..api.output_placeholders import missing_output_paths
 from ..api.scenario_history_tasks import (
     FetchScenarioHistoryTask,
+    FetchScenarioOutputFilesTask,
     FetchScenarioOutputTask,
     DeleteScenarioTask,
     FetchOnlineTaskStatusTask,
@@ -144,6 +146,7 @@ class QgisCplusMain(QtWidgets.QDockWidget, WidgetUi):
         self.processing_cancelled = False
         self.current_analysis_task = None
         self.fetch_default_layer_task = None
+        self.fetch_output_files_tasks = []
 
         # Set icons for buttons
         help_icon = FileUtils.get_icon("mActionHelpContents_green.svg")
@@ -1182,24 +1185,22 @@ class QgisCplusMain(QtWidgets.QDockWidget, WidgetUi):
         """Fetches scenarios from plugin settings and updates the
         scenario history list
         """
-        scenarios = settings_manager.get_scenarios()
+        scenarios = settings_manager.get_scenario_summaries()
 
         if len(scenarios) >= 0:
             self.scenario_list.clear()
 
         for scenario in scenarios:
             scenario_type = "Available offline"
-            if scenario.server_uuid:
-                scenario_result = settings_manager.get_scenario_result(scenario.uuid)
-                if scenario_result is None:
-                    scenario_type = "Online"
-            item_widget = ScenarioItemWidget(scenario.name, scenario_type)
+            if scenario["server_uuid"] and not scenario["has_result"]:
+                scenario_type = "Online"
+            item_widget = ScenarioItemWidget(scenario["name"], scenario_type)
             item = QtWidgets.QListWidgetItem(self.scenario_list)
             item.setSizeHint(item_widget.sizeHint())
-            item.setData(QtCore.Qt.UserRole, str(scenario.uuid))
-            item.setData(QtCore.Qt.UserRole + 1, scenario.name)
-            if scenario.server_uuid:
-                item.setData(QtCore.Qt.UserRole + 2, str(scenario.server_uuid))
+            item.setData(QtCore.Qt.UserRole, str(scenario["uuid"]))
+            item.setData(QtCore.Qt.UserRole + 1, scenario["name"])
+            if scenario["server_uuid"]:
+                item.setData(QtCore.Qt.UserRole + 2, str(scenario["server_uuid"]))
             else:
                 item.setData(QtCore.Qt.UserRole + 2, "")
             self.scenario_list.setItemWidget(item, item_widget)
@@ -2037,9 +2038,6 @@ class QgisCplusMain(QtWidgets.QDockWidget, WidgetUi):
             load_landuse = settings_manager.get_value(
                 Settings.LANDUSE_PROJECT, default=True, setting_type=bool
             )
-            load_highest_position = settings_manager.get_value(
-                Settings.HIGHEST_POSITION, default=False, setting_type=bool
-            )
 
             scenario_name = scenario_result.scenario.name
             qgis_instance = QgsProject.instance()
@@ -2115,84 +2113,203 @@ class QgisCplusMain(QtWidgets.QDockWidget, WidgetUi):
             """
             self.move_layer_to_group(scenario_layer, scenario_group)
 
-            # Add activities and pathways
-            activity_index = 0
+            # Add activities and pathways, downloading the online outputs
+            # that have only been registered as placeholders
+            add_activity_layers = partial(
+                self.add_activity_layers,
+                list_activities,
+                activity_group,
+                pathways_group,
+                progress_dialog,
+                report_manager,
+            )
+            layer_paths = []
             if load_landuse:
-                for activity in list_activities:
-                    activity_name = activity.name
-                    activity_layer = QgsRasterLayer(activity.path, activity.name)
-                    activity_layer.setCustomProperty(
-                        ACTIVITY_IDENTIFIER_PROPERTY, str(activity.uuid)
+                layer_paths.extend(activity.path for activity in list_activities)
+            if load_weighted_ncs:
+                layer_paths.extend(
+                    pathway.path
+                    for activity in list_activities
+                    for pathway in activity.pathways
+                )
+            elif load_landuse and settings_manager.get_value(
+                Settings.HIGHEST_POSITION, default=False, setting_type=bool
+            ):
+                # The report uses the CRS of a pathway output to zoom
+                # its map items to the scenario extent
+                layer_paths.extend(
+                    [
+                        pathway.path
+                        for activity in list_activities
+                        for pathway in activity.pathways
+                    ][:1]
+                )
+            missing_paths = missing_output_paths(
+                scenario_result.scenario_directory, layer_paths
+            )
+            if len(missing_paths) > 0:
+
+                def on_output_files_fetched(is_success):
+                    if is_success:
+                        add_activity_layers()
+                        return
+                    # The layers of the missing outputs cannot be added and
+                    # the report would use incomplete outputs
+                    message = tr(
+                        "Unable to download some of the scenario outputs, "
+                        "the activity layers and the report have not been created."
                     )
-                    list_pathways = activity.pathways
+                    self.show_message(message, level=Qgis.Critical)
+                    if progress_dialog is not None:
+                        progress_dialog.change_status_message(message)
+                        progress_dialog.processing_cancelled()
+
+                self.fetch_output_files(
+                    scenario_result.scenario_directory,
+                    missing_paths,
+                    on_output_files_fetched,
+                )
+            else:
+                add_activity_layers()
 
-                    # Add activity layer with styling, if available
-                    if activity_layer:
-                        renderer = self.style_activity_layer(activity_layer, activity)
+        else:
+            # Re-initializes variables if processing were cancelled by the user
+            # Not doing this breaks the processing if a user tries to run
+            # the processing after cancelling or if the processing fails
+            self.position_feedback = QgsProcessingFeedback()
+            self.processing_context = QgsProcessingContext()
+
+    def add_activity_layers(
+        self,
+        list_activities,
+        activity_group,
+        pathways_group,
+        progress_dialog,
+        report_manager,
+    ):
+        """Adds the activity and weighted pathway layers of a scenario to
+        their groups and initiates the report generation.
 
-                        added_activity_layer = qgis_instance.addMapLayer(activity_layer)
-                        self.move_layer_to_group(added_activity_layer, activity_group)
+        :param list_activities: Activities of the scenario
+        :type list_activities: list
 
-                        activity_layer.setRenderer(renderer)
-                        activity_layer.triggerRepaint()
+        :param activity_group: Group of the activity layers, None if the
+        activities are not loaded
+        :type activity_group: QgsLayerTreeGroup
 
-                    # Add activity pathways
-                    if load_weighted_ncs:
-                        if len(list_pathways) > 0:
-                            activity_pathway_group = pathways_group.insertGroup(
-                                activity_index, activity_name
-                            )
-                            activity_pathway_group.setExpanded(False)
+        :param pathways_group: Group of the weighted pathway layers, None if
+        the pathways are not loaded
+        :type pathways_group: QgsLayerTreeGroup
 
-                            pw_index = 0
-                            for pathway in list_pathways:
-                                try:
-                                    # pathway_name = pathway.name
-                                    pathway_layer = pathway.to_map_layer()
+        :param progress_dialog: Progress dialog of the analysis
+        :type progress_dialog: ProgressDialog
 
-                                    added_pw_layer = qgis_instance.addMapLayer(
-                                        pathway_layer
-                                    )
-                                    self.move_layer_to_group(
-                                        added_pw_layer, activity_pathway_group
-                                    )
+        :param report_manager: Report manager used to generate analysis report_templates
+        :type report_manager: ReportManager
+        """
+        qgis_instance = QgsProject.instance()
+        load_weighted_ncs = pathways_group is not None
+        load_landuse = activity_group is not None
+        load_highest_position = settings_manager.get_value(
+            Settings.HIGHEST_POSITION, default=False, setting_type=bool
+        )
 
-                                    pathway_layer.triggerRepaint()
+        activity_index = 0
+        if load_landuse:
+            for activity in list_activities:
+                activity_name = activity.name
+                activity_layer = QgsRasterLayer(activity.path, activity.name)
+                activity_layer.setCustomProperty(
+                    ACTIVITY_IDENTIFIER_PROPERTY, str(activity.uuid)
+                )
+                list_pathways = activity.pathways
 
-                                    pw_index = pw_index + 1
-                                except Exception as err:
-                                    self.show_message(
-                                        tr(
-                                            "An error occurred loading a pathway, "
-                                            "check logs for more information"
-                                        ),
-                                        level=Qgis.Info,
-                                    )
-                                    log(
-                                        tr(
-                                            "An error occurred loading a pathway, "
-                                            'scenario analysis, error message "{}"'.format(
-                                                err
-                                            )
+                # Add activity layer with styling, if available
+                if activity_layer:
+                    renderer = self.style_activity_layer(activity_layer, activity)
+
+                    added_activity_layer = qgis_instance.addMapLayer(activity_layer)
+                    self.move_layer_to_group(added_activity_layer, activity_group)
+
+                    activity_layer.setRenderer(renderer)
+                    activity_layer.triggerRepaint()
+
+                # Add activity pathways
+                if load_weighted_ncs:
+                    if len(list_pathways) > 0:
+                        activity_pathway_group = pathways_group.insertGroup(
+                            activity_index, activity_name
+                        )
+                        activity_pathway_group.setExpanded(False)
+
+                        pw_index = 0
+                        for pathway in list_pathways:
+                            try:
+                                # pathway_name = pathway.name
+                                pathway_layer = pathway.to_map_layer()
+
+                                added_pw_layer = qgis_instance.addMapLayer(
+                                    pathway_layer
+                                )
+                                self.move_layer_to_group(
+                                    added_pw_layer, activity_pathway_group
+                                )
+
+                                pathway_layer.triggerRepaint()
+
+                                pw_index = pw_index + 1
+                            except Exception as err:
+                                self.show_message(
+                                    tr(
+                                        "An error occurred loading a pathway, "
+                                        "check logs for more information"
+                                    ),
+                                    level=Qgis.Info,
+                                )
+                                log(
+                                    tr(
+                                        "An error occurred loading a pathway, "
+                                        'scenario analysis, error message "{}"'.format(
+                                            err
                                         )
                                     )
+                                )
 
-                    activity_index = activity_index + 1
-
-            # Initiate report generation
-            if load_landuse and load_highest_position:
-                self.run_report(progress_dialog, report_manager) if (
-                    progress_dialog is not None and report_manager is not None
-                ) else None
-            else:
-                progress_dialog.processing_finished() if progress_dialog is not None else None
+                activity_index = activity_index + 1
 
+        # Initiate report generation
+        if load_landuse and load_highest_position:
+            self.run_report(progress_dialog, report_manager) if (
+                progress_dialog is not None and report_manager is not None
+            ) else None
         else:
-            # Re-initializes variables if processing were cancelled by the user
-            # Not doing this breaks the processing if a user tries to run
-            # the processing after cancelling or if the processing fails
-            self.position_feedback = QgsProcessingFeedback()
-            self.processing_context = QgsProcessingContext()
+            progress_dialog.processing_finished() if progress_dialog is not None else None
+
+    def fetch_output_files(self, scenario_directory, paths, callback):
+        """Downloads online scenario outputs that have only been registered
+        as placeholders.
+
+        :param scenario_directory: Scenario output directory
+        :type scenario_directory: str
+
+        :param paths: Paths of the outputs to download
+        :type paths: list
+
+        :param callback: Function called once the downloads have finished,
+        with True if all the outputs have been downloaded
+        :type callback: typing.Callable
+        """
+        task = FetchScenarioOutputFilesTask(scenario_directory, paths)
+
+        def on_finished(is_success):
+            if not is_success:
+                log(tr("Unable to download some of the scenario outputs"), info=False)
+            self.fetch_output_files_tasks.remove(task)
+            callback(is_success)
+
+        task.task_finished.connect(on_finished)
+        self.fetch_output_files_tasks.append(task)
+        QgsApplication.taskManager().addTask(task)
 
     def style_activities_layer(self, layer, activities):
         """Applies the styling to the passed layer that
@@ -0,0 +1,550 @@
+# -*- coding: utf-8 -*-
+"""
+Contains functions and classes for running the raster algebra of the
+scenario analysis in-process, block by block, using NumPy.
+"""
+
+import dataclasses
+import typing
+
+import numpy as np
+from osgeo import gdal
+
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsFeedback,
+    QgsRasterDataProvider,
+    QgsRasterLayer,
+    QgsRectangle,
+)
+
+from ..definitions.constants import NO_DATA_VALUE
+from ..utils import log, raster_block_to_array
+
+
+# Default memory, in megabytes, that can be used by the block-wise analysis
+DEFAULT_MEMORY_BUDGET = 256
+
+DEFAULT_CREATE_OPTIONS = [
+    "COMPRESS=DEFLATE",
+    "PREDICTOR=2",
+    "ZLEVEL=6",
+    "TILED=YES",
+    "BIGTIFF=IF_SAFER",
+]
+
+
+@dataclasses.dataclass
+class RasterGrid:
+    """Output grid of a block-wise analysis. All the input layers are
+    resampled to this grid when they are read.
+    """
+
+    extent: QgsRectangle
+    columns: int
+    rows: int
+    crs: QgsCoordinateReferenceSystem
+
+    @classmethod
+    def from_layer(
+        cls, layer: QgsRasterLayer, extent: QgsRectangle = None
+    ) -> "RasterGrid":
+        """Creates a grid with the pixel size and CRS of the given layer
+        that covers the given extent.
+
+        :param layer: Layer whose pixel size and CRS will be used.
+        :type layer: QgsRasterLayer
+
+        :param extent: Extent of the grid, if not specified then the extent
+        of the layer will be used.
+        :type extent: QgsRectangle
+
+        :returns: Grid with the layer's resolution covering the extent.
+        :rtype: RasterGrid
+        """
+        if extent is None:
+            extent = layer.extent()
+
+        columns = max(1, round(extent.width() / layer.rasterUnitsPerPixelX()))
+        rows = max(1, round(extent.height() / layer.rasterUnitsPerPixelY()))
+
+        return cls(QgsRectangle(extent), int(columns), int(rows), layer.crs())
+
+    @property
+    def pixel_width(self) -> float:
+        """Gets the width of a pixel in map units.
+
+        :returns: Pixel width.
+        :rtype: float
+        """
+        return self.extent.width() / self.columns
+
+    @property
+    def pixel_height(self) -> float:
+        """Gets the height of a pixel in map units.
+
+        :returns: Pixel height.
+        :rtype: float
+        """
+        return self.extent.height() / self.rows
+
+    def geo_transform(self, row_offset: int = 0) -> typing.Tuple:
+        """Gets the GDAL affine transform of the grid or of a window
+        starting at the given row.
+
+        :param row_offset: First row of the window.
+        :type row_offset: int
+
+        :returns: GDAL geotransform tuple.
+        :rtype: tuple
+        """
+        return (
+            self.extent.xMinimum(),
+            self.pixel_width,
+            0.0,
+            self.extent.yMaximum() - row_offset * self.pixel_height,
+            0.0,
+            -self.pixel_height,
+        )
+
+    def window_extent(self, row_offset: int, rows: int) -> QgsRectangle:
+        """Gets the extent of a window spanning the full width of the grid.
+
+        :param row_offset: First row of the window.
+        :type row_offset: int
+
+        :param rows: Number of rows in the window.
+        :type rows: int
+
+        :returns: Extent of the window.
+        :rtype: QgsRectangle
+        """
+        y_max = self.extent.yMaximum() - row_offset * self.pixel_height
+        return QgsRectangle(
+            self.extent.xMinimum(),
+            y_max - rows * self.pixel_height,
+            self.extent.xMaximum(),
+            y_max,
+        )
+
+    def windows(
+        self, bytes_per_pixel: int, memory_budget: int = DEFAULT_MEMORY_BUDGET
+    ) -> typing.Iterator[typing.Tuple[int, int]]:
+        """Splits the grid into windows of full-width row strips whose
+        size does not exceed the memory budget.
+
+        :param bytes_per_pixel: Total number of bytes that will be held in
+        memory for each pixel of a window.
+        :type bytes_per_pixel: int
+
+        :param memory_budget: Memory budget in megabytes.
+        :type memory_budget: int
+
+        :returns: Iterator of tuples containing the first row and number
+        of rows of each window.
+        :rtype: typing.Iterator[typing.Tuple[int, int]]
+        """
+        budget = max(1, int(memory_budget)) * 1024 * 1024
+        window_rows = budget // max(1, self.columns * bytes_per_pixel)
+        window_rows = int(min(self.rows, max(1, window_rows)))
+
+        for row_offset in range(0, self.rows, window_rows):
+            yield row_offset, min(window_rows, self.rows - row_offset)
+
+    def window_count(
+        self, bytes_per_pixel: int, memory_budget: int = DEFAULT_MEMORY_BUDGET
+    ) -> int:
+        """Returns the number of windows for the given memory budget.
+
+        :param bytes_per_pixel: Total number of bytes that will be held in
+        memory for each pixel of a window.
+        :type bytes_per_pixel: int
+
+        :param memory_budget: Memory budget in megabytes.
+        :type memory_budget: int
+
+        :returns: Number of windows.
+        :rtype: int
+        """
+        return len(list(self.windows(bytes_per_pixel, memory_budget)))
+
+
+def read_window(
+    provider: QgsRasterDataProvider,
+    grid: RasterGrid,
+    row_offset: int,
+    rows: int,
+    band: int = 1,
+) -> np.ma.MaskedArray:
+    """Reads a window of a raster resampled to the grid.
+
+    :param provider: Data provider of the raster layer to read.
+    :type provider: QgsRasterDataProvider
+
+    :param grid: Grid that the data will be resampled to.
+    :type grid: RasterGrid
+
+    :param row_offset: First row of the window.
+    :type row_offset: int
+
+    :param rows: Number of rows in the window.
+    :type rows: int
+
+    :param band: Band number, default is one.
+    :type band: int
+
+    :returns: Masked array of the window where NoData pixels are masked. If
+    the block could not be read then all the pixels will be masked.
+    :rtype: np.ma.MaskedArray
+    """
+    block = provider.block(
+        band, grid.window_extent(row_offset, rows), grid.columns, rows
+    )
+    data = raster_block_to_array(block)
+    if data.shape != (rows, grid.columns):
+        log(f"Unable to read raster block from {provider.dataSourceUri()}", info=False)
+        return np.ma.masked_all((rows, grid.columns), dtype=np.float32)
+
+    return data
+
+
+class VectorMask:
+    """Rasterizes mask polygons onto windows of a grid."""
+
+    def __init__(self, paths: typing.List[str]):
+        self._datasets = []
+        for path in paths:
+            dataset = gdal.OpenEx(path, gdal.OF_VECTOR)
+            if dataset is None:
+                log(f"Unable to open mask layer {path}", info=False)
+                continue
+            self._datasets.append(dataset)
+
+    def is_valid(self) -> bool:
+        """Checks whether there is at least one readable mask layer.
+
+        :returns: True if there is a valid mask layer else False.
+        :rtype: bool
+        """
+        return len(self._datasets) > 0
+
+    def window(self, grid: RasterGrid, row_offset: int, rows: int) -> np.ndarray:
+        """Rasterizes the mask polygons onto a window of the grid.
+
+        :param grid: Grid to rasterize onto.
+        :type grid: RasterGrid
+
+        :param row_offset: First row of the window.
+        :type row_offset: int
+
+        :param rows: Number of rows in the window.
+        :type rows: int
+
+        :returns: Boolean array where True represents a pixel whose center
+        is within a mask polygon.
+        :rtype: np.ndarray
+        """
+        driver = gdal.GetDriverByName("MEM")
+        mask_dataset = driver.Create("", grid.columns, rows, 1, gdal.GDT_Byte)
+        mask_dataset.SetGeoTransform(grid.geo_transform(row_offset))
+        mask_dataset.SetProjection(grid.crs.toWkt())
+
+        for dataset in self._datasets:
+            gdal.Rasterize(mask_dataset, dataset, burnValues=[1])
+
+        mask = mask_dataset.GetRasterBand(1).ReadAsArray() > 0
+        mask_dataset = None
+
+        return mask
+
+
+class RasterWriter:
+    """Writes windows of a grid to a tiled and compressed GeoTIFF."""
+
+    def __init__(
+        self,
+        path: str,
+        grid: RasterGrid,
+        data_type: int = gdal.GDT_Float32,
+        nodata_value: float = NO_DATA_VALUE,
+        create_options: typing.List[str] = None,
+    ):
+        self._path = path
+        self._nodata_value = nodata_value
+
+        if create_options is None:
+            create_options = DEFAULT_CREATE_OPTIONS
+
+        driver = gdal.GetDriverByName("GTiff")
+        self._dataset = driver.Create(
+            path, grid.columns, grid.rows, 1, data_type, create_options
+        )
+        if self._dataset is None:
+            raise IOError(f"Unable to create output raster {path}")
+
+        self._dataset.SetGeoTransform(grid.geo_transform())
+        self._dataset.SetProjection(grid.crs.toWkt())
+        self._band = self._dataset.GetRasterBand(1)
+        self._band.SetNoDataValue(nodata_value)
+
+    @property
+    def path(self) -> str:
+        """Gets the path of the output raster.
+
+        :returns: Output raster path.
+        :rtype: str
+        """
+        return self._path
+
+    def write(self, data: np.ma.MaskedArray, row_offset: int):
+        """Writes a window to the output raster. Masked pixels are
+        written as NoData.
+
+        :param data: Window data.
+        :type data: np.ma.MaskedArray
+
+        :param row_offset: First row of the window.
+        :type row_offset: int
+        """
+        self._band.WriteArray(np.ma.filled(data, self._nodata_value), 0, row_offset)
+
+    def close(self):
+        """Flushes and closes the output raster."""
+        if self._dataset is None:
+            return
+
+        self._band.FlushCache()
+        self._band = None
+        self._dataset = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def weighted_sum(
+    weighted_arrays: typing.List[typing.Tuple[np.ma.MaskedArray, float]]
+) -> np.ma.MaskedArray:
+    """Computes the sum of arrays each multiplied by its coefficient. As
+    in the raster calculator, a pixel is NoData if it is NoData in any of
+    the arrays.
+
+    :param weighted_arrays: List of tuples containing an array and its
+    coefficient.
+    :type weighted_arrays: list
+
+    :returns: Weighted sum of the arrays.
+    :rtype: np.ma.MaskedArray
+    """
+    result = None
+    for data, coefficient in weighted_arrays:
+        weighted = data.astype(np.float32) * np.float32(coefficient)
+        result = weighted if result is None else result + weighted
+
+    return result
+
+
+def sum_ignore_nodata(arrays: typing.List[np.ma.MaskedArray]) -> np.ma.MaskedArray:
+    """Computes the sum of arrays ignoring NoData pixels. As in the cell
+    statistics tool, a pixel is NoData only if it is NoData in all the
+    arrays.
+
+    :param arrays: Arrays to sum.
+    :type arrays: list
+
+    :returns: Sum of the arrays.
+    :rtype: np.ma.MaskedArray
+    """
+    total = np.zeros(arrays[0].shape, dtype=np.float32)
+    all_masked = np.ones(arrays[0].shape, dtype=bool)
+    for data in arrays:
+        total += np.ma.filled(data.astype(np.float32), 0)
+        all_masked &= np.ma.getmaskarray(data)
+
+    return np.ma.masked_array(total, mask=all_masked)
+
+
+def highest_position(arrays: typing.List[np.ma.MaskedArray]) -> np.ma.MaskedArray:
+    """Computes the one-based position of the array with the highest value
+    for each pixel, ignoring NoData pixels. Ties are resolved using the
+    first array. A pixel is NoData if it is NoData in all the arrays.
+
+    :param arrays: Ordered arrays to compare.
+    :type arrays: list
+
+    :returns: Array of positions.
+    :rtype: np.ma.MaskedArray
+    """
+    stack = np.ma.stack([data.astype(np.float64) for data in arrays])
+    all_masked = np.ma.getmaskarray(stack).all(axis=0)
+    positions = np.argmax(stack.filled(-np.inf), axis=0).astype(np.int32) + 1
+
+    return np.ma.masked_array(positions, mask=all_masked)
+
+
+def run_windowed_kernel(
+    input_paths: typing.List[str],
+    output_path: str,
+    grid: RasterGrid,
+    kernel: typing.Callable[[typing.List[np.ma.MaskedArray]], np.ma.MaskedArray],
+    data_type: int = gdal.GDT_Float32,
+    nodata_value: float = NO_DATA_VALUE,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    feedback: QgsFeedback = None,
+) -> bool:
+    """Applies a kernel to a stack of rasters window by window.
+
+    All the inputs are opened once and aligned windows, resampled to the
+    grid, are read and passed to the kernel. The result of each window is
+    written to a tiled and compressed GeoTIFF.
+
+    :param input_paths: Paths of the input rasters, in the order that they
+    will be passed to the kernel.
+    :type input_paths: list
+
+    :param output_path: Path of the output raster.
+    :type output_path: str
+
+    :param grid: Grid of the output raster.
+    :type grid: RasterGrid
+
+    :param kernel: Function that computes the output window from the input
+    windows.
+    :type kernel: typing.Callable
+
+    :param data_type: GDAL data type of the output raster.
+    :type data_type: int
+
+    :param nodata_value: NoData value of the output raster.
+    :type nodata_value: float
+
+    :param memory_budget: Memory budget in megabytes.
+    :type memory_budget: int
+
+    :param feedback: Feedback for reporting progress and cancelling.
+    :type feedback: QgsFeedback
+
+    :returns: True if the output was successfully created, else False if
+    an input is invalid or the operation was cancelled.
+    :rtype: bool
+    """
+    providers = []
+    for input_path in input_paths:
+        layer = QgsRasterLayer(input_path, "input")
+        if not layer.isValid():
+            log(f"Invalid input layer {input_path} for windowed analysis", info=False)
+            return False
+        # Keep a reference to the layer so the provider is not deleted
+        providers.append((layer, layer.dataProvider()))
+
+    # Input windows with their masks, the output window and its mask
+    bytes_per_pixel = 9 * (len(providers) + 2)
+    windows = list(grid.windows(bytes_per_pixel, memory_budget))
+
+    with RasterWriter(output_path, grid, data_type, nodata_value) as writer:
+        for window_index, (row_offset, rows) in enumerate(windows):
+            if feedback is not None and feedback.isCanceled():
+                return False
+
+            arrays = [
+                read_window(provider, grid, row_offset, rows)
+                for _, provider in providers
+            ]
+            writer.write(kernel(arrays), row_offset)
+
+            if feedback is not None:
+                feedback.setProgress((window_index + 1) / len(windows) * 100)
+
+    return True
+
+
+def windowed_cell_sum(
+    input_paths: typing.List[str],
+    output_path: str,
+    reference_layer: QgsRasterLayer,
+    nodata_value: float = NO_DATA_VALUE,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    feedback: QgsFeedback = None,
+) -> bool:
+    """Computes the sum of the input rasters ignoring NoData pixels, the
+    equivalent of the cell statistics tool with the sum statistic.
+
+    :param input_paths: Paths of the input rasters.
+    :type input_paths: list
+
+    :param output_path: Path of the output raster.
+    :type output_path: str
+
+    :param reference_layer: Layer whose extent, pixel size and CRS are used
+    for the output raster.
+    :type reference_layer: QgsRasterLayer
+
+    :param nodata_value: NoData value of the output raster.
+    :type nodata_value: float
+
+    :param memory_budget: Memory budget in megabytes.
+    :type memory_budget: int
+
+    :param feedback: Feedback for reporting progress and cancelling.
+    :type feedback: QgsFeedback
+
+    :returns: True if the output was successfully created else False.
+    :rtype: bool
+    """
+    return run_windowed_kernel(
+        input_paths,
+        output_path,
+        RasterGrid.from_layer(reference_layer),
+        sum_ignore_nodata,
+        nodata_value=nodata_value,
+        memory_budget=memory_budget,
+        feedback=feedback,
+    )
+
+
+def windowed_highest_position(
+    input_paths: typing.List[str],
+    output_path: str,
+    reference_layer: QgsRasterLayer,
+    nodata_value: float = NO_DATA_VALUE,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    feedback: QgsFeedback = None,
+) -> bool:
+    """Computes the one-based position of the raster with the highest value
+    for each pixel ignoring NoData pixels, the equivalent of the highest
+    position in raster stack tool.
+
+    :param input_paths: Ordered paths of the input rasters.
+    :type input_paths: list
+
+    :param output_path: Path of the output raster.
+    :type output_path: str
+
+    :param reference_layer: Layer whose extent, pixel size and CRS are used
+    for the output raster.
+    :type reference_layer: QgsRasterLayer
+
+    :param nodata_value: NoData value of the output raster.
+    :type nodata_value: float
+
+    :param memory_budget: Memory budget in megabytes.
+    :type memory_budget: int
+
+    :param feedback: Feedback for reporting progress and cancelling.
+    :type feedback: QgsFeedback
+
+    :returns: True if the output was successfully created else False.
+    :rtype: bool
+    """
+    return run_windowed_kernel(
+        input_paths,
+        output_path,
+        RasterGrid.from_layer(reference_layer),
+        highest_position,
+        data_type=gdal.GDT_Int32,
+        nodata_value=nodata_value,
+        memory_budget=memory_budget,
+        feedback=feedback,
+    )
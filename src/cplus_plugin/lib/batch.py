@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+"""
+Headless batch runner for sweeping the scenario analysis parameters.
+
+The runner is intended for use in standalone PyQGIS scripts, where each
+worker process initializes its own QGIS application and processing
+framework, e.g.
+
+    runner = BatchScenarioRunner(scenario, output_directory, max_workers=4)
+    parameter_sets = create_parameter_grid(
+        {"Biodiversity": [0, 5, 10]}, suitability_indices=[0, 1.0]
+    )
+    results = runner.run(parameter_sets)
+    runner.write_summary(results)
+
+The activities of the base scenario need to have been saved in settings
+since the worker processes load them from there.
+"""
+
+import concurrent.futures
+import csv
+import dataclasses
+import itertools
+import multiprocessing
+import os
+import traceback
+import typing
+import uuid
+
+from qgis.core import QgsApplication, QgsRasterLayer
+
+from ..conf import settings_manager, Settings
+from ..models.base import Scenario, SpatialExtent
+from ..utils import calculate_raster_area_by_pixel_value, FileUtils, log
+
+
+SUMMARY_FILE_NAME = "batch_summary.csv"
+
+# Application instance of a worker process, kept alive for the process lifetime
+_worker_application = None
+
+
+@dataclasses.dataclass
+class BatchRunParameters:
+    """Parameters of a single run in a batch."""
+
+    run_id: str
+    priority_group_coefficients: typing.Dict[str, float] = dataclasses.field(
+        default_factory=dict
+    )
+    suitability_index: typing.Optional[float] = None
+    sieve_threshold: typing.Optional[float] = None
+    # Whether the sieve function is enabled, the saved setting is used if None
+    sieve_enabled: typing.Optional[bool] = None
+
+
+@dataclasses.dataclass
+class BatchRunResult:
+    """Outcome of a single run in a batch."""
+
+    parameters: BatchRunParameters
+    success: bool
+    scenario_directory: str = ""
+    output_path: str = ""
+    activity_areas: typing.Dict[str, float] = dataclasses.field(default_factory=dict)
+    error: str = ""
+
+
+def _sieve_threshold_label(parameters: BatchRunParameters) -> str:
+    """Gets the sieve threshold of a run as shown in the summary table.
+
+    :param parameters: Parameters of the run.
+    :type parameters: BatchRunParameters
+
+    :returns: Sieve threshold, "disabled" if the sieve function has been
+    disabled or empty if the saved settings are used.
+    :rtype: str
+    """
+    if parameters.sieve_enabled is False:
+        return "disabled"
+
+    return "" if parameters.sieve_threshold is None else parameters.sieve_threshold
+
+
+def create_parameter_grid(
+    priority_group_coefficients: typing.Dict[str, typing.List[float]] = None,
+    suitability_indices: typing.List[float] = None,
+    sieve_thresholds: typing.List[typing.Optional[float]] = None,
+) -> typing.List[BatchRunParameters]:
+    """Creates the parameters of the runs for all the combinations of the
+    given parameter values.
+
+    :param priority_group_coefficients: Coefficient values for each priority
+    group, keyed by the group name.
+    :type priority_group_coefficients: dict
+
+    :param suitability_indices: Pathway suitability index values, the saved
+    setting is used if not specified.
+    :type suitability_indices: list
+
+    :param sieve_thresholds: Sieve threshold values where None disables the
+    sieve function, the saved settings are used if not specified.
+    :type sieve_thresholds: list
+
+    :returns: Parameters of each run.
+    :rtype: typing.List[BatchRunParameters]
+    """
+    priority_group_coefficients = priority_group_coefficients or {}
+    group_names = list(priority_group_coefficients.keys())
+    coefficient_values = [priority_group_coefficients[name] for name in group_names]
+
+    parameter_sets = []
+    for index, (coefficients, suitability_index, sieve_threshold) in enumerate(
+        itertools.product(
+            itertools.product(*coefficient_values),
+            suitability_indices or [None],
+            sieve_thresholds or [None],
+        )
+    ):
+        parameter_sets.append(
+            BatchRunParameters(
+                run_id=f"run_{index + 1:04d}",
+                priority_group_coefficients=dict(zip(group_names, coefficients)),
+                suitability_index=suitability_index,
+                sieve_threshold=sieve_threshold,
+                sieve_enabled=(
+                    sieve_threshold is not None if sieve_thresholds else None
+                ),
+            )
+        )
+
+    return parameter_sets
+
+
+def _initialize_worker():
+    """Initializes QGIS and the processing framework in a worker process."""
+    global _worker_application
+
+    if QgsApplication.instance() is None:
+        _worker_application = QgsApplication([], False)
+        _worker_application.initQgis()
+
+    from processing.core.Processing import Processing
+
+    Processing.initialize()
+
+
+def run_batch_scenario(
+    scenario_info: typing.Dict, parameters: BatchRunParameters
+) -> BatchRunResult:
+    """Runs the scenario analysis for one set of batch parameters.
+
+    The parameters are applied to the analysis task only, the saved settings
+    are not modified so several runs can execute concurrently.
+
+    :param scenario_info: Base scenario details, see
+    BatchScenarioRunner.scenario_info.
+    :type scenario_info: dict
+
+    :param parameters: Parameters of the run.
+    :type parameters: BatchRunParameters
+
+    :returns: Result of the run.
+    :rtype: BatchRunResult
+    """
+    # Imported here to avoid a circular import with the tasks module
+    from ..tasks import ScenarioAnalysisTask
+
+    scenario_directory = os.path.join(
+        scenario_info["output_directory"], parameters.run_id
+    )
+
+    try:
+        activities = []
+        for activity_uuid in scenario_info["activity_uuids"]:
+            activity = settings_manager.get_activity(activity_uuid)
+            if activity is None:
+                raise ValueError(f"Activity {activity_uuid} not found in settings")
+            activities.append(activity)
+
+        extent = SpatialExtent(bbox=list(scenario_info["bbox"]))
+        scenario = Scenario(
+            uuid=uuid.uuid4(),
+            name=f"{scenario_info['name']} {parameters.run_id}",
+            description=scenario_info["description"],
+            extent=extent,
+            activities=activities,
+            priority_layer_groups=scenario_info["priority_layer_groups"],
+        )
+
+        task = ScenarioAnalysisTask(
+            scenario.name,
+            scenario.description,
+            activities,
+            scenario_info["priority_layer_groups"],
+            extent,
+            scenario,
+        )
+        task.scenario_directory = scenario_directory
+        # Runs share the snapped layers through the intermediate layers cache
+        task.settings_overrides[Settings.SNAP_CACHE_ENABLED] = True
+        task.priority_group_coefficients = dict(parameters.priority_group_coefficients)
+        if parameters.suitability_index is not None:
+            task.settings_overrides[
+                Settings.PATHWAY_SUITABILITY_INDEX
+            ] = parameters.suitability_index
+        if parameters.sieve_threshold is not None:
+            task.settings_overrides[Settings.SIEVE_ENABLED] = True
+            task.settings_overrides[
+                Settings.SIEVE_THRESHOLD
+            ] = parameters.sieve_threshold
+        elif parameters.sieve_enabled is not None:
+            task.settings_overrides[Settings.SIEVE_ENABLED] = parameters.sieve_enabled
+
+        if not task.run() or task.output is None:
+            return BatchRunResult(
+                parameters=parameters,
+                success=False,
+                scenario_directory=scenario_directory,
+                error=str(task.error or "Scenario analysis did not complete"),
+            )
+
+        output_path = task.output["OUTPUT"]
+        pixel_areas = calculate_raster_area_by_pixel_value(
+            QgsRasterLayer(output_path, scenario.name)
+        )
+        activity_areas = {
+            activity.name: float(pixel_areas.get(activity.style_pixel_value, 0.0))
+            for activity in activities
+        }
+
+        return BatchRunResult(
+            parameters=parameters,
+            success=True,
+            scenario_directory=scenario_directory,
+            output_path=output_path,
+            activity_areas=activity_areas,
+        )
+
+    except Exception as e:
+        log(f"Problem running batch scenario {parameters.run_id}, {e}", info=False)
+        return BatchRunResult(
+            parameters=parameters,
+            success=False,
+            scenario_directory=scenario_directory,
+            error=f"{e}\n{traceback.format_exc()}",
+        )
+
+
+class BatchScenarioRunner:
+    """Runs the scenario analysis for a set of parameter combinations on a
+    bounded pool of worker processes.
+
+    Snapped layers are shared between the runs through the persistent
+    intermediate layers cache. The first run is executed on its own so that
+    the cache is populated before the remaining runs are fanned out.
+    """
+
+    def __init__(
+        self,
+        scenario: Scenario,
+        output_directory: str,
+        max_workers: int = None,
+    ):
+        self.scenario = scenario
+        self.output_directory = output_directory
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        FileUtils.create_new_dir(self.output_directory)
+
+    @property
+    def scenario_info(self) -> typing.Dict:
+        """Gets the details of the base scenario that are passed to the
+        worker processes.
+
+        :returns: Scenario name, description, extent, activity identifiers,
+        priority layer groups and the batch output directory.
+        :rtype: dict
+        """
+        return {
+            "name": self.scenario.name,
+            "description": self.scenario.description,
+            "bbox": list(self.scenario.extent.bbox),
+            "activity_uuids": [
+                str(activity.uuid) for activity in self.scenario.activities
+            ],
+            "priority_layer_groups": list(self.scenario.priority_layer_groups or []),
+            "output_directory": self.output_directory,
+        }
+
+    def run(
+        self, parameter_sets: typing.List[BatchRunParameters]
+    ) -> typing.List[BatchRunResult]:
+        """Runs the scenario analysis for each set of parameters.
+
+        :param parameter_sets: Parameters of the runs.
+        :type parameter_sets: typing.List[BatchRunParameters]
+
+        :returns: Results of the runs in the same order as the parameters.
+        :rtype: typing.List[BatchRunResult]
+        """
+        if len(parameter_sets) == 0:
+            return []
+
+        scenario_info = self.scenario_info
+        snapping_enabled = settings_manager.get_value(
+            Settings.SNAPPING_ENABLED, default=False, setting_type=bool
+        )
+
+        results = []
+        remaining_sets = list(parameter_sets)
+        if snapping_enabled:
+            # Populate the snap cache before the runs are fanned out
+            results.append(run_batch_scenario(scenario_info, remaining_sets.pop(0)))
+
+        if len(remaining_sets) == 0:
+            return results
+
+        worker_count = max(1, min(self.max_workers, len(remaining_sets)))
+        log(
+            f"Running {len(remaining_sets)} batch scenario(s) "
+            f"using {worker_count} worker process(es)"
+        )
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=worker_count,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initialize_worker,
+        ) as executor:
+            results.extend(
+                executor.map(
+                    run_batch_scenario,
+                    itertools.repeat(scenario_info),
+                    remaining_sets,
+                )
+            )
+
+        return results
+
+    def write_summary(
+        self, results: typing.List[BatchRunResult], path: str = None
+    ) -> str:
+        """Writes a table of the per-activity areas of each run.
+
+        :param results: Results of the runs.
+        :type results: typing.List[BatchRunResult]
+
+        :param path: Path of the CSV file, defaults to a file in the batch
+        output directory.
+        :type path: str
+
+        :returns: Path of the summary table.
+        :rtype: str
+        """
+        if path is None:
+            path = os.path.join(self.output_directory, SUMMARY_FILE_NAME)
+
+        return write_batch_summary(results, path)
+
+
+def write_batch_summary(results: typing.List[BatchRunResult], path: str) -> str:
+    """Writes a CSV table with a row for each run containing its parameters
+    and the area, in hectares, of each activity in the scenario output.
+
+    :param results: Results of the runs.
+    :type results: typing.List[BatchRunResult]
+
+    :param path: Path of the CSV file.
+    :type path: str
+
+    :returns: Path of the summary table.
+    :rtype: str
+    """
+    group_names = []
+    activity_names = []
+    for result in results:
+        for name in result.parameters.priority_group_coefficients:
+            if name not in group_names:
+                group_names.append(name)
+        for name in result.activity_areas:
+            if name not in activity_names:
+                activity_names.append(name)
+
+    header = (
+        ["run_id"]
+        + group_names
+        + ["suitability_index", "sieve_threshold", "success"]
+        + activity_names
+        + ["output_path", "error"]
+    )
+
+    with open(path, "w", newline="") as summary_file:
+        writer = csv.writer(summary_file)
+        writer.writerow(header)
+        for result in results:
+            parameters = result.parameters
+            writer.writerow(
+                [parameters.run_id]
+                + [
+                    parameters.priority_group_coefficients.get(name, "")
+                    for name in group_names
+                ]
+                + [
+                    ""
+                    if parameters.suitability_index is None
+                    else parameters.suitability_index,
+                    _sieve_threshold_label(parameters),
+                    result.success,
+                ]
+                + [result.activity_areas.get(name, "") for name in activity_names]
+                + [
+                    result.output_path,
+                    result.error.splitlines()[0] if result.error else "",
+                ]
+            )
+
+    return path
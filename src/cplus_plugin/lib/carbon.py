@@ -21,9 +21,11 @@ from qgis.core import (
 )
 from qgis import processing
 
+import numpy as np
+
 from ..conf import settings_manager, Settings
 from ..models.base import Activity, DataSourceType, NcsPathwayType
-from ..utils import log
+from ..utils import log, raster_block_to_array
 
 
 # For now, will set this manually but for future implementation, consider
@@ -31,17 +33,21 @@ from ..utils import log
 # reference layer. This area is in hectares i.e. 300m by 300m pixel size.
 MEAN_REFERENCE_LAYER_AREA = 9.0
 
+# Maximum number of NCS pathway pixels that will be read into memory at
+# once when computing the intersecting pixels in blocks.
+MAX_BLOCK_PIXELS = 4000000
+
 LOG_PREFIX = "Irrecoverable Carbon Calculation"
 
 
 def calculate_irrecoverable_carbon_from_mean(
-    ncs_pathways_layer: QgsRasterLayer,
+    ncs_pathways_layer: QgsRasterLayer, vectorized: bool = True
 ) -> float:
     """Calculates the total irrecoverable carbon in tonnes for protect NCS pathways
     using the reference layer defined in settings that is based on the
     mean value per hectare.
 
-    This is a manual, pixel-by-pixel analysis that overcomes the limitations
+    This is a manual analysis of each reference pixel that overcomes the limitations
     of the raster calculator and zonal statistics tools, which use the intersection
     of the center point of the reference pixel to determine whether the reference
     pixel will be considered in the computation. The use of these tools results in some
@@ -57,6 +63,11 @@ def calculate_irrecoverable_carbon_from_mean(
     this function.
     :type ncs_pathways_layer: QgsRasterLayer
 
+    :param vectorized: True to read the layers in blocks and compute the
+    intersecting pixels using NumPy array operations (default), else False to
+    use the slower pixel-by-pixel analysis. Both produce the same results.
+    :type vectorized: bool
+
     :returns: The total irrecoverable carbon for protect NCS pathways
     specified in the input. If there are any errors during the operation,
     such as an invalid input raster layer, then -1.0 will be returned.
@@ -141,8 +152,54 @@ def calculate_irrecoverable_carbon_from_mean(
         )
         return -1.0
 
-    #
-    reference_provider = reference_irrecoverable_carbon_layer.dataProvider()
+    if vectorized:
+        ic_pixel_count, ic_total = _sum_intersecting_pixels_by_block(
+            reference_irrecoverable_carbon_layer, reference_extent, ncs_pathways_layer
+        )
+    else:
+        ic_pixel_count, ic_total = _sum_intersecting_pixels_by_pixel(
+            reference_irrecoverable_carbon_layer, reference_extent, ncs_pathways_layer
+        )
+
+    if ic_pixel_count == 0:
+        log(
+            f"{LOG_PREFIX} - No protect NCS pathways were found in the reference layer.",
+            info=False,
+        )
+        return 0.0
+
+    ic_mean = ic_total / float(ic_pixel_count)
+
+    log("Calculating the total irrecoverable carbon...")
+
+    return MEAN_REFERENCE_LAYER_AREA * ic_pixel_count * ic_mean
+
+
+def _sum_intersecting_pixels_by_pixel(
+    reference_layer: QgsRasterLayer,
+    reference_extent: QgsRectangle,
+    ncs_pathways_layer: QgsRasterLayer,
+) -> typing.Tuple[int, float]:
+    """Visits each pixel of the reference layer and checks whether there
+    are valid intersecting pixels in the NCS pathways layer.
+
+    This is the original implementation of the analysis and is retained for
+    benchmarking and verifying the results of the vectorized version.
+
+    :param reference_layer: Mean irrecoverable carbon reference layer.
+    :type reference_layer: QgsRasterLayer
+
+    :param reference_extent: Extent of the reference layer to analyze.
+    :type reference_extent: QgsRectangle
+
+    :param ncs_pathways_layer: Binary layer of protect NCS pathways.
+    :type ncs_pathways_layer: QgsRasterLayer
+
+    :returns: A tuple containing the number of reference pixels that intersect
+    with valid NCS pathway pixels and the sum of their values.
+    :rtype: tuple
+    """
+    reference_provider = reference_layer.dataProvider()
     reference_layer_iterator = QgsRasterIterator(reference_provider)
     reference_layer_iterator.startRasterRead(
         1, reference_provider.xSize(), reference_provider.ySize(), reference_extent
@@ -223,9 +280,6 @@ def calculate_irrecoverable_carbon_from_mean(
 
                 # Check if the NCS block within the reference block contains
                 # any other value apart from the invalid value i.e. 0 pixel value.
-                # In future iterations, consider using QGIS 3.40+ which includes
-                # QgsRasterBlock.as_numpy() that provides the ability to work with
-                # the raw binary data in numpy for more faster calculations.
                 ncs_ba_set = set(
                     ncs_block_data[i] for i in range(ncs_block_data.size())
                 )
@@ -242,21 +296,115 @@ def calculate_irrecoverable_carbon_from_mean(
 
     reference_layer_iterator.stopRasterRead(1)
 
-    ic_pixel_count = len(irrecoverable_carbon_intersecting_pixel_values)
-    if ic_pixel_count == 0:
-        log(
-            f"{LOG_PREFIX} - No protect NCS pathways were found in the reference layer.",
-            info=False,
-        )
-        return 0.0
+    return len(irrecoverable_carbon_intersecting_pixel_values), float(
+        sum(irrecoverable_carbon_intersecting_pixel_values)
+    )
+
+
+def _sum_intersecting_pixels_by_block(
+    reference_layer: QgsRasterLayer,
+    reference_extent: QgsRectangle,
+    ncs_pathways_layer: QgsRasterLayer,
+) -> typing.Tuple[int, float]:
+    """Vectorized version of `_sum_intersecting_pixels_by_pixel` that reads
+    both layers in tiles of reference layer rows and computes the
+    intersecting pixels using NumPy array operations.
+
+    For each tile, the NCS pathways layer is read at a resolution that
+    is an integer subdivision of the reference pixel i.e. each reference
+    pixel is sampled using the same number of NCS pixels as the pixel-by-pixel
+    implementation. The samples are then reshaped so that a reference pixel
+    is considered if any of its NCS samples has a valid (non-zero) value.
+
+    :param reference_layer: Mean irrecoverable carbon reference layer.
+    :type reference_layer: QgsRasterLayer
+
+    :param reference_extent: Extent of the reference layer to analyze.
+    :type reference_extent: QgsRectangle
+
+    :param ncs_pathways_layer: Binary layer of protect NCS pathways.
+    :type ncs_pathways_layer: QgsRasterLayer
 
-    ic_mean = sum(irrecoverable_carbon_intersecting_pixel_values) / float(
-        ic_pixel_count
+    :returns: A tuple containing the number of reference pixels that intersect
+    with valid NCS pathway pixels and the sum of their values.
+    :rtype: tuple
+    """
+    reference_provider = reference_layer.dataProvider()
+    ncs_provider = ncs_pathways_layer.dataProvider()
+
+    columns = reference_provider.xSize()
+    rows = reference_provider.ySize()
+    if columns == 0 or rows == 0:
+        return 0, 0.0
+
+    # Same pixel size as used in the pixel-by-pixel analysis
+    pixel_width = reference_extent.width() / columns
+    pixel_height = reference_extent.height() / rows
+
+    # Number of NCS samples per reference pixel in each direction
+    ncs_x_factor = max(
+        1, math.ceil(pixel_width / ncs_pathways_layer.rasterUnitsPerPixelX())
+    )
+    ncs_y_factor = max(
+        1, math.ceil(pixel_height / ncs_pathways_layer.rasterUnitsPerPixelY())
     )
 
-    log("Calculating the total irrecoverable carbon...")
+    tile_rows = int(MAX_BLOCK_PIXELS // (columns * ncs_x_factor * ncs_y_factor))
+    tile_rows = min(rows, max(1, tile_rows))
 
-    return MEAN_REFERENCE_LAYER_AREA * ic_pixel_count * ic_mean
+    ic_pixel_count = 0
+    ic_total = 0.0
+
+    for start_row in range(0, rows, tile_rows):
+        block_rows = min(tile_rows, rows - start_row)
+        tile_extent = QgsRectangle(
+            reference_extent.xMinimum(),
+            reference_extent.yMaximum() - (start_row + block_rows) * pixel_height,
+            reference_extent.xMaximum(),
+            reference_extent.yMaximum() - start_row * pixel_height,
+        )
+
+        reference_block = reference_provider.block(1, tile_extent, columns, block_rows)
+        if not reference_block.isValid():
+            log(
+                f"{LOG_PREFIX} - Invalid irrecoverable carbon layer raster block.",
+                info=False,
+            )
+            break
+
+        ncs_block = ncs_provider.block(
+            1,
+            tile_extent,
+            columns * ncs_x_factor,
+            block_rows * ncs_y_factor,
+        )
+        if not ncs_block.isValid():
+            log(
+                f"{LOG_PREFIX} - Invalid aggregated NCS pathway raster block.",
+                info=False,
+            )
+            continue
+
+        reference_values = raster_block_to_array(reference_block)
+        ncs_values = raster_block_to_array(ncs_block)
+        if reference_values.size == 0 or ncs_values.size == 0:
+            continue
+
+        # Resample the NCS samples onto the reference grid where a reference
+        # pixel is valid if any of the corresponding NCS samples is non-zero.
+        # The raw values are compared, as in the pixel-by-pixel analysis, so
+        # non-zero NoData values are also considered valid.
+        ncs_valid = np.ma.getdata(ncs_values) != 0
+        ncs_valid = ncs_valid.reshape(
+            block_rows, ncs_y_factor, columns, ncs_x_factor
+        ).any(axis=(1, 3))
+
+        intersecting = ncs_valid & ~np.ma.getmaskarray(reference_values)
+
+        ic_pixel_count += int(np.count_nonzero(intersecting))
+        ic_total += float(reference_values.data[intersecting].astype(np.float64).sum())
+
+    return ic_pixel_count, ic_total
 
 
 class IrrecoverableCarbonCalculator:
@@ -19,6 +19,7 @@ from qgis import processing
 
 from ..definitions.constants import NPV_PRIORITY_LAYERS_SEGMENT, PRIORITY_LAYERS_SEGMENT
 from ..conf import settings_manager, Settings
+from ..models.base import Activity
 from ..models.financial import NcsPathwayNpvCollection
 from ..utils import clean_filename, FileUtils, log, tr
 
@@ -220,11 +221,38 @@ def calculate_activity_npv(activity_id: str, activity_area: float) -> float:
     :rtype: float
     """
     activity = settings_manager.get_activity(activity_id)
-    if activity is None or len(activity.pathways) == 0:
+    if activity is None:
         return -1.0
 
-    npv_collection = settings_manager.get_npv_collection()
-    if npv_collection is None:
+    return compute_activity_npv(
+        activity, activity_area, settings_manager.get_npv_collection()
+    )
+
+
+def compute_activity_npv(
+    activity: Activity,
+    activity_area: float,
+    npv_collection: typing.Optional[NcsPathwayNpvCollection],
+) -> float:
+    """Calculates the total NPV of an activity from the NPV values of
+    its NCS pathways in the given collection.
+
+    :param activity: Activity whose NPV is to be calculated.
+    :type activity: Activity
+
+    :param activity_area: The area of the activity in hectares.
+    :type activity_area: float
+
+    :param npv_collection: Collection containing the NPV values of the
+    NCS pathways.
+    :type npv_collection: NcsPathwayNpvCollection
+
+    :returns: Returns the total NPV of the activity, or -1.0 if the
+    activity lacks pathways, there is no NPV collection or if the NPV
+    rate for all pathways has not been specified.
+    :rtype: float
+    """
+    if len(activity.pathways) == 0 or npv_collection is None:
         return -1.0
 
     pathway_npv_values = []
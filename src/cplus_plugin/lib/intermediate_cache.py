@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent content-addressed cache of the intermediate layers of the
+scenario analysis.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import typing
+import uuid
+
+from ..utils import FileUtils, log, md5
+
+
+INTERMEDIATE_CACHE_DIRECTORY_NAME = "analysis_cache"
+
+CHECKSUM_INDEX_FILE_NAME = "checksums.json"
+
+# Default maximum size of the cached layers, in megabytes
+DEFAULT_MAX_CACHE_SIZE = 2048
+
+
+class IntermediateCache:
+    """Stores intermediate layers, e.g. snapped layers or weighted pathways,
+    keyed by a fingerprint of the stage that produced them, the contents of
+    their inputs and the stage parameters. A stage whose fingerprint is
+    unchanged does not need to be recomputed.
+
+    The fingerprint of a layer produced by the cache is its stage fingerprint
+    so downstream stages do not need to hash intermediate outputs. Checksums
+    of the source layers are persisted in an index keyed by the file size
+    and modification time so that unchanged files are only hashed once.
+
+    The size of the cached layers is bounded by max_size, in bytes, and
+    the least recently used layers are evicted when the index is saved.
+    A max_size of zero or less keeps all the layers.
+    """
+
+    def __init__(
+        self, directory: str, max_size: int = DEFAULT_MAX_CACHE_SIZE * 1024 * 1024
+    ):
+        self._directory = directory
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(directory, CHECKSUM_INDEX_FILE_NAME)
+
+        FileUtils.create_new_dir(self._directory)
+
+        self._checksums = self._read_index()
+
+    @property
+    def directory(self) -> str:
+        """Gets the directory where the intermediate layers are stored.
+
+        :returns: Cache directory.
+        :rtype: str
+        """
+        return self._directory
+
+    def _read_index(self) -> typing.Dict:
+        """Reads the persisted checksum index.
+
+        :returns: Checksum records keyed by the normalized file path.
+        :rtype: dict
+        """
+        if not os.path.exists(self._index_path):
+            return {}
+
+        try:
+            with open(self._index_path, "r") as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError) as e:
+            log(f"Unable to read the analysis cache index, {e}", info=False)
+
+        return {}
+
+    def save(self):
+        """Evicts the least recently used layers above the maximum cache
+        size and persists the checksum index.
+        """
+        self.prune()
+
+        with self._lock:
+            content = json.dumps(self._checksums)
+
+        temporary_path = f"{self._index_path}.{str(uuid.uuid4())[:8]}.tmp"
+        try:
+            with open(temporary_path, "w") as index_file:
+                index_file.write(content)
+            os.replace(temporary_path, self._index_path)
+        except OSError as e:
+            log(f"Unable to save the analysis cache index, {e}", info=False)
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def _cached_layers(self) -> typing.List[os.DirEntry]:
+        """Gets the layers stored in the cache directory.
+
+        :returns: Cached layers sorted from the least to the most
+        recently used.
+        :rtype: list
+        """
+        try:
+            entries = [
+                entry
+                for entry in os.scandir(self._directory)
+                if entry.is_file() and entry.name.endswith(".tif")
+            ]
+        except OSError as e:
+            log(f"Unable to list the analysis cache layers, {e}", info=False)
+            return []
+
+        return sorted(entries, key=lambda entry: entry.stat().st_mtime)
+
+    def _remove_layer(self, path: str) -> bool:
+        """Removes a cached layer and its checksum record.
+
+        :param path: Path of the cached layer.
+        :type path: str
+
+        :returns: True if the layer was removed, else False.
+        :rtype: bool
+        """
+        try:
+            os.remove(path)
+        except OSError as e:
+            log(f"Unable to remove {path} from the analysis cache, {e}", info=False)
+            return False
+
+        with self._lock:
+            self._checksums.pop(os.path.normpath(path), None)
+
+        return True
+
+    def prune(self):
+        """Removes the least recently used layers until the size of the
+        cached layers is within the maximum cache size.
+        """
+        if self._max_size <= 0:
+            return
+
+        layers = self._cached_layers()
+        cache_size = sum(layer.stat().st_size for layer in layers)
+
+        for layer in layers:
+            if cache_size <= self._max_size:
+                break
+            layer_size = layer.stat().st_size
+            if self._remove_layer(layer.path):
+                cache_size -= layer_size
+
+    def clear(self):
+        """Removes all the cached layers and checksum records."""
+        for layer in self._cached_layers():
+            self._remove_layer(layer.path)
+
+        with self._lock:
+            self._checksums.clear()
+
+        self.save()
+
+    def register(self, path: str, checksum: str):
+        """Records the checksum, or fingerprint, of a file.
+
+        :param path: File path.
+        :type path: str
+
+        :param checksum: Checksum of the file.
+        :type checksum: str
+        """
+        file_stat = os.stat(path)
+        with self._lock:
+            self._checksums[os.path.normpath(path)] = {
+                "size": file_stat.st_size,
+                "mtime": file_stat.st_mtime,
+                "checksum": checksum,
+            }
+
+    def checksum(self, path: str) -> str:
+        """Gets the checksum of a file.
+
+        :param path: File path.
+        :type path: str
+
+        :returns: Recorded checksum if the file has not changed since it
+        was recorded, else the MD5 checksum of the file contents.
+        :rtype: str
+        """
+        file_stat = os.stat(path)
+
+        with self._lock:
+            record = self._checksums.get(os.path.normpath(path))
+
+        if (
+            record is not None
+            and record["size"] == file_stat.st_size
+            and record["mtime"] == file_stat.st_mtime
+        ):
+            return record["checksum"]
+
+        checksum = md5(path)
+        self.register(path, checksum)
+
+        return checksum
+
+    def fingerprint(
+        self,
+        stage: str,
+        input_paths: typing.List[str],
+        parameters: typing.Dict,
+    ) -> str:
+        """Creates the fingerprint of a stage run.
+
+        :param stage: Name of the stage.
+        :type stage: str
+
+        :param input_paths: Paths of the input files, the order is significant.
+        :type input_paths: list
+
+        :param parameters: Parameters of the stage, must be JSON serializable.
+        :type parameters: dict
+
+        :returns: Fingerprint of the stage run.
+        :rtype: str
+        """
+        content = json.dumps(
+            {
+                "stage": stage,
+                "inputs": [self.checksum(path) for path in input_paths],
+                "parameters": parameters,
+            },
+            sort_keys=True,
+            default=str,
+        ).encode("utf-8")
+
+        return hashlib.sha256(content).hexdigest()
+
+    def snap_key(
+        self,
+        input_path: str,
+        reference_path: str,
+        extent: typing.Any,
+        rescale_values: bool,
+        resampling_method: int,
+        nodata_value: float,
+    ) -> str:
+        """Creates the fingerprint of a snap request.
+
+        :param input_path: Input layer source.
+        :type input_path: str
+
+        :param reference_path: Reference layer source.
+        :type reference_path: str
+
+        :param extent: Clip extent.
+        :type extent: typing.Any
+
+        :param rescale_values: Whether pixel values are rescaled.
+        :type rescale_values: bool
+
+        :param resampling_method: Resampling method.
+        :type resampling_method: int
+
+        :param nodata_value: NoData value of the snapped layer.
+        :type nodata_value: float
+
+        :returns: Fingerprint of the snap request.
+        :rtype: str
+        """
+        return self.fingerprint(
+            "snap",
+            [input_path, reference_path],
+            {
+                "extent": str(extent),
+                "rescale_values": bool(rescale_values),
+                "resampling_method": int(resampling_method),
+                "nodata_value": str(nodata_value),
+            },
+        )
+
+    def path(self, fingerprint: str) -> str:
+        """Gets the path of the cached layer for the given fingerprint.
+
+        :param fingerprint: Stage fingerprint.
+        :type fingerprint: str
+
+        :returns: Path of the cached layer, which may not exist.
+        :rtype: str
+        """
+        return os.path.join(self._directory, f"{fingerprint}.tif")
+
+    def get(self, fingerprint: str) -> typing.Optional[str]:
+        """Gets the cached layer for the given fingerprint. The layer can be
+        evicted when the cache is saved, use restore to get a copy of the
+        layer that outlives the cache entry.
+
+        :param fingerprint: Stage fingerprint.
+        :type fingerprint: str
+
+        :returns: Path of the cached layer or None if it is not in the cache.
+        :rtype: str
+        """
+        cached_path = self.path(fingerprint)
+        if not os.path.exists(cached_path):
+            return None
+
+        # The modification time marks the last use of the layer for eviction
+        try:
+            os.utime(cached_path)
+        except OSError:
+            pass
+
+        self.register(cached_path, fingerprint)
+
+        return cached_path
+
+    def put(self, fingerprint: str, layer_path: str) -> str:
+        """Adds a layer to the cache.
+
+        :param fingerprint: Fingerprint of the stage run that produced the layer.
+        :type fingerprint: str
+
+        :param layer_path: Path of the layer.
+        :type layer_path: str
+
+        :returns: Path of the cached layer, or the given layer path if it
+        could not be added to the cache.
+        :rtype: str
+        """
+        cached_path = self.path(fingerprint)
+        temporary_path = f"{cached_path}.{str(uuid.uuid4())[:8]}.tmp"
+
+        try:
+            shutil.copyfile(layer_path, temporary_path)
+            # Atomic so that concurrent runs never read a partial file
+            os.replace(temporary_path, cached_path)
+        except OSError as e:
+            log(f"Problem adding {layer_path} to the analysis cache, {e}", info=False)
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return layer_path
+
+        self.register(layer_path, fingerprint)
+        self.register(cached_path, fingerprint)
+
+        return cached_path
+
+    def restore(self, fingerprint: str, output_path: str) -> typing.Optional[str]:
+        """Copies a cached layer to the given output path.
+
+        :param fingerprint: Stage fingerprint.
+        :type fingerprint: str
+
+        :param output_path: Path where the layer will be copied.
+        :type output_path: str
+
+        :returns: Output path or None if the layer is not in the cache or
+        could not be copied.
+        :rtype: str
+        """
+        cached_path = self.get(fingerprint)
+        if cached_path is None:
+            return None
+
+        try:
+            shutil.copyfile(cached_path, output_path)
+        except OSError as e:
+            log(f"Problem restoring {output_path} from the analysis cache, {e}")
+            return None
+
+        self.register(output_path, fingerprint)
+
+        return output_path
@@ -17,7 +17,8 @@ from qgis.PyQt import QtCore, QtGui
 from ...models.base import ScenarioResult
 from ...models.helpers import layer_from_scenario_result
 from ...models.report import ScenarioAreaInfo
-from ...utils import calculate_raster_area_by_pixel_value, log, tr
+from ...utils import log, tr
+from ..statistics import raster_statistics_cache
 
 
 class ScenarioComparisonTableInfo(QtCore.QObject):
@@ -132,7 +133,7 @@ class ScenarioComparisonTableInfo(QtCore.QObject):
                 self._multistep_area_feedback.setCurrentStep(current_step)
                 continue
 
-            area_info = calculate_raster_area_by_pixel_value(
+            area_info = raster_statistics_cache.area_by_pixel_value(
                 layer, feedback=self._multistep_area_feedback
             )
             int_area_info = {
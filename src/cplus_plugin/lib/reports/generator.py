@@ -68,7 +68,7 @@ from ...definitions.defaults import (
     REPORT_COLOR_TREEFOG,
 )
 from .layout_items import BasicScenarioDetailsItem, CplusMapRepeatItem
-from .metrics import create_metrics_expression_context, evaluate_activity_metric
+from .metrics import MetricsEvaluator
 from ...models.base import Activity, ScenarioResult
 from ...models.helpers import extent_to_project_crs_extent
 from ...models.report import (
@@ -80,12 +80,12 @@ from ...models.report import (
     ScenarioComparisonReportContext,
 )
 from ...utils import (
-    calculate_raster_area_by_pixel_value,
     clean_filename,
     get_report_font,
     log,
     tr,
 )
+from ..statistics import raster_statistics_cache
 from .variables import create_bulleted_text, LayoutVariableRegister
 
 
@@ -1293,7 +1293,7 @@ class ScenarioAnalysisReportGenerator(DuplicatableRepeatPageReportGenerator):
             page_pos = self._repeat_page_num + p
             _ = self.duplicate_repeat_page(page_pos)
 
-        self._pixel_area_info = calculate_raster_area_by_pixel_value(
+        self._pixel_area_info = raster_statistics_cache.area_by_pixel_value(
             self._scenario_layer, feedback=self._area_processing_feedback
         )
 
@@ -1779,10 +1779,15 @@ class ScenarioAnalysisReportGenerator(DuplicatableRepeatPageReportGenerator):
 
         parent_table.setHeaders(columns)
 
-        metrics_context = create_metrics_expression_context(self._project)
+        # Metric expressions are prepared once and reused for all activities,
+        # the settings and pathway areas are loaded once for the scenario
+        metrics_evaluator = MetricsEvaluator(
+            self._project,
+            [str(activity.uuid) for activity in self._context.scenario.activities],
+        )
 
         rows_data = []
-        for activity in self._context.scenario.activities:
+        for activity_index, activity in enumerate(self._context.scenario.activities):
             activity_row_cells = []
 
             # Activity name column
@@ -1805,30 +1810,35 @@ class ScenarioAnalysisReportGenerator(DuplicatableRepeatPageReportGenerator):
                 highlight_error = False
 
                 base_overall_progress = 70
-                progress_increment = 15 / (
-                    float(len(self._metrics_configuration.metric_columns))
-                    * num_activities
+                progress_increment = 15 / float(num_activities)
+                progress = base_overall_progress + (
+                    (activity_index + 1) * progress_increment
+                )
+                tr_msg = f"{tr('Calculating')} {activity.name} metrics"
+                if self._process_check_cancelled_or_set_progress(progress, tr_msg):
+                    return self._get_failed_result()
+
+                metric_columns = self._metrics_configuration.metric_columns
+                activity_metrics = [
+                    self._metrics_configuration.find(str(activity.uuid), mc.name)
+                    for mc in metric_columns
+                ]
+
+                expressions = [
+                    None if activity_metric is None else activity_metric.expression
+                    for activity_metric in activity_metrics
+                ]
+
+                # The metrics of the activity are evaluated in one batch
+                results = metrics_evaluator.evaluate_activity(
+                    activity_context_info, expressions
                 )
 
-                for i, mc in enumerate(self._metrics_configuration.metric_columns):
-                    progress = base_overall_progress + ((i + 1) * progress_increment)
-                    tr_msg = f"{tr('Calculating')} {activity.name} {mc.header} metrics"
-                    if self._process_check_cancelled_or_set_progress(progress, tr_msg):
-                        return self._get_failed_result()
-
-                    activity_metric = self._metrics_configuration.find(
-                        str(activity.uuid), mc.name
-                    )
-                    if activity_metric is None:
+                for mc, result in zip(metric_columns, results):
+                    if result is None:
                         cell_value = tr("Error fetching metric")
                         highlight_error = True
                     else:
-                        result = evaluate_activity_metric(
-                            metrics_context,
-                            activity_context_info,
-                            activity_metric.expression,
-                        )
-
                         if not result.success:
                             cell_value = tr("Metric eval error")
                             highlight_error = True
@@ -3,6 +3,7 @@
 Provides variables and functions for custom activity metrics.
 """
 
+from functools import partial
 import typing
 
 from qgis.core import (
@@ -24,9 +25,12 @@ from ...definitions.defaults import (
     PWL_IMPACT_EXPRESSION_DESCRIPTION,
 )
 from ..carbon import IrrecoverableCarbonCalculator
-from ..financials import calculate_activity_npv
+from ..financials import calculate_activity_npv, compute_activity_npv
+from ...models.base import Activity
+from ...models.financial import NcsPathwayNpvCollection
 from ...models.report import ActivityContextInfo, MetricEvalResult
-from ...utils import calculate_raster_area, function_help_to_html, log, tr
+from ...utils import function_help_to_html, log, tr
+from ..statistics import raster_statistics_cache
 
 # Collection of metric expression functions
 METRICS_LIBRARY = []
@@ -42,11 +46,43 @@ FUNC_ACTIVITY_NPV = "activity_npv"
 FUNC_PWL_IMPACT = "pwl_impact"
 
 
+def _memoized_result(
+    results: typing.Optional[dict],
+    key: typing.Hashable,
+    calculate: typing.Callable[[], typing.Any],
+) -> typing.Any:
+    """Gets the result of a metric function from the memoized results,
+    calculating it if it is not available.
+
+    :param results: Memoized results of the function or None if the
+    results are not memoized.
+    :type results: dict
+
+    :param key: Arguments that determine the result of the function.
+    :type key: typing.Hashable
+
+    :param calculate: Callable that calculates the result.
+    :type calculate: typing.Callable
+
+    :returns: The result of the function.
+    :rtype: typing.Any
+    """
+    if results is None:
+        return calculate()
+
+    if key not in results:
+        results[key] = calculate()
+
+    return results[key]
+
+
 class ActivityIrrecoverableCarbonFunction(QgsScopedExpressionFunction):
     """Calculates the total irrecoverable carbon of an activity using the
     means-based reference carbon layer."""
 
-    def __init__(self):
+    def __init__(self, memoize: bool = False):
+        # Results are memoized by functions created for a report run
+        self._results = {} if memoize else None
         help_html = function_help_to_html(
             FUNC_MEAN_BASED_IC,
             tr(MEAN_BASED_IRRECOVERABLE_CARBON_EXPRESSION_DESCRIPTION),
@@ -84,9 +120,12 @@ class ActivityIrrecoverableCarbonFunction(QgsScopedExpressionFunction):
             return -1.0
 
         activity_id = context.variable(VAR_ACTIVITY_ID)
-        irrecoverable_carbon_calculator = IrrecoverableCarbonCalculator(activity_id)
 
-        return irrecoverable_carbon_calculator.run()
+        return _memoized_result(
+            self._results,
+            activity_id,
+            lambda: IrrecoverableCarbonCalculator(activity_id).run(),
+        )
 
     def clone(self) -> "ActivityIrrecoverableCarbonFunction":
         """Gets a clone of this function.
@@ -94,7 +133,7 @@ class ActivityIrrecoverableCarbonFunction(QgsScopedExpressionFunction):
         :returns: A clone of this function.
         :rtype: ActivityIrrecoverableCarbonFunction
         """
-        return ActivityIrrecoverableCarbonFunction()
+        return ActivityIrrecoverableCarbonFunction(self._results is not None)
 
 
 class ActivityNpvFunction(QgsScopedExpressionFunction):
@@ -102,7 +141,14 @@ class ActivityNpvFunction(QgsScopedExpressionFunction):
     individual NPV values of the pathways in the activity.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        memoize: bool = False,
+        metrics_data: typing.Optional["ScenarioMetricsData"] = None,
+    ):
+        # Results are memoized by functions created for a report run
+        self._results = {} if memoize else None
+        self._metrics_data = metrics_data
         help_html = function_help_to_html(
             FUNC_ACTIVITY_NPV,
             tr(NPV_EXPRESSION_DESCRIPTION),
@@ -147,7 +193,14 @@ class ActivityNpvFunction(QgsScopedExpressionFunction):
         if not isinstance(activity_area, (float, int)):
             return -1.0
 
-        return calculate_activity_npv(activity_id, activity_area)
+        if self._metrics_data is not None:
+            calculate = partial(
+                self._metrics_data.activity_npv, activity_id, activity_area
+            )
+        else:
+            calculate = partial(calculate_activity_npv, activity_id, activity_area)
+
+        return _memoized_result(self._results, (activity_id, activity_area), calculate)
 
     def clone(self) -> "ActivityNpvFunction":
         """Gets a clone of this function.
@@ -155,13 +208,20 @@ class ActivityNpvFunction(QgsScopedExpressionFunction):
         :returns: A clone of this function.
         :rtype: ActivityNpvFunction
         """
-        return ActivityNpvFunction()
+        return ActivityNpvFunction(self._results is not None, self._metrics_data)
 
 
 class ActivityPwlImpactFunction(QgsScopedExpressionFunction):
     """Calculates the PWL impact an activity."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        memoize: bool = False,
+        metrics_data: typing.Optional["ScenarioMetricsData"] = None,
+    ):
+        # Results are memoized by functions created for a report run
+        self._results = {} if memoize else None
+        self._metrics_data = metrics_data
         arg_name = "custom_impact"
         example_intro = (
             f"For an activity with an area of 20,000 ha, "
@@ -224,7 +284,14 @@ class ActivityPwlImpactFunction(QgsScopedExpressionFunction):
         if not isinstance(num_jobs, (float, int)):
             return -1.0
 
-        return calculate_activity_pwl_impact(activity_id, num_jobs)
+        if self._metrics_data is not None:
+            calculate = partial(
+                self._metrics_data.activity_pwl_impact, activity_id, num_jobs
+            )
+        else:
+            calculate = partial(calculate_activity_pwl_impact, activity_id, num_jobs)
+
+        return _memoized_result(self._results, (activity_id, num_jobs), calculate)
 
     def clone(self) -> "ActivityPwlImpactFunction":
         """Gets a clone of this function.
@@ -232,16 +299,28 @@ class ActivityPwlImpactFunction(QgsScopedExpressionFunction):
         :returns: A clone of this function.
         :rtype: ActivityPwlImpactFunction
         """
-        return ActivityPwlImpactFunction()
+        return ActivityPwlImpactFunction(self._results is not None, self._metrics_data)
 
 
-def create_metrics_expression_scope() -> QgsExpressionContextScope:
+def create_metrics_expression_scope(
+    memoize_results: bool = False,
+    metrics_data: typing.Optional["ScenarioMetricsData"] = None,
+) -> QgsExpressionContextScope:
     """Creates the expression context scope for activity metrics.
 
     The initial variable values will be arbitrary and will only be
     updated just prior to the evaluation of the expression in a
     separate function.
 
+    :param memoize_results: True to memoize the results of the metric
+    functions in the scope e.g. for the duration of a report run.
+    :type memoize_results: bool
+
+    :param metrics_data: Settings and pathway areas loaded once for the
+    activities of a scenario. If not specified, the metric functions
+    read them for each activity.
+    :type metrics_data: ScenarioMetricsData
+
     :returns: The expression scope for activity metrics.
     :rtype: QgsExpressionContextScope
     """
@@ -267,10 +346,14 @@ def create_metrics_expression_scope() -> QgsExpressionContextScope:
         )
     )
     # Add functions
-    expression_scope.addFunction(FUNC_PWL_IMPACT, ActivityPwlImpactFunction())
-    expression_scope.addFunction(FUNC_ACTIVITY_NPV, ActivityNpvFunction())
     expression_scope.addFunction(
-        FUNC_MEAN_BASED_IC, ActivityIrrecoverableCarbonFunction()
+        FUNC_PWL_IMPACT, ActivityPwlImpactFunction(memoize_results, metrics_data)
+    )
+    expression_scope.addFunction(
+        FUNC_ACTIVITY_NPV, ActivityNpvFunction(memoize_results, metrics_data)
+    )
+    expression_scope.addFunction(
+        FUNC_MEAN_BASED_IC, ActivityIrrecoverableCarbonFunction(memoize_results)
     )
 
     return expression_scope
@@ -318,6 +401,8 @@ def metric_function_by_name(name: str) -> typing.Optional[QgsScopedExpressionFun
 
 def create_metrics_expression_context(
     project: QgsProject = None,
+    memoize_results: bool = False,
+    metrics_data: typing.Optional["ScenarioMetricsData"] = None,
 ) -> QgsExpressionContext:
     """Gets the expression context to use in the initial set up (e.g.
     expression builder) as well as computation stage of activity metrics.
@@ -329,6 +414,14 @@ def create_metrics_expression_context(
     the current project will be used.
     :type project: QgsProject
 
+    :param memoize_results: True to memoize the results of the metric
+    functions in the context e.g. for the duration of a report run.
+    :type memoize_results: bool
+
+    :param metrics_data: Settings and pathway areas loaded once for the
+    activities of a scenario.
+    :type metrics_data: ScenarioMetricsData
+
     :returns: The expression to use in the customization of activity
     metrics.
     :rtype: QgsExpressionContext
@@ -342,7 +435,9 @@ def create_metrics_expression_context(
     metric_expression_context.appendScope(
         QgsExpressionContextUtils.projectScope(project)
     )
-    metric_expression_context.appendScope(create_metrics_expression_scope())
+    metric_expression_context.appendScope(
+        create_metrics_expression_scope(memoize_results, metrics_data)
+    )
 
     # Highlight some key variables
     metric_expression_context.setHighlightedVariables([VAR_ACTIVITY_AREA])
@@ -376,17 +471,57 @@ def evaluate_activity_metric(
     :rtype: MetricEvalResult
     """
     # Update context with activity information
+    if not _update_activity_variables(context, activity_info):
+        return MetricEvalResult(False, None)
+
+    expression = QgsExpression(expression_str)
+    expression.prepare(context)
+
+    return _evaluate_expression(expression, context)
+
+
+def _update_activity_variables(
+    context: QgsExpressionContext, activity_info: ActivityContextInfo
+) -> bool:
+    """Updates the variables of the metrics scope in the context with the
+    activity information.
+
+    :param context: Expression context containing the metrics scope.
+    :type context: QgsExpressionContext
+
+    :param activity_info: Contains information about an activity whose
+    attribute values will be used to evaluate expressions.
+    :type activity_info: ActivityContextInfo
+
+    :returns: True if the variables were updated or False if the context
+    does not contain the metrics scope.
+    :rtype: bool
+    """
     metrics_scope = context.activeScopeForVariable(VAR_ACTIVITY_AREA)
     if metrics_scope is None:
-        return MetricEvalResult(False, None)
+        return False
 
-    # Update context
     metrics_scope.setVariable(VAR_ACTIVITY_ID, str(activity_info.activity.uuid))
     metrics_scope.setVariable(VAR_ACTIVITY_NAME, activity_info.activity.name)
     metrics_scope.setVariable(VAR_ACTIVITY_AREA, activity_info.area)
 
-    expression = QgsExpression(expression_str)
-    expression.prepare(context)
+    return True
+
+
+def _evaluate_expression(
+    expression: QgsExpression, context: QgsExpressionContext
+) -> MetricEvalResult:
+    """Evaluates a prepared metric expression.
+
+    :param expression: Prepared expression.
+    :type expression: QgsExpression
+
+    :param context: Expression context the expression was prepared with.
+    :type context: QgsExpressionContext
+
+    :returns: The result of the metric calculation.
+    :rtype: MetricEvalResult
+    """
     result = expression.evaluate(context)
 
     if expression.hasEvalError() or expression.hasParserError():
@@ -402,6 +537,121 @@ def evaluate_activity_metric(
     return MetricEvalResult(True, result)
 
 
+class MetricsEvaluator:
+    """Evaluates the metric expressions of the activities in a report run.
+
+    Each expression is parsed and prepared once and reused for all the
+    activities. The metric functions in the evaluator's context memoize
+    their results so the results are only calculated once per activity
+    for the lifetime of the evaluator.
+
+    The settings and pathway areas used by the metric functions are
+    loaded once for the activities of the scenario.
+    """
+
+    def __init__(
+        self,
+        project: QgsProject = None,
+        activity_ids: typing.Optional[typing.Iterable[str]] = None,
+    ):
+        self._metrics_data = ScenarioMetricsData(activity_ids or [])
+        self._context = create_metrics_expression_context(
+            project, memoize_results=True, metrics_data=self._metrics_data
+        )
+        self._expressions = {}
+
+    @property
+    def metrics_data(self) -> "ScenarioMetricsData":
+        """Gets the settings and pathway areas used by the metric
+        functions.
+
+        :returns: Metrics data of the scenario.
+        :rtype: ScenarioMetricsData
+        """
+        return self._metrics_data
+
+    @property
+    def context(self) -> QgsExpressionContext:
+        """Gets the expression context used to evaluate the metrics.
+
+        :returns: Metrics expression context.
+        :rtype: QgsExpressionContext
+        """
+        return self._context
+
+    def compiled_expression(self, expression_str: str) -> QgsExpression:
+        """Gets the prepared expression, the expression is parsed and
+        prepared the first time it is requested.
+
+        :param expression_str: Expression string.
+        :type expression_str: str
+
+        :returns: Prepared expression.
+        :rtype: QgsExpression
+        """
+        expression = self._expressions.get(expression_str)
+        if expression is None:
+            expression = QgsExpression(expression_str)
+            expression.prepare(self._context)
+            self._expressions[expression_str] = expression
+
+        return expression
+
+    def evaluate(
+        self, activity_info: ActivityContextInfo, expression_str: str
+    ) -> MetricEvalResult:
+        """Calculates a metric for an activity.
+
+        :param activity_info: Contains information about an activity whose
+        attribute values will be used to evaluate the expression.
+        :type activity_info: ActivityContextInfo
+
+        :param expression_str: Expression to be evaluated.
+        :type expression_str: str
+
+        :returns: The result of the activity's metric calculation.
+        :rtype: MetricEvalResult
+        """
+        return self.evaluate_activity(activity_info, [expression_str])[0]
+
+    def evaluate_activity(
+        self,
+        activity_info: ActivityContextInfo,
+        expressions: typing.List[typing.Optional[str]],
+    ) -> typing.List[typing.Optional[MetricEvalResult]]:
+        """Calculates several metrics for an activity in one batch, the
+        activity information is set in the context once for the batch.
+
+        :param activity_info: Contains information about an activity whose
+        attribute values will be used to evaluate the expressions.
+        :type activity_info: ActivityContextInfo
+
+        :param expressions: Expressions to be evaluated, None values are
+        skipped.
+        :type expressions: list
+
+        :returns: The results of the activity's metric calculations in the
+        same order as the expressions, None for skipped expressions.
+        :rtype: list
+        """
+        if not _update_activity_variables(self._context, activity_info):
+            return [
+                MetricEvalResult(False, None) if expression_str is not None else None
+                for expression_str in expressions
+            ]
+
+        results = []
+        for expression_str in expressions:
+            if expression_str is None:
+                results.append(None)
+                continue
+
+            expression = self.compiled_expression(expression_str)
+            results.append(_evaluate_expression(expression, self._context))
+
+        return results
+
+
 class MetricsExpressionContextGenerator(QgsExpressionContextGenerator):
     """Helper class that generates the metrics expression context for use in
     QGIS objects that expect an expression context generator.
@@ -436,16 +686,52 @@ def calculate_activity_pwl_impact(activity_id: str, number_jobs: float) -> float
     :rtype: float
     """
     activity = settings_manager.get_activity(activity_id)
-    if activity is None or len(activity.pathways) == 0:
+    if activity is None:
         return -1.0
 
-    pathway_areas = []
+    return compute_activity_pwl_impact(activity, number_jobs)
+
+
+def compute_activity_pwl_impact(
+    activity: Activity,
+    number_jobs: float,
+    pathway_areas: typing.Optional[typing.Dict[str, float]] = None,
+) -> float:
+    """Calculates the PWL impact of an activity from the areas of its
+    NCS pathways.
+
+    :param activity: Activity whose PWL impact is to be calculated.
+    :type activity: Activity
+
+    :param number_jobs: Number of jobs for the activity.
+    :type number_jobs: float
+
+    :param pathway_areas: Precomputed areas, in hectares, keyed by the
+    pathway path where -1 indicates the area could not be computed.
+    Areas of pathways that are not in the mapping are computed.
+    :type pathway_areas: dict
+
+    :returns: Returns the total pwl impact of the activity, or -1.0
+    if the activity lacks pathways or if the area of all pathways
+    could not be computed.
+    :rtype: float
+    """
+    if len(activity.pathways) == 0:
+        return -1.0
+
+    if pathway_areas is None:
+        pathway_areas = {}
+
+    areas = []
     for pathway in activity.pathways:
-        pathway_layer = pathway.to_map_layer()
-        if pathway_layer is None:
-            continue
+        area = pathway_areas.get(pathway.path)
+        if area is None:
+            pathway_layer = pathway.to_map_layer()
+            if pathway_layer is None:
+                continue
+
+            area = raster_statistics_cache.area(pathway_layer, 1)
 
-        area = calculate_raster_area(pathway_layer, 1)
         if area == -1.0:
             log(
                 f"Could not compute the area for {pathway.name} "
@@ -455,9 +741,133 @@ def calculate_activity_pwl_impact(activity_id: str, number_jobs: float) -> float
             )
             continue
 
-        pathway_areas.append(area)
+        areas.append(area)
 
-    if len(pathway_areas) == 0:
+    if len(areas) == 0:
         return -1.0
 
-    return float(sum(pathway_areas)) * number_jobs
+    return float(sum(areas)) * number_jobs
+
+
+class ScenarioMetricsData:
+    """Settings and NCS pathway areas used by the metric functions,
+    loaded once for the activities of a scenario.
+
+    The activities and the NPV collection are read from the settings the
+    first time they are needed. The areas of the pathways in all the
+    activities are computed together in a single pass the first time an
+    area is needed, so the per-activity metrics become lookups.
+    """
+
+    def __init__(self, activity_ids: typing.Iterable[str]):
+        self._activity_ids = [str(activity_id) for activity_id in activity_ids]
+        self._activities = None
+        self._npv_collection = None
+        self._npv_collection_loaded = False
+        self._pathway_areas = None
+
+    def activity(self, activity_id: str) -> typing.Optional[Activity]:
+        """Gets an activity saved in the settings.
+
+        :param activity_id: The ID of the activity.
+        :type activity_id: str
+
+        :returns: Activity or None if not found.
+        :rtype: Activity
+        """
+        if self._activities is None:
+            self._activities = {
+                activity_id: settings_manager.get_activity(activity_id)
+                for activity_id in self._activity_ids
+            }
+
+        activity_id = str(activity_id)
+        if activity_id not in self._activities:
+            self._activities[activity_id] = settings_manager.get_activity(activity_id)
+
+        return self._activities[activity_id]
+
+    def npv_collection(self) -> typing.Optional[NcsPathwayNpvCollection]:
+        """Gets the NPV collection saved in the settings.
+
+        :returns: NPV collection or None if not defined.
+        :rtype: NcsPathwayNpvCollection
+        """
+        if not self._npv_collection_loaded:
+            self._npv_collection = settings_manager.get_npv_collection()
+            self._npv_collection_loaded = True
+
+        return self._npv_collection
+
+    def pathway_areas(self) -> typing.Dict[str, float]:
+        """Gets the areas of the NCS pathways in the activities, the areas
+        are computed in a single pass the first time they are requested.
+
+        :returns: Areas, in hectares, keyed by the pathway path where -1
+        indicates the area could not be computed.
+        :rtype: dict
+        """
+        if self._pathway_areas is not None:
+            return self._pathway_areas
+
+        pathway_layers = {}
+        for activity_id in self._activity_ids:
+            activity = self.activity(activity_id)
+            if activity is None:
+                continue
+
+            for pathway in activity.pathways:
+                if pathway.path in pathway_layers:
+                    continue
+
+                pathway_layer = pathway.to_map_layer()
+                if pathway_layer is not None:
+                    pathway_layers[pathway.path] = pathway_layer
+
+        statistics = raster_statistics_cache.statistics_for_bands(
+            [(layer, 1) for layer in pathway_layers.values()]
+        )
+        self._pathway_areas = {
+            path: band_statistics.area if band_statistics is not None else -1.0
+            for path, band_statistics in zip(pathway_layers, statistics)
+        }
+
+        return self._pathway_areas
+
+    def activity_npv(self, activity_id: str, activity_area: float) -> float:
+        """Calculates the total NPV of an activity.
+
+        :param activity_id: The ID of the activity.
+        :type activity_id: str
+
+        :param activity_area: The area of the activity in hectares.
+        :type activity_area: float
+
+        :returns: Returns the total NPV of the activity, or -1.0 if it
+        could not be calculated.
+        :rtype: float
+        """
+        activity = self.activity(activity_id)
+        if activity is None:
+            return -1.0
+
+        return compute_activity_npv(activity, activity_area, self.npv_collection())
+
+    def activity_pwl_impact(self, activity_id: str, number_jobs: float) -> float:
+        """Calculates the PWL impact of an activity.
+
+        :param activity_id: The ID of the activity.
+        :type activity_id: str
+
+        :param number_jobs: Number of jobs for the activity.
+        :type number_jobs: float
+
+        :returns: Returns the total pwl impact of the activity, or -1.0
+        if it could not be calculated.
+        :rtype: float
+        """
+        activity = self.activity(activity_id)
+        if activity is None:
+            return -1.0
+
+        return compute_activity_pwl_impact(activity, number_jobs, self.pathway_areas())
@@ -0,0 +1,581 @@
+# -*- coding: utf-8 -*-
+"""
+Embedded SQLite store for the scenarios, scenario results, layer mappings
+and online tasks of the plugin.
+"""
+
+import contextlib
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import typing
+
+from ..utils import log
+
+
+SETTINGS_STORE_FILE_NAME = "cplus_plugin.sqlite"
+
+# Format of the dates saved in the store, sorts in chronological order
+STORE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+ONLINE_TASK_RUNNING = "running"
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS scenarios (
+    uuid TEXT PRIMARY KEY,
+    name TEXT,
+    description TEXT,
+    server_uuid TEXT,
+    created_date TEXT NOT NULL,
+    activities TEXT NOT NULL DEFAULT '[]',
+    extent TEXT
+);
+CREATE INDEX IF NOT EXISTS scenarios_name ON scenarios (name);
+CREATE INDEX IF NOT EXISTS scenarios_created_date ON scenarios (created_date);
+CREATE INDEX IF NOT EXISTS scenarios_server_uuid ON scenarios (server_uuid);
+CREATE TABLE IF NOT EXISTS scenario_results (
+    scenario_id TEXT PRIMARY KEY,
+    created_date TEXT NOT NULL,
+    analysis_output TEXT,
+    output_layer_name TEXT,
+    scenario_directory TEXT
+);
+CREATE INDEX IF NOT EXISTS scenario_results_created_date
+    ON scenario_results (created_date);
+CREATE TABLE IF NOT EXISTS layer_mappings (
+    identifier TEXT PRIMARY KEY,
+    mapping TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS online_tasks (
+    scenario_uuid TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    updated_date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS online_tasks_status
+    ON online_tasks (status, updated_date);
+"""
+
+
+def store_date(date: datetime.datetime = None) -> str:
+    """Formats a date for saving in the store.
+
+    :param date: Date to format, defaults to the current date
+    :type date: datetime.datetime
+
+    :returns: Formatted date
+    :rtype: str
+    """
+    date = date or datetime.datetime.now()
+    return date.strftime(STORE_DATE_FORMAT)
+
+
+def _page_clause(limit: int = None, offset: int = 0) -> typing.Tuple[str, list]:
+    """Gets the SQL clause and parameters for reading a page of rows.
+
+    :param limit: Maximum number of rows, all rows are read if None
+    :type limit: int
+
+    :param offset: Number of rows to skip
+    :type offset: int
+
+    :returns: SQL clause and its parameters
+    :rtype: tuple
+    """
+    if limit is None and not offset:
+        return "", []
+
+    return " LIMIT ? OFFSET ?", [-1 if limit is None else int(limit), int(offset)]
+
+
+class SettingsStore:
+    """Stores the records that grow with the use of the plugin, i.e.
+    scenarios, their results, layer mappings and online tasks, in a SQLite
+    database so that they can be queried by indexed columns and read in
+    pages instead of decoding all the QgsSettings groups.
+
+    The store is safe to use from the plugin tasks, a single connection is
+    shared and access to it is serialized.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.RLock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._connection.row_factory = sqlite3.Row
+        with self._lock:
+            try:
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.DatabaseError as e:
+                log(f"Unable to enable WAL mode in the settings store, {e}")
+            self._connection.executescript(SCHEMA)
+            self._connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    @property
+    def path(self) -> str:
+        """Gets the path of the database file.
+
+        :returns: Database file path
+        :rtype: str
+        """
+        return self._path
+
+    def close(self):
+        """Closes the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Context manager that runs the statements executed in it in a
+        single transaction, which is rolled back if an error occurs.
+
+        :yields: Database connection
+        :ytype: sqlite3.Connection
+        """
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+            else:
+                self._connection.execute("COMMIT")
+
+    def _execute(self, sql: str, parameters: typing.Sequence = ()):
+        with self._lock:
+            return self._connection.execute(sql, parameters)
+
+    def _fetch_all(self, sql: str, parameters: typing.Sequence = ()) -> list:
+        with self._lock:
+            return [dict(row) for row in self._connection.execute(sql, parameters)]
+
+    def _fetch_one(
+        self, sql: str, parameters: typing.Sequence = ()
+    ) -> typing.Optional[dict]:
+        with self._lock:
+            row = self._connection.execute(sql, parameters).fetchone()
+
+        return dict(row) if row is not None else None
+
+    def get_metadata(self, key: str, default: str = None) -> typing.Optional[str]:
+        """Gets a value of the store metadata.
+
+        :param key: Metadata key
+        :type key: str
+
+        :param default: Value returned when the key does not exist
+        :type default: str
+
+        :returns: Metadata value
+        :rtype: str
+        """
+        row = self._fetch_one("SELECT value FROM metadata WHERE key = ?", (key,))
+        return row["value"] if row is not None else default
+
+    def set_metadata(self, key: str, value: str):
+        """Sets a value of the store metadata.
+
+        :param key: Metadata key
+        :type key: str
+
+        :param value: Metadata value
+        :type value: str
+        """
+        self._execute(
+            "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+            (key, value),
+        )
+
+    def save_scenario(
+        self,
+        identifier: str,
+        name: str,
+        description: str,
+        server_uuid: typing.Optional[str],
+        activities: typing.List[str],
+        bbox: typing.Optional[typing.List[float]],
+        created_date: str = None,
+    ):
+        """Saves a scenario, the created date of an existing scenario is
+        kept unless a new one is given.
+
+        :param identifier: Scenario UUID
+        :type identifier: str
+
+        :param name: Scenario name
+        :type name: str
+
+        :param description: Scenario description
+        :type description: str
+
+        :param server_uuid: UUID of the scenario in the server
+        :type server_uuid: str
+
+        :param activities: JSON strings of the scenario activities
+        :type activities: list
+
+        :param bbox: Bounding box of the scenario extent
+        :type bbox: list
+
+        :param created_date: Created date in the store date format
+        :type created_date: str
+        """
+        self._execute(
+            "INSERT INTO scenarios "
+            "(uuid, name, description, server_uuid, created_date, activities, "
+            "extent) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (uuid) DO UPDATE SET name = excluded.name, "
+            "description = excluded.description, "
+            "server_uuid = excluded.server_uuid, "
+            "created_date = COALESCE(?, scenarios.created_date), "
+            "activities = excluded.activities, extent = excluded.extent",
+            (
+                str(identifier),
+                name,
+                description,
+                server_uuid,
+                created_date or store_date(),
+                json.dumps(list(activities)),
+                json.dumps(bbox) if bbox is not None else None,
+                created_date,
+            ),
+        )
+
+    def get_scenario(self, identifier: str) -> typing.Optional[dict]:
+        """Gets the scenario with the given UUID.
+
+        :param identifier: Scenario UUID
+        :type identifier: str
+
+        :returns: Scenario row or None if not found
+        :rtype: dict
+        """
+        return self._fetch_one(
+            "SELECT * FROM scenarios WHERE uuid = ?", (str(identifier),)
+        )
+
+    def find_scenarios(
+        self,
+        name: str = None,
+        server_uuid: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        online: bool = None,
+        limit: int = None,
+        offset: int = 0,
+    ) -> typing.List[dict]:
+        """Finds the scenarios that match all the given criteria, the most
+        recent scenarios are returned first.
+
+        :param name: Scenario name
+        :type name: str
+
+        :param server_uuid: UUID of the scenario in the server
+        :type server_uuid: str
+
+        :param start_date: Earliest created date in the store date format
+        :type start_date: str
+
+        :param end_date: Latest created date in the store date format
+        :type end_date: str
+
+        :param online: Only return online scenarios if True or offline
+        scenarios if False
+        :type online: bool
+
+        :param limit: Maximum number of scenarios
+        :type limit: int
+
+        :param offset: Number of scenarios to skip
+        :type offset: int
+
+        :returns: Scenario rows
+        :rtype: list
+        """
+        conditions = []
+        parameters = []
+        if name is not None:
+            conditions.append("name = ?")
+            parameters.append(name)
+        if server_uuid is not None:
+            conditions.append("server_uuid = ?")
+            parameters.append(str(server_uuid))
+        if start_date is not None:
+            conditions.append("created_date >= ?")
+            parameters.append(start_date)
+        if end_date is not None:
+            conditions.append("created_date <= ?")
+            parameters.append(end_date)
+        if online is not None:
+            conditions.append(
+                "server_uuid IS NOT NULL" if online else "server_uuid IS NULL"
+            )
+
+        sql = "SELECT * FROM scenarios"
+        if conditions:
+            sql = f"{sql} WHERE {' AND '.join(conditions)}"
+        page_clause, page_parameters = _page_clause(limit, offset)
+
+        return self._fetch_all(
+            f"{sql} ORDER BY created_date DESC, uuid{page_clause}",
+            parameters + page_parameters,
+        )
+
+    def scenario_summaries(
+        self, limit: int = None, offset: int = 0
+    ) -> typing.List[dict]:
+        """Gets the identifying details of the scenarios without their
+        activities, the most recent scenarios are returned first.
+
+        :param limit: Maximum number of scenarios
+        :type limit: int
+
+        :param offset: Number of scenarios to skip
+        :type offset: int
+
+        :returns: Rows with the scenario UUID, name, server UUID and whether
+        the scenario has a result
+        :rtype: list
+        """
+        page_clause, page_parameters = _page_clause(limit, offset)
+        rows = self._fetch_all(
+            "SELECT scenarios.uuid, scenarios.name, scenarios.server_uuid, "
+            "scenario_results.scenario_id IS NOT NULL AS has_result "
+            "FROM scenarios LEFT JOIN scenario_results "
+            "ON scenario_results.scenario_id = scenarios.uuid "
+            f"ORDER BY scenarios.created_date DESC, scenarios.uuid{page_clause}",
+            page_parameters,
+        )
+        for row in rows:
+            row["has_result"] = bool(row["has_result"])
+
+        return rows
+
+    def delete_scenario(self, identifier: str):
+        """Deletes the scenario with the given UUID.
+
+        :param identifier: Scenario UUID
+        :type identifier: str
+        """
+        self._execute("DELETE FROM scenarios WHERE uuid = ?", (str(identifier),))
+
+    def delete_scenarios(self):
+        """Deletes all the scenarios."""
+        self._execute("DELETE FROM scenarios")
+
+    def save_scenario_result(
+        self,
+        scenario_id: str,
+        created_date: str,
+        analysis_output: str,
+        output_layer_name: str,
+        scenario_directory: str,
+    ):
+        """Saves the result of a scenario.
+
+        :param scenario_id: Scenario UUID
+        :type scenario_id: str
+
+        :param created_date: Created date in the store date format
+        :type created_date: str
+
+        :param analysis_output: JSON string of the analysis output
+        :type analysis_output: str
+
+        :param output_layer_name: Name of the output layer
+        :type output_layer_name: str
+
+        :param scenario_directory: Scenario output directory
+        :type scenario_directory: str
+        """
+        self._execute(
+            "INSERT OR REPLACE INTO scenario_results (scenario_id, created_date, "
+            "analysis_output, output_layer_name, scenario_directory) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                str(scenario_id),
+                created_date,
+                analysis_output,
+                output_layer_name,
+                scenario_directory,
+            ),
+        )
+
+    def get_scenario_result(self, scenario_id: str) -> typing.Optional[dict]:
+        """Gets the result of a scenario.
+
+        :param scenario_id: Scenario UUID
+        :type scenario_id: str
+
+        :returns: Scenario result row or None if not found
+        :rtype: dict
+        """
+        return self._fetch_one(
+            "SELECT * FROM scenario_results WHERE scenario_id = ?",
+            (str(scenario_id),),
+        )
+
+    def scenario_results(self, limit: int = None, offset: int = 0) -> typing.List[dict]:
+        """Gets the scenario results, the most recent results are returned
+        first.
+
+        :param limit: Maximum number of results
+        :type limit: int
+
+        :param offset: Number of results to skip
+        :type offset: int
+
+        :returns: Scenario result rows
+        :rtype: list
+        """
+        page_clause, page_parameters = _page_clause(limit, offset)
+        return self._fetch_all(
+            "SELECT * FROM scenario_results "
+            f"ORDER BY created_date DESC, scenario_id{page_clause}",
+            page_parameters,
+        )
+
+    def delete_scenario_result(self, scenario_id: str):
+        """Deletes the result of a scenario.
+
+        :param scenario_id: Scenario UUID
+        :type scenario_id: str
+        """
+        self._execute(
+            "DELETE FROM scenario_results WHERE scenario_id = ?", (str(scenario_id),)
+        )
+
+    def delete_scenario_results(self):
+        """Deletes all the scenario results."""
+        self._execute("DELETE FROM scenario_results")
+
+    def save_layer_mapping(self, identifier: str, mapping: str):
+        """Saves a layer mapping.
+
+        :param identifier: Layer mapping identifier
+        :type identifier: str
+
+        :param mapping: JSON string of the layer mapping
+        :type mapping: str
+        """
+        self._execute(
+            "INSERT OR REPLACE INTO layer_mappings (identifier, mapping) "
+            "VALUES (?, ?)",
+            (identifier, mapping),
+        )
+
+    def get_layer_mapping(self, identifier: str) -> typing.Optional[str]:
+        """Gets a layer mapping.
+
+        :param identifier: Layer mapping identifier
+        :type identifier: str
+
+        :returns: JSON string of the layer mapping or None if not found
+        :rtype: str
+        """
+        row = self._fetch_one(
+            "SELECT mapping FROM layer_mappings WHERE identifier = ?", (identifier,)
+        )
+        return row["mapping"] if row is not None else None
+
+    def layer_mappings(self) -> typing.Dict[str, str]:
+        """Gets all the layer mappings.
+
+        :returns: JSON strings of the layer mappings keyed by the identifier
+        :rtype: dict
+        """
+        return {
+            row["identifier"]: row["mapping"]
+            for row in self._fetch_all("SELECT * FROM layer_mappings")
+        }
+
+    def delete_layer_mapping(self, identifier: str):
+        """Deletes a layer mapping.
+
+        :param identifier: Layer mapping identifier
+        :type identifier: str
+        """
+        self._execute("DELETE FROM layer_mappings WHERE identifier = ?", (identifier,))
+
+    def save_online_task(self, scenario_uuid: str, status: str = ONLINE_TASK_RUNNING):
+        """Saves the status of an online task.
+
+        :param scenario_uuid: UUID of the scenario of the task
+        :type scenario_uuid: str
+
+        :param status: Task status
+        :type status: str
+        """
+        self._execute(
+            "INSERT OR REPLACE INTO online_tasks (scenario_uuid, status, "
+            "updated_date) VALUES (?, ?, ?)",
+            (str(scenario_uuid), status, store_date()),
+        )
+
+    def online_tasks(
+        self, status: str = None, limit: int = None, offset: int = 0
+    ) -> typing.List[dict]:
+        """Gets the online tasks, the most recently updated tasks are
+        returned first.
+
+        :param status: Only return the tasks with this status
+        :type status: str
+
+        :param limit: Maximum number of tasks
+        :type limit: int
+
+        :param offset: Number of tasks to skip
+        :type offset: int
+
+        :returns: Online task rows
+        :rtype: list
+        """
+        sql = "SELECT * FROM online_tasks"
+        parameters = []
+        if status is not None:
+            sql = f"{sql} WHERE status = ?"
+            parameters.append(status)
+        page_clause, page_parameters = _page_clause(limit, offset)
+
+        return self._fetch_all(
+            f"{sql} ORDER BY updated_date DESC, rowid DESC{page_clause}",
+            parameters + page_parameters,
+        )
+
+    def delete_online_tasks(self, status: str = None):
+        """Deletes the online tasks.
+
+        :param status: Only delete the tasks with this status
+        :type status: str
+        """
+        if status is None:
+            self._execute("DELETE FROM online_tasks")
+        else:
+            self._execute("DELETE FROM online_tasks WHERE status = ?", (status,))
+
+    def clear(self):
+        """Deletes all the records, the store metadata is kept."""
+        with self.transaction() as connection:
+            for table in (
+                "scenarios",
+                "scenario_results",
+                "layer_mappings",
+                "online_tasks",
+            ):
+                connection.execute(f"DELETE FROM {table}")
@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide cache of raster band statistics used by the reports, metrics
+and comparison tables.
+"""
+
+import collections
+import dataclasses
+import json
+import os
+import threading
+import typing
+
+from qgis.core import QgsFeedback, QgsRasterLayer
+
+from ..conf import settings_manager, Settings
+from ..utils import calculate_raster_histograms, log
+
+
+# Default maximum number of band statistics held in memory
+DEFAULT_CACHE_SIZE = 256
+
+SIDECAR_FILE_EXTENSION = ".cplus_stats.json"
+
+
+@dataclasses.dataclass
+class RasterBandStatistics:
+    """Statistics of a raster band computed from its pixel value histogram."""
+
+    pixel_areas: typing.Dict[float, float] = dataclasses.field(default_factory=dict)
+    pixel_counts: typing.Dict[float, int] = dataclasses.field(default_factory=dict)
+    nodata_count: int = 0
+
+    @property
+    def minimum(self) -> typing.Optional[float]:
+        """Gets the minimum pixel value.
+
+        :returns: Minimum value or None if there are no value pixels.
+        :rtype: float
+        """
+        return min(self.pixel_counts) if self.pixel_counts else None
+
+    @property
+    def maximum(self) -> typing.Optional[float]:
+        """Gets the maximum pixel value.
+
+        :returns: Maximum value or None if there are no value pixels.
+        :rtype: float
+        """
+        return max(self.pixel_counts) if self.pixel_counts else None
+
+    @property
+    def area(self) -> float:
+        """Gets the total area, in hectares, of the value pixels.
+
+        :returns: Total area or -1 if there are no value pixels.
+        :rtype: float
+        """
+        if len(self.pixel_areas) == 0:
+            return -1.0
+
+        return float(sum(self.pixel_areas.values()))
+
+    def to_dict(self) -> dict:
+        """Serializes the statistics to a JSON-compatible dictionary.
+
+        :returns: Statistics as a dictionary.
+        :rtype: dict
+        """
+        return {
+            "histogram": [
+                [value, self.pixel_areas[value], self.pixel_counts.get(value, 0)]
+                for value in self.pixel_areas
+            ],
+            "nodata_count": self.nodata_count,
+        }
+
+    @classmethod
+    def from_dict(cls, source_dict: dict) -> "RasterBandStatistics":
+        """Creates statistics from a dictionary created by to_dict.
+
+        :param source_dict: Statistics as a dictionary.
+        :type source_dict: dict
+
+        :returns: Band statistics.
+        :rtype: RasterBandStatistics
+        """
+        histogram = source_dict.get("histogram", [])
+        return cls(
+            pixel_areas={value: area for value, area, _ in histogram},
+            pixel_counts={value: count for value, _, count in histogram},
+            nodata_count=int(source_dict.get("nodata_count", 0)),
+        )
+
+
+class RasterStatisticsCache:
+    """Least recently used cache of raster band statistics keyed by the
+    file path, modification time and band number.
+
+    Statistics can optionally be persisted in a sidecar file next to the
+    raster so that they are available across sessions.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        self._max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _file_info(layer: QgsRasterLayer) -> typing.Optional[typing.Tuple]:
+        """Gets the path, modification time and size of the layer file.
+
+        :param layer: Raster layer.
+        :type layer: QgsRasterLayer
+
+        :returns: Tuple containing the normalized path, modification time and
+        size or None if the layer is not a file.
+        :rtype: tuple
+        """
+        path = layer.dataProvider().dataSourceUri()
+        if not path or not os.path.isfile(path):
+            return None
+
+        file_stat = os.stat(path)
+
+        return os.path.normpath(path), file_stat.st_mtime_ns, file_stat.st_size
+
+    def _sidecar_enabled(self) -> bool:
+        return settings_manager.get_value(
+            Settings.STATISTICS_SIDECAR_ENABLED, default=False, setting_type=bool
+        )
+
+    def _read_sidecar(
+        self, file_info: typing.Tuple, band_number: int
+    ) -> typing.Optional[RasterBandStatistics]:
+        """Reads the persisted statistics of a band if they are still valid.
+
+        :param file_info: Path, modification time and size of the raster.
+        :type file_info: tuple
+
+        :param band_number: Band number.
+        :type band_number: int
+
+        :returns: Band statistics or None if not available.
+        :rtype: RasterBandStatistics
+        """
+        path, modified_time, size = file_info
+        sidecar_path = f"{path}{SIDECAR_FILE_EXTENSION}"
+        if not os.path.exists(sidecar_path):
+            return None
+
+        try:
+            with open(sidecar_path, "r") as sidecar_file:
+                content = json.load(sidecar_file)
+        except (OSError, ValueError) as e:
+            log(f"Unable to read raster statistics from {sidecar_path}, {e}")
+            return None
+
+        if content.get("mtime") != modified_time or content.get("size") != size:
+            return None
+
+        band_content = content.get("bands", {}).get(str(band_number))
+        if band_content is None:
+            return None
+
+        return RasterBandStatistics.from_dict(band_content)
+
+    def _write_sidecar(
+        self,
+        file_info: typing.Tuple,
+        band_number: int,
+        statistics: RasterBandStatistics,
+    ):
+        """Persists the statistics of a band in the sidecar file.
+
+        :param file_info: Path, modification time and size of the raster.
+        :type file_info: tuple
+
+        :param band_number: Band number.
+        :type band_number: int
+
+        :param statistics: Band statistics.
+        :type statistics: RasterBandStatistics
+        """
+        path, modified_time, size = file_info
+        sidecar_path = f"{path}{SIDECAR_FILE_EXTENSION}"
+
+        content = {"mtime": modified_time, "size": size, "bands": {}}
+        try:
+            if os.path.exists(sidecar_path):
+                with open(sidecar_path, "r") as sidecar_file:
+                    existing_content = json.load(sidecar_file)
+                if (
+                    existing_content.get("mtime") == modified_time
+                    and existing_content.get("size") == size
+                ):
+                    content = existing_content
+
+            content["bands"][str(band_number)] = statistics.to_dict()
+            with open(sidecar_path, "w") as sidecar_file:
+                json.dump(content, sidecar_file)
+        except (OSError, ValueError) as e:
+            log(f"Unable to save raster statistics to {sidecar_path}, {e}")
+
+    def _get(self, key: typing.Tuple) -> typing.Optional[RasterBandStatistics]:
+        with self._lock:
+            statistics = self._entries.get(key)
+            if statistics is not None:
+                self._entries.move_to_end(key)
+
+        return statistics
+
+    def _put(self, key: typing.Tuple, statistics: RasterBandStatistics):
+        with self._lock:
+            self._entries[key] = statistics
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def statistics(
+        self,
+        layer: QgsRasterLayer,
+        band_number: int = 1,
+        feedback: QgsFeedback = None,
+    ) -> typing.Optional[RasterBandStatistics]:
+        """Gets the statistics of a raster band, computing them if they are
+        not in the cache.
+
+        :param layer: Raster layer.
+        :type layer: QgsRasterLayer
+
+        :param band_number: Band number, default is band one.
+        :type band_number: int
+
+        :param feedback: Feedback object for progress and cancelling the
+        calculation.
+        :type feedback: QgsFeedback
+
+        :returns: Band statistics or None if the layer is invalid or the
+        calculation was cancelled.
+        :rtype: RasterBandStatistics
+        """
+        return self.statistics_for_bands([(layer, band_number)], feedback)[0]
+
+    def statistics_for_bands(
+        self,
+        layer_bands: typing.List[typing.Tuple[QgsRasterLayer, int]],
+        feedback: QgsFeedback = None,
+    ) -> typing.List[typing.Optional[RasterBandStatistics]]:
+        """Gets the statistics of several raster bands. Bands that are not
+        in the cache are computed in a single pass over each layer.
+
+        :param layer_bands: List of tuples containing a layer and a band number.
+        :type layer_bands: list
+
+        :param feedback: Feedback object for progress and cancelling the
+        calculation.
+        :type feedback: QgsFeedback
+
+        :returns: Statistics for each band, in the same order as the input,
+        where the statistics are None for invalid layers.
+        :rtype: list
+        """
+        results = [None] * len(layer_bands)
+        pending = []
+        sidecar_enabled = self._sidecar_enabled()
+
+        for index, (layer, band_number) in enumerate(layer_bands):
+            if layer is None or not layer.isValid():
+                continue
+
+            file_info = self._file_info(layer)
+            key = (*file_info, band_number) if file_info is not None else None
+
+            statistics = self._get(key) if key is not None else None
+            if statistics is None and key is not None and sidecar_enabled:
+                statistics = self._read_sidecar(file_info, band_number)
+                if statistics is not None:
+                    self._put(key, statistics)
+
+            if statistics is not None:
+                results[index] = statistics
+            else:
+                pending.append((index, key, file_info))
+
+        if len(pending) == 0:
+            return results
+
+        histograms = calculate_raster_histograms(
+            [layer_bands[index] for index, _, _ in pending], feedback
+        )
+        if feedback is not None and feedback.isCanceled():
+            return results
+
+        for (index, key, file_info), (pixel_areas, pixel_counts) in zip(
+            pending, histograms
+        ):
+            layer, band_number = layer_bands[index]
+            statistics = RasterBandStatistics(
+                pixel_areas=pixel_areas,
+                pixel_counts=pixel_counts,
+                nodata_count=layer.width() * layer.height()
+                - int(sum(pixel_counts.values())),
+            )
+            results[index] = statistics
+
+            if key is not None:
+                self._put(key, statistics)
+                if sidecar_enabled:
+                    self._write_sidecar(file_info, band_number, statistics)
+
+        return results
+
+    def area_by_pixel_value(
+        self,
+        layer: QgsRasterLayer,
+        band_number: int = 1,
+        feedback: QgsFeedback = None,
+    ) -> dict:
+        """Gets the area, in hectares, of the value pixels in a raster band
+        grouped by the pixel value.
+
+        :param layer: Raster layer.
+        :type layer: QgsRasterLayer
+
+        :param band_number: Band number, default is band one.
+        :type band_number: int
+
+        :param feedback: Feedback object for progress and cancelling the
+        calculation.
+        :type feedback: QgsFeedback
+
+        :returns: Dictionary of the pixel values and corresponding areas,
+        empty if the layer is invalid or empty.
+        :rtype: dict
+        """
+        statistics = self.statistics(layer, band_number, feedback)
+        if statistics is None:
+            return {}
+
+        return dict(statistics.pixel_areas)
+
+    def area(
+        self,
+        layer: QgsRasterLayer,
+        band_number: int = 1,
+        feedback: QgsFeedback = None,
+    ) -> float:
+        """Gets the total area, in hectares, of the value pixels in a
+        raster band.
+
+        :param layer: Raster layer.
+        :type layer: QgsRasterLayer
+
+        :param band_number: Band number, default is band one.
+        :type band_number: int
+
+        :param feedback: Feedback object for progress and cancelling the
+        calculation.
+        :type feedback: QgsFeedback
+
+        :returns: Total area or -1 if the layer is invalid or empty.
+        :rtype: float
+        """
+        statistics = self.statistics(layer, band_number, feedback)
+        if statistics is None:
+            return -1.0
+
+        return statistics.area
+
+    def clear(self):
+        """Removes all the statistics held in memory."""
+        with self._lock:
+            self._entries.clear()
+
+
+raster_statistics_cache = RasterStatisticsCache()
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Content-addressed index of the layers uploaded to the CPLUS API.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import typing
+import uuid
+
+from ..utils import log
+
+
+UPLOAD_INDEX_FILE_NAME = "upload_index.json"
+
+# Directory of the compressed copies of the layers being uploaded
+UPLOAD_CACHE_DIRECTORY_NAME = "upload_cache"
+
+# Size of the blocks read when hashing a file
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def content_hash(path: str) -> str:
+    """Computes the SHA-256 hash of the contents of a file by streaming it
+    in blocks.
+
+    :param path: File path.
+    :type path: str
+
+    :returns: Hexadecimal digest of the file contents.
+    :rtype: str
+    """
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            file_hash.update(block)
+
+    return file_hash.hexdigest()
+
+
+class UploadedLayerIndex:
+    """Maps the hash of the contents of uploaded files to the corresponding
+    layers in the server so that identical content is only uploaded once,
+    regardless of the file path.
+
+    Hashes are recorded against the file path, size and modification time
+    so that unchanged files are only hashed once. The index is a JSON file
+    that can be shared between machines, entries written by other processes
+    are merged when the index is saved.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+
+        content = self._read()
+        self._files = content.get("files", {})
+        self._layers = content.get("layers", {})
+        self._removed = set()
+
+    @property
+    def path(self) -> str:
+        """Gets the path of the index file.
+
+        :returns: Index file path.
+        :rtype: str
+        """
+        return self._path
+
+    def _read(self) -> typing.Dict:
+        """Reads the persisted index.
+
+        :returns: File hashes and layers keyed by the content hash.
+        :rtype: dict
+        """
+        if not os.path.exists(self._path):
+            return {}
+
+        try:
+            with open(self._path, "r") as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError) as e:
+            log(f"Unable to read the uploaded layers index, {e}", info=False)
+
+        return {}
+
+    def save(self):
+        """Persists the index, merging the entries saved by other processes
+        since the index was read.
+        """
+        content = self._read()
+        with self._lock:
+            files = content.get("files", {})
+            files.update(self._files)
+            layers = content.get("layers", {})
+            layers.update(self._layers)
+            for removed_hash in self._removed:
+                layers.pop(removed_hash, None)
+            self._files = files
+            self._layers = layers
+            self._removed = set()
+            content = json.dumps({"files": files, "layers": layers})
+
+        directory = os.path.dirname(self._path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        temporary_path = f"{self._path}.{str(uuid.uuid4())[:8]}.tmp"
+        try:
+            with open(temporary_path, "w") as index_file:
+                index_file.write(content)
+            os.replace(temporary_path, self._path)
+        except OSError as e:
+            log(f"Unable to save the uploaded layers index, {e}", info=False)
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def content_hash(self, path: str) -> str:
+        """Gets the hash of the contents of a file.
+
+        :param path: File path.
+        :type path: str
+
+        :returns: Recorded hash if the size and modification time of the
+        file are unchanged, else the hash of the file contents.
+        :rtype: str
+        """
+        file_stat = os.stat(path)
+        key = os.path.normpath(os.path.abspath(path))
+
+        with self._lock:
+            record = self._files.get(key)
+
+        if (
+            record is not None
+            and record["size"] == file_stat.st_size
+            and record["mtime"] == file_stat.st_mtime
+        ):
+            return record["hash"]
+
+        file_hash = content_hash(path)
+        with self._lock:
+            self._files[key] = {
+                "size": file_stat.st_size,
+                "mtime": file_stat.st_mtime,
+                "hash": file_hash,
+            }
+
+        return file_hash
+
+    def get(self, file_hash: str) -> typing.Optional[typing.Dict]:
+        """Gets the uploaded layer with the given content.
+
+        :param file_hash: Hash of the file contents.
+        :type file_hash: str
+
+        :returns: Uploaded layer details, including its UUID, or None if
+        the content has not been uploaded.
+        :rtype: dict
+        """
+        with self._lock:
+            layer = self._layers.get(file_hash)
+
+        return dict(layer) if layer is not None else None
+
+    def add(self, file_hash: str, layer: typing.Dict):
+        """Records the layer created by uploading the given content.
+
+        :param file_hash: Hash of the file contents.
+        :type file_hash: str
+
+        :param layer: Uploaded layer details, including its UUID.
+        :type layer: dict
+        """
+        with self._lock:
+            self._layers[file_hash] = dict(layer)
+            self._removed.discard(file_hash)
+
+    def remove(self, file_hash: str):
+        """Removes the layer of the given content e.g. when it is no
+        longer available in the server.
+
+        :param file_hash: Hash of the file contents.
+        :type file_hash: str
+        """
+        with self._lock:
+            self._layers.pop(file_hash, None)
+            self._removed.add(file_hash)
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent cache of the metadata extracted from validated datasets.
+"""
+
+import dataclasses
+import json
+import os
+import threading
+import typing
+import uuid
+
+from osgeo import gdal
+
+from ...conf import settings_manager, Settings
+from ...utils import log
+from .metadata import (
+    DatasetMetadata,
+    NO_DATA_BAND_NUMBER,
+    RESOLUTION_DECIMAL_PLACES,
+)
+
+
+VALIDATION_CACHE_FILE_NAME = "validation_cache.json"
+
+# Incremented when the extracted metadata changes
+METADATA_VERSION = 1
+
+# Fields of the dataset metadata that are not persisted
+EXCLUDED_FIELDS = ("metadata",)
+
+# Sidecar files checked in addition to the files listed by GDAL
+SIDECAR_SUFFIXES = (".aux.xml", ".ovr", ".msk")
+WORLD_FILE_EXTENSIONS = (".aux.xml", ".prj", ".tfw", ".wld")
+
+
+def extraction_configuration() -> typing.Dict:
+    """Gets the configuration that the extracted metadata depends on.
+
+    :returns: Configuration of the metadata extraction.
+    :rtype: dict
+    """
+    return {
+        "version": METADATA_VERSION,
+        "decimal_places": RESOLUTION_DECIMAL_PLACES,
+        "no_data_band": NO_DATA_BAND_NUMBER,
+    }
+
+
+class ValidationMetadataCache:
+    """Caches the metadata of validated datasets keyed by the file path,
+    size and modification time, the modification times of the sidecar
+    files and the configuration of the validation rules, so that only new or modified datasets are opened
+    again when validating.
+
+    Entries written by other processes are merged when the cache is saved.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        self._configuration = extraction_configuration()
+        self._entries = self._read()
+        self._changed = False
+
+    @classmethod
+    def from_settings(cls) -> typing.Optional["ValidationMetadataCache"]:
+        """Creates the cache in the base data directory.
+
+        :returns: Validation cache or None if the cache has been disabled
+        or the base directory has not been set.
+        :rtype: ValidationMetadataCache
+        """
+        enabled = settings_manager.get_value(
+            Settings.VALIDATION_CACHE_ENABLED, default=True, setting_type=bool
+        )
+        base_dir = settings_manager.get_value(Settings.BASE_DIR, default="")
+        if not enabled or not base_dir:
+            return None
+
+        return cls(os.path.join(base_dir, VALIDATION_CACHE_FILE_NAME))
+
+    @property
+    def path(self) -> str:
+        """Gets the path of the cache file.
+
+        :returns: Cache file path.
+        :rtype: str
+        """
+        return self._path
+
+    def _read(self) -> typing.Dict:
+        """Reads the persisted entries.
+
+        :returns: Entries keyed by the normalized file path.
+        :rtype: dict
+        """
+        if not os.path.exists(self._path):
+            return {}
+
+        try:
+            with open(self._path, "r") as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError) as e:
+            log(f"Unable to read the validation cache, {e}", info=False)
+
+        return {}
+
+    def save(self):
+        """Persists the cache if entries have been added, merging the
+        entries saved by other processes since the cache was read and
+        removing the entries of deleted datasets.
+        """
+        if not self._changed:
+            return
+
+        entries = self._read()
+        with self._lock:
+            entries.update(self._entries)
+            entries = {
+                key: entry for key, entry in entries.items() if os.path.isfile(key)
+            }
+            self._entries = entries
+            self._changed = False
+            content = json.dumps(entries)
+
+        temporary_path = f"{self._path}.{str(uuid.uuid4())[:8]}.tmp"
+        try:
+            with open(temporary_path, "w") as cache_file:
+                cache_file.write(content)
+            os.replace(temporary_path, self._path)
+        except OSError as e:
+            log(f"Unable to save the validation cache, {e}", info=False)
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    @staticmethod
+    def _sidecar_files(path: str) -> typing.List[typing.List]:
+        """Gets the sidecar files of a dataset such as the .aux.xml, .prj
+        and .tfw files, which change the metadata without modifying the
+        dataset file.
+
+        :param path: Normalized dataset file path.
+        :type path: str
+
+        :returns: Sorted list of the file names and modification times
+        of the sidecar files.
+        :rtype: list
+        """
+        file_paths = set()
+        try:
+            dataset = gdal.OpenEx(path)
+            if dataset is not None:
+                file_paths.update(dataset.GetFileList() or [])
+        except RuntimeError as e:
+            log(f"Unable to list the files of {path}, {e}", info=False)
+
+        base_path = os.path.splitext(path)[0]
+        file_paths.update(f"{path}{suffix}" for suffix in SIDECAR_SUFFIXES)
+        file_paths.update(
+            f"{base_path}{extension}" for extension in WORLD_FILE_EXTENSIONS
+        )
+
+        sidecars = []
+        for file_path in file_paths:
+            file_path = os.path.normpath(os.path.abspath(file_path))
+            if file_path == path or not os.path.isfile(file_path):
+                continue
+            sidecars.append(
+                [os.path.basename(file_path), os.stat(file_path).st_mtime_ns]
+            )
+
+        return sorted(sidecars)
+
+    @staticmethod
+    def _file_info(
+        path: str,
+    ) -> typing.Optional[typing.Tuple[str, int, int, typing.List]]:
+        """Gets the normalized path, size and modification time of a file
+        and the modification times of its sidecar files.
+
+        :param path: File path.
+        :type path: str
+
+        :returns: Tuple containing the normalized path, size, modification
+        time and sidecar files or None if the path is not a file.
+        :rtype: tuple
+        """
+        if not path or not os.path.isfile(path):
+            return None
+
+        file_stat = os.stat(path)
+        normalized_path = os.path.normpath(os.path.abspath(path))
+
+        return (
+            normalized_path,
+            file_stat.st_size,
+            file_stat.st_mtime_ns,
+            ValidationMetadataCache._sidecar_files(normalized_path),
+        )
+
+    def get(
+        self, path: str, statistics: bool = False, approximate: bool = False
+    ) -> typing.Optional[DatasetMetadata]:
+        """Gets the cached metadata of a dataset.
+
+        :param path: Dataset file path.
+        :type path: str
+
+        :param statistics: True if the minimum and maximum values of
+        raster datasets are required.
+        :type statistics: bool
+
+        :param approximate: True if estimated minimum and maximum values
+        can be used.
+        :type approximate: bool
+
+        :returns: Dataset metadata or None if the dataset has not been
+        validated with the current configuration or has been modified.
+        :rtype: DatasetMetadata
+        """
+        file_info = self._file_info(path)
+        if file_info is None:
+            return None
+
+        key, size, modified_time, sidecars = file_info
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if (
+            entry is None
+            or entry.get("size") != size
+            or entry.get("mtime") != modified_time
+            or entry.get("sidecars") != sidecars
+            or entry.get("configuration") != self._configuration
+        ):
+            return None
+
+        record = entry.get("record", {})
+        if statistics and record.get("is_raster"):
+            if not record.get("has_statistics"):
+                return None
+            if record.get("approximate_statistics") and not approximate:
+                return None
+
+        if record.get("resolution") is not None:
+            record = dict(record, resolution=tuple(record["resolution"]))
+
+        try:
+            return DatasetMetadata(**record)
+        except TypeError:
+            return None
+
+    def put(self, path: str, record: DatasetMetadata):
+        """Caches the metadata of a dataset. The metadata of datasets that
+        could not be read is not cached so that they are read again in the
+        next validation.
+
+        :param path: Dataset file path.
+        :type path: str
+
+        :param record: Dataset metadata.
+        :type record: DatasetMetadata
+        """
+        file_info = self._file_info(path)
+        if file_info is None or record.is_default_layer or not record.is_valid:
+            return
+
+        key, size, modified_time, sidecars = file_info
+        entry = {
+            "size": size,
+            "mtime": modified_time,
+            "sidecars": sidecars,
+            "configuration": self._configuration,
+            "record": {
+                field.name: getattr(record, field.name)
+                for field in dataclasses.fields(record)
+                if field.name not in EXCLUDED_FIELDS
+            },
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._changed = True
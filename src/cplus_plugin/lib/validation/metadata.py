@@ -0,0 +1,450 @@
+# -*- coding: utf-8 -*-
+"""
+Metadata of the datasets shared by the rule validators.
+"""
+
+import concurrent.futures
+import dataclasses
+import os
+from pathlib import Path
+import types
+import typing
+
+from osgeo import gdal
+
+from qgis.core import (
+    QgsFeedback,
+    QgsMapLayer,
+    QgsRasterBandStats,
+    QgsRasterLayer,
+    QgsUnitTypes,
+)
+
+from ...conf import settings_manager, Settings
+from ...models.base import LayerModelComponent
+from ...utils import log, tr
+
+
+# Types of default layers whose metadata is used in the validation
+DEFAULT_LAYER_TYPES = ("ncs_pathway", "ncs_carbon")
+
+EMPTY_METADATA = types.MappingProxyType({})
+
+DEFAULT_LAYER_PREFIX = "cplus://"
+
+# Decimal places of the x and y resolution compared by the validators
+RESOLUTION_DECIMAL_PLACES = 6
+
+# Band whose NoData value is checked by the validators
+NO_DATA_BAND_NUMBER = 0
+
+# Maximum number of datasets opened concurrently
+MAX_METADATA_WORKERS = 8
+
+
+def _freeze(value: typing.Any) -> typing.Any:
+    """Creates a read-only copy of a decoded JSON value.
+
+    :param value: Decoded JSON value.
+    :type value: Any
+
+    :returns: Value where dictionaries are replaced by read-only mappings
+    and lists by tuples.
+    :rtype: Any
+    """
+    if isinstance(value, dict):
+        return types.MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+
+    return value
+
+
+class DefaultLayerMetadataIndex:
+    """Read-only index of the metadata of the default layers keyed by the
+    layer type and UUID.
+
+    The default layers are decoded from the settings once when the index
+    is created so the index is built once per validation run and shared by
+    all the rule validators.
+    """
+
+    def __init__(self, layers: typing.Dict[str, typing.List[dict]]):
+        index = {}
+        for layer_type, type_layers in layers.items():
+            for layer in type_layers:
+                layer_uuid = layer.get("layer_uuid")
+                if layer_uuid is None:
+                    continue
+                index[(layer_type, str(layer_uuid))] = _freeze(
+                    layer.get("metadata") or {}
+                )
+
+        self._index = types.MappingProxyType(index)
+
+    @classmethod
+    def from_settings(
+        cls, layer_types: typing.Iterable[str] = DEFAULT_LAYER_TYPES
+    ) -> "DefaultLayerMetadataIndex":
+        """Creates an index of the default layers saved in the settings.
+
+        :param layer_types: Types of default layers to include.
+        :type layer_types: typing.Iterable
+
+        :returns: Index of the default layers.
+        :rtype: DefaultLayerMetadataIndex
+        """
+        return cls(
+            {
+                layer_type: settings_manager.get_default_layers(layer_type)
+                for layer_type in layer_types
+            }
+        )
+
+    def metadata(
+        self, layer_uuid: str, layer_type: str = "ncs_pathway"
+    ) -> typing.Mapping:
+        """Gets the metadata of a default layer.
+
+        :param layer_uuid: UUID of the layer.
+        :type layer_uuid: str
+
+        :param layer_type: Type of the layer e.g. ncs_pathway.
+        :type layer_type: str
+
+        :returns: Read-only layer metadata, empty if the layer is not in
+        the index.
+        :rtype: typing.Mapping
+        """
+        return self._index.get((layer_type, str(layer_uuid)), EMPTY_METADATA)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+@dataclasses.dataclass(frozen=True)
+class DatasetMetadata:
+    """Properties of a dataset that are checked by the rule validators.
+
+    The record is extracted once per validation run, from the layer or
+    from the metadata of a default layer, and shared by all the rules.
+    """
+
+    is_valid: bool
+    is_default_layer: bool = False
+    is_raster: bool = False
+    name: str = ""
+    crs: typing.Optional[str] = None
+    is_geographic: bool = False
+    # Tuple containing the x and y resolutions and the units
+    resolution: typing.Optional[typing.Tuple[float, float, str]] = None
+    has_no_data: bool = False
+    no_data_value: typing.Optional[float] = None
+    has_statistics: bool = False
+    minimum: typing.Optional[float] = None
+    maximum: typing.Optional[float] = None
+    # True if the minimum and maximum values have been estimated
+    approximate_statistics: bool = False
+    metadata: typing.Mapping = EMPTY_METADATA
+
+
+def approximate_statistics_enabled() -> bool:
+    """Checks whether the value range of the datasets can be estimated
+    instead of being computed from all the pixels.
+
+    :returns: True if approximate statistics are enabled else False.
+    :rtype: bool
+    """
+    return settings_manager.get_value(
+        Settings.APPROXIMATE_VALIDATION_STATISTICS, default=False, setting_type=bool
+    )
+
+
+def approximate_value_range(
+    path: str, band_number: int = 1
+) -> typing.Optional[typing.Tuple[float, float, bool]]:
+    """Estimates the minimum and maximum values of a raster band without
+    reading all the pixels.
+
+    Statistics stored in the dataset or in a PAM .aux.xml file are used
+    if available, otherwise the range is computed from an overview or
+    from a sample of the raster blocks.
+
+    :param path: Raster file path.
+    :type path: str
+
+    :param band_number: Band number, default is band one.
+    :type band_number: int
+
+    :returns: Tuple containing the minimum and maximum values and whether
+    the values are exact or None if the range could not be estimated.
+    :rtype: tuple
+    """
+    if not path or not os.path.isfile(path):
+        return None
+
+    try:
+        dataset = gdal.Open(path, gdal.GA_ReadOnly)
+        if dataset is None:
+            return None
+
+        band = dataset.GetRasterBand(band_number)
+        minimum = band.GetMetadataItem("STATISTICS_MINIMUM")
+        maximum = band.GetMetadataItem("STATISTICS_MAXIMUM")
+        if minimum is not None and maximum is not None:
+            is_exact = band.GetMetadataItem("STATISTICS_APPROXIMATE") != "YES"
+            return float(minimum), float(maximum), is_exact
+
+        value_range = band.ComputeRasterMinMax(True)
+    except (AttributeError, RuntimeError, ValueError) as e:
+        log(f"Unable to estimate the value range of {path}, {e}", info=False)
+        return None
+
+    if value_range is None:
+        return None
+
+    return float(value_range[0]), float(value_range[1]), False
+
+
+def layer_resolution_definition(
+    layer: QgsRasterLayer,
+) -> typing.Tuple[float, float, str]:
+    """Creates a resolution definition tuple from a layer.
+
+    :param layer: Input layer.
+    :type layer: QgsRasterLayer
+
+    :returns: Tuple containing x and y resolutions as well
+    as the units.
+    :rtype: tuple
+    """
+    crs = layer.crs()
+    if crs is None:
+        crs_unit_str = tr("unknown")
+    else:
+        crs_unit_str = QgsUnitTypes.toAbbreviatedString(crs.mapUnits())
+
+    # Tuple containing x, y (truncated to given decimal places) and units
+    return (
+        round(layer.rasterUnitsPerPixelX(), RESOLUTION_DECIMAL_PLACES),
+        round(layer.rasterUnitsPerPixelY(), RESOLUTION_DECIMAL_PLACES),
+        crs_unit_str,
+    )
+
+
+def default_layer_dataset_metadata(metadata: typing.Mapping) -> DatasetMetadata:
+    """Creates the dataset metadata of a default layer.
+
+    :param metadata: Metadata of the default layer.
+    :type metadata: typing.Mapping
+
+    :returns: Dataset metadata, the layer is valid as it is available in
+    the server.
+    :rtype: DatasetMetadata
+    """
+    resolution = None
+    if "resolution" in metadata and "unit" in metadata:
+        resolution = (
+            round(metadata["resolution"][0], RESOLUTION_DECIMAL_PLACES),
+            round(metadata["resolution"][1], RESOLUTION_DECIMAL_PLACES),
+            metadata["unit"],
+        )
+
+    return DatasetMetadata(
+        is_valid=True,
+        is_default_layer=True,
+        is_raster=metadata.get("is_raster", False),
+        name=metadata.get("name", ""),
+        crs=metadata.get("crs", None),
+        is_geographic=metadata.get("is_geographic", False),
+        resolution=resolution,
+        has_no_data="nodata_value" in metadata,
+        no_data_value=metadata.get("nodata_value", None),
+        metadata=metadata,
+    )
+
+
+def layer_dataset_metadata(
+    layer: typing.Optional[QgsMapLayer],
+    is_valid: bool,
+    statistics: bool = False,
+    approximate: bool = False,
+) -> DatasetMetadata:
+    """Extracts the dataset metadata of a map layer.
+
+    :param layer: Map layer or None if the dataset does not exist.
+    :type layer: QgsMapLayer
+
+    :param is_valid: Whether the dataset is valid.
+    :type is_valid: bool
+
+    :param statistics: True to compute the minimum and maximum values
+    of raster layers.
+    :type statistics: bool
+
+    :param approximate: True to estimate the minimum and maximum values
+    instead of reading all the pixels.
+    :type approximate: bool
+
+    :returns: Dataset metadata.
+    :rtype: DatasetMetadata
+    """
+    if layer is None or not is_valid:
+        return DatasetMetadata(is_valid=is_valid)
+
+    crs = layer.crs()
+    if not isinstance(layer, QgsRasterLayer):
+        return DatasetMetadata(
+            is_valid=is_valid,
+            name=Path(layer.source()).stem,
+            crs=crs.authid(),
+            is_geographic=crs.isGeographic(),
+        )
+
+    provider = layer.dataProvider()
+    has_no_data = provider.sourceHasNoDataValue(NO_DATA_BAND_NUMBER)
+    minimum = maximum = None
+    approximate_statistics = False
+    value_range = None
+    if statistics and approximate:
+        value_range = approximate_value_range(provider.dataSourceUri())
+
+    if value_range is not None:
+        minimum, maximum, is_exact = value_range
+        approximate_statistics = not is_exact
+    elif statistics:
+        band_statistics = provider.bandStatistics(
+            1, QgsRasterBandStats.Stats.Min | QgsRasterBandStats.Stats.Max
+        )
+        minimum = band_statistics.minimumValue
+        maximum = band_statistics.maximumValue
+
+    return DatasetMetadata(
+        is_valid=is_valid,
+        is_raster=True,
+        name=Path(layer.source()).stem,
+        crs=crs.authid(),
+        is_geographic=crs.isGeographic(),
+        resolution=layer_resolution_definition(layer),
+        has_no_data=has_no_data,
+        no_data_value=(
+            provider.sourceNoDataValue(NO_DATA_BAND_NUMBER) if has_no_data else None
+        ),
+        has_statistics=statistics,
+        minimum=minimum,
+        maximum=maximum,
+        approximate_statistics=approximate_statistics,
+    )
+
+
+def extract_dataset_metadata(
+    dataset: typing.Union[LayerModelComponent, str],
+    default_layer_index: DefaultLayerMetadataIndex,
+    statistics: bool = False,
+    approximate: bool = False,
+) -> DatasetMetadata:
+    """Extracts the metadata of a dataset, the dataset layer is opened
+    at most once.
+
+    :param dataset: Model component or the path of a raster layer e.g.
+    a carbon layer. Paths of default layers start with cplus://.
+    :type dataset: LayerModelComponent, str
+
+    :param default_layer_index: Index of the default layers.
+    :type default_layer_index: DefaultLayerMetadataIndex
+
+    :param statistics: True to compute the minimum and maximum values
+    of raster layers.
+    :type statistics: bool
+
+    :param approximate: True to estimate the minimum and maximum values
+    instead of reading all the pixels.
+    :type approximate: bool
+
+    :returns: Dataset metadata.
+    :rtype: DatasetMetadata
+    """
+    if isinstance(dataset, str):
+        if dataset.startswith(DEFAULT_LAYER_PREFIX):
+            return default_layer_dataset_metadata(
+                default_layer_index.metadata(
+                    dataset.replace(DEFAULT_LAYER_PREFIX, ""), "ncs_carbon"
+                )
+            )
+
+        layer = QgsRasterLayer(dataset)
+        return layer_dataset_metadata(layer, layer.isValid(), statistics, approximate)
+
+    if dataset.is_default_layer():
+        return default_layer_dataset_metadata(
+            default_layer_index.metadata(dataset.layer_uuid)
+        )
+
+    # Only model components without a layer require their own validity check
+    layer = dataset.to_map_layer()
+    is_valid = layer.isValid() if layer is not None else dataset.is_valid()
+
+    return layer_dataset_metadata(layer, is_valid, statistics, approximate)
+
+
+def extract_datasets_metadata(
+    datasets: typing.Dict[str, typing.Union[LayerModelComponent, str]],
+    default_layer_index: DefaultLayerMetadataIndex,
+    statistics: bool = False,
+    feedback: QgsFeedback = None,
+    approximate: bool = False,
+) -> typing.Optional[typing.Dict[str, DatasetMetadata]]:
+    """Extracts the metadata of several datasets concurrently.
+
+    :param datasets: Model components or raster layer paths keyed by the
+    dataset path.
+    :type datasets: dict
+
+    :param default_layer_index: Index of the default layers.
+    :type default_layer_index: DefaultLayerMetadataIndex
+
+    :param statistics: True to compute the minimum and maximum values
+    of raster layers.
+    :type statistics: bool
+
+    :param feedback: Feedback object for cancelling the extraction.
+    :type feedback: QgsFeedback
+
+    :param approximate: True to estimate the minimum and maximum values
+    instead of reading all the pixels.
+    :type approximate: bool
+
+    :returns: Dataset metadata keyed by the dataset path or None if the
+    extraction was cancelled.
+    :rtype: dict
+    """
+    records = {}
+    if len(datasets) == 0:
+        return records
+
+    max_workers = min(MAX_METADATA_WORKERS, os.cpu_count() or 1, len(datasets))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                extract_dataset_metadata,
+                dataset,
+                default_layer_index,
+                statistics,
+                approximate,
+            ): path
+            for path, dataset in datasets.items()
+        }
+        for future in concurrent.futures.as_completed(futures):
+            if feedback is not None and feedback.isCanceled():
+                for pending_future in futures:
+                    pending_future.cancel()
+                return None
+
+            path = futures[future]
+            try:
+                records[path] = future.result()
+            except Exception as e:
+                log(f"Unable to read the metadata of {path}, {e}", info=False)
+                records[path] = DatasetMetadata(is_valid=False)
+
+    return records
@@ -8,7 +8,7 @@ from pathlib import Path
 import traceback
 import typing
 
-from qgis.core import QgsRasterBandStats, QgsRasterLayer, QgsTask, QgsUnitTypes
+from qgis.core import QgsRasterLayer, QgsTask
 
 from ...definitions.constants import NO_DATA_VALUE
 
@@ -20,7 +20,18 @@ from .configs import (
     raster_validation_config,
     resolution_validation_config,
 )
+from .cache import ValidationMetadataCache
 from .feedback import ValidationFeedback
+from .metadata import (
+    approximate_statistics_enabled,
+    DatasetMetadata,
+    DefaultLayerMetadataIndex,
+    extract_dataset_metadata,
+    extract_datasets_metadata,
+    layer_resolution_definition,
+    NO_DATA_BAND_NUMBER,
+    RESOLUTION_DECIMAL_PLACES,
+)
 from ...models.base import LayerModelComponent, ModelComponentType, NcsPathway
 from ...models.validation import (
     RuleConfiguration,
@@ -47,6 +58,8 @@ class BaseRuleValidator:
         self._feedback = feedback
         self._result: RuleResult = None
         self.model_components: typing.List[LayerModelComponent] = list()
+        self.default_layer_index: DefaultLayerMetadataIndex = None
+        self.dataset_records: typing.Dict[str, DatasetMetadata] = None
 
     @property
     def rule_configuration(self) -> RuleConfiguration:
@@ -160,8 +173,10 @@ class BaseRuleValidator:
 
     def get_default_layer_metadata(
         self, layer_uuid: str, layer_type: str = "ncs_pathway"
-    ) -> typing.Dict:
-        """Get default layer metadata
+    ) -> typing.Mapping:
+        """Get default layer metadata from the index shared in the
+        validation run, the index is created if the validator is used
+        on its own.
 
         :param layer_uuid: UUID of the layer
         :type layer_uuid: str
@@ -169,13 +184,89 @@ class BaseRuleValidator:
         :param layer_type: Type of the layer e.g. ncs_pathway
         :type layer_type: str
 
-        :return: Layer metadata
-        :rtype: typing.Dict
+        :return: Read-only layer metadata
+        :rtype: typing.Mapping
+        """
+        if self.default_layer_index is None:
+            self.default_layer_index = DefaultLayerMetadataIndex.from_settings()
+
+        return self.default_layer_index.metadata(layer_uuid, layer_type)
+
+    def requires_statistics(self) -> bool:
+        """Indicates whether the validator checks the minimum and maximum
+        values of the datasets, which are expensive to compute.
+
+        :returns: True if the statistics of the datasets are required
+        else False. Default is False.
+        :rtype: bool
+        """
+        return False
+
+    def requires_exact_statistics(self, record: DatasetMetadata) -> bool:
+        """Indicates whether the estimated minimum and maximum values of a
+        dataset are inconclusive for the validator so that the values need
+        to be computed from all the pixels.
+
+        :param record: Dataset metadata with estimated statistics.
+        :type record: DatasetMetadata
+
+        :returns: True if the exact statistics of the dataset are required
+        else False. Default is False.
+        :rtype: bool
+        """
+        return False
+
+    def datasets(
+        self, model_component: LayerModelComponent
+    ) -> typing.Dict[str, typing.Union[LayerModelComponent, str]]:
+        """Gets the datasets of a model component checked by the validator.
+
+        :param model_component: Model component being validated.
+        :type model_component: LayerModelComponent
+
+        :returns: Model component or layer path keyed by the dataset path.
+        :rtype: dict
         """
-        layers = settings_manager.get_default_layers(layer_type, as_dict=True)
-        layer = layers.get(layer_uuid)
-        layer_metadata = layer.get("metadata", {})
-        return layer_metadata
+        return {model_component.path: model_component}
+
+    def get_dataset_metadata(
+        self, dataset: typing.Union[LayerModelComponent, str]
+    ) -> DatasetMetadata:
+        """Gets the metadata of a dataset from the records shared in the
+        validation run, the metadata is extracted if it is not available
+        e.g. when the validator is used on its own.
+
+        :param dataset: Model component or the path of a raster layer.
+        :type dataset: LayerModelComponent, str
+
+        :returns: Dataset metadata.
+        :rtype: DatasetMetadata
+        """
+        path = dataset if isinstance(dataset, str) else dataset.path
+        if self.dataset_records is None:
+            self.dataset_records = {}
+
+        if self.default_layer_index is None:
+            self.default_layer_index = DefaultLayerMetadataIndex.from_settings()
+
+        record = self.dataset_records.get(path)
+        statistics = self.requires_statistics()
+        if record is None or (
+            statistics and record.is_raster and not record.has_statistics
+        ):
+            record = extract_dataset_metadata(
+                dataset,
+                self.default_layer_index,
+                statistics,
+                statistics and approximate_statistics_enabled(),
+            )
+            self.dataset_records[path] = record
+
+        if record.approximate_statistics and self.requires_exact_statistics(record):
+            record = extract_dataset_metadata(dataset, self.default_layer_index, True)
+            self.dataset_records[path] = record
+
+        return record
 
 
 BaseRuleValidatorType = typing.TypeVar("BaseRuleValidatorType", bound=BaseRuleValidator)
@@ -205,22 +296,13 @@ class RasterValidator(BaseRuleValidator):
             if self.feedback.isCanceled():
                 return False
 
-            is_valid = model_component.is_valid()
-            if not is_valid:
+            dataset_metadata = self.get_dataset_metadata(model_component)
+            if not dataset_metadata.is_valid:
                 if status:
                     status = False
                 non_raster_model_components.append(model_component.name)
-            else:
-                if model_component.is_default_layer():
-                    layer_metadata = self.get_default_layer_metadata(
-                        model_component.layer_uuid
-                    )
-                    if not layer_metadata.get("is_raster", False):
-                        non_raster_model_components.append(model_component.name)
-                else:
-                    layer = model_component.to_map_layer().clone()
-                    if not isinstance(layer, QgsRasterLayer):
-                        non_raster_model_components.append(model_component.name)
+            elif not dataset_metadata.is_raster:
+                non_raster_model_components.append(model_component.name)
 
             progress += progress_increment
             self._set_progress(progress)
@@ -293,8 +375,8 @@ class CrsValidator(BaseRuleValidator):
             if self.feedback.isCanceled():
                 return False
 
-            is_valid = model_component.is_valid()
-            if not is_valid:
+            dataset_metadata = self.get_dataset_metadata(model_component)
+            if not dataset_metadata.is_valid:
                 if status:
                     status = False
 
@@ -306,16 +388,8 @@ class CrsValidator(BaseRuleValidator):
                     crs_definitions[invalid_msg] = [model_component.name]
 
             else:
-                if model_component.is_default_layer():
-                    layer_metadata = self.get_default_layer_metadata(
-                        model_component.layer_uuid
-                    )
-                    crs = layer_metadata.get("crs", None)
-                else:
-                    layer = model_component.to_map_layer().clone()
-                    crs = layer.crs()
-
-                if crs is None:
+                crs_id = dataset_metadata.crs
+                if crs_id is None:
                     # Flag that there is at least one dataset with an undefined CRS
                     if not has_undefined:
                         has_undefined = True
@@ -329,10 +403,6 @@ class CrsValidator(BaseRuleValidator):
                     else:
                         crs_definitions[undefined_msg] = [model_component.name]
                 else:
-                    if model_component.is_default_layer():
-                        crs_id = crs
-                    else:
-                        crs_id = crs.authid()
                     if crs_id in crs_definitions:
                         layers = crs_definitions.get(crs_id)
                         layers.append(model_component.name)
@@ -423,11 +493,13 @@ class ProjectedCrsValidator(BaseRuleValidator):
             if self.feedback.isCanceled():
                 return False
 
-            if not model_component.is_valid():
+            dataset_metadata = self.get_dataset_metadata(model_component)
+            if not dataset_metadata.is_valid:
                 status = False
                 crs_definitions.setdefault(invalid_msg, []).append(model_component.name)
             else:
-                crs, is_geographic = self._get_crs_and_type(model_component)
+                crs = dataset_metadata.crs
+                is_geographic = dataset_metadata.is_geographic
 
                 if crs is None:
                     status = False
@@ -465,27 +537,6 @@ class ProjectedCrsValidator(BaseRuleValidator):
 
         return status
 
-    def _get_crs_and_type(
-        self, model_component
-    ) -> typing.Tuple[typing.Optional[str], bool]:
-        """Retrieve the CRS and its type (geographic or not) for a model component.
-
-        :param model_component: The model component to analyze.
-        :type model_component: LayerModelComponent
-
-        :returns: A tuple containing the CRS ID (or None) and a boolean indicating if it is geographic.
-        :rtype: tuple
-        """
-        if model_component.is_default_layer():
-            layer_metadata = self.get_default_layer_metadata(model_component.layer_uuid)
-            return layer_metadata.get("crs", None), layer_metadata.get(
-                "is_geographic", False
-            )
-        else:
-            layer = model_component.to_map_layer().clone()
-            crs = layer.crs()
-            return crs.authid() if crs else None, crs.isGeographic() if crs else False
-
     def _generate_summary_and_info(
         self, status: bool, crs: str, crs_definitions: dict
     ) -> typing.Tuple[str, list]:
@@ -534,7 +585,7 @@ class NoDataValueValidator(BaseRuleValidator):
     """Checks if applicable input datasets have the same no data value."""
 
     # Default band in raster layer.
-    BAND_NUMBER = 0
+    BAND_NUMBER = NO_DATA_BAND_NUMBER
 
     def _validate(self) -> bool:
         """Checks whether applicable input datasets have the same no data value.
@@ -557,8 +608,8 @@ class NoDataValueValidator(BaseRuleValidator):
             if self.feedback.isCanceled():
                 return False
 
-            is_valid = model_component.is_valid()
-            if not is_valid:
+            dataset_metadata = self.get_dataset_metadata(model_component)
+            if not dataset_metadata.is_valid:
                 if status:
                     status = False
 
@@ -571,30 +622,14 @@ class NoDataValueValidator(BaseRuleValidator):
                     no_data_definitions[invalid_msg] = [model_component.name]
 
             else:
-                if model_component.is_default_layer():
-                    layer_metadata = self.get_default_layer_metadata(
-                        model_component.layer_uuid
-                    )
-                    if not layer_metadata.get("is_raster", False):
-                        continue
-                else:
-                    layer = model_component.to_map_layer().clone()
-                    if not isinstance(layer, QgsRasterLayer):
-                        continue
+                if not dataset_metadata.is_raster:
+                    continue
 
                 # If band does not have NoData value then exclude from validation
-                if model_component.is_default_layer():
-                    if "nodata_value" not in layer_metadata:
-                        continue
-                else:
-                    raster_provider = layer.dataProvider()
-                    if not raster_provider.sourceHasNoDataValue(self.BAND_NUMBER):
-                        continue
+                if not dataset_metadata.has_no_data:
+                    continue
 
-                if model_component.is_default_layer():
-                    no_data_value = layer_metadata["nodata_value"]
-                else:
-                    no_data_value = raster_provider.sourceNoDataValue(self.BAND_NUMBER)
+                no_data_value = dataset_metadata.no_data_value
                 if no_data_value != NO_DATA_VALUE:
                     if no_data_value in no_data_definitions:
                         layers = no_data_definitions.get(no_data_value)
@@ -644,7 +679,7 @@ class NoDataValueValidator(BaseRuleValidator):
 class ResolutionValidator(BaseRuleValidator):
     """Checks if datasets have the same spatial resolution."""
 
-    DECIMAL_PLACES = 6
+    DECIMAL_PLACES = RESOLUTION_DECIMAL_PLACES
 
     def _validate(self) -> bool:
         """Checks whether input datasets have the same
@@ -681,8 +716,8 @@ class ResolutionValidator(BaseRuleValidator):
             if self.feedback.isCanceled():
                 return False
 
-            is_valid = model_component.is_valid()
-            if not is_valid:
+            dataset_metadata = self.get_dataset_metadata(model_component)
+            if not dataset_metadata.is_valid:
                 if status:
                     status = False
 
@@ -695,25 +730,10 @@ class ResolutionValidator(BaseRuleValidator):
                     spatial_resolution_definitions[invalid_msg] = [model_component.name]
 
             else:
-                if model_component.is_default_layer():
-                    layer_metadata = self.get_default_layer_metadata(
-                        model_component.layer_uuid
-                    )
-                    if not layer_metadata.get("is_raster", False):
-                        continue
-                else:
-                    layer = model_component.to_map_layer().clone()
-                    if not isinstance(layer, QgsRasterLayer):
-                        continue
+                resolution_definition = dataset_metadata.resolution
+                if not dataset_metadata.is_raster or resolution_definition is None:
+                    continue
 
-                if model_component.is_default_layer():
-                    resolution_definition = (
-                        round(layer_metadata["resolution"][0], self.DECIMAL_PLACES),
-                        round(layer_metadata["resolution"][1], self.DECIMAL_PLACES),
-                        layer_metadata["unit"],
-                    )
-                else:
-                    resolution_definition = self.create_resolution_definition(layer)
                 if resolution_definition in spatial_resolution_definitions:
                     layers = spatial_resolution_definitions.get(resolution_definition)
                     layers.append(model_component.name)
@@ -773,19 +793,7 @@ class ResolutionValidator(BaseRuleValidator):
         as the units.
         :rtype: tuple
         """
-        crs = layer.crs()
-        if crs is None:
-            crs_unit_str = tr("unknown")
-        else:
-            crs_unit_str = QgsUnitTypes.toAbbreviatedString(crs.mapUnits())
-
-        # Tuple containing x, y (truncated to given decimal places) and units
-        resolution_definition = (
-            round(layer.rasterUnitsPerPixelX(), cls.DECIMAL_PLACES),
-            round(layer.rasterUnitsPerPixelY(), cls.DECIMAL_PLACES),
-            crs_unit_str,
-        )
-        return resolution_definition
+        return layer_resolution_definition(layer)
 
     @classmethod
     def resolution_definition_to_str(cls, resolution_definition: tuple) -> str:
@@ -846,8 +854,8 @@ class CarbonLayerResolutionValidator(ResolutionValidator):
             if self.feedback.isCanceled():
                 return False
 
-            is_valid = model_component.is_valid()
-            if not is_valid:
+            dataset_metadata = self.get_dataset_metadata(model_component)
+            if not dataset_metadata.is_valid:
                 if status:
                     status = False
 
@@ -860,76 +868,35 @@ class CarbonLayerResolutionValidator(ResolutionValidator):
                     carbon_resolution_definitions[invalid_msg] = [model_component.name]
 
             else:
-                if model_component.is_default_layer():
-                    ncs_layer_metadata = self.get_default_layer_metadata(
-                        model_component.layer_uuid
-                    )
-                    if not ncs_layer_metadata.get("is_raster", False):
-                        continue
-                else:
-                    ncs_layer = model_component.to_map_layer().clone()
-                    if not isinstance(ncs_layer, QgsRasterLayer):
-                        continue
+                if not dataset_metadata.is_raster:
+                    continue
 
                 # Check if the model component is an NcsPathway
                 if not isinstance(model_component, NcsPathway):
                     continue
 
-                if model_component.is_default_layer():
-                    ncs_resolution_definition = (
-                        round(ncs_layer_metadata["resolution"][0], self.DECIMAL_PLACES),
-                        round(ncs_layer_metadata["resolution"][1], self.DECIMAL_PLACES),
-                        ncs_layer_metadata["unit"],
-                    )
-                else:
-                    ncs_resolution_definition = self.create_resolution_definition(
-                        ncs_layer
-                    )
+                ncs_resolution_definition = dataset_metadata.resolution
 
                 # Loop through the spatial resolution of each carbon path
                 for carbon_path in model_component.carbon_paths:
-                    if carbon_path.startswith("cplus://"):
-                        layer_uuid = carbon_path.replace("cplus://", "")
-                        carbon_layer_metadata = self.get_default_layer_metadata(
-                            layer_uuid, "ncs_carbon"
-                        )
-                    else:
-                        layer = QgsRasterLayer(carbon_path)
-                        if not layer.isValid():
-                            if model_component.name in carbon_resolution_definitions:
-                                carbon_definitions = carbon_resolution_definitions.get(
-                                    model_component.name
-                                )
-                                carbon_definitions.append(invalid_carbon_msg)
-                            else:
-                                carbon_resolution_definitions[model_component.name] = [
-                                    invalid_carbon_msg
-                                ]
-                            continue
-
-                    if carbon_path.startswith("cplus://"):
-                        carbon_resolution_definition = (
-                            round(
-                                carbon_layer_metadata["resolution"][0],
-                                self.DECIMAL_PLACES,
-                            ),
-                            round(
-                                carbon_layer_metadata["resolution"][1],
-                                self.DECIMAL_PLACES,
-                            ),
-                            carbon_layer_metadata["unit"],
-                        )
-                    else:
-                        carbon_layer = layer.clone()
-                        carbon_resolution_definition = (
-                            self.create_resolution_definition(carbon_layer)
-                        )
+                    carbon_metadata = self.get_dataset_metadata(carbon_path)
+                    if not carbon_metadata.is_valid:
+                        if model_component.name in carbon_resolution_definitions:
+                            carbon_definitions = carbon_resolution_definitions.get(
+                                model_component.name
+                            )
+                            carbon_definitions.append(invalid_carbon_msg)
+                        else:
+                            carbon_resolution_definitions[model_component.name] = [
+                                invalid_carbon_msg
+                            ]
+                        continue
 
-                    if carbon_path.startswith("cplus://"):
-                        layer_name = carbon_layer_metadata["name"]
-                    else:
-                        # We will use the file name to represent the layer name
-                        layer_name = Path(carbon_layer.source()).stem
+                    carbon_resolution_definition = carbon_metadata.resolution
+
+                    # Default layers use their name in the server while
+                    # other layers are represented by the file name
+                    layer_name = carbon_metadata.name
 
                     if ncs_resolution_definition != carbon_resolution_definition:
                         if model_component.name in carbon_resolution_definitions:
@@ -983,6 +950,24 @@ class CarbonLayerResolutionValidator(ResolutionValidator):
         """
         return RuleType.CARBON_RESOLUTION
 
+    def datasets(
+        self, model_component: LayerModelComponent
+    ) -> typing.Dict[str, typing.Union[LayerModelComponent, str]]:
+        """Includes the carbon layers of NCS pathways.
+
+        :param model_component: Model component being validated.
+        :type model_component: LayerModelComponent
+
+        :returns: Model component or layer path keyed by the dataset path.
+        :rtype: dict
+        """
+        datasets = super().datasets(model_component)
+        if isinstance(model_component, NcsPathway):
+            for carbon_path in model_component.carbon_paths:
+                datasets[carbon_path] = carbon_path
+
+        return datasets
+
     def is_comparative(self) -> bool:
         """Validator can be used for even one dataset."""
         return False
@@ -993,6 +978,13 @@ class NormalizedValidator(BaseRuleValidator):
     range 0 - 1.
     """
 
+    MINIMUM_VALUE = 0.0
+    MAXIMUM_VALUE = 1.0
+
+    # Margin from the range bounds within which estimated values are
+    # computed from all the pixels
+    RANGE_MARGIN = 0.05
+
     def _validate(self) -> bool:
         """Checks whether the value range is between 0 and 1
         for the input raster datasets.
@@ -1016,41 +1008,32 @@ class NormalizedValidator(BaseRuleValidator):
             if self.feedback.isCanceled():
                 return False
 
-            is_valid = model_component.is_valid()
-            if not is_valid:
+            dataset_metadata = self.get_dataset_metadata(model_component)
+            if not dataset_metadata.is_valid:
                 if status:
                     status = False
                 invalid_model_components.append(model_component.name)
             else:
-                if model_component.is_default_layer():
-                    layer_metadata = self.get_default_layer_metadata(
-                        model_component.layer_uuid
-                    )
+                if dataset_metadata.is_default_layer:
                     # TODO: Proposed attribute in CPLUS API
-                    if "has_range" not in layer_metadata:
+                    if "has_range" not in dataset_metadata.metadata:
                         continue
 
                     # TODO: CPLUS API to consider additional
                     #  attributes to check / get
                     pass
                 else:
-                    layer = model_component.to_map_layer().clone()
-                    if not isinstance(layer, QgsRasterLayer):
+                    if not dataset_metadata.is_raster:
                         invalid_model_components.append(model_component.name)
                         continue
 
-                    raster_provider = layer.dataProvider()
-                    raster_stats = raster_provider.bandStatistics(
-                        1, QgsRasterBandStats.Stats.Min | QgsRasterBandStats.Stats.Max
-                    )
-
                     if (
-                        raster_stats.minimumValue < 0.0
-                        or raster_stats.maximumValue > 1.0
+                        dataset_metadata.minimum < self.MINIMUM_VALUE
+                        or dataset_metadata.maximum > self.MAXIMUM_VALUE
                     ):
                         outside_range_model_components[model_component.name] = (
-                            raster_stats.minimumValue,
-                            raster_stats.maximumValue,
+                            dataset_metadata.minimum,
+                            dataset_metadata.maximum,
                         )
 
             progress += progress_increment
@@ -1096,6 +1079,22 @@ class NormalizedValidator(BaseRuleValidator):
         """
         return RuleType.NORMALIZED
 
+    def requires_statistics(self) -> bool:
+        """The minimum and maximum values are checked."""
+        return True
+
+    def requires_exact_statistics(self, record: DatasetMetadata) -> bool:
+        """Estimated values close to the range bounds are inconclusive as
+        the pixels that were not read could be outside the range.
+        """
+        if not record.approximate_statistics or record.minimum is None:
+            return False
+
+        return (
+            abs(record.minimum - self.MINIMUM_VALUE) <= self.RANGE_MARGIN
+            or abs(record.maximum - self.MAXIMUM_VALUE) <= self.RANGE_MARGIN
+        )
+
     def is_comparative(self) -> bool:
         """Validator can be used for even one dataset."""
         return False
@@ -1167,12 +1166,78 @@ class DataValidator(QgsTask):
             self.log(msg, False)
             return False
 
+        # Default layers are decoded once and shared by the rule validators
+        default_layer_index = DefaultLayerMetadataIndex.from_settings()
+
+        # Each dataset is opened once and the rules are evaluated against
+        # the extracted metadata
+        datasets = {}
+        for rule_validator in self._applicable_rule_validators:
+            for model_component in self.model_components:
+                datasets.update(rule_validator.datasets(model_component))
+
+        statistics = any(
+            rule_validator.requires_statistics()
+            for rule_validator in self._applicable_rule_validators
+        )
+        approximate = statistics and approximate_statistics_enabled()
+
+        # Only new or modified datasets are opened if they have been
+        # validated before
+        dataset_records = {}
+        pending_datasets = dict(datasets)
+        cache = ValidationMetadataCache.from_settings()
+        if cache is not None:
+            for path in datasets:
+                record = cache.get(path, statistics, approximate)
+                if record is not None:
+                    dataset_records[path] = record
+                    del pending_datasets[path]
+
+        extracted_records = extract_datasets_metadata(
+            pending_datasets,
+            default_layer_index,
+            statistics,
+            self._feedback,
+            approximate,
+        )
+        if extracted_records is None:
+            return False
+
+        dataset_records.update(extracted_records)
+
+        # Estimated value ranges that are inconclusive for a rule are
+        # computed from all the pixels
+        exact_datasets = {
+            path: dataset
+            for path, dataset in datasets.items()
+            if dataset_records[path].approximate_statistics
+            and any(
+                rule_validator.requires_exact_statistics(dataset_records[path])
+                for rule_validator in self._applicable_rule_validators
+            )
+        }
+        exact_records = extract_datasets_metadata(
+            exact_datasets, default_layer_index, True, self._feedback
+        )
+        if exact_records is None:
+            return False
+
+        dataset_records.update(exact_records)
+        extracted_records.update(exact_records)
+        if cache is not None:
+            for path, record in extracted_records.items():
+                cache.put(path, record)
+            cache.save()
+
         for i, rule_validator in enumerate(self._applicable_rule_validators):
             if self.isCanceled():
                 status = False
                 break
 
             rule_validator.model_components = self.model_components
+            rule_validator.default_layer_index = default_layer_index
+            rule_validator.dataset_records = dataset_records
             rule_info = RuleInfo(
                 rule_validator.rule_type, rule_validator.rule_configuration.rule_name
             )
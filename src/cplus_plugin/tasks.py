@@ -3,14 +3,20 @@
  Plugin tasks related to the scenario analysis
 
 """
+import concurrent.futures
 import datetime
 import json
 import math
 import os
+import threading
 import uuid
 import typing
+from functools import partial
 from pathlib import Path
 
+import numpy as np
+from osgeo import gdal
+
 from qgis import processing
 from qgis.PyQt import QtCore
 from qgis.core import (
@@ -19,6 +25,7 @@ from qgis.core import (
     QgsProcessing,
     QgsProcessingContext,
     QgsProcessingFeedback,
+    QgsProcessingUtils,
     QgsRasterLayer,
     QgsRectangle,
     QgsVectorLayer,
@@ -30,6 +37,23 @@ from .conf import settings_manager, Settings
 from .definitions.defaults import (
     SCENARIO_OUTPUT_FILE_NAME,
 )
+from .lib.analysis import (
+    DEFAULT_MEMORY_BUDGET,
+    highest_position,
+    read_window,
+    RasterGrid,
+    RasterWriter,
+    sum_ignore_nodata,
+    VectorMask,
+    weighted_sum,
+    windowed_cell_sum,
+    windowed_highest_position,
+)
+from .lib.intermediate_cache import (
+    DEFAULT_MAX_CACHE_SIZE,
+    IntermediateCache,
+    INTERMEDIATE_CACHE_DIRECTORY_NAME,
+)
 from .models.base import ScenarioResult, SpatialExtent, Activity
 from .models.helpers import clone_activity
 from .resources import *
@@ -86,6 +110,12 @@ class ScenarioAnalysisTask(QgsTask):
 
         self.scenario = scenario
 
+        self.intermediate_cache = None
+
+        # Values used instead of the saved settings, e.g. for batch runs
+        self.settings_overrides = {}
+        self.priority_group_coefficients = {}
+
     def get_settings_value(self, name: str, default=None, setting_type=None):
         """Gets value of the setting with the passed name.
 
@@ -98,9 +128,13 @@ class ScenarioAnalysisTask(QgsTask):
         :param setting_type: Type of the store setting
         :type setting_type: Any
 
-        :returns: Value of the setting
+        :returns: Value of the setting, the overridden value takes
+        precedence over the saved setting
         :rtype: Any
         """
+        if name in self.settings_overrides:
+            return self.settings_overrides[name]
+
         return settings_manager.get_value(name, default, setting_type)
 
     def get_scenario_directory(self) -> str:
@@ -143,10 +177,22 @@ class ScenarioAnalysisTask(QgsTask):
     def get_priority_layers(self) -> typing.List:
         """Gets all the available priority layers in the plugin.
 
+        The values of the priority groups with overridden coefficients,
+        keyed by the group name, are replaced accordingly.
+
         :returns: Priority layers list
         :rtype: list
         """
-        return settings_manager.get_priority_layers()
+        priority_layers = settings_manager.get_priority_layers()
+        if not self.priority_group_coefficients:
+            return priority_layers
+
+        for priority_layer in priority_layers:
+            for group in priority_layer.get("groups", []):
+                if group.get("name") in self.priority_group_coefficients:
+                    group["value"] = self.priority_group_coefficients[group.get("name")]
+
+        return priority_layers
 
     def get_masking_layers(self) -> typing.List:
         """Gets all the masking layers.
@@ -233,10 +279,13 @@ class ScenarioAnalysisTask(QgsTask):
     def run(self):
         """Runs the main scenario analysis task operations"""
 
-        self.scenario_directory = self.get_scenario_directory()
+        if not self.scenario_directory:
+            self.scenario_directory = self.get_scenario_directory()
 
         FileUtils.create_new_dir(self.scenario_directory)
 
+        self.intermediate_cache = self.get_intermediate_cache()
+
         selected_pathway = None
         pathway_found = False
 
@@ -290,6 +339,29 @@ class ScenarioAnalysisTask(QgsTask):
                 extent_string,
             )
 
+        # Run the weighting, activities creation, masking, cleaning and
+        # highest position analysis in a single in-memory pass.
+        fused_analysis_enabled = self.get_settings_value(
+            Settings.FUSED_ANALYSIS_ENABLED, default=False, setting_type=bool
+        )
+        if fused_analysis_enabled:
+            if self.get_settings_value(
+                Settings.SIEVE_ENABLED, default=False, setting_type=bool
+            ):
+                self.log_message(
+                    "The sieve function requires the full activity layers, "
+                    "running the analysis using the processing tools."
+                )
+            else:
+                result = self.run_fused_analysis(
+                    self.analysis_activities,
+                    self.analysis_priority_layers_groups,
+                    snapped_extent,
+                )
+                if self.intermediate_cache is not None:
+                    self.intermediate_cache.save()
+                return result
+
         # Weight the pathways using the pathway suitability index
         # and priority group coefficients for the PWLs
         save_output = self.get_settings_value(
@@ -353,6 +425,9 @@ class ScenarioAnalysisTask(QgsTask):
         )
         self.run_highest_position_analysis(temporary_output=not save_output)
 
+        if self.intermediate_cache is not None:
+            self.intermediate_cache.save()
+
         return True
 
     def finished(self, result: bool):
@@ -473,8 +548,10 @@ class ScenarioAnalysisTask(QgsTask):
         :rtype: bool
 
         """
-        self.feedback = QgsProcessingFeedback()
-        self.feedback.progressChanged.connect(self.update_progress)
+        # Layers can be snapped concurrently hence the processing context
+        # and feedback are not shared.
+        context = QgsProcessingContext()
+        feedback = QgsProcessingFeedback()
 
         try:
             alg_params = {
@@ -490,8 +567,8 @@ class ScenarioAnalysisTask(QgsTask):
             translate_output = processing.run(
                 "gdal:translate",
                 alg_params,
-                context=self.processing_context,
-                feedback=self.feedback,
+                context=context,
+                feedback=feedback,
                 is_child_algorithm=True,
             )
 
@@ -513,8 +590,8 @@ class ScenarioAnalysisTask(QgsTask):
             outputs = processing.run(
                 "gdal:warpreproject",
                 alg_params,
-                context=self.processing_context,
-                feedback=self.feedback,
+                context=context,
+                feedback=feedback,
                 is_child_algorithm=True,
             )
 
@@ -579,133 +656,115 @@ class ScenarioAnalysisTask(QgsTask):
                 Settings.RESAMPLING_METHOD, default=0
             )
 
-            if pathways is not None and len(pathways) > 0:
-                snapped_pathways_directory = os.path.join(
-                    self.scenario_directory, "pathways"
+            # Layers to be snapped, keyed by the source path so that layers
+            # shared by several pathways are only snapped once.
+            snap_requests = {}
+
+            def add_snap_request(layer_path, directory_name):
+                if layer_path in snap_requests:
+                    return
+                layer = QgsRasterLayer(layer_path, f"{str(uuid.uuid4())[:4]}")
+                directory = os.path.join(self.scenario_directory, directory_name)
+                FileUtils.create_new_dir(directory)
+                snap_requests[layer_path] = (
+                    directory,
+                    layer.dataProvider().sourceNoDataValue(1),
                 )
 
-                FileUtils.create_new_dir(snapped_pathways_directory)
+            for pathway in pathways:
+                if pathway.carbon_paths is not None:
+                    for carbon_path in pathway.carbon_paths:
+                        add_snap_request(carbon_path, "carbon_layers")
 
-                for pathway in pathways:
-                    pathway_layer = QgsRasterLayer(pathway.path, pathway.name)
-                    nodata_value = pathway_layer.dataProvider().sourceNoDataValue(1)
+                add_snap_request(pathway.path, "pathways")
 
-                    if self.processing_cancelled:
-                        return False
+                for priority_layer in pathway.priority_layers or []:
+                    if priority_layer is None:
+                        continue
 
-                    # carbon layer snapping
-                    self.log_message(
-                        f"Snapping carbon layers from {pathway.name} pathway"
+                    priority_layer_settings = self.get_priority_layer(
+                        priority_layer.get("uuid")
                     )
+                    if priority_layer_settings is None:
+                        continue
 
-                    if (
-                        pathway.carbon_paths is not None
-                        and len(pathway.carbon_paths) > 0
-                    ):
-                        snapped_carbon_directory = os.path.join(
-                            self.scenario_directory, "carbon_layers"
-                        )
+                    priority_layer_path = priority_layer_settings.get("path")
+                    if Path(priority_layer_path).exists():
+                        add_snap_request(priority_layer_path, "priority_layers")
 
-                        FileUtils.create_new_dir(snapped_carbon_directory)
-
-                        snapped_carbon_paths = []
-
-                        for carbon_path in pathway.carbon_paths:
-                            carbon_layer = QgsRasterLayer(
-                                carbon_path, f"{str(uuid.uuid4())[:4]}"
-                            )
-                            nodata_value_carbon = (
-                                carbon_layer.dataProvider().sourceNoDataValue(1)
-                            )
-
-                            carbon_output_path = self.snap_layer(
-                                carbon_path,
-                                reference_layer_path,
-                                extent,
-                                snapped_carbon_directory,
-                                rescale_values,
-                                resampling_method,
-                                nodata_value_carbon,
-                            )
-
-                            if carbon_output_path:
-                                snapped_carbon_paths.append(carbon_output_path)
-                            else:
-                                snapped_carbon_paths.append(carbon_path)
-
-                        pathway.carbon_paths = snapped_carbon_paths
-
-                    self.log_message(f"Snapping {pathway.name} pathway layer \n")
-
-                    # Pathway snapping
-                    output_path = self.snap_layer(
-                        pathway.path,
-                        reference_layer_path,
-                        extent,
-                        snapped_pathways_directory,
-                        rescale_values,
-                        resampling_method,
-                        nodata_value,
-                    )
-                    if output_path:
-                        pathway.path = output_path
+            snap_cache_enabled = self.get_settings_value(
+                Settings.SNAP_CACHE_ENABLED, default=False, setting_type=bool
+            )
+            snap_cache = self.intermediate_cache if snap_cache_enabled else None
 
-            for pwl_pathway in pathways:
-                self.log_message(
-                    f"Snapping {len(pwl_pathway.priority_layers)} "
-                    f"priority weighting layers from pathway {pwl_pathway.name} with layers\n"
+            def run_snap_request(layer_path):
+                if self.processing_cancelled:
+                    return None
+                directory, nodata_value = snap_requests[layer_path]
+                self.log_message(f"Snapping layer {layer_path} \n")
+                return self.snap_layer(
+                    layer_path,
+                    reference_layer_path,
+                    extent,
+                    directory,
+                    rescale_values,
+                    resampling_method,
+                    nodata_value,
+                    snap_cache,
                 )
 
-                if (
-                    pwl_pathway.priority_layers is not None
-                    and len(pwl_pathway.priority_layers) > 0
-                ):
-                    snapped_priority_directory = os.path.join(
-                        self.scenario_directory, "priority_layers"
-                    )
-
-                    FileUtils.create_new_dir(snapped_priority_directory)
-
-                    priority_layers = []
-                    for priority_layer in pwl_pathway.priority_layers:
-                        if priority_layer is None:
-                            continue
-
-                        priority_layer_settings = self.get_priority_layer(
-                            priority_layer.get("uuid")
-                        )
-                        if priority_layer_settings is None:
-                            continue
+            layer_paths = list(snap_requests.keys())
+            worker_count = self.get_worker_count(len(layer_paths))
+            self.log_message(
+                f"Snapping {len(layer_paths)} unique layer(s) from "
+                f"{len(pathways)} pathway(s) using {worker_count} worker(s) \n"
+            )
 
-                        priority_layer_path = priority_layer_settings.get("path")
+            snapped_paths = {}
+            if len(layer_paths) > 0:
+                with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=worker_count
+                ) as executor:
+                    for index, (layer_path, output_path) in enumerate(
+                        zip(layer_paths, executor.map(run_snap_request, layer_paths))
+                    ):
+                        snapped_paths[layer_path] = output_path
+                        self.update_progress((index + 1) / len(layer_paths) * 100)
 
-                        if not Path(priority_layer_path).exists():
-                            priority_layers.append(priority_layer)
-                            continue
+            if self.processing_cancelled:
+                return False
 
-                        layer = QgsRasterLayer(
-                            priority_layer_path, f"{str(uuid.uuid4())[:4]}"
-                        )
-                        nodata_value_priority = layer.dataProvider().sourceNoDataValue(
-                            1
-                        )
+            for pathway in pathways:
+                if pathway.carbon_paths is not None and len(pathway.carbon_paths) > 0:
+                    pathway.carbon_paths = [
+                        snapped_paths.get(carbon_path) or carbon_path
+                        for carbon_path in pathway.carbon_paths
+                    ]
+
+                if snapped_paths.get(pathway.path):
+                    pathway.path = snapped_paths[pathway.path]
+
+                priority_layers = []
+                for priority_layer in pathway.priority_layers or []:
+                    if priority_layer is None:
+                        continue
 
-                        priority_output_path = self.snap_layer(
-                            priority_layer_path,
-                            reference_layer_path,
-                            extent,
-                            snapped_priority_directory,
-                            rescale_values,
-                            resampling_method,
-                            nodata_value_priority,
-                        )
+                    priority_layer_settings = self.get_priority_layer(
+                        priority_layer.get("uuid")
+                    )
+                    if priority_layer_settings is None:
+                        continue
 
-                        if priority_output_path:
-                            priority_layer["path"] = priority_output_path
+                    priority_output_path = snapped_paths.get(
+                        priority_layer_settings.get("path")
+                    )
+                    if priority_output_path:
+                        priority_layer["path"] = priority_output_path
 
-                        priority_layers.append(priority_layer)
+                    priority_layers.append(priority_layer)
 
-                    pwl_pathway.priority_layers = priority_layers
+                if pathway.priority_layers:
+                    pathway.priority_layers = priority_layers
 
         except Exception as e:
             self.log_message(f"Problem snapping layers, {e} \n")
@@ -723,11 +782,16 @@ class ScenarioAnalysisTask(QgsTask):
         rescale_values,
         resampling_method,
         nodata_value,
+        snap_cache: IntermediateCache = None,
     ):
         """Snaps the passed input layer using the reference layer and updates
         the snap output no data value to be the same as the original input layer
         no data value.
 
+        If a snap cache is passed, a previously snapped layer with the same
+        source contents and snap parameters is copied to the output directory
+        instead of snapping the layer again.
+
         :param input_path: Input layer source
         :type input_path: str
 
@@ -750,7 +814,45 @@ class ScenarioAnalysisTask(QgsTask):
         :param nodata_value: Original no data value of the input layer
         :type nodata_value: float
 
+        :param snap_cache: Cache of the previously snapped layers
+        :type snap_cache: IntermediateCache
+
+        :returns: Path of the snapped layer or None if snapping failed
+        :rtype: str
         """
+        cache_key = None
+        if snap_cache is not None:
+            try:
+                cache_key = snap_cache.snap_key(
+                    input_path,
+                    reference_path,
+                    extent,
+                    rescale_values,
+                    resampling_method,
+                    nodata_value,
+                )
+            except OSError as e:
+                self.log_message(f"Unable to create snap cache key, {e}")
+
+            if cache_key is not None:
+                # The cached layer is copied so that the scenario never
+                # references a layer that can be evicted from the cache
+                snap_directory = os.path.join(directory, "snap_layers")
+                FileUtils.create_new_dir(snap_directory)
+                cached_path = snap_cache.restore(
+                    cache_key,
+                    os.path.join(
+                        snap_directory,
+                        f"{Path(input_path).stem}_{str(uuid.uuid4())[:4]}_final.tif",
+                    ),
+                )
+                if cached_path is not None:
+                    self.log_message(
+                        f"Using cached snapped layer {cached_path} for {input_path} \n"
+                    )
+                    return cached_path
+
+        output_path = None
 
         input_result_path, reference_result_path = align_rasters(
             input_path,
@@ -769,10 +871,248 @@ class ScenarioAnalysisTask(QgsTask):
 
             output_path = os.path.join(directory, f"{name}_final.tif")
 
-            self.replace_nodata(input_result_path, output_path, nodata_value)
+            if not self.replace_nodata(input_result_path, output_path, nodata_value):
+                return None
+
+            if cache_key is not None:
+                snap_cache.put(cache_key, output_path)
 
         return output_path
 
+    def get_intermediate_cache(self) -> typing.Optional[IntermediateCache]:
+        """Gets the persistent cache of the intermediate layers.
+
+        :returns: Intermediate layers cache or None if both the snap cache
+        and the incremental analysis have been disabled or the base
+        directory has not been set.
+        :rtype: IntermediateCache
+        """
+        snap_cache_enabled = self.get_settings_value(
+            Settings.SNAP_CACHE_ENABLED, default=False, setting_type=bool
+        )
+        incremental_analysis_enabled = self.get_settings_value(
+            Settings.INCREMENTAL_ANALYSIS_ENABLED, default=False, setting_type=bool
+        )
+        base_dir = self.get_settings_value(Settings.BASE_DIR)
+        if not (snap_cache_enabled or incremental_analysis_enabled) or not base_dir:
+            return None
+
+        max_size = self.get_settings_value(
+            Settings.INTERMEDIATE_CACHE_MAX_SIZE,
+            default=DEFAULT_MAX_CACHE_SIZE,
+            setting_type=int,
+        )
+
+        return IntermediateCache(
+            os.path.join(base_dir, INTERMEDIATE_CACHE_DIRECTORY_NAME),
+            max_size * 1024 * 1024,
+        )
+
+    def stage_fingerprint(
+        self, stage: str, input_paths: typing.List[str], parameters: typing.Dict
+    ) -> typing.Optional[str]:
+        """Creates the fingerprint of a stage run for the incremental analysis.
+
+        :param stage: Name of the stage.
+        :type stage: str
+
+        :param input_paths: Paths of the stage input layers.
+        :type input_paths: list
+
+        :param parameters: Parameters of the stage that affect its output.
+        :type parameters: dict
+
+        :returns: Fingerprint or None if the incremental analysis is disabled
+        or the fingerprint could not be created.
+        :rtype: str
+        """
+        incremental_analysis_enabled = self.get_settings_value(
+            Settings.INCREMENTAL_ANALYSIS_ENABLED, default=False, setting_type=bool
+        )
+        if not incremental_analysis_enabled or self.intermediate_cache is None:
+            return None
+
+        try:
+            return self.intermediate_cache.fingerprint(stage, input_paths, parameters)
+        except OSError as e:
+            self.log_message(f"Unable to fingerprint the {stage} stage inputs, {e}")
+
+        return None
+
+    def cached_stage_output(
+        self, fingerprint: typing.Optional[str], output: str
+    ) -> typing.Optional[str]:
+        """Gets the output of a previous stage run with the same fingerprint.
+
+        :param fingerprint: Stage fingerprint.
+        :type fingerprint: str
+
+        :param output: Output of the stage, either a file path or
+        a temporary output.
+        :type output: str
+
+        :returns: Path of the cached output copied to the output path, or to
+        a temporary file if the output is temporary, or None if the stage
+        needs to be run.
+        :rtype: str
+        """
+        if fingerprint is None:
+            return None
+
+        # Layers in the cache can be evicted by other runs so they are
+        # always copied out of the cache
+        if output == QgsProcessing.TEMPORARY_OUTPUT:
+            output = QgsProcessingUtils.generateTempFilename(f"{fingerprint}.tif")
+
+        return self.intermediate_cache.restore(fingerprint, output)
+
+    def cache_stage_output(self, fingerprint: typing.Optional[str], output_path: str):
+        """Adds the output of a stage run to the intermediate layers cache.
+
+        :param fingerprint: Stage fingerprint.
+        :type fingerprint: str
+
+        :param output_path: Output path of the stage.
+        :type output_path: str
+        """
+        if fingerprint is None or not output_path or not os.path.exists(output_path):
+            return
+
+        self.intermediate_cache.put(fingerprint, output_path)
+
+    def run_incremental_processing(
+        self,
+        stage: str,
+        algorithm: str,
+        alg_params: typing.Dict,
+        input_paths: typing.List[str],
+        parameters: typing.Dict,
+        run_stage: typing.Callable[[], str] = None,
+    ) -> str:
+        """Runs a processing algorithm for a stage unless the stage output
+        for the same inputs and parameters is available from a previous run.
+
+        :param stage: Name of the stage.
+        :type stage: str
+
+        :param algorithm: Processing algorithm id.
+        :type algorithm: str
+
+        :param alg_params: Algorithm parameters.
+        :type alg_params: dict
+
+        :param input_paths: Paths of the stage input layers, including any
+        mask or reference layers.
+        :type input_paths: list
+
+        :param parameters: Parameters of the stage that affect its output
+        and are not input paths.
+        :type parameters: dict
+
+        :param run_stage: Function that computes the stage output in place of
+        the processing algorithm and returns the output path.
+        :type run_stage: typing.Callable
+
+        :returns: Output path of the stage.
+        :rtype: str
+        """
+        fingerprint = self.stage_fingerprint(
+            stage,
+            input_paths,
+            dict(parameters, algorithm=algorithm, windowed=run_stage is not None),
+        )
+        cached_output = self.cached_stage_output(fingerprint, alg_params["OUTPUT"])
+        if cached_output is not None:
+            self.log_message(
+                f"Inputs of the {stage} stage are unchanged, "
+                f"using output {cached_output} \n"
+            )
+            return cached_output
+
+        if run_stage is not None:
+            output_path = run_stage()
+        else:
+            output_path = processing.run(
+                algorithm,
+                alg_params,
+                context=self.processing_context,
+                feedback=self.feedback,
+            )["OUTPUT"]
+        self.cache_stage_output(fingerprint, output_path)
+
+        return output_path
+
+    def windowed_kernels_enabled(self) -> bool:
+        """Checks whether the cell statistics and highest position stages
+        are computed using the windowed NumPy kernels.
+
+        :returns: True if the windowed kernels are enabled else False.
+        :rtype: bool
+        """
+        return self.get_settings_value(
+            Settings.WINDOWED_KERNELS_ENABLED, default=False, setting_type=bool
+        )
+
+    def run_windowed_stage(
+        self,
+        kernel: typing.Callable,
+        input_paths: typing.List[str],
+        output: str,
+        reference_layer_path: str,
+        nodata_value: float = -9999,
+    ) -> str:
+        """Runs a windowed kernel over the input layers.
+
+        :param kernel: Windowed kernel function i.e. windowed_cell_sum or
+        windowed_highest_position.
+        :type kernel: typing.Callable
+
+        :param input_paths: Paths of the input layers.
+        :type input_paths: list
+
+        :param output: Output file path or a temporary output.
+        :type output: str
+
+        :param reference_layer_path: Path of the layer that defines the
+        output grid.
+        :type reference_layer_path: str
+
+        :param nodata_value: NoData value of the output.
+        :type nodata_value: float
+
+        :returns: Output path.
+        :rtype: str
+        """
+        if output == QgsProcessing.TEMPORARY_OUTPUT:
+            output = QgsProcessingUtils.generateTempFilename(
+                f"{str(uuid.uuid4())[:8]}.tif"
+            )
+
+        memory_budget = int(
+            self.get_settings_value(
+                Settings.ANALYSIS_MEMORY_BUDGET, default=DEFAULT_MEMORY_BUDGET
+            )
+        )
+
+        feedback = QgsProcessingFeedback()
+        feedback.progressChanged.connect(self.update_progress)
+
+        reference_layer = QgsRasterLayer(reference_layer_path, "reference_layer")
+        if not reference_layer.isValid():
+            raise ValueError(f"Invalid reference layer {reference_layer_path}")
+
+        if not kernel(
+            input_paths,
+            output,
+            reference_layer,
+            nodata_value=nodata_value,
+            memory_budget=memory_budget,
+            feedback=feedback,
+        ):
+            raise RuntimeError(f"Windowed analysis for output {output} failed")
+
+        return output
+
     def run_activities_analysis(self, activities, extent, temporary_output=False):
         """Runs the required activity analysis on the passed
         activities pathways. The analysis is responsible for creating activities
@@ -869,13 +1209,25 @@ class ScenarioAnalysisTask(QgsTask):
                 if self.processing_cancelled:
                     return False
 
-                results = processing.run(
+                run_stage = None
+                if self.windowed_kernels_enabled():
+                    run_stage = partial(
+                        self.run_windowed_stage,
+                        windowed_cell_sum,
+                        layers,
+                        output,
+                        reference_layer,
+                        -9999,
+                    )
+
+                activity.path = self.run_incremental_processing(
+                    "activity",
                     "native:cellstatistics",
                     alg_params,
-                    context=self.processing_context,
-                    feedback=self.feedback,
+                    [path for path in layers + [reference_layer] if path],
+                    {"extent": extent, "nodata": -9999},
+                    run_stage,
                 )
-                activity.path = results["OUTPUT"]
 
         except Exception as e:
             self.log_message(f"Problem creating activity layers, {e}")
@@ -1036,13 +1388,13 @@ class ScenarioAnalysisTask(QgsTask):
                 if self.processing_cancelled:
                     return False
 
-                results = processing.run(
+                activity.path = self.run_incremental_processing(
+                    "masked_activity",
                     "gdal:cliprasterbymasklayer",
                     alg_params,
-                    context=self.processing_context,
-                    feedback=self.feedback,
+                    [activity.path] + list(masking_layers),
+                    {"extent": extent, "crs": activity_layer.crs().authid()},
                 )
-                activity.path = results["OUTPUT"]
 
         except Exception as e:
             self.log_message(f"Problem masking activities layers, {e} \n")
@@ -1224,13 +1576,13 @@ class ScenarioAnalysisTask(QgsTask):
                 if self.processing_cancelled:
                     return False
 
-                results = processing.run(
+                activity.path = self.run_incremental_processing(
+                    "final_masked_activity",
                     "gdal:cliprasterbymasklayer",
                     alg_params,
-                    context=self.processing_context,
-                    feedback=self.feedback,
+                    [activity.path] + list(masking_layers),
+                    {"extent": extent, "crs": activity_layer.crs().authid()},
                 )
-                activity.path = results["OUTPUT"]
 
         except Exception as e:
             self.log_message(f"Problem masking activities layers, {e} \n")
@@ -1544,6 +1896,182 @@ class ScenarioAnalysisTask(QgsTask):
 
         return True
 
+    def get_worker_count(self, job_count: int) -> int:
+        """Gets the number of workers for running the given number of
+        independent processing jobs.
+
+        :param job_count: Number of jobs to be run.
+        :type job_count: int
+
+        :returns: Number of workers, at least one and at most the number
+        of jobs.
+        :rtype: int
+        """
+        worker_count = int(
+            self.get_settings_value(
+                Settings.ANALYSIS_WORKER_COUNT, default=0, setting_type=int
+            )
+            or 0
+        )
+        if worker_count <= 0:
+            worker_count = os.cpu_count() or 1
+
+        return max(1, min(worker_count, job_count))
+
+    def run_processing_jobs(
+        self, algorithm: str, jobs: typing.List[typing.Dict]
+    ) -> typing.List[typing.Dict]:
+        """Runs independent jobs of a processing algorithm on a pool of
+        worker threads.
+
+        Each job has its own processing context and feedback, and the
+        progress of all the jobs is aggregated into the task progress.
+        Threads are used because the processing framework cannot be
+        started in child processes of the QGIS application.
+
+        :param algorithm: Processing algorithm id.
+        :type algorithm: str
+
+        :param jobs: Parameters of each job.
+        :type jobs: typing.List[typing.Dict]
+
+        :returns: Results of the jobs, in the same order as the jobs. The
+        results of a cancelled run will be incomplete.
+        :rtype: typing.List[typing.Dict]
+        """
+        if len(jobs) == 0:
+            return []
+
+        progress = [0.0] * len(jobs)
+        feedbacks = [QgsProcessingFeedback() for _ in jobs]
+        lock = threading.Lock()
+
+        def job_progress_changed(index: int, value: float):
+            with lock:
+                progress[index] = value
+                total_progress = sum(progress) / len(progress)
+            self.update_progress(total_progress)
+            if self.processing_cancelled:
+                for feedback in feedbacks:
+                    feedback.cancel()
+
+        def run_job(index: int) -> typing.Dict:
+            if self.processing_cancelled:
+                return {}
+
+            feedback = feedbacks[index]
+            feedback.progressChanged.connect(
+                lambda value, job_index=index: job_progress_changed(job_index, value)
+            )
+
+            # Processing contexts should not be shared across threads
+            context = QgsProcessingContext()
+
+            return processing.run(
+                algorithm,
+                jobs[index],
+                context=context,
+                feedback=feedback,
+            )
+
+        worker_count = self.get_worker_count(len(jobs))
+        self.log_message(
+            f"Running {len(jobs)} {algorithm} job(s) using {worker_count} worker(s) \n"
+        )
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=worker_count
+        ) as executor:
+            results = list(executor.map(run_job, range(len(jobs))))
+
+        return results
+
+    def get_pathway_weights(
+        self,
+        pathway,
+        priority_layers_groups,
+        suitability_index,
+        settings_priority_layers,
+    ) -> typing.Optional[typing.List[typing.Tuple[str, float]]]:
+        """Gets the layers and corresponding coefficients used for weighting
+        the given pathway.
+
+        The pathway layer is weighted by the suitability index, or by 1 if the
+        index is zero, and each of its PWLs by the coefficient of each priority
+        group that the PWL belongs to.
+
+        :param pathway: Pathway to be weighted.
+        :type pathway: NcsPathway
+
+        :param priority_layers_groups: Used priority layers groups and their values
+        :type priority_layers_groups: dict
+
+        :param suitability_index: Pathway suitability index.
+        :type suitability_index: float
+
+        :param settings_priority_layers: Priority layers saved in settings.
+        :type settings_priority_layers: list
+
+        :returns: List of tuples containing the layer path and coefficient where
+        the first item is the pathway layer. Returns None if the suitability index
+        is zero and there are no PWLs with non-zero coefficients, in which case
+        the weighting is not required.
+        :rtype: list
+        """
+        run_calculation = False
+
+        # Include suitability index if not zero
+        if suitability_index > 0:
+            weights = [(pathway.path, suitability_index)]
+            run_calculation = True
+        else:
+            weights = [(pathway.path, 1.0)]
+
+        for layer in pathway.priority_layers:
+            if not any(priority_layers_groups):
+                self.log_message(
+                    f"There are no defined priority layers in groups,"
+                    f" skipping the inclusion of PWLs in pathways "
+                    f"weighting."
+                )
+                break
+
+            if layer is None:
+                continue
+
+            settings_layer = self.get_priority_layer(layer.get("uuid"))
+            if settings_layer is None:
+                continue
+
+            pwl = settings_layer.get("path")
+
+            missing_pwl_message = (
+                f"Path {pwl} for priority "
+                f"weighting layer {layer.get('name')} "
+                f"doesn't exist, skipping the layer "
+                f"from the pathway {pathway.name} weighting."
+            )
+            if pwl is None:
+                self.log_message(missing_pwl_message)
+                continue
+
+            pwl_path = Path(pwl)
+
+            if not pwl_path.exists():
+                self.log_message(missing_pwl_message)
+                continue
+
+            for priority_layer in settings_priority_layers:
+                if priority_layer.get("name") == layer.get("name"):
+                    for group in priority_layer.get("groups", []):
+                        value = group.get("value")
+                        priority_group_coefficient = float(value)
+                        if priority_group_coefficient > 0:
+                            weights.append((pwl, priority_group_coefficient))
+                            run_calculation = True
+
+        return weights if run_calculation else None
+
     def run_pathways_weighting(
         self, activities, priority_layers_groups, extent, temporary_output=False
     ) -> bool:
@@ -1629,78 +2157,37 @@ class ScenarioAnalysisTask(QgsTask):
             )
             FileUtils.create_new_dir(weighted_pathways_directory)
 
+            weighted_pathways = []
+            jobs = []
             for pathway in pathways:
                 # Skip processing if cancelled
                 if self.processing_cancelled:
                     return False
 
-                base_names = []
-                layers = [pathway.path]
-                run_calculation = False
-
-                # Include suitability index if not zero
-                pathway_basename = Path(pathway.path).stem
-                if suitability_index > 0:
-                    base_names.append(f'({suitability_index}*"{pathway_basename}@1")')
-                    run_calculation = True
-                else:
-                    base_names.append(f'("{pathway_basename}@1")')
-
-                for layer in pathway.priority_layers:
-                    if not any(priority_layers_groups):
-                        self.log_message(
-                            f"There are no defined priority layers in groups,"
-                            f" skipping the inclusion of PWLs in pathways "
-                            f"weighting."
-                        )
-                        break
-
-                    if layer is None:
-                        continue
-
-                    settings_layer = self.get_priority_layer(layer.get("uuid"))
-                    if settings_layer is None:
-                        continue
-
-                    pwl = settings_layer.get("path")
-
-                    missing_pwl_message = (
-                        f"Path {pwl} for priority "
-                        f"weighting layer {layer.get('name')} "
-                        f"doesn't exist, skipping the layer "
-                        f"from the pathway {pathway.name} weighting."
-                    )
-                    if pwl is None:
-                        self.log_message(missing_pwl_message)
-                        continue
-
-                    pwl_path = Path(pwl)
-
-                    if not pwl_path.exists():
-                        self.log_message(missing_pwl_message)
-                        continue
-
-                    pwl_path_basename = pwl_path.stem
-
-                    for priority_layer in settings_priority_layers:
-                        if priority_layer.get("name") == layer.get("name"):
-                            for group in priority_layer.get("groups", []):
-                                value = group.get("value")
-                                priority_group_coefficient = float(value)
-                                if priority_group_coefficient > 0:
-                                    if pwl not in layers:
-                                        layers.append(pwl)
-
-                                    pwl_expression = f'({priority_group_coefficient}*"{pwl_path_basename}@1")'
-                                    base_names.append(pwl_expression)
-                                    if not run_calculation:
-                                        run_calculation = True
+                weights = self.get_pathway_weights(
+                    pathway,
+                    priority_layers_groups,
+                    suitability_index,
+                    settings_priority_layers,
+                )
 
                 # No need to run the calculation if suitability index is
                 # zero or there are no PWLs in the activity.
-                if not run_calculation:
+                if weights is None:
                     continue
 
+                base_names = []
+                layers = []
+                for index, (layer_path, coefficient) in enumerate(weights):
+                    if layer_path not in layers:
+                        layers.append(layer_path)
+
+                    layer_basename = Path(layer_path).stem
+                    if index == 0 and suitability_index <= 0:
+                        base_names.append(f'("{layer_basename}@1")')
+                    else:
+                        base_names.append(f'({coefficient}*"{layer_basename}@1")')
+
                 file_name = clean_filename(pathway.name.replace(" ", "_"))
                 output_file = os.path.join(
                     weighted_pathways_directory,
@@ -1726,19 +2213,38 @@ class ScenarioAnalysisTask(QgsTask):
                     f" Used parameters for calculating weighting pathways {alg_params} \n"
                 )
 
-                self.feedback = QgsProcessingFeedback()
-                self.feedback.progressChanged.connect(self.update_progress)
+                # The expression uses the layer names hence the
+                # coefficients are fingerprinted instead.
+                fingerprint = self.stage_fingerprint(
+                    "weighted_pathway",
+                    [layer_path for layer_path, _ in weights],
+                    {
+                        "coefficients": [coefficient for _, coefficient in weights],
+                        "suitability_index": suitability_index > 0,
+                        "extent": extent,
+                    },
+                )
+                cached_output = self.cached_stage_output(fingerprint, output)
+                if cached_output is not None:
+                    self.log_message(
+                        f"Inputs of the {pathway.name} pathway weighting are "
+                        f"unchanged, using output {cached_output} \n"
+                    )
+                    pathway.path = cached_output
+                    continue
 
-                if self.processing_cancelled:
-                    return False
+                weighted_pathways.append((pathway, fingerprint))
+                jobs.append(alg_params)
 
-                results = processing.run(
-                    "qgis:rastercalculator",
-                    alg_params,
-                    context=self.processing_context,
-                    feedback=self.feedback,
-                )
-                pathway.path = results["OUTPUT"]
+            # The pathways are independent so they are weighted concurrently
+            results = self.run_processing_jobs("qgis:rastercalculator", jobs)
+
+            if self.processing_cancelled:
+                return False
+
+            for (pathway, fingerprint), result in zip(weighted_pathways, results):
+                pathway.path = result["OUTPUT"]
+                self.cache_stage_output(fingerprint, pathway.path)
 
         except Exception as e:
             self.log_message(f"Problem weighting pathways, {e}\n")
@@ -1831,13 +2337,25 @@ class ScenarioAnalysisTask(QgsTask):
                 if self.processing_cancelled:
                     return False
 
-                results = processing.run(
+                run_stage = None
+                if self.windowed_kernels_enabled():
+                    run_stage = partial(
+                        self.run_windowed_stage,
+                        windowed_cell_sum,
+                        layers,
+                        output,
+                        layers[0],
+                        0,
+                    )
+
+                activity.path = self.run_incremental_processing(
+                    "cleaned_activity",
                     "native:cellstatistics",
                     alg_params,
-                    context=self.processing_context,
-                    feedback=self.feedback,
+                    layers,
+                    {"extent": extent, "nodata": 0},
+                    run_stage,
                 )
-                activity.path = results["OUTPUT"]
 
         except Exception as e:
             self.log_message(f"Problem cleaning activities, {e}")
@@ -1955,12 +2473,23 @@ class ScenarioAnalysisTask(QgsTask):
             if self.processing_cancelled:
                 return False
 
-            self.output = processing.run(
-                "native:highestpositioninrasterstack",
-                alg_params,
-                context=self.processing_context,
-                feedback=self.feedback,
-            )
+            if self.windowed_kernels_enabled() and len(layers) > 0:
+                self.output = {
+                    "OUTPUT": self.run_windowed_stage(
+                        windowed_highest_position,
+                        sources,
+                        output_file,
+                        list(layers.values())[0].source(),
+                        -9999,
+                    )
+                }
+            else:
+                self.output = processing.run(
+                    "native:highestpositioninrasterstack",
+                    alg_params,
+                    context=self.processing_context,
+                    feedback=self.feedback,
+                )
 
         except Exception as err:
             self.log_message(
@@ -1973,3 +2502,413 @@ class ScenarioAnalysisTask(QgsTask):
             return False
 
         return True
+
+    def create_vector_mask(
+        self, mask_paths: typing.List[str], grid: RasterGrid
+    ) -> typing.Optional[VectorMask]:
+        """Creates a mask from the polygon layers that can be rasterized
+        onto the analysis grid.
+
+        Layers that are invalid, are not polygon layers or whose CRS differs
+        from that of the grid are skipped.
+
+        :param mask_paths: Paths to the mask layers.
+        :type mask_paths: typing.List[str]
+
+        :param grid: Analysis grid.
+        :type grid: RasterGrid
+
+        :returns: Vector mask or None if there are no usable mask layers.
+        :rtype: VectorMask
+        """
+        valid_paths = []
+        for mask_path in mask_paths:
+            mask_layer = QgsVectorLayer(mask_path, "mask", "ogr")
+            if not mask_layer.isValid():
+                self.log_message(
+                    f"Skipping masking using layer {mask_path}, not a valid layer."
+                )
+                continue
+
+            if Qgis.versionInt() < 33000:
+                layer_check = mask_layer.geometryType() == QgsWkbTypes.PolygonGeometry
+            else:
+                layer_check = mask_layer.geometryType() == Qgis.GeometryType.Polygon
+
+            if not layer_check:
+                self.log_message(
+                    f"Skipping masking using layer {mask_path}, not a polygon layer."
+                )
+                continue
+
+            if mask_layer.crs() != grid.crs:
+                self.log_message(
+                    f"Skipping masking using layer {mask_path}, the mask layer "
+                    f"crs does not match the scenario crs."
+                )
+                continue
+
+            valid_paths.append(mask_path)
+
+        if len(valid_paths) == 0:
+            return None
+
+        vector_mask = VectorMask(valid_paths)
+
+        return vector_mask if vector_mask.is_valid() else None
+
+    def fused_output_path(
+        self, directory_name: str, file_name: str, save_output: bool
+    ) -> str:
+        """Gets the path of an output of the fused analysis.
+
+        :param directory_name: Name of the directory in the scenario directory.
+        :type directory_name: str
+
+        :param file_name: Output file name without the extension.
+        :type file_name: str
+
+        :param save_output: True to save the output in the scenario directory,
+        else False to save it as a temporary file.
+        :type save_output: bool
+
+        :returns: Output file path.
+        :rtype: str
+        """
+        if not save_output:
+            return QgsProcessingUtils.generateTempFilename(f"{file_name}.tif")
+
+        output_directory = os.path.join(self.scenario_directory, directory_name)
+        FileUtils.create_new_dir(output_directory)
+
+        return os.path.join(output_directory, f"{file_name}.tif")
+
+    def run_fused_analysis(
+        self, activities, priority_layers_groups, extent: QgsRectangle
+    ) -> bool:
+        """Runs the pathways weighting, activities creation, masking, cleaning
+        and highest position analysis in a single in-memory pass.
+
+        The input layers are read block by block onto a common grid, all the
+        steps are computed in memory and only the outputs that the user has
+        opted to save, together with the cleaned activities and scenario
+        output required for the post-analysis, are written to disk.
+
+        :param activities: List of the selected activities
+        :type activities: typing.List[Activity]
+
+        :param priority_layers_groups: Used priority layers groups and their values
+        :type priority_layers_groups: dict
+
+        :param extent: Snapped extent of the analysis
+        :type extent: QgsRectangle
+
+        :returns: True if the analysis was successfully completed else False.
+        :rtype: bool
+        """
+        if self.processing_cancelled:
+            return False
+
+        self.set_status_message(tr("Running the scenario analysis in memory"))
+
+        if len(activities) == 0:
+            msg = tr(f"No defined activities for running the scenario analysis.")
+            self.set_info_message(msg, level=Qgis.Critical)
+            self.log_message(msg)
+            return False
+
+        writers = []
+
+        try:
+            pathways = []
+            for activity in activities:
+                if not activity.pathways and (
+                    activity.path is None or activity.path == ""
+                ):
+                    self.set_info_message(
+                        tr(
+                            f"No defined activity pathways or an"
+                            f" activity layer for the activity {activity.name}"
+                        ),
+                        level=Qgis.Critical,
+                    )
+                    self.log_message(
+                        f"No defined activity pathways or an "
+                        f"activity layer for the activity {activity.name}"
+                    )
+                    return False
+
+                for pathway in activity.pathways:
+                    if pathway not in pathways:
+                        pathways.append(pathway)
+
+            # The extent has been aligned to the pathway layers, which will
+            # also have been snapped to the reference layer if enabled.
+            reference_layer_path = (
+                pathways[0].path if len(pathways) > 0 else activities[0].path
+            )
+            reference_layer = QgsRasterLayer(reference_layer_path, "reference_layer")
+            if not reference_layer.isValid():
+                self.log_message(
+                    f"Invalid reference layer {reference_layer_path} "
+                    f"for the scenario analysis."
+                )
+                return False
+
+            grid = RasterGrid.from_layer(reference_layer, extent)
+
+            suitability_index = float(
+                self.get_settings_value(Settings.PATHWAY_SUITABILITY_INDEX, default=0)
+            )
+            settings_priority_layers = self.get_priority_layers()
+
+            pathway_weights = {}
+            input_paths = []
+            for pathway in pathways:
+                weights = self.get_pathway_weights(
+                    pathway,
+                    priority_layers_groups,
+                    suitability_index,
+                    settings_priority_layers,
+                )
+                pathway_weights[str(pathway.uuid)] = weights
+                layer_paths = [pathway.path]
+                if weights is not None:
+                    layer_paths.extend(layer_path for layer_path, _ in weights)
+                for layer_path in layer_paths:
+                    if layer_path not in input_paths:
+                        input_paths.append(layer_path)
+
+            for activity in activities:
+                if activity.path and activity.path not in input_paths:
+                    input_paths.append(activity.path)
+
+            # Open each input layer only once
+            input_layers = {}
+            for layer_path in input_paths:
+                layer = QgsRasterLayer(layer_path, Path(layer_path).stem)
+                if not layer.isValid():
+                    self.log_message(
+                        f"Invalid layer {layer_path} in the scenario analysis."
+                    )
+                    return False
+                input_layers[layer_path] = layer
+
+            project_mask = self.create_vector_mask(self.get_masking_layers(), grid)
+            activity_masks = {
+                str(activity.uuid): self.create_vector_mask(activity.mask_paths, grid)
+                for activity in activities
+            }
+
+            # Outputs
+            save_weighted_pathways = self.get_settings_value(
+                Settings.NCS_WEIGHTED, default=True, setting_type=bool
+            )
+            save_activities = self.get_settings_value(
+                Settings.LANDUSE_PROJECT, default=True, setting_type=bool
+            )
+            save_cleaned_activities = self.get_settings_value(
+                Settings.LANDUSE_NORMALIZED, default=True, setting_type=bool
+            )
+            save_scenario_output = self.get_settings_value(
+                Settings.HIGHEST_POSITION, default=True, setting_type=bool
+            )
+
+            weighted_pathway_writers = {}
+            if save_weighted_pathways:
+                for pathway in pathways:
+                    if pathway_weights[str(pathway.uuid)] is None:
+                        continue
+                    file_name = clean_filename(pathway.name.replace(" ", "_"))
+                    writer = RasterWriter(
+                        self.fused_output_path(
+                            "weighted_pathways",
+                            f"{file_name}_{str(uuid.uuid4())[:4]}",
+                            True,
+                        ),
+                        grid,
+                    )
+                    writers.append(writer)
+                    weighted_pathway_writers[str(pathway.uuid)] = writer
+
+            activity_writers = {}
+            cleaned_activity_writers = {}
+            for activity in activities:
+                file_name = clean_filename(activity.name.replace(" ", "_"))
+                if save_activities:
+                    writer = RasterWriter(
+                        self.fused_output_path(
+                            "activities",
+                            f"{file_name}_{str(uuid.uuid4())[:4]}",
+                            True,
+                        ),
+                        grid,
+                    )
+                    writers.append(writer)
+                    activity_writers[str(activity.uuid)] = writer
+
+                # Cleaned activities are always required for the post-analysis
+                writer = RasterWriter(
+                    self.fused_output_path(
+                        "weighted_pathways",
+                        f"{file_name}_{str(uuid.uuid4())[:4]}_cleaned",
+                        save_cleaned_activities,
+                    ),
+                    grid,
+                    nodata_value=0,
+                )
+                writers.append(writer)
+                cleaned_activity_writers[str(activity.uuid)] = writer
+
+            scenario_writer = RasterWriter(
+                self.fused_output_path(
+                    "",
+                    f"{SCENARIO_OUTPUT_FILE_NAME}_{str(self.scenario.uuid)[:4]}",
+                    save_scenario_output,
+                ),
+                grid,
+                data_type=gdal.GDT_Int32,
+            )
+            writers.append(scenario_writer)
+
+            # Order of the activities in the highest position analysis
+            ordered_activities = sorted(
+                activities,
+                key=lambda activity_instance: activity_instance.style_pixel_value,
+            )
+            for index, activity in enumerate(ordered_activities):
+                activity.style_pixel_value = index + 1
+
+            # Inputs, weighted pathways, activities and masks held per pixel
+            bytes_per_pixel = 8 * (
+                len(input_layers) + len(pathways) + 3 * len(activities) + 2
+            )
+            memory_budget = int(
+                self.get_settings_value(
+                    Settings.ANALYSIS_MEMORY_BUDGET, default=DEFAULT_MEMORY_BUDGET
+                )
+            )
+            windows = list(grid.windows(bytes_per_pixel, memory_budget))
+
+            self.log_message(
+                f"Running the fused scenario analysis on a grid of "
+                f"{grid.columns} x {grid.rows} pixels in {len(windows)} block(s) \n"
+            )
+
+            for window_index, (row_offset, rows) in enumerate(windows):
+                if self.processing_cancelled:
+                    return False
+
+                inputs = {
+                    layer_path: read_window(
+                        layer.dataProvider(), grid, row_offset, rows
+                    )
+                    for layer_path, layer in input_layers.items()
+                }
+
+                # Pathways weighting
+                weighted_pathways = {}
+                for pathway in pathways:
+                    pathway_uuid = str(pathway.uuid)
+                    weights = pathway_weights[pathway_uuid]
+                    if weights is None:
+                        weighted_pathways[pathway_uuid] = inputs[pathway.path]
+                        continue
+
+                    weighted_pathways[pathway_uuid] = weighted_sum(
+                        [
+                            (inputs[layer_path], coefficient)
+                            for layer_path, coefficient in weights
+                        ]
+                    )
+                    if pathway_uuid in weighted_pathway_writers:
+                        weighted_pathway_writers[pathway_uuid].write(
+                            weighted_pathways[pathway_uuid], row_offset
+                        )
+
+                project_mask_window = (
+                    project_mask.window(grid, row_offset, rows)
+                    if project_mask is not None
+                    else None
+                )
+
+                cleaned_activities = {}
+                for activity in activities:
+                    activity_uuid = str(activity.uuid)
+
+                    # Activity creation
+                    activity_arrays = [
+                        weighted_pathways[str(pathway.uuid)]
+                        for pathway in activity.pathways
+                    ]
+                    if activity.path:
+                        activity_arrays.insert(0, inputs[activity.path])
+                    activity_data = sum_ignore_nodata(activity_arrays)
+                    if activity_uuid in activity_writers:
+                        activity_writers[activity_uuid].write(activity_data, row_offset)
+
+                    # Masking
+                    if project_mask_window is not None:
+                        activity_data = np.ma.masked_where(
+                            project_mask_window, activity_data
+                        )
+                    activity_mask = activity_masks[activity_uuid]
+                    if activity_mask is not None:
+                        activity_data = np.ma.masked_where(
+                            activity_mask.window(grid, row_offset, rows),
+                            activity_data,
+                        )
+
+                    # Cleaning, zero values are not statistically meaningful
+                    activity_data = np.ma.masked_where(
+                        activity_data.filled(0) == 0, activity_data
+                    )
+                    cleaned_activity_writers[activity_uuid].write(
+                        activity_data, row_offset
+                    )
+                    cleaned_activities[activity_uuid] = activity_data
+
+                # Highest position
+                scenario_writer.write(
+                    highest_position(
+                        [
+                            cleaned_activities[str(activity.uuid)]
+                            for activity in ordered_activities
+                        ]
+                    ),
+                    row_offset,
+                )
+
+                self.update_progress((window_index + 1) / len(windows) * 100)
+
+            for writer in writers:
+                writer.close()
+
+            for pathway in pathways:
+                pathway_uuid = str(pathway.uuid)
+                if pathway_uuid in weighted_pathway_writers:
+                    pathway.path = weighted_pathway_writers[pathway_uuid].path
+
+            for activity in activities:
+                activity.path = cleaned_activity_writers[str(activity.uuid)].path
+
+            # We explicitly set the created_date since the current implementation
+            # of the data model means that the attribute value is set only once when
+            # the class is loaded hence subsequent instances will have the same value.
+            self.scenario_result = ScenarioResult(
+                scenario=self.scenario,
+                scenario_directory=self.scenario_directory,
+                created_date=datetime.datetime.now(),
+            )
+            self.output = {"OUTPUT": scenario_writer.path}
+
+        except Exception as e:
+            self.log_message(f"Problem running the fused scenario analysis, {e}\n")
+            self.cancel_task(e)
+            return False
+
+        finally:
+            for writer in writers:
+                writer.close()
+
+        return True
@@ -25,11 +25,15 @@ from qgis.core import (
     QgsCoordinateTransform,
     QgsCoordinateTransformContext,
     QgsDistanceArea,
+    QgsFeedback,
+    QgsGeometry,
     QgsMessageLog,
     QgsProcessingFeedback,
     QgsProject,
     QgsProcessing,
+    QgsRasterBlock,
     QgsRasterLayer,
+    QgsRectangle,
     QgsUnitTypes,
 )
 
@@ -51,6 +55,26 @@ from .definitions.constants import (
 )
 
 
+# Maximum number of pixels read at once when calculating raster areas
+RASTER_AREA_BLOCK_PIXELS = 4000000
+
+# Maximum number of pixels read at once when compressing a raster
+COMPRESS_BLOCK_PIXELS = 4000000
+
+# Mapping of raster data types to the corresponding NumPy types
+_NUMPY_DATA_TYPES = {
+    Qgis.DataType.Byte: np.uint8,
+    Qgis.DataType.UInt16: np.uint16,
+    Qgis.DataType.Int16: np.int16,
+    Qgis.DataType.UInt32: np.uint32,
+    Qgis.DataType.Int32: np.int32,
+    Qgis.DataType.Float32: np.float32,
+    Qgis.DataType.Float64: np.float64,
+}
+if hasattr(Qgis.DataType, "Int8"):
+    _NUMPY_DATA_TYPES[Qgis.DataType.Int8] = np.int8
+
+
 def tr(message):
     """Get the translation for a string using Qt translation API.
     We implement this ourselves since we do not inherit QObject.
@@ -175,6 +199,238 @@ def clean_filename(filename):
     return filename
 
 
+def raster_block_to_array(block: QgsRasterBlock) -> np.ma.MaskedArray:
+    """Converts the data in a raster block into a masked NumPy array where
+    the NoData pixels are masked out.
+
+    For QGIS 3.40+, the native `QgsRasterBlock.as_numpy` is used, otherwise
+    the raw bytes of the block are reinterpreted based on the block's data type.
+
+    :param block: Raster block whose data is to be converted.
+    :type block: QgsRasterBlock
+
+    :returns: A masked array with the same number of rows and columns as the
+    block where NoData pixels (and NaN pixels for floating point data) are
+    masked. An empty masked array is returned if the block is invalid or
+    its data type is not supported.
+    :rtype: np.ma.MaskedArray
+    """
+    if not block.isValid():
+        return np.ma.masked_array(np.empty((0, 0)))
+
+    rows, columns = block.height(), block.width()
+
+    if hasattr(block, "as_numpy"):
+        data = block.as_numpy(use_masking=True)
+        if not isinstance(data, np.ma.MaskedArray):
+            data = np.ma.masked_array(data)
+    else:
+        dtype = _NUMPY_DATA_TYPES.get(block.dataType())
+        if dtype is None:
+            log(f"Unsupported raster data type {block.dataType()}.", info=False)
+            return np.ma.masked_array(np.empty((0, 0)))
+
+        raw_data = np.frombuffer(bytes(block.data()), dtype=dtype)
+        data = np.ma.masked_array(raw_data.reshape(rows, columns))
+
+        if block.hasNoDataValue():
+            data = np.ma.masked_where(data.data == block.noDataValue(), data)
+        elif block.hasNoData():
+            # NoData has been defined using a bitmap e.g. for the areas outside
+            # the extent of the source, so we check each pixel individually.
+            no_data_mask = np.array(
+                [[block.isNoData(r, c) for c in range(columns)] for r in range(rows)],
+                dtype=bool,
+            )
+            data = np.ma.masked_where(no_data_mask, data)
+
+    if np.issubdtype(data.dtype, np.floating):
+        data = np.ma.masked_where(np.isnan(data.data), data)
+
+    return data
+
+
+def _pixel_row_areas(
+    layer: QgsRasterLayer,
+    area_calculator: QgsDistanceArea,
+    row_offset: int,
+    rows: int,
+) -> np.ndarray:
+    """Calculates the area, in hectares, of a pixel in each of the given rows
+    of a raster layer.
+
+    The area of a pixel only varies with its row for geographic CRSs hence
+    a pixel in the center column is measured for each row.
+
+    :param layer: Raster layer.
+    :type layer: QgsRasterLayer
+
+    :param area_calculator: Area calculator using the layer CRS and ellipsoid.
+    :type area_calculator: QgsDistanceArea
+
+    :param row_offset: First row.
+    :type row_offset: int
+
+    :param rows: Number of rows.
+    :type rows: int
+
+    :returns: Array with the pixel area of each row.
+    :rtype: np.ndarray
+    """
+    if Qgis.versionInt() < 33000:
+        unit_type = QgsUnitTypes.AreaUnit.AreaHectares
+    else:
+        unit_type = Qgis.AreaUnit.Hectares
+
+    extent = layer.extent()
+    pixel_width = layer.rasterUnitsPerPixelX()
+    pixel_height = layer.rasterUnitsPerPixelY()
+    x_min = extent.xMinimum() + (layer.width() // 2) * pixel_width
+
+    row_areas = np.zeros(rows, dtype=np.float64)
+    for index in range(rows):
+        y_max = extent.yMaximum() - (row_offset + index) * pixel_height
+        pixel_geometry = QgsGeometry.fromRect(
+            QgsRectangle(x_min, y_max - pixel_height, x_min + pixel_width, y_max)
+        )
+        row_areas[index] = area_calculator.convertAreaMeasurement(
+            area_calculator.measureArea(pixel_geometry), unit_type
+        )
+
+    return row_areas
+
+
+def calculate_raster_histograms(
+    layer_bands: typing.List[typing.Tuple[QgsRasterLayer, int]],
+    feedback: QgsFeedback = None,
+) -> typing.List[typing.Tuple[dict, dict]]:
+    """Calculates the area and number of pixels for each pixel value in
+    several bands or layers.
+
+    The rasters are read block by block, the bands of the same layer are
+    read in the same pass and histograms of the pixel areas and counts are
+    accumulated for each band hence no temporary outputs are created. The
+    pixel areas are measured using the ellipsoid of the layer CRS if available.
+
+    :param layer_bands: List of tuples containing a layer and a band number.
+    :type layer_bands: list
+
+    :param feedback: Feedback object for progress and cancelling the calculation.
+    :type feedback: QgsFeedback
+
+    :returns: A tuple for each layer band, in the same order as the input,
+    containing a dictionary of the area in hectares and a dictionary of the
+    number of pixels for each pixel value. Empty dictionaries are returned
+    for invalid or empty layers, or for all the layers if the calculation
+    was cancelled.
+    :rtype: list
+    """
+    pixel_areas = [{} for _ in layer_bands]
+    pixel_counts = [{} for _ in layer_bands]
+
+    # Group the bands by layer so that each layer is only traversed once
+    layer_groups = {}
+    for index, (layer, band_number) in enumerate(layer_bands):
+        if layer is None or not layer.isValid():
+            log("Invalid layer for raster area calculation.", info=False)
+            continue
+        key = id(layer)
+        if key not in layer_groups:
+            layer_groups[key] = (layer, [])
+        layer_groups[key][1].append((index, band_number))
+
+    total_rows = sum(layer.height() for layer, _ in layer_groups.values())
+    processed_rows = 0
+
+    for layer, bands in layer_groups.values():
+        provider = layer.dataProvider()
+        columns, height = layer.width(), layer.height()
+        extent = layer.extent()
+        pixel_height = layer.rasterUnitsPerPixelY()
+
+        area_calculator = QgsDistanceArea()
+        crs = layer.crs()
+        area_calculator.setSourceCrs(crs, QgsCoordinateTransformContext())
+        if crs is not None and crs.isValid():
+            # Use ellipsoid calculation if available
+            area_calculator.setEllipsoid(crs.ellipsoidAcronym())
+
+        block_rows = max(1, min(height, RASTER_AREA_BLOCK_PIXELS // max(1, columns)))
+        for row_offset in range(0, height, block_rows):
+            if feedback is not None and feedback.isCanceled():
+                return [({}, {}) for _ in layer_bands]
+
+            rows = min(block_rows, height - row_offset)
+            y_max = extent.yMaximum() - row_offset * pixel_height
+            block_extent = QgsRectangle(
+                extent.xMinimum(),
+                y_max - rows * pixel_height,
+                extent.xMaximum(),
+                y_max,
+            )
+            row_areas = _pixel_row_areas(layer, area_calculator, row_offset, rows)
+
+            for index, band_number in bands:
+                data = raster_block_to_array(
+                    provider.block(band_number, block_extent, columns, rows)
+                )
+                if data.shape != (rows, columns):
+                    continue
+
+                valid = ~np.ma.getmaskarray(data)
+                values = data.data[valid]
+                if values.size == 0:
+                    continue
+
+                areas = np.broadcast_to(row_areas[:, None], data.shape)[valid]
+                unique_values, inverse = np.unique(values, return_inverse=True)
+                value_areas = np.bincount(inverse, weights=areas)
+                value_counts = np.bincount(inverse)
+
+                band_areas = pixel_areas[index]
+                band_counts = pixel_counts[index]
+                for value, area, count in zip(
+                    unique_values.tolist(), value_areas.tolist(), value_counts.tolist()
+                ):
+                    band_areas[value] = band_areas.get(value, 0.0) + area
+                    band_counts[value] = band_counts.get(value, 0) + count
+
+            processed_rows += rows
+            if feedback is not None and total_rows > 0:
+                feedback.setProgress(processed_rows / total_rows * 100)
+
+    for (layer, band_number), band_areas in zip(layer_bands, pixel_areas):
+        if layer is not None and layer.isValid() and len(band_areas) == 0:
+            log("Input layer for raster area calculation is empty.", info=False)
+
+    return list(zip(pixel_areas, pixel_counts))
+
+
+def calculate_raster_areas_by_pixel_value(
+    layer_bands: typing.List[typing.Tuple[QgsRasterLayer, int]],
+    feedback: QgsFeedback = None,
+) -> typing.List[dict]:
+    """Calculates the area of value pixels for several bands or layers and
+    groups the area by the pixel value, in a single pass over each layer.
+
+    :param layer_bands: List of tuples containing a layer and a band number.
+    :type layer_bands: list
+
+    :param feedback: Feedback object for progress and cancelling the calculation.
+    :type feedback: QgsFeedback
+
+    :returns: A dictionary for each layer band, in the same order as the
+    input, containing the pixel value as the key and the corresponding area
+    in hectares as the value. An empty dictionary is returned for invalid or
+    empty layers, or for all the layers if the calculation was cancelled.
+    :rtype: list
+    """
+    return [
+        pixel_areas
+        for pixel_areas, _ in calculate_raster_histograms(layer_bands, feedback)
+    ]
+
+
 def calculate_raster_area_by_pixel_value(
     layer: QgsRasterLayer, band_number: int = 1, feedback: QgsProcessingFeedback = None
 ) -> dict:
@@ -200,53 +456,7 @@ def calculate_raster_area_by_pixel_value(
     or if it is empty.
     :rtype: float
     """
-    if not layer.isValid():
-        log("Invalid layer for raster area calculation.", info=False)
-        return {}
-
-    algorithm_name = "native:rasterlayeruniquevaluesreport"
-    params = {
-        "INPUT": layer,
-        "BAND": band_number,
-        "OUTPUT_TABLE": "TEMPORARY_OUTPUT",
-        "OUTPUT_HTML_FILE": QgsProcessing.TEMPORARY_OUTPUT,
-    }
-
-    algorithm_result = processing.run(algorithm_name, params, feedback=feedback)
-
-    # Get number of pixels with values
-    total_pixel_count = algorithm_result["TOTAL_PIXEL_COUNT"]
-    if total_pixel_count == 0:
-        log("Input layer for raster area calculation is empty.", info=False)
-        return {}
-
-    output_table = algorithm_result["OUTPUT_TABLE"]
-    if output_table is None:
-        log("Unique values raster table could not be retrieved.", info=False)
-        return {}
-
-    area_calc = QgsDistanceArea()
-    crs = layer.crs()
-    area_calc.setSourceCrs(crs, QgsCoordinateTransformContext())
-    if crs is not None:
-        # Use ellipsoid calculation if available
-        area_calc.setEllipsoid(crs.ellipsoidAcronym())
-
-    version = Qgis.versionInt()
-    if version < 33000:
-        unit_type = QgsUnitTypes.AreaUnit.AreaHectares
-    else:
-        unit_type = Qgis.AreaUnit.Hectares
-
-    pixel_areas = {}
-    features = output_table.getFeatures()
-    for f in features:
-        pixel_value = f.attribute(0)
-        area = f.attribute(2)
-        pixel_value_area = area_calc.convertAreaMeasurement(area, unit_type)
-        pixel_areas[pixel_value] = pixel_value_area
-
-    return pixel_areas
+    return calculate_raster_areas_by_pixel_value([(layer, band_number)], feedback)[0]
 
 
 def calculate_raster_area(
@@ -879,6 +1089,8 @@ def compress_raster(
 ):
     """
     Compresses a raster file using GDAL and optionally replace old NoData pixel values with a new one.
+    The raster is read and written in strips of rows so that memory use does not
+    depend on the raster size.
 
     :param input_path: Path to the input raster file
     :type input_path: str
@@ -938,7 +1150,7 @@ def compress_raster(
         dtype = src_ds.GetRasterBand(1).DataType
 
         compression = src_ds.GetMetadataItem("COMPRESSION", "IMAGE_STRUCTURE")
-        if compression.lower() == "deflate":
+        if compression and compression.lower() == "deflate":
             log(f"Raster {input_path} is already compressed with DEFLATE.")
             return input_path
 
@@ -970,21 +1182,35 @@ def compress_raster(
         out_ds.SetGeoTransform(src_ds.GetGeoTransform())
         out_ds.SetProjection(src_ds.GetProjection())
 
+        # Process strips of whole output tiles so that memory use is bounded
+        tile_size = 256
+        rows_per_window = max(
+            tile_size,
+            (COMPRESS_BLOCK_PIXELS // max(xsize, 1)) // tile_size * tile_size,
+        )
+
         for i in range(1, band_count + 1):
             band = src_ds.GetRasterBand(i)
-            data = band.ReadAsArray()
             old_nodata = band.GetNoDataValue()
+            out_band = out_ds.GetRasterBand(i)
 
-            # Replace pixel values if old NoData exists
-            if nodata_value is not None and old_nodata is not None:
-                data = np.where(data == old_nodata, nodata_value, data)
+            for y_offset in range(0, ysize, rows_per_window):
+                rows = min(rows_per_window, ysize - y_offset)
+                data = band.ReadAsArray(0, y_offset, xsize, rows)
 
-            out_band = out_ds.GetRasterBand(i)
-            out_band.WriteArray(data)
-            out_band.SetNoDataValue(nodata_value)
+                # Replace pixel values if old NoData exists
+                if nodata_value is not None and old_nodata is not None:
+                    data = np.where(data == old_nodata, nodata_value, data)
+
+                out_band.WriteArray(data, 0, y_offset)
+
+            band_nodata = nodata_value if nodata_value is not None else old_nodata
+            if band_nodata is not None:
+                out_band.SetNoDataValue(band_nodata)
             out_band.FlushCache()
 
         # Close datasets
+        out_ds = None
         src_ds = None
         # if os.path.exists(output_path):
         log(f"Successfully compressed raster saved to temporary file: {output_path}")
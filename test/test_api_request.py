@@ -1,3 +1,4 @@
+import itertools
 import os
 import tempfile
 import typing
@@ -11,11 +12,17 @@ from PyQt5.QtCore import QCoreApplication, QIODevice, QByteArray
 from qgis.core import QgsRasterLayer, QgsTask
 from qgis.PyQt.QtNetwork import QNetworkReply
 from cplus_plugin.api.request import (
+    CplusApiReply,
     CplusApiRequestError,
     CplusApiPooling,
     JOB_COMPLETED_STATUS,
     CplusApiUrl,
     CplusApiRequest,
+    FileDownload,
+    FileDownloadManager,
+    UploadFileReader,
+    create_upload_parts,
+    scenario_status_poller,
 )
 from cplus_plugin.api.carbon import IrrecoverableCarbonDownloadTask
 from cplus_plugin.conf import settings_manager, Settings
@@ -97,6 +104,61 @@ class TestCplusApiPooling(unittest.TestCase):
         with self.assertRaises(CplusApiRequestError):
             self.pooling.results()
 
+    @patch("time.sleep", return_value=None)
+    def test_results_elapsed_timeout(self, mock_sleep):
+        self.pooling.timeout = 10
+        self.mock_context.get.return_value = ({"status": "JOB_RUNNING"}, 200)
+        with patch("time.monotonic", side_effect=itertools.count(0, 6)):
+            with self.assertRaises(CplusApiRequestError):
+                self.pooling.results()
+        self.assertEqual(self.mock_context.get.call_count, 2)
+
+    def test_adaptive_interval(self):
+        self.pooling.interval = 1
+        self.pooling.max_interval = 4
+        running = {"status": "Running", "progress": 10}
+
+        self.pooling.update_interval(running)
+        self.assertEqual(self.pooling.current_interval, 1)
+        self.pooling.update_interval(running)
+        self.assertEqual(self.pooling.current_interval, 1.5)
+        for _ in range(5):
+            self.pooling.update_interval(None)
+        self.assertEqual(self.pooling.current_interval, 4)
+        self.assertLessEqual(self.pooling.next_delay(), 4 * (1 + self.pooling.JITTER))
+
+        self.pooling.update_interval({"status": "Running", "progress": 20})
+        self.assertEqual(self.pooling.current_interval, 1)
+
+    @patch("time.sleep", return_value=None)
+    def test_shared_poller_results(self, mock_sleep):
+        api_request = CplusApiRequest()
+        responses = {
+            "first": [
+                {"status": "Running", "progress": 50},
+                {"status": JOB_COMPLETED_STATUS, "progress": 100},
+            ],
+        }
+        fetched = []
+
+        def reply_result(reply):
+            return responses[reply].pop(0), 200
+
+        with patch.object(
+            CplusApiRequest, "create_reply", side_effect=lambda method, url: url
+        ), patch.object(CplusApiRequest, "send_requests"), patch.object(
+            CplusApiRequest, "reply_result", side_effect=reply_result
+        ):
+            pooling = CplusApiPooling(
+                api_request, "first", interval=0.01, scenario_uuid="first"
+            )
+            pooling.on_response_fetched = fetched.append
+            response = pooling.results()
+
+        self.assertEqual(response["status"], JOB_COMPLETED_STATUS)
+        self.assertEqual(len(fetched), 2)
+        self.assertEqual(scenario_status_poller.scenario_uuids, [])
+
 
 class TestCplusApiUrl(unittest.TestCase):
     @patch("cplus_plugin.conf.settings_manager.get_value")
@@ -252,6 +314,141 @@ class TestCplusApiRequest(unittest.TestCase):
         self.api_request._make_request(mock_reply)
         mock_event_loop.assert_called_once()
 
+    def test_create_reply(self):
+        reply = self.api_request.create_reply(
+            "post", "http://example.com", {"key": "value"}
+        )
+        self.assertIsInstance(reply, CplusApiReply)
+        self.assertEqual(reply.method, "POST")
+        self.assertEqual(reply.url, "http://example.com")
+        self.assertEqual(bytes(reply.data), b'{"key": "value"}')
+        self.assertFalse(reply.finished)
+
+    def test_send_requests_cancelled(self):
+        replies = [
+            self.api_request.create_reply("GET", f"http://example.com/{index}")
+            for index in range(3)
+        ]
+        self.api_request.send_requests(replies, is_cancelled=lambda: True)
+        for reply in replies:
+            self.assertTrue(reply.finished)
+            self.assertTrue(reply.cancelled)
+            self.assertIsNone(reply.reply)
+        with self.assertRaises(CplusApiRequestError):
+            self.api_request.reply_result(replies[0])
+
+    @patch.object(CplusApiRequest, "send_requests")
+    def test_get_uses_async_reply(self, mock_send_requests):
+        mock_reply = MockQNetworkReply(
+            data=b'{"key": "value"}',
+            error_code=QNetworkReply.NoError,
+            error_string=QNetworkReply.NoError,
+        )
+
+        def finish_replies(replies):
+            for reply in replies:
+                reply.reply = mock_reply
+                reply._on_finished()
+            return replies
+
+        mock_send_requests.side_effect = finish_replies
+        response, status_code = self.api_request.get("http://example.com")
+        self.assertEqual(response, {"key": "value"})
+        self.assertEqual(status_code, 200)
+        mock_send_requests.assert_called_once()
+
+    def test_create_upload_parts(self):
+        with tempfile.NamedTemporaryFile(delete=False) as upload_file:
+            upload_file.write(b"x" * 25)
+        upload_urls = [
+            {"url": f"http://example.com/{number}", "part_number": number}
+            for number in range(1, 4)
+        ]
+        parts = create_upload_parts(upload_file.name, upload_urls, chunk_size=10)
+        self.assertEqual([part.part_number for part in parts], [1, 2, 3])
+        self.assertEqual([part.offset for part in parts], [0, 10, 20])
+        self.assertEqual([part.size for part in parts], [10, 10, 5])
+        os.remove(upload_file.name)
+
+    def test_download_state(self):
+        file_path = os.path.join(tempfile.mkdtemp(), "output.tif")
+        download = FileDownload(
+            url="http://example.com/output.tif", file_path=file_path
+        )
+        with open(download.partial_path, "wb") as partial_file:
+            partial_file.write(b"0" * 100)
+        download.size = 100
+        download.etag = '"abc"'
+        download.completed_segments = {0, 2}
+        download.save_state()
+
+        resumed_download = FileDownload(url=download.url, file_path=file_path)
+        resumed_download.load_state()
+        self.assertEqual(resumed_download.size, 100)
+        self.assertEqual(resumed_download.etag, '"abc"')
+        self.assertEqual(resumed_download.completed_segments, {0, 2})
+        self.assertEqual(resumed_download.segment_count(40), 3)
+
+        # The partial file is discarded when its size is not the expected one
+        changed_download = FileDownload(
+            url=download.url, file_path=file_path, expected_size=200
+        )
+        changed_download.load_state()
+        self.assertIsNone(changed_download.size)
+        self.assertEqual(changed_download.completed_segments, set())
+
+    def test_download_content_range(self):
+        reply = MagicMock()
+        reply.rawHeader.return_value = QByteArray(b"bytes 0-99/1000")
+        self.assertEqual(FileDownloadManager._content_range_total(reply), 1000)
+        reply.rawHeader.return_value = QByteArray(b"bytes 0-99/*")
+        self.assertIsNone(FileDownloadManager._content_range_total(reply))
+
+    def test_upload_file_reader(self):
+        with tempfile.NamedTemporaryFile(delete=False) as upload_file:
+            upload_file.write(b"a" * 10 + b"b" * 10 + b"c" * 5)
+        upload_urls = [
+            {"url": f"http://example.com/{number}", "part_number": number}
+            for number in range(1, 4)
+        ]
+        parts = create_upload_parts(upload_file.name, upload_urls, chunk_size=10)
+        with UploadFileReader() as reader:
+            devices = [reader.device(part) for part in parts]
+            self.assertEqual([device.size() for device in devices], [10, 10, 5])
+            self.assertEqual(bytes(devices[1].readAll()), b"b" * 10)
+            self.assertEqual(bytes(devices[2].read(3)), b"ccc")
+            self.assertEqual(bytes(devices[2].readAll()), b"cc")
+        self.assertFalse(devices[0].isOpen())
+        os.remove(upload_file.name)
+
+    @patch.object(CplusApiRequest, "send_requests")
+    def test_upload_parts(self, mock_send_requests):
+        with tempfile.NamedTemporaryFile(delete=False) as upload_file:
+            upload_file.write(b"x" * 25)
+        upload_urls = [
+            {"url": f"http://example.com/{number}", "part_number": number}
+            for number in range(1, 4)
+        ]
+        parts = create_upload_parts(upload_file.name, upload_urls, chunk_size=10)
+
+        def finish_replies(replies, **kwargs):
+            for reply in replies:
+                reply.reply = MockQNetworkReply(
+                    data=b"", error_code=QNetworkReply.NoError
+                )
+                reply._on_finished()
+            return replies
+
+        mock_send_requests.side_effect = finish_replies
+        uploaded_parts = []
+        items = self.api_request.upload_parts(
+            parts, lambda part, item: uploaded_parts.append(part.part_number)
+        )
+        self.assertEqual([item["part_number"] for item in items], [1, 2, 3])
+        self.assertEqual(sorted(uploaded_parts), [1, 2, 3])
+        mock_send_requests.assert_called_once()
+        os.remove(upload_file.name)
+
     @patch.object(CplusApiRequest, "post")
     @patch.object(CplusApiRequest, "_is_valid_token", return_value=True)
     def test_api_token(self, mock_is_valid_token, mock_post):
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the batch scenario runner.
+"""
+
+import csv
+import os
+import tempfile
+import unittest
+from unittest import mock, TestCase
+
+from processing.core.Processing import Processing
+from qgis.core import QgsRasterLayer
+
+from cplus_plugin.conf import settings_manager, Settings
+from cplus_plugin.lib.batch import (
+    BatchRunResult,
+    create_parameter_grid,
+    run_batch_scenario,
+    write_batch_summary,
+)
+from cplus_plugin.tasks import ScenarioAnalysisTask
+from cplus_plugin.utils import align_rasters
+
+from model_data_for_testing import ACTIVITY_UUID_STR, get_activity
+from utilities_for_testing import get_qgis_app
+
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestBatchScenarioRunner(TestCase):
+    """Tests for the batch scenario runner helpers."""
+
+    def test_create_parameter_grid(self):
+        """Test the parameter grid contains all the combinations."""
+        parameter_sets = create_parameter_grid(
+            {"Biodiversity": [0, 5], "Livelihood": [1, 2, 3]},
+            suitability_indices=[0, 1.0],
+        )
+
+        self.assertEqual(len(parameter_sets), 12)
+        self.assertEqual(len({params.run_id for params in parameter_sets}), 12)
+        self.assertEqual(
+            parameter_sets[0].priority_group_coefficients,
+            {"Biodiversity": 0, "Livelihood": 1},
+        )
+        self.assertIsNone(parameter_sets[0].sieve_threshold)
+
+    def create_scenario_info(self) -> dict:
+        """Saves the test activity and creates the base scenario details of
+        the batch runs.
+
+        :returns: Base scenario details.
+        :rtype: dict
+        """
+        settings_manager.save_activity(get_activity())
+        self.addCleanup(settings_manager.remove_activity, ACTIVITY_UUID_STR)
+
+        return {
+            "name": "Batch scenario",
+            "description": "Batch scenario description",
+            "activity_uuids": [ACTIVITY_UUID_STR],
+            "bbox": [30.89, 30.90, -24.70, -24.69],
+            "priority_layer_groups": [],
+            "output_directory": tempfile.mkdtemp(),
+        }
+
+    def test_runs_share_snapped_layers(self):
+        """Test a run reuses the layer snapped by a previous run and copies
+        it to its own scenario directory.
+        """
+        Processing.initialize()
+
+        base_dir = settings_manager.get_value(Settings.BASE_DIR)
+        self.addCleanup(settings_manager.set_value, Settings.BASE_DIR, base_dir)
+        settings_manager.set_value(Settings.BASE_DIR, tempfile.mkdtemp())
+
+        layer_directory = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "data", "pathways", "layers"
+        )
+        input_path = os.path.join(layer_directory, "test_pathway_1.tif")
+        reference_path = os.path.join(layer_directory, "test_pathway_2.tif")
+        reference_layer = QgsRasterLayer(reference_path, "reference")
+        extent = reference_layer.extent()
+        extent_string = (
+            f"{extent.xMinimum()},{extent.xMaximum()},"
+            f"{extent.yMinimum()},{extent.yMaximum()}"
+            f" [{reference_layer.crs().authid()}]"
+        )
+
+        parameter_sets = create_parameter_grid(suitability_indices=[0, 1.0])
+        scenario_info = self.create_scenario_info()
+
+        snapped_paths = []
+
+        def run(task):
+            snapped_paths.append(
+                task.snap_layer(
+                    input_path,
+                    reference_path,
+                    extent_string,
+                    task.scenario_directory,
+                    False,
+                    0,
+                    -9999.0,
+                    task.get_intermediate_cache(),
+                )
+            )
+            return False
+
+        with mock.patch.object(
+            ScenarioAnalysisTask, "run", autospec=True, side_effect=run
+        ), mock.patch("cplus_plugin.tasks.align_rasters", wraps=align_rasters) as align:
+            for parameters in parameter_sets:
+                run_batch_scenario(scenario_info, parameters)
+
+        self.assertEqual(align.call_count, 1)
+        self.assertEqual(len(snapped_paths), 2)
+        self.assertTrue(os.path.exists(snapped_paths[1]))
+        self.assertTrue(
+            snapped_paths[1].startswith(
+                os.path.join(
+                    scenario_info["output_directory"], parameter_sets[1].run_id
+                )
+            )
+        )
+
+    def test_run_disables_sieve(self):
+        """Test a None sieve threshold in the sweep disables the sieve
+        function instead of using the saved setting.
+        """
+        parameter_sets = create_parameter_grid(sieve_thresholds=[None, 10.0])
+        scenario_info = self.create_scenario_info()
+
+        run_overrides = []
+
+        def run(task):
+            run_overrides.append(dict(task.settings_overrides))
+            return False
+
+        with mock.patch.object(ScenarioAnalysisTask, "run", autospec=True) as task_run:
+            task_run.side_effect = run
+            results = [
+                run_batch_scenario(scenario_info, parameters)
+                for parameters in parameter_sets
+            ]
+
+        self.assertFalse(results[0].success)
+        self.assertFalse(run_overrides[0][Settings.SIEVE_ENABLED])
+        self.assertNotIn(Settings.SIEVE_THRESHOLD, run_overrides[0])
+        self.assertTrue(run_overrides[1][Settings.SIEVE_ENABLED])
+        self.assertEqual(run_overrides[1][Settings.SIEVE_THRESHOLD], 10.0)
+
+    def test_write_summary(self):
+        """Test the summary table has a row with the activity areas of each run."""
+        parameter_sets = create_parameter_grid({"Biodiversity": [0, 5]})
+        results = [
+            BatchRunResult(
+                parameters=parameter_sets[0],
+                success=True,
+                activity_areas={"Agroforestry": 10.5, "Restoration": 2.0},
+            ),
+            BatchRunResult(
+                parameters=parameter_sets[1], success=False, error="Failed\nDetails"
+            ),
+        ]
+
+        path = os.path.join(tempfile.mkdtemp(), "summary.csv")
+        write_batch_summary(results, path)
+
+        with open(path, newline="") as summary_file:
+            rows = list(csv.DictReader(summary_file))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["Biodiversity"], "0")
+        self.assertEqual(float(rows[0]["Agroforestry"]), 10.5)
+        self.assertEqual(rows[1]["success"], "False")
+        self.assertEqual(rows[1]["error"], "Failed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for carbon calculations.
+"""
+
+import unittest
+from unittest import TestCase
+
+from qgis.core import QgsRasterLayer
+
+from cplus_plugin.conf import settings_manager, Settings
+from cplus_plugin.lib.carbon import calculate_irrecoverable_carbon_from_mean
+from cplus_plugin.models.base import DataSourceType
+
+from model_data_for_testing import (
+    get_protected_ncs_pathways,
+    get_reference_irrecoverable_carbon_path,
+)
+from utilities_for_testing import get_qgis_app
+
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestIrrecoverableCarbonFromMean(TestCase):
+    """Tests for the mean-based irrecoverable carbon calculation."""
+
+    def setUp(self):
+        extent_box = [
+            30.897412864,
+            30.902802731,
+            -24.699751899,
+            -24.694362032,
+        ]
+        settings_manager.set_value(Settings.SCENARIO_EXTENT, extent_box)
+        settings_manager.set_value(
+            Settings.IRRECOVERABLE_CARBON_SOURCE_TYPE, DataSourceType.LOCAL.value
+        )
+        settings_manager.set_value(
+            Settings.IRRECOVERABLE_CARBON_LOCAL_SOURCE,
+            get_reference_irrecoverable_carbon_path(),
+        )
+
+    def test_vectorized_matches_pixel_analysis(self):
+        """Test the vectorized calculation produces the same result as the
+        pixel-by-pixel analysis.
+        """
+        pathway = get_protected_ncs_pathways()[0]
+        ncs_layer = QgsRasterLayer(pathway.path, pathway.name)
+        self.assertTrue(ncs_layer.isValid())
+
+        pixel_result = calculate_irrecoverable_carbon_from_mean(
+            ncs_layer, vectorized=False
+        )
+        vectorized_result = calculate_irrecoverable_carbon_from_mean(ncs_layer)
+
+        self.assertNotEqual(pixel_result, -1.0)
+        self.assertAlmostEqual(vectorized_result, pixel_result, 4)
+
+    def test_invalid_layer(self):
+        """Test an invalid NCS pathways layer returns -1."""
+        ncs_layer = QgsRasterLayer("invalid_path.tif", "invalid")
+        result = calculate_irrecoverable_carbon_from_mean(ncs_layer)
+
+        self.assertEqual(result, -1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
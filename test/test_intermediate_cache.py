@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the intermediate layers cache.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import TestCase
+
+from cplus_plugin.lib.intermediate_cache import IntermediateCache
+
+from utilities_for_testing import get_qgis_app
+
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestIntermediateCache(TestCase):
+    """Tests for the content-addressed intermediate layers cache."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.data_directory = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "data", "pathways", "layers"
+        )
+        self.input_path = os.path.join(self.data_directory, "test_pathway_1.tif")
+        self.reference_path = os.path.join(self.data_directory, "test_pathway_2.tif")
+
+    def test_snap_key_depends_on_parameters(self):
+        """Test the snap key changes with the snap parameters."""
+        cache = IntermediateCache(self.directory)
+        key = cache.snap_key(
+            self.input_path, self.reference_path, "0,1,0,1", False, 0, -9999.0
+        )
+        same_key = cache.snap_key(
+            self.input_path, self.reference_path, "0,1,0,1", False, 0, -9999.0
+        )
+        other_key = cache.snap_key(
+            self.input_path, self.reference_path, "0,1,0,1", False, 1, -9999.0
+        )
+
+        self.assertEqual(key, same_key)
+        self.assertNotEqual(key, other_key)
+
+    def test_put_and_get(self):
+        """Test a layer is reused from the cache."""
+        cache = IntermediateCache(self.directory)
+        fingerprint = cache.fingerprint(
+            "weighted_pathway", [self.input_path], {"coefficients": [1.0]}
+        )
+        self.assertIsNone(cache.get(fingerprint))
+
+        cached_path = cache.put(fingerprint, self.input_path)
+
+        self.assertEqual(cache.get(fingerprint), cached_path)
+        self.assertTrue(os.path.exists(cached_path))
+
+    def test_fingerprint_chaining(self):
+        """Test the fingerprint of a cached output is its stage fingerprint
+        and the checksum index is persisted.
+        """
+        cache = IntermediateCache(self.directory)
+        fingerprint = cache.fingerprint(
+            "weighted_pathway", [self.input_path], {"coefficients": [0.5]}
+        )
+        cached_path = cache.put(fingerprint, self.input_path)
+
+        self.assertEqual(cache.checksum(cached_path), fingerprint)
+
+        cache.save()
+        reloaded_cache = IntermediateCache(self.directory)
+        self.assertEqual(reloaded_cache.checksum(cached_path), fingerprint)
+
+    def test_prune_least_recently_used(self):
+        """Test the least recently used layers are evicted when the cache
+        exceeds its maximum size.
+        """
+        layer_size = os.path.getsize(self.input_path)
+        cache = IntermediateCache(self.directory, max_size=layer_size)
+
+        old_fingerprint = cache.fingerprint("stage", [self.input_path], {"run": 1})
+        old_path = cache.put(old_fingerprint, self.input_path)
+        os.utime(old_path, (0, 0))
+        new_fingerprint = cache.fingerprint("stage", [self.input_path], {"run": 2})
+        new_path = cache.put(new_fingerprint, self.input_path)
+
+        cache.save()
+
+        self.assertFalse(os.path.exists(old_path))
+        self.assertIsNone(cache.get(old_fingerprint))
+        self.assertEqual(cache.get(new_fingerprint), new_path)
+
+    def test_clear(self):
+        """Test all the cached layers are removed."""
+        cache = IntermediateCache(self.directory)
+        fingerprint = cache.fingerprint("stage", [self.input_path], {})
+        cached_path = cache.put(fingerprint, self.input_path)
+
+        cache.clear()
+
+        self.assertFalse(os.path.exists(cached_path))
+        self.assertIsNone(cache.get(fingerprint))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,7 +20,9 @@ from cplus_plugin.lib.reports.metrics import (
     FUNC_ACTIVITY_NPV,
     FUNC_PWL_IMPACT,
     FUNC_MEAN_BASED_IC,
+    MetricsEvaluator,
     register_metric_functions,
+    ScenarioMetricsData,
     unregister_metric_functions,
 )
 from cplus_plugin.models.base import DataSourceType
@@ -159,6 +161,37 @@ class TestMetricExpressions(TestCase):
         self.assertTrue(result.success)
         self.assertEqual(result.value, reference_activity_npv)
 
+    def test_metrics_evaluator_activity_batch(self):
+        """Test the metrics of an activity are evaluated in one batch
+        using expressions that are prepared once.
+        """
+        npv_collection = get_ncs_pathway_npv_collection()
+        npv_collection.update_computed_normalization_range()
+        _ = npv_collection.normalize_npvs()
+        settings_manager.save_npv_collection(npv_collection)
+
+        reference_area = 200
+
+        register_metric_functions()
+        evaluator = MetricsEvaluator()
+        activity_context_info = ActivityContextInfo(get_activity(), reference_area)
+
+        npv_expression = f"{FUNC_ACTIVITY_NPV}()"
+        results = evaluator.evaluate_activity(
+            activity_context_info,
+            [npv_expression, None, "@cplus_activity_area * 2", "1 +"],
+        )
+
+        self.assertTrue(results[0].success)
+        self.assertEqual(results[0].value, NCS_PATHWAY_1_NPV * reference_area)
+        self.assertIsNone(results[1])
+        self.assertEqual(results[2].value, reference_area * 2)
+        self.assertFalse(results[3].success)
+        self.assertIs(
+            evaluator.compiled_expression(npv_expression),
+            evaluator.compiled_expression(npv_expression),
+        )
+
     def test_activity_pwl_impact_expression_function(self):
         """Test the calculation of the PWL impact of an activity
         using an expression function.
@@ -182,6 +215,26 @@ class TestMetricExpressions(TestCase):
         self.assertTrue(result.success)
         self.assertAlmostEqual(result.value, pathway_test_area * custom_jobs_per_ha, 1)
 
+    def test_scenario_metrics_data_pwl_impact(self):
+        """Test the PWL impact of an activity is calculated from the
+        pathway areas computed once for the scenario.
+        """
+        pathway_test_area = 1348.22
+        custom_jobs_per_ha = 1.5
+
+        metrics_data = ScenarioMetricsData([str(self.activity.uuid)])
+        pathway_areas = metrics_data.pathway_areas()
+
+        self.assertEqual(len(pathway_areas), 1)
+        self.assertIs(metrics_data.pathway_areas(), pathway_areas)
+        self.assertAlmostEqual(
+            metrics_data.activity_pwl_impact(
+                str(self.activity.uuid), custom_jobs_per_ha
+            ),
+            pathway_test_area * custom_jobs_per_ha,
+            1,
+        )
+
     def test_activity_irrecoverable_carbon_expression_function(self):
         """Test the calculation of an activity's irrecoverable carbon
         using an expression function.
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the placeholders of online scenario outputs.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from cplus_plugin.api.output_placeholders import (
+    fetch_placeholder_outputs,
+    missing_output_paths,
+    save_output_placeholders,
+)
+
+from utilities_for_testing import get_qgis_app
+
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestOutputPlaceholders(TestCase):
+    """Tests for the placeholders of online scenario outputs."""
+
+    def setUp(self):
+        self.scenario_directory = tempfile.mkdtemp()
+        self.activity_path = os.path.join(
+            self.scenario_directory, "activities", "activity.tif"
+        )
+        self.pathway_path = os.path.join(
+            self.scenario_directory, "weighted_pathways", "pathway.tif"
+        )
+        save_output_placeholders(
+            self.scenario_directory,
+            "server-uuid",
+            {
+                self.activity_path: {
+                    "filename": "activity.tif",
+                    "group": "activities",
+                    "size": 10,
+                },
+                self.pathway_path: {
+                    "filename": "pathway.tif",
+                    "group": "weighted_pathways",
+                },
+            },
+        )
+
+    def test_missing_output_paths(self):
+        """Test only the placeholders that have not been downloaded are
+        missing.
+        """
+        other_path = os.path.join(self.scenario_directory, "other.tif")
+        missing_paths = missing_output_paths(
+            self.scenario_directory,
+            [self.activity_path, self.pathway_path, other_path],
+        )
+        self.assertEqual(missing_paths, [self.activity_path, self.pathway_path])
+
+        os.makedirs(os.path.dirname(self.activity_path))
+        with open(self.activity_path, "wb") as activity_file:
+            activity_file.write(b"0" * 10)
+
+        self.assertEqual(
+            missing_output_paths(
+                self.scenario_directory, [self.activity_path, self.pathway_path]
+            ),
+            [self.pathway_path],
+        )
+
+    def test_fetch_placeholder_outputs(self):
+        """Test the placeholders are downloaded using new output URLs."""
+        request = MagicMock()
+        request.fetch_scenario_output_list.return_value = {
+            "results": [
+                {
+                    "filename": "activity.tif",
+                    "group": "activities",
+                    "url": "http://example.com/activity.tif",
+                }
+            ]
+        }
+
+        def download_files(downloads, **kwargs):
+            for download in downloads:
+                download.downloaded = True
+            return downloads
+
+        request.download_files.side_effect = download_files
+
+        downloaded_paths = fetch_placeholder_outputs(
+            self.scenario_directory, [self.activity_path], request
+        )
+
+        request.fetch_scenario_output_list.assert_called_once_with("server-uuid")
+        downloads = request.download_files.call_args[0][0]
+        self.assertEqual(downloads[0].url, "http://example.com/activity.tif")
+        self.assertEqual(downloads[0].expected_size, 10)
+        self.assertEqual(downloaded_paths, [self.activity_path])
+
+
+if __name__ == "__main__":
+    unittest.main()
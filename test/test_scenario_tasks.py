@@ -12,6 +12,9 @@ import datetime
 
 from processing.core.Processing import Processing
 
+import numpy as np
+from osgeo import gdal
+
 from qgis.core import Qgis, QgsRasterLayer, QgsVectorLayer, QgsWkbTypes
 
 from cplus_plugin.conf import settings_manager, Settings
@@ -20,10 +23,102 @@ from cplus_plugin.tasks import ScenarioAnalysisTask
 from cplus_plugin.models.base import Scenario, NcsPathway, Activity
 
 
+def read_masked_array(path: str) -> np.ma.MaskedArray:
+    """Reads the first band of a raster with the NoData pixels masked."""
+    dataset = gdal.Open(path)
+    band = dataset.GetRasterBand(1)
+    values = band.ReadAsArray().astype(np.float64)
+    nodata_value = band.GetNoDataValue()
+    if nodata_value is None:
+        return np.ma.masked_invalid(values)
+
+    return np.ma.masked_values(values, nodata_value)
+
+
 class ScenarioAnalysisTaskTest(unittest.TestCase):
     def setUp(self):
         Processing.initialize()
 
+    def create_pathways_analysis_task(self, task_name, activity_names):
+        """Creates an analysis task for activities that combine the two
+        test pathways.
+
+        :returns: Tuple containing the analysis task, the activities and
+        the extent string of the test pathways.
+        :rtype: tuple
+        """
+        pathway_layer_directory = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "data", "pathways", "layers"
+        )
+
+        first_test_pathway = NcsPathway(
+            uuid=uuid.uuid4(),
+            name="first_test_pathway",
+            description="first_test_description",
+            path=os.path.join(pathway_layer_directory, "test_pathway_1.tif"),
+        )
+        second_test_pathway = NcsPathway(
+            uuid=uuid.uuid4(),
+            name="second_test_pathway",
+            description="second_test_description",
+            path=os.path.join(pathway_layer_directory, "test_pathway_2.tif"),
+        )
+
+        first_test_layer = QgsRasterLayer(
+            first_test_pathway.path, first_test_pathway.name
+        )
+        test_extent = first_test_layer.extent()
+
+        activities = [
+            Activity(
+                uuid=uuid.uuid4(),
+                name=activity_name,
+                description="test_description",
+                pathways=[first_test_pathway, second_test_pathway],
+            )
+            for activity_name in activity_names
+        ]
+
+        scenario = Scenario(
+            uuid=uuid.uuid4(),
+            name="Scenario",
+            description="Scenario description",
+            activities=activities[:1],
+            extent=test_extent,
+            priority_layer_groups=[],
+        )
+
+        analysis_task = ScenarioAnalysisTask(
+            task_name,
+            f"{task_name}_description",
+            activities[:1],
+            [],
+            test_extent,
+            scenario,
+        )
+
+        extent_string = (
+            f"{test_extent.xMinimum()},{test_extent.xMaximum()},"
+            f"{test_extent.yMinimum()},{test_extent.yMaximum()}"
+            f" [{first_test_layer.crs().authid()}]"
+        )
+
+        base_dir = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "data",
+            "pathways",
+        )
+
+        analysis_task.scenario_directory = os.path.join(
+            f"{base_dir}",
+            f'scenario_{datetime.datetime.now().strftime("%Y_%m_%d_%H_%M_%S")}'
+            f"_{str(uuid.uuid4())[:4]}",
+        )
+
+        settings_manager.set_value(Settings.BASE_DIR, base_dir)
+
+        return analysis_task, activities, extent_string
+
     def test_scenario_pathways_weighting(self):
         """Test the weighting of NCS pathways"""
         pathway_layer_directory = os.path.join(
@@ -248,6 +343,55 @@ class ScenarioAnalysisTaskTest(unittest.TestCase):
         self.assertEqual(stat.minimumValue, 1.0)
         self.assertEqual(stat.maximumValue, 19.0)
 
+    def test_scenario_activities_creation_windowed(self):
+        """Test the windowed cell statistics kernel creates the same
+        activity layer as the processing tool.
+        """
+        (
+            analysis_task,
+            (test_activity, processing_activity),
+            extent_string,
+        ) = self.create_pathways_analysis_task(
+            "test_scenario_activities_creation_windowed",
+            ["test_activity", "processing_test_activity"],
+        )
+
+        analysis_task.settings_overrides[Settings.WINDOWED_KERNELS_ENABLED] = True
+        results = analysis_task.run_activities_analysis(
+            [test_activity],
+            extent_string,
+            temporary_output=True,
+        )
+
+        self.assertTrue(results)
+
+        result_layer = QgsRasterLayer(test_activity.path, test_activity.name)
+        self.assertTrue(result_layer.isValid())
+
+        stat = result_layer.dataProvider().bandStatistics(1)
+
+        self.assertEqual(stat.minimumValue, 1.0)
+        self.assertEqual(stat.maximumValue, 19.0)
+
+        analysis_task.settings_overrides[Settings.WINDOWED_KERNELS_ENABLED] = False
+        processing_results = analysis_task.run_activities_analysis(
+            [processing_activity],
+            extent_string,
+            temporary_output=True,
+        )
+        self.assertTrue(processing_results)
+
+        windowed_values = read_masked_array(test_activity.path)
+        processing_values = read_masked_array(processing_activity.path)
+
+        self.assertEqual(windowed_values.shape, processing_values.shape)
+        np.testing.assert_array_equal(
+            np.ma.getmaskarray(windowed_values), np.ma.getmaskarray(processing_values)
+        )
+        np.testing.assert_allclose(
+            windowed_values.compressed(), processing_values.compressed(), rtol=1e-6
+        )
+
     def test_scenario_activities_masking(self):
         activities_layer_directory = os.path.join(
             os.path.dirname(os.path.abspath(__file__)), "data", "activities", "layers"
@@ -343,5 +487,63 @@ class ScenarioAnalysisTaskTest(unittest.TestCase):
 
         self.assertTrue(result_layer.isValid())
 
+    def test_scenario_fused_analysis(self):
+        """Test the in-memory fused analysis produces the same activity
+        values as the processing tools.
+        """
+        (
+            analysis_task,
+            (test_activity, processing_activity),
+            extent_string,
+        ) = self.create_pathways_analysis_task(
+            "test_scenario_fused_analysis",
+            ["test_activity", "processing_test_activity"],
+        )
+
+        settings_manager.set_value(Settings.PATHWAY_SUITABILITY_INDEX, 0)
+        settings_manager.set_value(Settings.MASK_LAYERS_PATHS, "")
+
+        results = analysis_task.run_fused_analysis(
+            [test_activity],
+            [],
+            analysis_task.analysis_extent,
+        )
+
+        self.assertTrue(results)
+
+        result_layer = QgsRasterLayer(test_activity.path, test_activity.name)
+        self.assertTrue(result_layer.isValid())
+
+        stat = result_layer.dataProvider().bandStatistics(1)
+
+        self.assertEqual(stat.minimumValue, 1.0)
+        self.assertEqual(stat.maximumValue, 19.0)
+
+        scenario_layer = QgsRasterLayer(analysis_task.output["OUTPUT"], "scenario")
+        self.assertTrue(scenario_layer.isValid())
+
+        scenario_stat = scenario_layer.dataProvider().bandStatistics(1)
+        self.assertEqual(scenario_stat.minimumValue, 1.0)
+        self.assertEqual(scenario_stat.maximumValue, 1.0)
+
+        # Create the same activity using the processing tools
+        processing_results = analysis_task.run_activities_analysis(
+            [processing_activity],
+            extent_string,
+            temporary_output=True,
+        )
+        self.assertTrue(processing_results)
+
+        fused_values = read_masked_array(test_activity.path)
+        processing_values = read_masked_array(processing_activity.path)
+
+        self.assertEqual(fused_values.shape, processing_values.shape)
+        np.testing.assert_array_equal(
+            np.ma.getmaskarray(fused_values), np.ma.getmaskarray(processing_values)
+        )
+        np.testing.assert_allclose(
+            fused_values.compressed(), processing_values.compressed(), rtol=1e-6
+        )
+
     def tearDown(self):
         pass
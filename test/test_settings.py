@@ -9,6 +9,7 @@ from cplus_plugin.gui.settings.report_options import ReportSettingsWidget
 from cplus_plugin.conf import (
     settings_manager,
     Settings,
+    SettingsRepository,
 )
 
 QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
@@ -318,5 +319,87 @@ class ReportSettingsTest(unittest.TestCase):
         self.assertEqual(False, file_exist)
 
 
+class SettingsRepositoryTest(unittest.TestCase):
+    """Tests for the in-memory repository of the settings."""
+
+    def setUp(self):
+        self.group_uuid = "a4f76e6c-9f83-4a9e-a2c0-123456789abc"
+        self.pathway_uuid = "b5f76e6c-9f83-4a9e-a2c0-123456789abc"
+
+    def tearDown(self):
+        settings_manager.delete_priority_group(self.group_uuid)
+        settings_manager.remove_ncs_pathway(self.pathway_uuid)
+
+    def test_write_through(self):
+        """Test saved and removed items are reflected in the repository."""
+        settings_manager.get_priority_groups()
+        settings_manager.save_priority_group(
+            {"uuid": self.group_uuid, "name": "Test group", "value": "5"}
+        )
+        group = settings_manager.find_group_by_name("Test group")
+        self.assertEqual(str(group["uuid"]), self.group_uuid)
+        self.assertEqual(group["value"], "5")
+
+        settings_manager.delete_priority_group(self.group_uuid)
+        self.assertNotIn(
+            self.group_uuid,
+            [group["uuid"] for group in settings_manager.get_priority_groups()],
+        )
+
+    def test_items_are_copied(self):
+        """Test changes to the returned items do not modify the repository."""
+        settings_manager.save_ncs_pathway(
+            {"uuid": self.pathway_uuid, "name": "Test pathway", "carbon_paths": []}
+        )
+        pathway = settings_manager.get_ncs_pathway_dict(self.pathway_uuid)
+        pathway["name"] = "Changed"
+
+        self.assertEqual(
+            settings_manager.get_ncs_pathway_dict(self.pathway_uuid)["name"],
+            "Test pathway",
+        )
+
+    def test_external_change(self):
+        """Test the repository is reloaded when another instance changes the
+        settings revision.
+        """
+        settings_manager.save_priority_group(
+            {"uuid": self.group_uuid, "name": "Test group", "value": "5"}
+        )
+        settings_manager.get_priority_group(self.group_uuid)
+
+        group_key = settings_manager._get_priority_groups_settings_base(self.group_uuid)
+        settings_manager.settings.setValue(f"{group_key}/value", "7")
+        self.assertEqual(
+            settings_manager.get_priority_group(self.group_uuid)["value"], "5"
+        )
+
+        settings_manager.settings.setValue(
+            f"{settings_manager.BASE_GROUP_NAME}/"
+            f"{settings_manager.REPOSITORY_REVISION}",
+            "external revision",
+        )
+        self.assertEqual(
+            settings_manager.get_priority_group(self.group_uuid)["value"], "7"
+        )
+
+    def test_invalidate(self):
+        """Test an invalidated collection is loaded again."""
+        repository = SettingsRepository()
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return {"id": {"name": "item"}}
+
+        repository.collection(SettingsRepository.ACTIVITIES, loader)
+        repository.collection(SettingsRepository.ACTIVITIES, loader)
+        self.assertEqual(len(loads), 1)
+
+        repository.invalidate(SettingsRepository.ACTIVITIES)
+        repository.collection(SettingsRepository.ACTIVITIES, loader)
+        self.assertEqual(len(loads), 2)
+
+
 if __name__ == "__main__":
     unittest.main()
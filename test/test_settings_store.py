@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the SQLite settings store.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+
+from cplus_plugin.conf import settings_manager, Settings, SettingsManager
+from cplus_plugin.lib.settings_store import SettingsStore
+
+from utilities_for_testing import get_qgis_app
+
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestSettingsStore(TestCase):
+    """Tests for the SQLite settings store."""
+
+    def setUp(self):
+        self.store_path = os.path.join(tempfile.mkdtemp(), "settings.sqlite")
+        self.store = SettingsStore(self.store_path)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_find_scenarios(self):
+        """Test scenarios are queried by their attributes and in pages."""
+        self.store.save_scenario(
+            "first", "Scenario", "", None, [], [0, 1, 0, 1], "2024-01-01 10:00:00"
+        )
+        self.store.save_scenario(
+            "second", "Scenario", "", "server", [], None, "2024-02-01 10:00:00"
+        )
+        self.store.save_scenario(
+            "third", "Other", "", None, [], None, "2024-03-01 10:00:00"
+        )
+
+        scenarios = self.store.find_scenarios(name="Scenario")
+        self.assertEqual([row["uuid"] for row in scenarios], ["second", "first"])
+
+        online_scenarios = self.store.find_scenarios(online=True)
+        self.assertEqual([row["uuid"] for row in online_scenarios], ["second"])
+
+        scenarios = self.store.find_scenarios(start_date="2024-01-15 00:00:00")
+        self.assertEqual([row["uuid"] for row in scenarios], ["third", "second"])
+
+        page = self.store.find_scenarios(limit=1, offset=1)
+        self.assertEqual([row["uuid"] for row in page], ["second"])
+
+    def test_scenario_summaries(self):
+        """Test the summaries show whether the scenarios have results."""
+        self.store.save_scenario("first", "First", "", None, [], None)
+        self.store.save_scenario("second", "Second", "", "server", [], None)
+        self.store.save_scenario_result(
+            "first", "2024-01-01 10:00:00", "{}", "output", "directory"
+        )
+
+        summaries = {
+            row["uuid"]: row["has_result"] for row in self.store.scenario_summaries()
+        }
+        self.assertEqual(summaries, {"first": True, "second": False})
+
+    def test_transaction_rollback(self):
+        """Test changes in a failed transaction are discarded."""
+        self.store.save_layer_mapping("layer", "{}")
+
+        with self.assertRaises(ValueError):
+            with self.store.transaction():
+                self.store.delete_layer_mapping("layer")
+                raise ValueError()
+
+        self.assertEqual(self.store.get_layer_mapping("layer"), "{}")
+
+    def test_online_tasks(self):
+        """Test the most recent running online task is returned first."""
+        self.store.save_online_task("first")
+        self.store.save_online_task("second")
+
+        tasks = self.store.online_tasks(status="running", limit=1)
+        self.assertEqual(tasks[0]["scenario_uuid"], "second")
+
+        self.store.delete_online_tasks("running")
+        self.assertEqual(self.store.online_tasks(), [])
+
+
+class TestSettingsStoreMigration(TestCase):
+    """Tests for the migration of the settings to the store."""
+
+    def setUp(self):
+        self.store_path = os.path.join(tempfile.mkdtemp(), "settings.sqlite")
+        settings_manager.set_value(Settings.SETTINGS_STORE_ENABLED, False)
+        settings_manager.save_layer_mapping({"path": "layer.tif"}, "layer")
+
+    def tearDown(self):
+        settings_manager.set_value(Settings.SETTINGS_STORE_ENABLED, False)
+        settings_manager.remove(Settings.SETTINGS_STORE_PATH)
+        settings_manager.remove_layer_mapping("layer")
+        settings_manager.remove_layer_mapping("other")
+        if SettingsManager._settings_store is not None:
+            SettingsManager._settings_store.close()
+            SettingsManager._settings_store = None
+
+    def test_migration(self):
+        """Test the existing settings are available in the store."""
+        settings_manager.set_value(Settings.SETTINGS_STORE_PATH, self.store_path)
+        settings_manager.set_value(Settings.SETTINGS_STORE_ENABLED, True)
+
+        self.assertEqual(
+            settings_manager.get_layer_mapping("layer"), {"path": "layer.tif"}
+        )
+        self.assertTrue(os.path.exists(self.store_path))
+
+        settings_manager.save_layer_mapping({"path": "other.tif"}, "other")
+        settings_manager.set_value(Settings.SETTINGS_STORE_ENABLED, False)
+        self.assertEqual(
+            settings_manager.get_layer_mapping("other"), {"path": "other.tif"}
+        )
+
+    def test_resync_after_disabling(self):
+        """Test changes made while the store was disabled are synchronized."""
+        settings_manager.set_value(Settings.SETTINGS_STORE_PATH, self.store_path)
+        settings_manager.set_value(Settings.SETTINGS_STORE_ENABLED, True)
+        self.assertEqual(
+            settings_manager.get_layer_mapping("layer"), {"path": "layer.tif"}
+        )
+
+        settings_manager.set_value(Settings.SETTINGS_STORE_ENABLED, False)
+        settings_manager.save_layer_mapping({"path": "other.tif"}, "other")
+        settings_manager.remove_layer_mapping("layer")
+
+        settings_manager.set_value(Settings.SETTINGS_STORE_ENABLED, True)
+        self.assertEqual(
+            settings_manager.get_layer_mapping("other"), {"path": "other.tif"}
+        )
+        self.assertEqual(settings_manager.get_layer_mapping("layer"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
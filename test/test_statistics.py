@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the raster statistics cache.
+"""
+
+import os
+import unittest
+from unittest import TestCase
+
+from qgis.core import QgsRasterLayer
+
+from cplus_plugin.lib.statistics import RasterBandStatistics, RasterStatisticsCache
+from cplus_plugin.utils import calculate_raster_area_by_pixel_value
+
+from utilities_for_testing import get_qgis_app
+
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestRasterStatisticsCache(TestCase):
+    """Tests for the raster statistics cache."""
+
+    def setUp(self):
+        layer_directory = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "data", "pathways", "layers"
+        )
+        self.first_layer = QgsRasterLayer(
+            os.path.join(layer_directory, "test_pathway_1.tif"), "first"
+        )
+        self.second_layer = QgsRasterLayer(
+            os.path.join(layer_directory, "test_pathway_2.tif"), "second"
+        )
+
+    def test_statistics_are_cached(self):
+        """Test the statistics are computed once and match the area
+        calculation.
+        """
+        cache = RasterStatisticsCache()
+        statistics = cache.statistics(self.first_layer)
+
+        self.assertIsNotNone(statistics)
+        self.assertIs(cache.statistics(self.first_layer), statistics)
+        self.assertEqual(statistics.minimum, 1.0)
+        self.assertEqual(statistics.maximum, 10.0)
+        self.assertEqual(
+            cache.area_by_pixel_value(self.first_layer),
+            calculate_raster_area_by_pixel_value(self.first_layer),
+        )
+
+    def test_lru_eviction(self):
+        """Test the least recently used statistics are evicted."""
+        cache = RasterStatisticsCache(max_entries=1)
+        first_statistics = cache.statistics(self.first_layer)
+        cache.statistics(self.second_layer)
+
+        self.assertIsNot(cache.statistics(self.first_layer), first_statistics)
+
+    def test_serialization(self):
+        """Test the statistics can be restored from a dictionary."""
+        statistics = RasterBandStatistics(
+            pixel_areas={1: 2.5, 2: 5.0}, pixel_counts={1: 1, 2: 2}, nodata_count=3
+        )
+        restored_statistics = RasterBandStatistics.from_dict(statistics.to_dict())
+
+        self.assertEqual(restored_statistics, statistics)
+        self.assertEqual(restored_statistics.area, 7.5)
+
+    def test_invalid_layer(self):
+        """Test an invalid layer has no statistics."""
+        cache = RasterStatisticsCache()
+        invalid_layer = QgsRasterLayer("invalid_path.tif", "invalid")
+
+        self.assertIsNone(cache.statistics(invalid_layer))
+        self.assertEqual(cache.area(invalid_layer), -1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
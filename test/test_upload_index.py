@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the uploaded layers index.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import TestCase
+
+from cplus_plugin.lib.upload_index import UploadedLayerIndex, content_hash
+
+from utilities_for_testing import get_qgis_app
+
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestUploadedLayerIndex(TestCase):
+    """Tests for the content-addressed index of uploaded layers."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.directory, "upload_index.json")
+        self.layer_path = os.path.join(self.directory, "layer.tif")
+        self.copy_path = os.path.join(self.directory, "layer_copy.tif")
+        with open(self.layer_path, "wb") as layer_file:
+            layer_file.write(b"layer content")
+        shutil.copy(self.layer_path, self.copy_path)
+
+    def test_identical_content_has_same_hash(self):
+        """Test copies of a file map to the same uploaded layer."""
+        index = UploadedLayerIndex(self.index_path)
+        file_hash = index.content_hash(self.layer_path)
+        index.add(file_hash, {"uuid": "layer-uuid", "name": "layer.tif"})
+
+        self.assertEqual(file_hash, content_hash(self.layer_path))
+        self.assertEqual(index.content_hash(self.copy_path), file_hash)
+        self.assertEqual(
+            index.get(index.content_hash(self.copy_path))["uuid"], "layer-uuid"
+        )
+
+    def test_changed_content(self):
+        """Test an edited file is not matched to the previous upload."""
+        index = UploadedLayerIndex(self.index_path)
+        file_hash = index.content_hash(self.layer_path)
+        index.add(file_hash, {"uuid": "layer-uuid"})
+
+        with open(self.layer_path, "wb") as layer_file:
+            layer_file.write(b"edited layer content")
+
+        new_hash = index.content_hash(self.layer_path)
+        self.assertNotEqual(new_hash, file_hash)
+        self.assertIsNone(index.get(new_hash))
+
+    def test_save_merges_entries(self):
+        """Test entries saved by another index instance are preserved."""
+        index = UploadedLayerIndex(self.index_path)
+        other_index = UploadedLayerIndex(self.index_path)
+
+        index.add("first-hash", {"uuid": "first-uuid"})
+        index.save()
+        other_index.add("second-hash", {"uuid": "second-uuid"})
+        other_index.remove("first-hash")
+        other_index.save()
+
+        reloaded_index = UploadedLayerIndex(self.index_path)
+        self.assertIsNone(reloaded_index.get("first-hash"))
+        self.assertEqual(reloaded_index.get("second-hash")["uuid"], "second-uuid")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
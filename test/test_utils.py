@@ -2,9 +2,27 @@
 """Tests for the CPLUS plugin utilities.
 
 """
+import os
+import shutil
+import tempfile
 import unittest
 
-from cplus_plugin.utils import open_documentation
+import numpy as np
+from osgeo import gdal, osr
+
+from qgis.core import QgsRasterLayer
+
+from cplus_plugin.utils import (
+    calculate_raster_area_by_pixel_value,
+    calculate_raster_areas_by_pixel_value,
+    compress_raster,
+    open_documentation,
+)
+
+from utilities_for_testing import get_qgis_app
+
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
 
 
 class CplusPluginUtilTest(unittest.TestCase):
@@ -19,3 +37,113 @@ class CplusPluginUtilTest(unittest.TestCase):
         # at the moment only these checks will pass
         self.assertIsNotNone(result)
         self.assertFalse(result)
+
+
+class RasterAreaTest(unittest.TestCase):
+    def setUp(self):
+        layer_directory = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "data", "pathways", "layers"
+        )
+        self.first_layer = QgsRasterLayer(
+            os.path.join(layer_directory, "test_pathway_1.tif"), "first"
+        )
+        self.directory = tempfile.mkdtemp()
+        self.known_area_layer = QgsRasterLayer(
+            self.create_known_area_raster(), "known_area"
+        )
+
+    def create_known_area_raster(self) -> str:
+        """Creates a 10 by 10 raster with one hectare pixels. The first band
+        has 40 pixels with value 1 and 60 pixels with value 2, the second
+        band has 90 pixels with value 3 and 10 NoData pixels.
+
+        :returns: Path of the raster.
+        :rtype: str
+        """
+        path = os.path.join(self.directory, "known_area.tif")
+        dataset = gdal.GetDriverByName("GTiff").Create(
+            path, 10, 10, 2, gdal.GDT_Float32
+        )
+        dataset.SetGeoTransform([500000.0, 100.0, 0.0, 7300000.0, 0.0, -100.0])
+        spatial_reference = osr.SpatialReference()
+        spatial_reference.ImportFromEPSG(32735)
+        dataset.SetProjection(spatial_reference.ExportToWkt())
+
+        first_values = np.full((10, 10), 2.0, dtype=np.float32)
+        first_values[:4, :] = 1.0
+        second_values = np.full((10, 10), 3.0, dtype=np.float32)
+        second_values[0, :] = -9999.0
+        for band_number, values in enumerate([first_values, second_values], 1):
+            band = dataset.GetRasterBand(band_number)
+            band.SetNoDataValue(-9999.0)
+            band.WriteArray(values)
+        dataset = None
+
+        return path
+
+    def test_area_by_pixel_value(self):
+        # Each pixel value should have a positive area
+        pixel_areas = calculate_raster_area_by_pixel_value(self.first_layer)
+
+        self.assertGreater(len(pixel_areas), 0)
+        for area in pixel_areas.values():
+            self.assertGreater(area, 0)
+
+    def test_areas_for_several_layers(self):
+        # Areas should match the known areas of the pixels, each band is
+        # read in the same pass
+        pixel_areas = calculate_raster_areas_by_pixel_value(
+            [(self.known_area_layer, 1), (self.known_area_layer, 2)]
+        )
+
+        self.assertEqual(len(pixel_areas), 2)
+        self.assertEqual(set(pixel_areas[0].keys()), {1.0, 2.0})
+        self.assertEqual(set(pixel_areas[1].keys()), {3.0})
+
+        # Pixels are 100 m by 100 m on the UTM central meridian, where the
+        # ellipsoidal area of a pixel is within 0.2% of one hectare
+        self.assertAlmostEqual(pixel_areas[0][1.0], 40.0, delta=0.08)
+        self.assertAlmostEqual(pixel_areas[0][2.0], 60.0, delta=0.12)
+        self.assertAlmostEqual(pixel_areas[1][3.0], 90.0, delta=0.18)
+
+    def test_invalid_layer(self):
+        # Invalid layers should return an empty dictionary
+        invalid_layer = QgsRasterLayer("invalid_path.tif", "invalid")
+
+        self.assertEqual(calculate_raster_area_by_pixel_value(invalid_layer), {})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class CompressRasterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.input_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "data",
+            "pathways",
+            "layers",
+            "test_pathway_1.tif",
+        )
+
+    def test_compressed_values_unchanged(self):
+        # The compressed raster should have the same pixel values and nodata
+        output_path = compress_raster(
+            self.input_path,
+            os.path.join(self.directory, "compressed.tif"),
+            nodata_value=-9999.0,
+        )
+        self.assertIsNotNone(output_path)
+
+        input_layer = QgsRasterLayer(self.input_path, "input")
+        output_layer = QgsRasterLayer(output_path, "output")
+        self.assertTrue(output_layer.isValid())
+        self.assertEqual(output_layer.dataProvider().sourceNoDataValue(1), -9999.0)
+        self.assertEqual(
+            calculate_raster_area_by_pixel_value(output_layer),
+            calculate_raster_area_by_pixel_value(input_layer),
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
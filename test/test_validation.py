@@ -17,6 +17,11 @@ from cplus_plugin.lib.validation.configs import (
 )
 from cplus_plugin.lib.validation.feedback import ValidationFeedback
 from cplus_plugin.lib.validation.manager import ValidationManager
+from cplus_plugin.lib.validation.metadata import (
+    DatasetMetadata,
+    DefaultLayerMetadataIndex,
+    extract_datasets_metadata,
+)
 from cplus_plugin.lib.validation.validators import DataValidator, RasterValidator
 from cplus_plugin.models.validation import RuleInfo, RuleType
 
@@ -163,3 +168,86 @@ class TestDataValidation(TestCase):
         )
         resolution_validator.model_components = pathways
         return resolution_validator
+
+    def test_default_layer_metadata_index(self):
+        """Test the default layer metadata is indexed by type and UUID and
+        cannot be modified.
+        """
+        index = DefaultLayerMetadataIndex(
+            {
+                "ncs_pathway": [
+                    {
+                        "layer_uuid": "pathway-uuid",
+                        "metadata": {"is_raster": True, "resolution": [30, 30]},
+                    }
+                ],
+                "ncs_carbon": [{"layer_uuid": "carbon-uuid", "name": "Carbon"}],
+            }
+        )
+
+        metadata = index.metadata("pathway-uuid")
+        self.assertTrue(metadata["is_raster"])
+        self.assertEqual(metadata["resolution"], (30, 30))
+        with self.assertRaises(TypeError):
+            metadata["is_raster"] = False
+
+        self.assertEqual(len(index.metadata("carbon-uuid", "ncs_carbon")), 0)
+        self.assertEqual(len(index.metadata("pathway-uuid", "ncs_carbon")), 0)
+
+    def test_extract_datasets_metadata(self):
+        """Test the metadata of the datasets is extracted in one pass and
+        shared by the rule validators.
+        """
+        ncs_pathways = get_ncs_pathways()
+        datasets = {pathway.path: pathway for pathway in ncs_pathways}
+        records = extract_datasets_metadata(
+            datasets, DefaultLayerMetadataIndex({}), statistics=True
+        )
+
+        self.assertEqual(len(records), len(datasets))
+        for record in records.values():
+            self.assertTrue(record.is_valid)
+            self.assertTrue(record.is_raster)
+            self.assertIsNotNone(record.resolution)
+            self.assertTrue(record.has_statistics)
+
+        feedback = ValidationFeedback()
+        raster_validator = DataValidator.create_rule_validator(
+            RuleType.DATA_TYPE, raster_validation_config, feedback
+        )
+        raster_validator.model_components = ncs_pathways
+        raster_validator.dataset_records = records
+        self.assertIs(
+            raster_validator.get_dataset_metadata(ncs_pathways[0]),
+            records[ncs_pathways[0].path],
+        )
+
+    def test_normalized_validator_exact_statistics(self):
+        """Test estimated value ranges close to the 0 - 1 bounds are
+        computed from all the pixels.
+        """
+        normalized_validator = self._setup_normalized_validator(get_ncs_pathways())
+
+        def record(minimum, maximum, approximate=True):
+            return DatasetMetadata(
+                is_valid=True,
+                is_raster=True,
+                has_statistics=True,
+                minimum=minimum,
+                maximum=maximum,
+                approximate_statistics=approximate,
+            )
+
+        self.assertTrue(normalized_validator.requires_exact_statistics(record(0, 0.5)))
+        self.assertTrue(
+            normalized_validator.requires_exact_statistics(record(0.2, 0.98))
+        )
+        self.assertFalse(
+            normalized_validator.requires_exact_statistics(record(0.2, 0.8))
+        )
+        self.assertFalse(
+            normalized_validator.requires_exact_statistics(record(-5.0, 20.0))
+        )
+        self.assertFalse(
+            normalized_validator.requires_exact_statistics(record(0, 1, False))
+        )
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the persistent cache of validated dataset metadata.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+
+from cplus_plugin.lib.validation.cache import ValidationMetadataCache
+from cplus_plugin.lib.validation.metadata import DatasetMetadata
+
+from utilities_for_testing import get_qgis_app
+
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestValidationMetadataCache(TestCase):
+    """Tests for the persistent cache of validated dataset metadata."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.directory, "validation_cache.json")
+        self.dataset_path = os.path.join(self.directory, "pathway.tif")
+        with open(self.dataset_path, "wb") as dataset_file:
+            dataset_file.write(b"0" * 10)
+
+        self.record = DatasetMetadata(
+            is_valid=True,
+            is_raster=True,
+            name="pathway",
+            crs="EPSG:32735",
+            resolution=(30.0, 30.0, "m"),
+            has_no_data=True,
+            no_data_value=-9999.0,
+        )
+
+    def test_cached_metadata(self):
+        """Test the metadata is restored by another cache instance."""
+        cache = ValidationMetadataCache(self.cache_path)
+        cache.put(self.dataset_path, self.record)
+        cache.save()
+
+        restored_record = ValidationMetadataCache(self.cache_path).get(
+            self.dataset_path
+        )
+        self.assertEqual(restored_record, self.record)
+
+    def test_modified_dataset(self):
+        """Test the metadata of a modified dataset is not used."""
+        cache = ValidationMetadataCache(self.cache_path)
+        cache.put(self.dataset_path, self.record)
+
+        with open(self.dataset_path, "ab") as dataset_file:
+            dataset_file.write(b"1")
+
+        self.assertIsNone(cache.get(self.dataset_path))
+
+    def test_modified_sidecar_file(self):
+        """Test the metadata is not used when a sidecar file of the dataset
+        is created or modified.
+        """
+        cache = ValidationMetadataCache(self.cache_path)
+        cache.put(self.dataset_path, self.record)
+        self.assertIsNotNone(cache.get(self.dataset_path))
+
+        sidecar_path = f"{self.dataset_path}.aux.xml"
+        with open(sidecar_path, "w") as sidecar_file:
+            sidecar_file.write("<PAMDataset></PAMDataset>")
+        self.assertIsNone(cache.get(self.dataset_path))
+
+        cache.put(self.dataset_path, self.record)
+        self.assertIsNotNone(cache.get(self.dataset_path))
+
+        sidecar_stat = os.stat(sidecar_path)
+        os.utime(
+            sidecar_path,
+            ns=(sidecar_stat.st_atime_ns, sidecar_stat.st_mtime_ns + 10**9),
+        )
+        self.assertIsNone(cache.get(self.dataset_path))
+
+    def test_statistics_required(self):
+        """Test the metadata without statistics is not used when the
+        statistics are required.
+        """
+        cache = ValidationMetadataCache(self.cache_path)
+        cache.put(self.dataset_path, self.record)
+
+        self.assertIsNotNone(cache.get(self.dataset_path))
+        self.assertIsNone(cache.get(self.dataset_path, statistics=True))
+
+    def test_invalid_dataset_not_cached(self):
+        """Test the metadata of a dataset that could not be read is not
+        cached.
+        """
+        cache = ValidationMetadataCache(self.cache_path)
+        cache.put(self.dataset_path, DatasetMetadata(is_valid=False))
+
+        self.assertIsNone(cache.get(self.dataset_path))
+
+    def test_deleted_dataset_removed(self):
+        """Test the metadata of a deleted dataset is removed when the cache
+        is saved.
+        """
+        deleted_path = os.path.join(self.directory, "deleted_pathway.tif")
+        with open(deleted_path, "wb") as dataset_file:
+            dataset_file.write(b"0" * 10)
+
+        cache = ValidationMetadataCache(self.cache_path)
+        cache.put(self.dataset_path, self.record)
+        cache.put(deleted_path, self.record)
+        os.remove(deleted_path)
+        cache.save()
+
+        with open(self.cache_path, "r") as cache_file:
+            entries = json.load(cache_file)
+
+        self.assertEqual(
+            list(entries), [os.path.normpath(os.path.abspath(self.dataset_path))]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()